@@ -4,16 +4,25 @@
 # 이 패키지는 다양한 AI 기능을 제공합니다:
 # - LLM Engine: 대화형 언어 모델 (Llama)
 # - RAG Engine: 검색 증강 생성 (문서 검색)
+# - Embedding Service: 공유 임베딩 모델 (동적 마이크로 배칭)
+# - Vector Store: 벡터 저장소 (ChromaDB / 로컬 ANN 인덱스)
 # - Image Engine: AI 이미지 생성 (ComfyUI - SD 3.5 Medium GGUF)
 # =====================================================================
 
 from ai_core.llm_engine import LLMEngine
-from ai_core.rag_engine import RAGEngine
+from ai_core.rag_engine import RAGEngine, get_rag_engine
+from ai_core.embedding_service import EmbeddingService, get_embedding_service
+from ai_core.vector_store import VectorStore, create_vector_store
 from ai_core.image_engine import ImageEngine, get_image_engine, load_image_model
 
 __all__ = [
     'LLMEngine',
     'RAGEngine',
+    'get_rag_engine',
+    'EmbeddingService',
+    'get_embedding_service',
+    'VectorStore',
+    'create_vector_store',
     'ImageEngine',
     'get_image_engine',
     'load_image_model',
@@ -0,0 +1,195 @@
+# =====================================================================
+# ComfyUI Pool - 여러 ComfyUI 엔드포인트 상태 확인 / 선택 / 장애 전환
+# =====================================================================
+# COMFYUI_BASE_URLS에 나열한 ComfyUI 서버(GPU 노드)에 이미지 작업을 분산합니다.
+# 이미지 처리량을 늘릴 때는 ComfyUI 노드를 띄우고 목록에 주소만 추가하면 됩니다.
+#
+#   COMFYUI_BASE_URLS=http://comfyui:8188,http://gpu-node2:8188
+#   (없으면 COMFYUI_HOST/COMFYUI_PORT 1개 - 기존 설정 그대로 동작)
+#
+# - 헬스 체크: /queue(실행 + 대기 작업 수)와 /system_stats(VRAM 여유)를
+#   COMFYUI_HEALTH_INTERVAL마다 갱신 (작업 선택 시점에 오래된 것만)
+# - 선택: 대기 작업 수 + (요청 워크플로우의 모델이 상주하지 않으면 COMFYUI_COLD_PENALTY)가
+#   가장 작은 엔드포인트, 같으면 VRAM 여유(GB 단위)가 큰 곳 → 그래도 같으면 무작위
+#   (Worker 프로세스마다 풀 상태를 따로 보므로 동시에 시작한 Worker가 한 곳에 몰리지 않도록)
+#   ComfyUI API는 로드된 모델을 알려주지 않으므로 마지막으로 실행한 워크플로우를 상주 모델로 추정
+# - 장애: 연결에 실패한 엔드포인트는 COMFYUI_DOWN_RETRY_SEC 동안 제외하고,
+#   진행 중이던 작업은 ImageEngine이 다른 엔드포인트로 다시 요청
+#
+# COMFYUI_OUTPUT_MODE=file은 공유 볼륨이 필요하므로 로컬 엔드포인트 1개일 때만 사용하세요.
+# =====================================================================
+
+import os
+import time
+import random
+import threading
+import requests
+
+COMFYUI_HOST = os.environ.get("COMFYUI_HOST", "comfyui")
+COMFYUI_PORT = os.environ.get("COMFYUI_PORT", "8188")
+COMFYUI_BASE_URLS = [
+    url.strip().rstrip("/")
+    for url in os.environ.get("COMFYUI_BASE_URLS", f"http://{COMFYUI_HOST}:{COMFYUI_PORT}").split(",")
+    if url.strip()
+]
+
+COMFYUI_HEALTH_INTERVAL = float(os.environ.get("COMFYUI_HEALTH_INTERVAL", "5"))    # 초
+COMFYUI_HEALTH_TIMEOUT = float(os.environ.get("COMFYUI_HEALTH_TIMEOUT", "2"))      # 초
+COMFYUI_DOWN_RETRY_SEC = float(os.environ.get("COMFYUI_DOWN_RETRY_SEC", "15"))     # 장애 엔드포인트 제외 시간
+# 모델 콜드 로드 비용을 대기 작업 몇 개로 볼지 (클수록 상주 모델이 있는 엔드포인트를 선호)
+COMFYUI_COLD_PENALTY = float(os.environ.get("COMFYUI_COLD_PENALTY", "1"))
+
+
+class ComfyEndpointDown(ConnectionError):
+    """ComfyUI 엔드포인트 연결 실패 (다른 엔드포인트로 전환 대상)"""
+
+
+class ComfyEndpoint:
+    """
+    ComfyUI 서버 1개의 상태
+
+    Attributes:
+        base_url (str): HTTP 주소 (예: http://comfyui:8188)
+        ws_url (str): WebSocket 주소 (clientId 쿼리 제외)
+        healthy (bool | None): 마지막 헬스 체크 결과 (None: 아직 확인 전)
+        queue_remaining (int): 실행 + 대기 작업 수 (선택 직후 1 증가, 헬스 체크 시 실제 값으로 갱신)
+        vram_free (int): VRAM 여유 (바이트)
+        resident (str | None): 상주 중으로 추정되는 워크플로우 이름
+        listener: 엔드포인트별 WebSocket 리스너 (ImageEngine이 설정, websocket-client 미설치 시 None)
+    """
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip("/")
+        scheme, _, rest = self.base_url.partition("://")
+        self.ws_url = f"{'wss' if scheme == 'https' else 'ws'}://{rest}/ws"
+        self.name = rest
+        self.healthy = None
+        self.checked_at = 0.0
+        self.down_until = 0.0
+        self.queue_remaining = 0
+        self.vram_free = 0
+        self.vram_total = 0
+        self.resident = None
+        self.listener = None
+
+    def describe(self) -> dict:
+        return {
+            "url": self.base_url,
+            "healthy": self.healthy,
+            "queue_remaining": self.queue_remaining,
+            "vram_free_gb": round(self.vram_free / (1024 ** 3), 2),
+            "resident": self.resident,
+        }
+
+
+class ComfyPool:
+    """ComfyUI 엔드포인트 목록 관리 (헬스 체크 / 최소 부하 선택 / 장애 표시)"""
+
+    def __init__(self, base_urls: list = None, http: requests.Session = None):
+        self.endpoints = [ComfyEndpoint(url) for url in (base_urls or COMFYUI_BASE_URLS)]
+        if not self.endpoints:
+            raise ValueError("ComfyUI 엔드포인트가 없습니다 (COMFYUI_BASE_URLS)")
+        self.http = http or requests.Session()
+        self._lock = threading.Lock()
+
+    def check(self, endpoint: ComfyEndpoint) -> bool:
+        """/system_stats(생존 + VRAM) + /queue(부하)로 엔드포인트 상태 갱신"""
+        try:
+            stats = self.http.get(f"{endpoint.base_url}/system_stats", timeout=COMFYUI_HEALTH_TIMEOUT)
+            stats.raise_for_status()
+            stats_data = stats.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            self.mark_down(endpoint, e)
+            return False
+
+        queue_remaining = endpoint.queue_remaining
+        try:
+            queue = self.http.get(f"{endpoint.base_url}/queue", timeout=COMFYUI_HEALTH_TIMEOUT)
+            queue.raise_for_status()
+            queue_data = queue.json()
+            queue_remaining = len(queue_data.get("queue_running", [])) + len(queue_data.get("queue_pending", []))
+        except requests.exceptions.ConnectionError as e:
+            self.mark_down(endpoint, e)
+            return False
+        except (requests.exceptions.RequestException, ValueError):
+            pass   # /queue 응답 이상은 장애로 보지 않고 이전 부하 추정치 유지
+
+        devices = stats_data.get("devices") or stats_data.get("system", {}).get("devices") or [{}]
+        with self._lock:
+            was_down = endpoint.healthy is False
+            endpoint.queue_remaining = queue_remaining
+            endpoint.vram_free = devices[0].get("vram_free", 0)
+            endpoint.vram_total = devices[0].get("vram_total", 0)
+            endpoint.healthy = True
+            endpoint.down_until = 0.0
+            endpoint.checked_at = time.time()
+        if was_down:
+            print(f"✅ [ComfyPool] 엔드포인트 복구: {endpoint.name}")
+        return True
+
+    def mark_down(self, endpoint: ComfyEndpoint, reason=None):
+        """연결 실패 → COMFYUI_DOWN_RETRY_SEC 동안 선택 제외 (재시작 시 모델이 내려가므로 상주 정보도 초기화)"""
+        with self._lock:
+            was_healthy = endpoint.healthy is not False
+            endpoint.healthy = False
+            endpoint.resident = None
+            endpoint.checked_at = time.time()
+            endpoint.down_until = endpoint.checked_at + COMFYUI_DOWN_RETRY_SEC
+        if was_healthy:
+            print(f"⚠️ [ComfyPool] 엔드포인트 장애: {endpoint.name} ({reason}) - {COMFYUI_DOWN_RETRY_SEC:.0f}초간 제외")
+
+    def mark_resident(self, endpoint: ComfyEndpoint, workflow: str):
+        with self._lock:
+            endpoint.resident = workflow
+
+    def clear_resident(self):
+        with self._lock:
+            for endpoint in self.endpoints:
+                endpoint.resident = None
+
+    def refresh(self, force: bool = False):
+        """확인한 지 COMFYUI_HEALTH_INTERVAL이 지난 엔드포인트만 헬스 체크 (장애 엔드포인트는 제외 시간 이후)"""
+        now = time.time()
+        for endpoint in self.endpoints:
+            if force or (now - endpoint.checked_at >= COMFYUI_HEALTH_INTERVAL and now >= endpoint.down_until):
+                self.check(endpoint)
+
+    def healthy_endpoints(self) -> list:
+        return [endpoint for endpoint in self.endpoints if endpoint.healthy]
+
+    def choose(self, workflow: str = None, exclude: list = ()) -> ComfyEndpoint:
+        """
+        작업을 보낼 엔드포인트 선택 (대기 작업 수 + 콜드 로드 비용이 가장 작은 곳)
+
+        Args:
+            workflow: 실행할 워크플로우 이름 (상주 모델 선호 판단용)
+            exclude: 이번 작업에서 이미 실패한 엔드포인트
+
+        Raises:
+            ComfyEndpointDown: 사용 가능한 엔드포인트가 없음
+        """
+        self.refresh()
+        candidates = [ep for ep in self.healthy_endpoints() if ep not in exclude]
+        if not candidates:
+            # 전부 장애로 표시된 경우 제외 시간과 무관하게 한 번 더 확인 (일시적 끊김 대비)
+            for endpoint in self.endpoints:
+                if endpoint not in exclude:
+                    self.check(endpoint)
+            candidates = [ep for ep in self.healthy_endpoints() if ep not in exclude]
+        if not candidates:
+            names = ", ".join(endpoint.name for endpoint in self.endpoints)
+            raise ComfyEndpointDown(f"사용 가능한 ComfyUI 엔드포인트가 없습니다 (connection failed: {names})")
+
+        def cost(ep: ComfyEndpoint) -> tuple:
+            cold = 0 if workflow and ep.resident == workflow else COMFYUI_COLD_PENALTY
+            return ep.queue_remaining + cold, -(ep.vram_free // (1024 ** 3))
+
+        with self._lock:
+            lowest = min(cost(ep) for ep in candidates)
+            best = random.choice([ep for ep in candidates if cost(ep) == lowest])
+            # 다음 헬스 체크 전까지 이 프로세스가 보낸 작업도 부하로 반영
+            best.queue_remaining += 1
+        return best
+
+    def describe(self) -> list:
+        return [endpoint.describe() for endpoint in self.endpoints]
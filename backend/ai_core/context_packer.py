@@ -0,0 +1,176 @@
+# =====================================================================
+# Context Packer - RAG 참고 자료를 토큰 예산 안에 압축 배치
+# =====================================================================
+# 검색 결과 청크를 그대로 이어 붙이면 다음 낭비가 생깁니다.
+#   - 같은 페이지의 인접 청크: chunk_overlap(50자) 구간이 두 번 들어감
+#   - 거의 같은 내용의 청크(중복 업로드, 반복 문단): 같은 내용이 두 번 들어감
+# 프리필 토큰이 줄어들수록 첫 토큰까지의 시간(TTFT)이 짧아집니다.
+#
+# 처리 순서:
+#   1. 같은 (source, page)의 청크를 start_index 순으로 정렬 후 인접/겹치는 청크 병합
+#      (start_index가 없는 이전 데이터는 접미사/접두사 텍스트 겹침으로 판단)
+#   2. 문자 n-gram(shingle) Jaccard 유사도로 근중복 제거 (점수가 좋은 쪽 유지)
+#   3. 점수(낮을수록 관련성 높음) 순으로 토큰 예산(RAG_CONTEXT_TOKEN_BUDGET) 안에 배치
+# =====================================================================
+
+import os
+
+RAG_CONTEXT_TOKEN_BUDGET = int(os.getenv("RAG_CONTEXT_TOKEN_BUDGET", "1500"))
+RAG_CONTEXT_DEDUPE_JACCARD = float(os.getenv("RAG_CONTEXT_DEDUPE_JACCARD", "0.8"))
+
+_SHINGLE_SIZE = 5          # 근중복 판단용 문자 n-gram 길이
+_MIN_TEXT_OVERLAP = 10     # start_index 없이 텍스트로 겹침을 인정할 최소 길이
+_MAX_TEXT_OVERLAP = 100    # 텍스트 겹침 탐색 최대 길이 (chunk_overlap 50자 + 공백 여유)
+_MIN_TRUNCATE_TOKENS = 64  # 예산이 이보다 적게 남으면 잘라 넣지 않음
+_SEPARATOR = "\n\n"
+
+
+def estimate_tokens(text: str) -> int:
+    """토크나이저가 없을 때의 보수적 토큰 수 추정 (한국어 위주, 약 1.5자/토큰)"""
+    return int(len(text) / 1.5) + 1
+
+
+def _text_overlap(left: str, right: str) -> int:
+    """left의 접미사와 right의 접두사가 일치하는 최대 길이"""
+    limit = min(len(left), len(right), _MAX_TEXT_OVERLAP)
+    for size in range(limit, _MIN_TEXT_OVERLAP - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+def _merge_adjacent(results: list) -> list:
+    """같은 (source, page)의 인접·겹치는 청크를 하나의 구간으로 병합"""
+    groups = {}
+    for order, res in enumerate(results):
+        key = (res.get("source"), res.get("page"))
+        groups.setdefault(key, []).append((order, res))
+
+    segments = []
+    for (source, page), items in groups.items():
+        # start_index가 있으면 본문 위치 순, 없으면 검색 순서 유지
+        items.sort(key=lambda item: (item[1].get("start_index") is None, item[1].get("start_index") or 0, item[0]))
+        current = None
+        for order, res in items:
+            text = res["content"]
+            start = res.get("start_index")
+            if current is not None:
+                overlap = None
+                if start is not None and current["end"] is not None and start <= current["end"]:
+                    overlap = current["end"] - start
+                elif start is None or current["end"] is None:
+                    overlap = _text_overlap(current["content"], text) or None
+                if overlap is not None:
+                    if overlap < len(text):
+                        current["content"] += text[overlap:]
+                    if start is not None:
+                        current["end"] = max(current["end"], start + len(text))
+                    current["score"] = min(current["score"], res["score"])
+                    current["order"] = min(current["order"], order)
+                    current["merged"] += 1
+                    continue
+                segments.append(current)
+            current = {
+                "content": text,
+                "source": source,
+                "page": page,
+                "score": res["score"],
+                "order": order,
+                "end": start + len(text) if start is not None else None,
+                "merged": 1,
+            }
+        if current is not None:
+            segments.append(current)
+    return segments
+
+
+def _shingles(text: str) -> set:
+    compact = " ".join(text.split())
+    if len(compact) <= _SHINGLE_SIZE:
+        return {compact}
+    return {compact[i:i + _SHINGLE_SIZE] for i in range(len(compact) - _SHINGLE_SIZE + 1)}
+
+
+def _dedupe(segments: list, threshold: float) -> list:
+    """근중복 구간 제거 (점수가 좋은 구간부터 남기고, 이미 남긴 구간과 비슷하면 버림)"""
+    kept = []
+    kept_shingles = []
+    for seg in sorted(segments, key=lambda s: (s["score"], s["order"])):
+        shingles = _shingles(seg["content"])
+        duplicate = False
+        for other in kept_shingles:
+            inter = len(shingles & other)
+            # Jaccard 또는 포함도(작은 쪽이 큰 쪽에 거의 포함)로 판단
+            if inter / len(shingles | other) >= threshold or inter / min(len(shingles), len(other)) >= threshold:
+                duplicate = True
+                break
+        if not duplicate:
+            kept.append(seg)
+            kept_shingles.append(shingles)
+    return kept
+
+
+def _truncate_to_tokens(text: str, max_tokens: int, count_tokens) -> str:
+    """토큰 수가 max_tokens 이하가 되는 가장 긴 접두사 (이진 탐색)"""
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if count_tokens(text[:mid]) <= max_tokens:
+            low = mid
+        else:
+            high = mid - 1
+    return text[:low]
+
+
+def pack_context(results: list, count_tokens=None, budget: int = None,
+                 dedupe_threshold: float = None) -> dict:
+    """
+    검색 결과를 병합·중복 제거한 뒤 점수 순으로 토큰 예산 안에 배치
+
+    Args:
+        results: RAGEngine.search 결과 (content, source, page, score, start_index)
+        count_tokens: 텍스트 → 토큰 수 함수 (LLM 토크나이저, 없으면 추정치 사용)
+        budget: 참고 자료 최대 토큰 수 (기본 RAG_CONTEXT_TOKEN_BUDGET)
+        dedupe_threshold: 근중복 판단 Jaccard 임계값 (기본 RAG_CONTEXT_DEDUPE_JACCARD)
+
+    Returns:
+        dict:
+            - text (str): 프롬프트에 넣을 참고 자료
+            - tokens (int): 참고 자료 토큰 수
+            - naive_tokens (int): 청크를 그대로 이어 붙였을 때의 토큰 수
+            - chunks (int): 입력 청크 수
+            - segments (int): 최종 배치된 구간 수
+    """
+    count_tokens = count_tokens or estimate_tokens
+    budget = RAG_CONTEXT_TOKEN_BUDGET if budget is None else budget
+    threshold = RAG_CONTEXT_DEDUPE_JACCARD if dedupe_threshold is None else dedupe_threshold
+
+    if not results:
+        return {"text": "", "tokens": 0, "naive_tokens": 0, "chunks": 0, "segments": 0}
+
+    naive_tokens = count_tokens("\n".join(res["content"] for res in results))
+    segments = _dedupe(_merge_adjacent(results), threshold)
+    separator_tokens = count_tokens(_SEPARATOR)
+
+    packed = []
+    used = 0
+    for seg in segments:   # _dedupe 결과는 이미 점수 순
+        cost = count_tokens(seg["content"]) + (separator_tokens if packed else 0)
+        if used + cost <= budget:
+            packed.append(seg["content"])
+            used += cost
+            continue
+        remaining = budget - used - (separator_tokens if packed else 0)
+        if remaining >= _MIN_TRUNCATE_TOKENS:
+            # 남은 예산만큼만 잘라 넣고 종료 (이후 구간은 관련성이 더 낮음)
+            packed.append(_truncate_to_tokens(seg["content"], remaining, count_tokens))
+        break
+
+    text = _SEPARATOR.join(packed)
+    return {
+        "text": text,
+        "tokens": count_tokens(text) if text else 0,
+        "naive_tokens": naive_tokens,
+        "chunks": len(results),
+        "segments": len(packed),
+    }
@@ -0,0 +1,296 @@
+# =====================================================================
+# Embedding Service - 공유 임베딩 서비스 (동적 마이크로 배칭)
+# =====================================================================
+# 프로세스당 한 개의 임베딩 모델(jhgan/ko-sbert-nli)만 로드하고,
+# 동시에 들어온 encode 요청을 몇 ms 동안 모아서 한 번의 배치로 실행합니다.
+#
+# - query 레인: 채팅 검색용 짧은 질의 (짧은 대기, 항상 우선 처리)
+# - document 레인: PDF 학습용 대량 청크 (긴 대기, 하위 배치로 잘라서 처리)
+#   → 대량 문서 임베딩 중에도 채팅 질의가 하위 배치 사이에 끼어들 수 있음
+#
+# RAGEngine.search(백엔드)와 ingest_pdf_task(워커)가 모두 이 서비스를 사용하므로
+# 같은 프로세스에서 RAGEngine이 여러 번 생성되어도 모델은 한 번만 로드됩니다.
+# EMBEDDING_SERVICE_URL이 설정되면 원격 서비스(/ai/internal/embed)를 호출하여
+# 단일 호스트 배포에서도 백엔드/워커가 모델 한 개를 공유할 수 있습니다.
+# =====================================================================
+
+import os
+import time
+import threading
+from collections import deque
+
+from langchain_core.embeddings import Embeddings
+
+# =====================================================================
+# 설정
+# =====================================================================
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "jhgan/ko-sbert-nli")
+EMBEDDING_DEVICE = os.getenv("EMBEDDING_DEVICE", "")             # 비어 있으면 호출 측 기본값 사용
+EMBEDDING_SERVICE_URL = os.getenv("EMBEDDING_SERVICE_URL", "")   # 설정 시 원격 서비스 사용
+
+QUERY_MAX_WAIT_MS = float(os.getenv("EMBEDDING_QUERY_MAX_WAIT_MS", "5"))
+QUERY_MAX_BATCH = int(os.getenv("EMBEDDING_QUERY_MAX_BATCH", "64"))
+DOC_MAX_WAIT_MS = float(os.getenv("EMBEDDING_DOC_MAX_WAIT_MS", "20"))
+DOC_MAX_BATCH = int(os.getenv("EMBEDDING_DOC_MAX_BATCH", "128"))
+
+LANE_QUERY = "query"
+LANE_DOCUMENT = "document"
+
+
+class _EncodeRequest:
+    """encode 요청 1건 (큰 요청은 여러 배치에 걸쳐 조금씩 처리됨)"""
+
+    def __init__(self, texts: list):
+        self.texts = texts
+        self.results = [None] * len(texts)
+        self.next_index = 0       # 아직 배치에 담기지 않은 첫 텍스트 위치
+        self.done_count = 0
+        self.error = None
+        self.enqueued_at = time.perf_counter()
+        self.event = threading.Event()
+
+    def remaining(self) -> int:
+        return len(self.texts) - self.next_index
+
+
+class EmbeddingService:
+    """
+    동적 마이크로 배칭 임베딩 서비스
+
+    디스패처 스레드 1개가 모델을 독점 사용하며, 레인별 대기열에서
+    요청을 모아 배치로 encode한 뒤 각 요청자에게 결과를 나누어 돌려줍니다.
+
+    Attributes:
+        device (str): 모델 디바이스 ("cpu" 또는 "cuda")
+        stats (dict): 배치 처리 통계 (배치 수, 텍스트 수, 레인별)
+    """
+
+    def __init__(self, device: str = "cpu"):
+        self.device = device
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._lanes = {LANE_QUERY: deque(), LANE_DOCUMENT: deque()}
+        self._cond = threading.Condition()
+        self._dispatcher = None
+        self.stats = {
+            LANE_QUERY: {"batches": 0, "texts": 0, "requests": 0},
+            LANE_DOCUMENT: {"batches": 0, "texts": 0, "requests": 0},
+        }
+
+    # -----------------------------------------------------------------
+    # 모델
+    # -----------------------------------------------------------------
+    def _get_model(self):
+        """임베딩 모델 지연 로드 (프로세스당 1회)"""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    from langchain_huggingface import HuggingFaceEmbeddings
+                    print(f"📥 [EmbeddingService] 임베딩 모델 로딩 중... ({self.device} 모드)")
+                    self._model = HuggingFaceEmbeddings(
+                        model_name=EMBEDDING_MODEL_NAME,
+                        model_kwargs={'device': self.device},
+                        encode_kwargs={'normalize_embeddings': True}  # L2 정규화 (코사인 유사도)
+                    )
+                    print("✅ [EmbeddingService] 임베딩 모델 로딩 완료")
+        return self._model
+
+    def warmup(self):
+        """모델 로드 + 더미 문장 1회 encode (첫 질의 지연 제거)"""
+        self.encode(["워밍업 문장입니다."], LANE_QUERY)
+
+    # -----------------------------------------------------------------
+    # 요청 처리
+    # -----------------------------------------------------------------
+    def _ensure_dispatcher(self):
+        if self._dispatcher is None or not self._dispatcher.is_alive():
+            self._dispatcher = threading.Thread(
+                target=self._dispatch_loop, name="embedding-dispatcher", daemon=True
+            )
+            self._dispatcher.start()
+
+    def encode(self, texts: list, lane: str = LANE_DOCUMENT) -> list:
+        """
+        텍스트 리스트를 임베딩 (동시 요청과 함께 배치 처리될 때까지 블로킹)
+
+        Args:
+            texts: 임베딩할 텍스트 리스트
+            lane: "query" 또는 "document"
+
+        Returns:
+            list[list[float]]: 입력 순서와 동일한 벡터 리스트
+        """
+        if not texts:
+            return []
+        if lane not in self._lanes:
+            raise ValueError(f"알 수 없는 임베딩 레인: {lane}")
+
+        request = _EncodeRequest(list(texts))
+        with self._cond:
+            self._ensure_dispatcher()
+            self._lanes[lane].append(request)
+            self.stats[lane]["requests"] += 1
+            self._cond.notify()
+
+        request.event.wait()
+        if request.error is not None:
+            raise request.error
+        return request.results
+
+    def embed_query(self, text: str) -> list:
+        return self.encode([text], LANE_QUERY)[0]
+
+    def embed_documents(self, texts: list) -> list:
+        return self.encode(texts, LANE_DOCUMENT)
+
+    def _collect_batch(self, lane: str, max_batch: int) -> list:
+        """레인 앞쪽 요청들에서 최대 max_batch개 텍스트를 잘라 배치 구성 (cond 보유 상태에서 호출)"""
+        batch = []   # [(request, start, end), ...]
+        size = 0
+        pending = self._lanes[lane]
+        for request in list(pending):
+            if size >= max_batch:
+                break
+            take = min(request.remaining(), max_batch - size)
+            start = request.next_index
+            request.next_index += take
+            batch.append((request, start, start + take))
+            size += take
+            if request.remaining() == 0:
+                pending.remove(request)
+        return batch
+
+    def _lane_ready(self, lane: str, max_wait_ms: float, max_batch: int) -> float:
+        """레인 배치 실행까지 남은 대기 시간(초) 반환 (0이면 즉시 실행, None이면 비어 있음)"""
+        pending = self._lanes[lane]
+        if not pending:
+            return None
+        queued = sum(r.remaining() for r in pending)
+        if queued >= max_batch:
+            return 0.0
+        waited = time.perf_counter() - pending[0].enqueued_at
+        return max(0.0, max_wait_ms / 1000.0 - waited)
+
+    def _dispatch_loop(self):
+        """디스패처: query 레인 우선, 대기 시간 또는 배치 크기 도달 시 실행"""
+        while True:
+            with self._cond:
+                while True:
+                    q_wait = self._lane_ready(LANE_QUERY, QUERY_MAX_WAIT_MS, QUERY_MAX_BATCH)
+                    d_wait = self._lane_ready(LANE_DOCUMENT, DOC_MAX_WAIT_MS, DOC_MAX_BATCH)
+                    if q_wait == 0.0:
+                        lane, max_batch = LANE_QUERY, QUERY_MAX_BATCH
+                        break
+                    if d_wait == 0.0 and q_wait is None:
+                        lane, max_batch = LANE_DOCUMENT, DOC_MAX_BATCH
+                        break
+                    waits = [w for w in (q_wait, d_wait) if w is not None]
+                    self._cond.wait(timeout=min(waits) if waits else None)
+                batch = self._collect_batch(lane, max_batch)
+
+            self._run_batch(lane, batch)
+
+    def _run_batch(self, lane: str, batch: list):
+        texts = []
+        for request, start, end in batch:
+            texts.extend(request.texts[start:end])
+
+        try:
+            vectors = self._get_model().embed_documents(texts)
+            error = None
+        except Exception as e:
+            vectors = None
+            error = e
+
+        self.stats[lane]["batches"] += 1
+        self.stats[lane]["texts"] += len(texts)
+
+        offset = 0
+        for request, start, end in batch:
+            count = end - start
+            if error is not None:
+                request.error = error
+            else:
+                request.results[start:end] = vectors[offset:offset + count]
+            offset += count
+            request.done_count += count
+            if request.error is not None or request.done_count == len(request.texts):
+                with self._cond:
+                    # 실패한 요청의 남은 텍스트는 더 이상 처리하지 않음
+                    if request in self._lanes[lane]:
+                        self._lanes[lane].remove(request)
+                request.event.set()
+
+
+class RemoteEmbeddingService:
+    """
+    원격 임베딩 서비스 클라이언트 (EMBEDDING_SERVICE_URL 설정 시)
+
+    백엔드의 /ai/internal/embed API를 호출하며, 배칭은 원격 서비스 측에서 수행됩니다.
+    """
+
+    def __init__(self, base_url: str):
+        import requests
+        self.base_url = base_url.rstrip("/")
+        self._session = requests.Session()
+
+    def encode(self, texts: list, lane: str = LANE_DOCUMENT) -> list:
+        if not texts:
+            return []
+        resp = self._session.post(
+            f"{self.base_url}/ai/internal/embed",
+            json={"texts": texts, "lane": lane},
+            timeout=300
+        )
+        if resp.status_code != 200:
+            raise RuntimeError(f"원격 임베딩 실패: {resp.status_code} - {resp.text}")
+        return resp.json()["embeddings"]
+
+    def embed_query(self, text: str) -> list:
+        return self.encode([text], LANE_QUERY)[0]
+
+    def embed_documents(self, texts: list) -> list:
+        return self.encode(texts, LANE_DOCUMENT)
+
+    def warmup(self):
+        self.encode(["워밍업 문장입니다."], LANE_QUERY)
+
+
+class ServiceEmbeddings(Embeddings):
+    """LangChain Embeddings 어댑터 (Chroma 등 vector store의 embedding_function으로 사용)"""
+
+    def __init__(self, service):
+        self.service = service
+
+    def embed_query(self, text: str) -> list:
+        return self.service.embed_query(text)
+
+    def embed_documents(self, texts: list) -> list:
+        return self.service.embed_documents(texts)
+
+
+# =====================================================================
+# 전역 인스턴스 (싱글톤 패턴)
+# =====================================================================
+_service_instance = None
+_service_lock = threading.Lock()
+
+
+def get_embedding_service(default_device: str = "cpu"):
+    """
+    프로세스 공유 임베딩 서비스 반환
+
+    Args:
+        default_device: EMBEDDING_DEVICE 미설정 시 사용할 디바이스
+            (백엔드: "cpu" - LLM VRAM 확보, 워커: "cuda")
+    """
+    global _service_instance
+    if _service_instance is None:
+        with _service_lock:
+            if _service_instance is None:
+                if EMBEDDING_SERVICE_URL:
+                    print(f"🔗 [EmbeddingService] 원격 임베딩 서비스 사용: {EMBEDDING_SERVICE_URL}")
+                    _service_instance = RemoteEmbeddingService(EMBEDDING_SERVICE_URL)
+                else:
+                    _service_instance = EmbeddingService(EMBEDDING_DEVICE or default_device)
+    return _service_instance
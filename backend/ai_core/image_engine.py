@@ -3,18 +3,29 @@
 # =====================================================================
 # PC2 Worker에서 실행되는 이미지 생성 엔진
 # - ComfyUI 사이드카 컨테이너와 HTTP/WebSocket 통신
+# - COMFYUI_BASE_URLS로 여러 ComfyUI 노드에 분산 (ai_core.comfy_pool, 장애 시 다른 노드로 재요청)
 # - SD 3.5 Medium GGUF 모델 사용 (8GB VRAM 최적화)
 # - 번역은 PC1(Backend)에서 처리 후 영어 프롬프트 전달받음
 # =====================================================================
 
 import os
+import copy
 import json
 import uuid
 import time
+import threading
 import requests
+from collections import OrderedDict
 from pathlib import Path
 from typing import Optional, Callable
 
+from ai_core.workflow_registry import get_workflow_registry
+from ai_core.comfy_pool import ComfyPool, ComfyEndpoint, ComfyEndpointDown
+
+
+class ComfyOutputMissing(RuntimeError):
+    """생성은 끝났지만 출력 이미지를 다 받지 못함 (WebSocket 재연결 중 프레임 유실 등 - 재시도 대상)"""
+
 # WebSocket은 선택적 의존성 (설치 안 되어 있으면 폴링 방식 사용)
 try:
     import websocket
@@ -27,21 +38,248 @@ except ImportError:
 # =====================================================================
 # 설정
 # =====================================================================
-COMFYUI_HOST = os.environ.get("COMFYUI_HOST", "comfyui")
-COMFYUI_PORT = os.environ.get("COMFYUI_PORT", "8188")
-COMFYUI_BASE_URL = f"http://{COMFYUI_HOST}:{COMFYUI_PORT}"
+# ComfyUI 주소는 ai_core.comfy_pool (COMFYUI_BASE_URLS 또는 COMFYUI_HOST/COMFYUI_PORT)
 
-# 워크플로우 템플릿 경로
-WORKFLOW_DIR = Path(__file__).parent / "workflows"
-DEFAULT_WORKFLOW = "sd35_medium_gguf.json"
-
-# 출력 폴더 (ComfyUI와 공유)
+# 출력 폴더 (ComfyUI와 공유, COMFYUI_OUTPUT_MODE=file일 때만 사용)
 OUTPUT_DIR = Path("/ai_models/image/output")
 
+# 샘플링 중 저해상도 미리보기 수신 최소 간격 (초, 0이면 미리보기 콜백 미사용)
+#   ComfyUI를 --preview-method latent2rgb(또는 auto/taesd)로 실행해야 미리보기 프레임이 전송됨
+IMAGE_PREVIEW_INTERVAL = float(os.environ.get("IMAGE_PREVIEW_INTERVAL", "1.0"))
+
+# 단계별 시간 집계용 노드 분류
+SAMPLER_NODE_TYPES = ("KSampler", "KSamplerAdvanced", "SamplerCustom", "SamplerCustomAdvanced")
+VAE_DECODE_NODE_TYPES = ("VAEDecode", "VAEDecodeTiled")
+
+# 생성 이미지 수신 방식
+#   - websocket: SaveImageWebsocket 노드 → WebSocket 바이너리 프레임으로 수신 (기본, 디스크 기록 없음,
+#                ComfyUI 기본 포함 custom_nodes/websocket_image_save.py 필요)
+#   - view:      PreviewImage(임시 폴더) 출력 → /view 엔드포인트로 바이트 수신 (공유 볼륨 불필요)
+#                ※ ComfyUI temp 폴더는 재시작 시에만 비워지고 원격 삭제 API가 없어 작업마다 PNG가 누적됨
+#                  (사용 시 ComfyUI 컨테이너를 주기적으로 재시작하거나 temp 폴더 정리 cron 필요)
+#   - file:      SaveImage → 공유 볼륨 파일 읽기 후 삭제 (이전 방식)
+COMFYUI_OUTPUT_MODE = os.environ.get("COMFYUI_OUTPUT_MODE", "websocket").lower()
+
 # 연결 재시도 설정
 MAX_RETRIES = 30
 RETRY_DELAY = 2  # 초
 
+# HTTP 연결 풀 / WebSocket 리스너 설정
+COMFYUI_HTTP_POOL_SIZE = int(os.environ.get("COMFYUI_HTTP_POOL_SIZE", "8"))
+WS_RECONNECT_MAX_DELAY = float(os.environ.get("COMFYUI_WS_RECONNECT_MAX_SEC", "10"))
+WS_PING_INTERVAL = 20      # 초 (유휴 연결 유지용 ping 주기)
+WS_WAIT_SLICE = 5          # 초 (리스너 끊김 시 /history 확인 주기)
+WS_CONNECT_WAIT = 5        # 초 (첫 작업 요청 전 리스너 연결 시도 대기)
+_WS_IMAGE_HEADER = 8       # 바이너리 프레임 헤더 (이벤트 타입 4바이트 + 이미지 포맷 4바이트)
+_WS_EVENT_PREVIEW_IMAGE = 1                # 바이너리 이벤트 타입: 이미지 (샘플러 미리보기 / SaveImageWebsocket)
+_WS_IMAGE_FORMATS = {1: "jpeg", 2: "png"}  # 이미지 포맷 코드
+_FINISHED_BUFFER = 256     # 대기자 등록 전에 끝난 작업 결과 보관 개수
+
+
+def _create_http_session() -> requests.Session:
+    """ComfyUI용 keep-alive HTTP 세션 (요청마다 TCP 연결을 새로 열지 않음)"""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=2, pool_maxsize=COMFYUI_HTTP_POOL_SIZE)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class _PromptWaiter:
+    """prompt_id 1건의 완료 대기 상태"""
+
+    def __init__(self, progress_callback: Optional[Callable[[int, int], None]] = None,
+                 capture_nodes: Optional[set] = None,
+                 preview_callback: Optional[Callable[[bytes, str], None]] = None):
+        self.event = threading.Event()
+        self.error = None
+        self.progress_callback = progress_callback
+        self.preview_callback = preview_callback      # 샘플링 미리보기 (이미지 바이트, 포맷)
+        self.capture_nodes = capture_nodes or set()   # 바이너리 이미지 프레임을 수집할 노드 ID
+        self.images = []
+        self.node_times = {}       # 노드 ID → 실행 시간(초)
+        self.cached_nodes = set()  # ComfyUI 캐시로 실행을 건너뛴 노드 ID
+        self.registered_at = time.perf_counter()
+        self.started_at = None     # ComfyUI가 실행을 시작한 시각 (큐 대기 시간 측정)
+        self.last_preview_at = 0.0
+
+
+class _ComfyEventListener:
+    """
+    ComfyUI WebSocket 이벤트 리스너 (프로세스당 연결 1개 유지)
+
+    백그라운드 스레드 하나가 /ws 연결을 유지하며 이벤트를 prompt_id별 대기자에게 분배합니다.
+    연결이 끊기면 지수 백오프로 재연결하고, 끊긴 동안 완료된 작업은 대기자가 /history로 확인합니다.
+    """
+
+    def __init__(self, client_id: str, http: requests.Session, ws_url: str):
+        self.client_id = client_id
+        self.http = http
+        self.ws_url = ws_url
+        self.connected = threading.Event()
+        self.attempted = threading.Event()   # 첫 연결 시도 완료 (성공/실패 무관)
+        self._waiters = {}
+        self._finished = OrderedDict()    # 대기자 등록 전에 끝난 prompt_id → 오류(없으면 None)
+        self._executing = (None, None)    # 현재 실행 중인 (prompt_id, node) - 바이너리 프레임 귀속용
+        self._executing_since = 0.0       # 현재 노드 실행 시작 시각 (노드별 실행 시간 측정)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="comfyui-ws", daemon=True)
+                self._thread.start()
+
+    def register(self, prompt_id: str, progress_callback=None, capture_nodes: set = None,
+                 preview_callback=None) -> _PromptWaiter:
+        waiter = _PromptWaiter(progress_callback, capture_nodes, preview_callback)
+        with self._lock:
+            if prompt_id in self._finished:
+                # /prompt 응답보다 완료 이벤트가 먼저 도착한 경우
+                waiter.error = self._finished.pop(prompt_id)
+                waiter.event.set()
+            else:
+                self._waiters[prompt_id] = waiter
+        return waiter
+
+    def rekey(self, old_id: str, new_id: str, waiter: _PromptWaiter):
+        """미리 정한 prompt_id를 ComfyUI가 무시한 경우(구버전) 실제 ID로 대기자 이동"""
+        with self._lock:
+            self._waiters.pop(old_id, None)
+            if new_id in self._finished:
+                waiter.error = self._finished.pop(new_id)
+                waiter.event.set()
+            else:
+                self._waiters[new_id] = waiter
+
+    def unregister(self, prompt_id: str):
+        with self._lock:
+            self._waiters.pop(prompt_id, None)
+
+    def _finish(self, prompt_id: str, error=None):
+        with self._lock:
+            waiter = self._waiters.pop(prompt_id, None)
+            if waiter is None:
+                self._finished[prompt_id] = error
+                while len(self._finished) > _FINISHED_BUFFER:
+                    self._finished.popitem(last=False)
+                return
+        waiter.error = error
+        waiter.event.set()
+
+    def _run(self):
+        ws_url = f"{self.ws_url}?clientId={self.client_id}"
+        delay = 1.0
+        while True:
+            ws = None
+            try:
+                ws = websocket.create_connection(ws_url, timeout=WS_PING_INTERVAL, enable_multithread=True)
+                self.connected.set()
+                self.attempted.set()
+                delay = 1.0
+                print(f"🔌 [ImageEngine] ComfyUI WebSocket 연결: {self.ws_url} (clientId={self.client_id[:8]})")
+                while True:
+                    try:
+                        message = ws.recv()
+                    except websocket.WebSocketTimeoutException:
+                        ws.ping()
+                        continue
+                    if isinstance(message, bytes):
+                        self._dispatch_binary(message)
+                    elif message:
+                        self._dispatch(json.loads(message))
+            except Exception as e:
+                if self.connected.is_set():
+                    print(f"⚠️ [ImageEngine] ComfyUI WebSocket 끊김, 재연결 시도: {e}")
+            finally:
+                self.connected.clear()
+                self.attempted.set()
+                if ws is not None:
+                    try:
+                        ws.close()
+                    except Exception:
+                        pass
+            time.sleep(delay)
+            delay = min(delay * 2, WS_RECONNECT_MAX_DELAY)
+
+    def _dispatch_binary(self, frame: bytes):
+        """
+        이미지 바이너리 프레임 → 현재 실행 중인 노드의 대기자에게 전달
+
+        출력 노드(SaveImageWebsocket)의 프레임은 결과 이미지로 수집하고,
+        그 외 노드(샘플러)의 프레임은 미리보기로 IMAGE_PREVIEW_INTERVAL마다 preview_callback에 전달합니다.
+        """
+        if len(frame) <= _WS_IMAGE_HEADER or int.from_bytes(frame[:4], "big") != _WS_EVENT_PREVIEW_IMAGE:
+            return
+        preview = None
+        with self._lock:
+            prompt_id, node = self._executing
+            waiter = self._waiters.get(prompt_id)
+            if waiter is None:
+                return
+            if node in waiter.capture_nodes:
+                waiter.images.append(frame[_WS_IMAGE_HEADER:])
+            elif waiter.preview_callback:
+                now = time.perf_counter()
+                if now - waiter.last_preview_at >= IMAGE_PREVIEW_INTERVAL:
+                    waiter.last_preview_at = now
+                    preview = waiter.preview_callback
+        if preview:
+            image_format = _WS_IMAGE_FORMATS.get(int.from_bytes(frame[4:8], "big"), "jpeg")
+            try:
+                preview(frame[_WS_IMAGE_HEADER:], image_format)
+            except Exception:
+                pass
+
+    def _dispatch(self, message: dict):
+        msg_type = message.get("type")
+        data = message.get("data") or {}
+        prompt_id = data.get("prompt_id")
+        if not prompt_id:
+            return
+
+        if msg_type == "execution_start":
+            with self._lock:
+                waiter = self._waiters.get(prompt_id)
+                if waiter and waiter.started_at is None:
+                    waiter.started_at = time.perf_counter()
+        elif msg_type == "executing":
+            # 다음 노드 시작(또는 완료) 시점으로 이전 노드의 실행 시간 계산
+            now = time.perf_counter()
+            with self._lock:
+                prev_prompt, prev_node = self._executing
+                waiter = self._waiters.get(prompt_id)
+                if waiter and waiter.started_at is None:
+                    waiter.started_at = now
+                if waiter and prev_prompt == prompt_id and prev_node is not None:
+                    waiter.node_times[prev_node] = now - self._executing_since
+                self._executing = (prompt_id, data.get("node"))
+                self._executing_since = now
+        elif msg_type == "execution_cached":
+            with self._lock:
+                waiter = self._waiters.get(prompt_id)
+                if waiter:
+                    waiter.cached_nodes.update(data.get("nodes") or [])
+
+        if msg_type == "executing" and data.get("node") is None:
+            # 모든 노드 실행 완료
+            self._finish(prompt_id)
+        elif msg_type == "execution_success":
+            self._finish(prompt_id)
+        elif msg_type in ("execution_error", "execution_interrupted"):
+            self._finish(prompt_id, RuntimeError(f"ComfyUI 실행 오류: {message}"))
+        elif msg_type == "progress":
+            with self._lock:
+                waiter = self._waiters.get(prompt_id)
+            value, max_val = data.get("value", 0), data.get("max", 1)
+            if waiter and waiter.progress_callback:
+                try:
+                    waiter.progress_callback(value, max_val)
+                except Exception:
+                    pass
+            print(f"   📊 진행률: {value}/{max_val}")
+
 
 class ImageEngine:
     """
@@ -49,30 +287,35 @@ class ImageEngine:
 
     ComfyUI 컨테이너와 HTTP/WebSocket으로 통신하여 이미지를 생성합니다.
     GPU 메모리 관리는 ComfyUI가 담당합니다.
+    작업마다 ComfyPool에서 부하가 가장 적은 엔드포인트를 고르고, 실행 중 연결이 끊기면
+    다른 엔드포인트로 다시 요청합니다.
 
     Attributes:
-        workflow_template (dict): ComfyUI 워크플로우 JSON 템플릿
+        workflows (WorkflowRegistry): 검증·컴파일된 워크플로우 템플릿 (요청별 선택)
+        pool (ComfyPool): ComfyUI 엔드포인트 목록 (엔드포인트별 WebSocket 리스너 1개)
         client_id (str): WebSocket 클라이언트 식별자
+        http (requests.Session): keep-alive 연결 풀 (/system_stats, /queue, /prompt, /history, /free)
+        last_timings (dict): 직전 generate의 단계별 시간 (model_load_sec: 로더 노드 실행 시간, 캐시 적중 시 0,
+            queue_wait_sec / clip_encode_sec / sampling_sec / vae_decode_sec / transfer_sec,
+            endpoint: 실행한 ComfyUI 엔드포인트, failovers: 장애 전환 횟수)
     """
 
-    def __init__(self):
-        self.workflow_template = None
+    def __init__(self, base_urls: Optional[list] = None):
+        self.workflows = None
         self.client_id = str(uuid.uuid4())
         self._comfyui_ready = False
+        self._warned_view_temp = False
+        self.http = _create_http_session()
+        self.pool = ComfyPool(base_urls, self.http)
+        for endpoint in self.pool.endpoints:
+            if WEBSOCKET_AVAILABLE:
+                endpoint.listener = _ComfyEventListener(self.client_id, self.http, endpoint.ws_url)
+        self.last_timings = {}
 
-    def _load_workflow_template(self, workflow_name: str = DEFAULT_WORKFLOW) -> dict:
-        """워크플로우 JSON 템플릿 로드"""
-        workflow_path = WORKFLOW_DIR / workflow_name
-        if not workflow_path.exists():
-            raise FileNotFoundError(f"워크플로우 템플릿을 찾을 수 없습니다: {workflow_path}")
-
-        with open(workflow_path, "r", encoding="utf-8") as f:
-            return json.load(f)
-
-    def _get_vram_stats(self) -> dict:
+    def _get_vram_stats(self, endpoint: ComfyEndpoint) -> dict:
         """ComfyUI에서 GPU/VRAM 사용량 조회"""
         try:
-            response = requests.get(f"{COMFYUI_BASE_URL}/system_stats", timeout=5)
+            response = self.http.get(f"{endpoint.base_url}/system_stats", timeout=5)
             if response.status_code == 200:
                 stats = response.json()
                 devices = stats.get("devices", [])
@@ -92,31 +335,30 @@ class ImageEngine:
             print(f"⚠️ [ImageEngine] VRAM 정보 조회 실패: {e}")
         return None
 
-    def _log_vram_usage(self, phase: str):
+    def _log_vram_usage(self, phase: str, endpoint: ComfyEndpoint):
         """VRAM 사용량 로깅"""
-        stats = self._get_vram_stats()
+        stats = self._get_vram_stats(endpoint)
         if stats:
-            print(f"📊 [VRAM] {phase}")
+            print(f"📊 [VRAM] {phase} ({endpoint.name})")
             print(f"   - GPU: {stats['name']}")
             print(f"   - 사용량: {stats['vram_used_gb']}GB / {stats['vram_total_gb']}GB ({stats['vram_percent']}%)")
             print(f"   - 여유: {stats['vram_free_gb']}GB")
 
     def _wait_for_comfyui(self) -> bool:
-        """ComfyUI 서버가 준비될 때까지 대기"""
+        """ComfyUI 서버가 하나 이상 준비될 때까지 대기"""
         if self._comfyui_ready:
             return True
 
-        print(f"🔄 [ImageEngine] ComfyUI 서버 대기 중... ({COMFYUI_BASE_URL})")
+        print(f"🔄 [ImageEngine] ComfyUI 서버 대기 중... ({', '.join(ep.base_url for ep in self.pool.endpoints)})")
 
         for attempt in range(MAX_RETRIES):
-            try:
-                response = requests.get(f"{COMFYUI_BASE_URL}/system_stats", timeout=5)
-                if response.status_code == 200:
-                    print(f"✅ [ImageEngine] ComfyUI 서버 연결 성공!")
-                    self._comfyui_ready = True
-                    return True
-            except requests.exceptions.RequestException:
-                pass
+            self.pool.refresh(force=True)
+            healthy = self.pool.healthy_endpoints()
+            if healthy:
+                print(f"✅ [ImageEngine] ComfyUI 서버 연결 성공! "
+                      f"({len(healthy)}/{len(self.pool.endpoints)}개: {', '.join(ep.name for ep in healthy)})")
+                self._comfyui_ready = True
+                return True
 
             print(f"   - 재시도 {attempt + 1}/{MAX_RETRIES}...")
             time.sleep(RETRY_DELAY)
@@ -137,10 +379,9 @@ class ImageEngine:
         if not self._wait_for_comfyui():
             raise ConnectionError("ComfyUI 서버에 연결할 수 없습니다.")
 
-        # 워크플로우 템플릿 로드
-        if self.workflow_template is None:
-            self.workflow_template = self._load_workflow_template()
-            print(f"✅ [ImageEngine] 워크플로우 템플릿 로드 완료")
+        # 워크플로우 템플릿 로드 (프로세스당 1회 검증·컴파일)
+        if self.workflows is None:
+            self.workflows = get_workflow_registry()
 
     def is_loaded(self) -> bool:
         """모델 로드 상태 확인 (ComfyUI 연결 상태)"""
@@ -155,18 +396,27 @@ class ImageEngine:
         """
         print("🔄 [ImageEngine] ComfyUI 모드 - 메모리는 ComfyUI가 자동 관리합니다.")
 
-        # 선택적: ComfyUI 메모리 해제 요청
-        try:
-            requests.post(f"{COMFYUI_BASE_URL}/free", json={"free_memory": True}, timeout=10)
-            print("✅ [ImageEngine] ComfyUI 메모리 해제 요청 완료")
-        except Exception as e:
-            print(f"⚠️ [ImageEngine] 메모리 해제 요청 실패 (무시): {e}")
+        # 선택적: ComfyUI 메모리 해제 요청 (모든 엔드포인트)
+        for endpoint in self.pool.endpoints:
+            try:
+                self.http.post(f"{endpoint.base_url}/free", json={"free_memory": True}, timeout=10)
+                print(f"✅ [ImageEngine] ComfyUI 메모리 해제 요청 완료 ({endpoint.name})")
+            except Exception as e:
+                print(f"⚠️ [ImageEngine] 메모리 해제 요청 실패 (무시, {endpoint.name}): {e}")
+        self.pool.clear_resident()
 
     def _apply_style_prompt(self, prompt: str, style: str) -> tuple:
-        """스타일에 따른 프롬프트 수식어 추가 및 네거티브 프롬프트 반환
+        """스타일 수식어(positive)와 네거티브 프롬프트 반환
 
         SD 3.5 Medium은 자연어 기반 T5 인코더를 사용하므로,
         태그 나열보다 자연스러운 문장형 프롬프트가 더 효과적입니다.
+
+        스타일 수식어는 사용자 프롬프트에 이어 붙이지 않고 별도 인코딩 노드({{STYLE_PROMPT}})에서
+        인코딩한 뒤 ConditioningConcat으로 합칩니다. 스타일/네거티브 인코딩 노드의 입력이
+        작업마다 같으므로 ComfyUI 노드 출력 캐시가 재사용합니다 (매 작업 사용자 프롬프트만 인코딩).
+
+        Returns:
+            tuple: (prompt, style_positive, negative)
         """
         style_config = {
             # === SD 3.5 비즈니스 특화 프리셋 ===
@@ -198,10 +448,7 @@ class ImageEngine:
         }
 
         config = style_config.get(style, style_config["realistic"])
-        positive = f"{prompt}, {config['positive']}"
-        negative = config["negative"]
-
-        return positive, negative
+        return prompt, config["positive"], config["negative"]
 
     def _parse_size(self, size: str) -> tuple:
         """크기 문자열을 width, height 튜플로 파싱"""
@@ -214,56 +461,17 @@ class ImageEngine:
         except:
             return 1024, 1024  # SD 3.5 기본 해상도
 
-    def _inject_parameters(
-        self,
-        workflow: dict,
-        positive_prompt: str,
-        negative_prompt: str,
-        width: int,
-        height: int,
-        seed: int,
-        steps: int,
-        cfg: float,
-        output_prefix: str
-    ) -> dict:
-        """워크플로우 템플릿에 파라미터 주입"""
-        # 깊은 복사
-        workflow_copy = json.loads(json.dumps(workflow))
-        prompt_data = workflow_copy.get("prompt", workflow_copy)
-
-        # 각 노드의 입력값을 문자열 치환
-        workflow_str = json.dumps(prompt_data)
-
-        # 프롬프트 문자열을 JSON 안전하게 이스케이프 (따옴표, 백슬래시 등 처리)
-        def escape_for_json(s: str) -> str:
-            # json.dumps로 이스케이프 후 앞뒤 따옴표 제거
-            return json.dumps(s)[1:-1]
-
-        replacements = {
-            "{{POSITIVE_PROMPT}}": escape_for_json(positive_prompt),
-            "{{NEGATIVE_PROMPT}}": escape_for_json(negative_prompt),
-            "{{WIDTH}}": str(width),
-            "{{HEIGHT}}": str(height),
-            "{{SEED}}": str(seed),
-            "{{STEPS}}": str(steps),
-            "{{CFG}}": str(cfg),
-            "{{OUTPUT_PREFIX}}": output_prefix
-        }
-
-        for placeholder, value in replacements.items():
-            workflow_str = workflow_str.replace(placeholder, value)
-
-        return json.loads(workflow_str)
-
-    def _queue_prompt(self, prompt: dict) -> str:
-        """ComfyUI에 프롬프트 큐 요청"""
+    def _queue_prompt(self, endpoint: ComfyEndpoint, prompt: dict, prompt_id: Optional[str] = None) -> str:
+        """ComfyUI에 프롬프트 큐 요청 (prompt_id 지정 시 해당 ID로 실행)"""
         payload = {
             "prompt": prompt,
             "client_id": self.client_id
         }
+        if prompt_id:
+            payload["prompt_id"] = prompt_id
 
-        response = requests.post(
-            f"{COMFYUI_BASE_URL}/prompt",
+        response = self.http.post(
+            f"{endpoint.base_url}/prompt",
             json=payload,
             timeout=30
         )
@@ -277,66 +485,63 @@ class ImageEngine:
 
         return prompt_id
 
-    def _wait_for_completion_polling(self, prompt_id: str, timeout: int = 300) -> bool:
+    def _check_history(self, endpoint: ComfyEndpoint, prompt_id: str) -> bool:
+        """/history로 작업 완료 여부 확인 (실패 상태면 예외, 연결 불가면 ComfyEndpointDown)"""
+        try:
+            response = self.http.get(f"{endpoint.base_url}/history/{prompt_id}", timeout=10)
+            if response.status_code == 200:
+                history = response.json()
+                if prompt_id in history:
+                    status = history[prompt_id].get("status", {})
+                    if status.get("completed", False):
+                        return True
+                    if status.get("status_str") == "error":
+                        raise RuntimeError(f"ComfyUI 작업 실패: {history[prompt_id]}")
+        except requests.exceptions.ConnectionError as e:
+            # 서버가 내려감 → 다른 엔드포인트로 다시 요청
+            raise ComfyEndpointDown(f"{endpoint.name} 연결 끊김: {e}") from e
+        except requests.exceptions.RequestException:
+            pass
+        return False
+
+    def _wait_for_completion_polling(self, endpoint: ComfyEndpoint, prompt_id: str, timeout: int = 300) -> bool:
         """폴링 방식으로 작업 완료 대기"""
         start_time = time.time()
 
         while time.time() - start_time < timeout:
-            try:
-                response = requests.get(f"{COMFYUI_BASE_URL}/history/{prompt_id}", timeout=10)
-                if response.status_code == 200:
-                    history = response.json()
-                    if prompt_id in history:
-                        status = history[prompt_id].get("status", {})
-                        if status.get("completed", False):
-                            return True
-                        if status.get("status_str") == "error":
-                            raise RuntimeError(f"ComfyUI 작업 실패: {history[prompt_id]}")
-            except requests.exceptions.RequestException:
-                pass
-
+            if self._check_history(endpoint, prompt_id):
+                return True
             time.sleep(1)
 
         raise TimeoutError(f"이미지 생성 타임아웃 ({timeout}초)")
 
-    def _wait_for_completion_websocket(self, prompt_id: str, timeout: int = 300) -> bool:
-        """WebSocket 방식으로 작업 완료 대기"""
-        ws_url = f"ws://{COMFYUI_HOST}:{COMFYUI_PORT}/ws?clientId={self.client_id}"
+    def _wait_for_completion_websocket(self, endpoint: ComfyEndpoint, waiter: _PromptWaiter, prompt_id: str,
+                                       timeout: int = 300) -> bool:
+        """
+        엔드포인트의 공유 WebSocket 리스너로 작업 완료 대기
 
-        ws = websocket.create_connection(ws_url, timeout=timeout)
+        리스너가 끊겨 있는 동안에는 1초마다 /history로 완료 여부를 확인합니다
+        (끊긴 사이에 완료 이벤트를 놓쳐도 대기가 멈추지 않고, 서버가 내려갔으면 ComfyEndpointDown).
+        """
+        listener = endpoint.listener
+        deadline = time.time() + timeout
         try:
-            start_time = time.time()
-
-            while time.time() - start_time < timeout:
-                result = ws.recv()
-                if result:
-                    message = json.loads(result)
-                    msg_type = message.get("type")
-
-                    if msg_type == "executing":
-                        data = message.get("data", {})
-                        if data.get("prompt_id") == prompt_id:
-                            if data.get("node") is None:
-                                # 모든 노드 실행 완료
-                                return True
-
-                    elif msg_type == "execution_error":
-                        raise RuntimeError(f"ComfyUI 실행 오류: {message}")
-
-                    elif msg_type == "progress":
-                        data = message.get("data", {})
-                        value = data.get("value", 0)
-                        max_val = data.get("max", 1)
-                        print(f"   📊 진행률: {value}/{max_val}")
-
+            while time.time() < deadline:
+                wait_slice = WS_WAIT_SLICE if listener.connected.is_set() else 1
+                if waiter.event.wait(min(wait_slice, max(0.0, deadline - time.time()))):
+                    if waiter.error:
+                        raise waiter.error
+                    return True
+                if not listener.connected.is_set() and self._check_history(endpoint, prompt_id):
+                    return True
         finally:
-            ws.close()
+            listener.unregister(prompt_id)
 
         raise TimeoutError(f"이미지 생성 타임아웃 ({timeout}초)")
 
-    def _get_output_images(self, prompt_id: str) -> list:
-        """생성된 이미지 파일 경로 조회"""
-        response = requests.get(f"{COMFYUI_BASE_URL}/history/{prompt_id}", timeout=10)
+    def _get_output_refs(self, endpoint: ComfyEndpoint, prompt_id: str) -> list:
+        """/history에서 출력 이미지 정보 조회 ([{"filename", "subfolder", "type"}, ...])"""
+        response = self.http.get(f"{endpoint.base_url}/history/{prompt_id}", timeout=10)
         response.raise_for_status()
 
         history = response.json()
@@ -344,45 +549,249 @@ class ImageEngine:
             return []
 
         outputs = history[prompt_id].get("outputs", {})
+        refs = []
+        for node_id, node_output in outputs.items():
+            for img_info in node_output.get("images", []):
+                if img_info.get("filename"):
+                    refs.append(img_info)
+        return refs
+
+    def _get_output_images(self, endpoint: ComfyEndpoint, prompt_id: str) -> list:
+        """생성된 이미지 파일 경로 조회 (공유 볼륨 기준)"""
         images = []
+        for img_info in self._get_output_refs(endpoint, prompt_id):
+            subfolder = img_info.get("subfolder", "")
+            if subfolder:
+                images.append(OUTPUT_DIR / subfolder / img_info["filename"])
+            else:
+                images.append(OUTPUT_DIR / img_info["filename"])
+        return images
 
-        for node_id, node_output in outputs.items():
-            if "images" in node_output:
-                for img_info in node_output["images"]:
-                    filename = img_info.get("filename")
-                    subfolder = img_info.get("subfolder", "")
-                    if filename:
-                        if subfolder:
-                            images.append(OUTPUT_DIR / subfolder / filename)
-                        else:
-                            images.append(OUTPUT_DIR / filename)
+    def _prepare_output_nodes(self, workflow: dict, mode: str) -> set:
+        """
+        출력 방식에 맞게 SaveImage 노드 교체
+
+        Returns:
+            set: 출력 노드 ID (websocket 모드에서 바이너리 프레임 수집 대상)
+        """
+        prompt_data = workflow.get("prompt", workflow)
+        output_nodes = set()
+        for node_id, node in prompt_data.items():
+            if node.get("class_type") != "SaveImage":
+                continue
+            output_nodes.add(node_id)
+            if mode == "view":
+                # temp 폴더에 저장 (ComfyUI 재시작 전까지 누적 - COMFYUI_OUTPUT_MODE 주석 참고)
+                node["class_type"] = "PreviewImage"
+                node["inputs"] = {"images": node["inputs"]["images"]}
+            elif mode == "websocket":
+                node["class_type"] = "SaveImageWebsocket"
+                node["inputs"] = {"images": node["inputs"]["images"]}
+        return output_nodes
+
+    @staticmethod
+    def _summarize_timings(workflow: dict, waiter: Optional[_PromptWaiter], total_sec: float,
+                           transfer_sec: Optional[float] = None) -> dict:
+        """
+        노드별 실행 시간 → 단계별 시간 요약 (폴링 방식은 노드 시간을 알 수 없어 None)
+
+        queue_wait(요청 → 실행 시작) / model_load(로더 노드) / clip_encode(CLIPTextEncode) /
+        sampling(샘플러 노드) / vae_decode(VAEDecode) / transfer(출력 이미지 수신)
+        """
+        timings = {"total_sec": round(total_sec, 3), "model_load_sec": None, "model_resident": None,
+                   "clip_encode_sec": None, "clip_cached": None, "queue_wait_sec": None,
+                   "sampling_sec": None, "vae_decode_sec": None,
+                   "transfer_sec": round(transfer_sec, 3) if transfer_sec is not None else None}
+        if waiter is None:
+            return timings
+        prompt_data = workflow.get("prompt", workflow)
+
+        def node_sum(class_types) -> float:
+            return sum(waiter.node_times.get(nid, 0.0) for nid, node in prompt_data.items()
+                       if node.get("class_type") in class_types)
+
+        if waiter.started_at is not None:
+            timings["queue_wait_sec"] = round(max(0.0, waiter.started_at - waiter.registered_at), 3)
+        timings["sampling_sec"] = round(node_sum(SAMPLER_NODE_TYPES), 3)
+        timings["vae_decode_sec"] = round(node_sum(VAE_DECODE_NODE_TYPES), 3)
+        loaders = [nid for nid, node in prompt_data.items() if "Loader" in node.get("class_type", "")]
+        load_sec = sum(waiter.node_times.get(nid, 0.0) for nid in loaders)
+        timings["model_load_sec"] = round(load_sec, 3)
+        timings["model_resident"] = all(nid in waiter.cached_nodes for nid in loaders)
+        # 텍스트 인코딩 = CLIPTextEncode 노드 실행 시간 합 (캐시된 스타일/네거티브 노드는 실행되지 않음)
+        encoders = [nid for nid, node in prompt_data.items() if node.get("class_type") == "CLIPTextEncode"]
+        timings["clip_encode_sec"] = round(sum(waiter.node_times.get(nid, 0.0) for nid in encoders), 3)
+        timings["clip_cached"] = f"{sum(1 for nid in encoders if nid in waiter.cached_nodes)}/{len(encoders)}"
+        timings["node_times"] = {nid: round(t, 3) for nid, t in waiter.node_times.items()}
+        return timings
+
+    def _fetch_via_view(self, endpoint: ComfyEndpoint, prompt_id: str) -> list:
+        """/view 엔드포인트로 출력 이미지 바이트 수신 (배치 순서 유지)"""
+        refs = self._get_output_refs(endpoint, prompt_id)
+        if not refs:
+            raise RuntimeError("생성된 이미지를 찾을 수 없습니다.")
+        images = []
+        for ref in refs:
+            response = self.http.get(
+                f"{endpoint.base_url}/view",
+                params={"filename": ref["filename"], "subfolder": ref.get("subfolder", ""), "type": ref.get("type", "output")},
+                timeout=30
+            )
+            response.raise_for_status()
+            print(f"   - 출력 수신(/view): {ref['filename']}")
+            images.append(response.content)
+        return images
 
+    def _read_output_files(self, endpoint: ComfyEndpoint, prompt_id: str) -> list:
+        """공유 볼륨의 출력 파일 읽기 후 삭제 (COMFYUI_OUTPUT_MODE=file)"""
+        output_images = self._get_output_images(endpoint, prompt_id)
+        if not output_images:
+            raise RuntimeError("생성된 이미지를 찾을 수 없습니다.")
+
+        images = []
+        for image_path in output_images:
+            print(f"   - 출력 파일: {image_path}")
+
+            # 파일이 생성될 때까지 잠시 대기
+            for _ in range(10):
+                if image_path.exists():
+                    break
+                time.sleep(0.5)
+
+            if not image_path.exists():
+                raise FileNotFoundError(f"이미지 파일을 찾을 수 없습니다: {image_path}")
+
+            with open(image_path, "rb") as f:
+                images.append(f.read())
+
+            # ComfyUI 임시 출력 파일 삭제 (PC1에 HTTP 전송 후 유일한 사본이 됨)
+            try:
+                image_path.unlink()
+                print(f"🗑️ [ImageEngine] ComfyUI 임시 파일 삭제: {image_path.name}")
+            except Exception:
+                pass
         return images
 
+    def _run_on_endpoint(self, endpoint: ComfyEndpoint, workflow: dict, output_mode: str,
+                         batch_size: int, progress_callback=None, preview_callback=None) -> tuple:
+        """
+        엔드포인트 1곳에서 워크플로우 실행 후 출력 이미지 수신
+
+        websocket 출력은 리스너가 연결되어 있을 때만 사용합니다. 첫 연결 전/재연결 대기 중이면
+        이미지 프레임을 받을 곳이 없으므로 이 작업만 /view 출력으로 요청합니다.
+
+        Returns:
+            tuple: (이미지 바이트 목록, 대기자(폴링 방식이면 None), 출력 수신 시간, 실제 출력 방식)
+
+        Raises:
+            ComfyEndpointDown / requests.ConnectionError: 엔드포인트 장애 (호출자가 다른 엔드포인트로 재요청)
+            ComfyOutputMissing: 출력 이미지 수 부족 (호출자가 재시도)
+        """
+        # VRAM 사용량 로깅 (생성 전)
+        self._log_vram_usage("이미지 생성 시작 전", endpoint)
+
+        # 5. ComfyUI에 작업 요청 (WebSocket 리스너는 엔드포인트당 1개를 계속 유지)
+        listener = endpoint.listener
+        if listener:
+            listener.ensure_started()
+            # 연결 전에 큐에 넣으면 이 clientId의 진행률/완료 이벤트가 전달되지 않음 (프로세스 첫 작업)
+            listener.attempted.wait(WS_CONNECT_WAIT)
+        if output_mode == "websocket" and not (listener and listener.connected.is_set()):
+            print(f"⚠️ [ImageEngine] {endpoint.name} WebSocket 미연결 - 이번 작업은 /view로 출력 수신")
+            output_mode = "view"
+        workflow = copy.deepcopy(workflow)
+        output_nodes = self._prepare_output_nodes(workflow, output_mode)
+        # 대기자를 큐 요청 전에 등록 → 빠르게 끝난 작업의 이벤트/이미지 프레임도 놓치지 않음
+        requested_id = str(uuid.uuid4())
+        waiter = None
+        if listener:
+            capture = output_nodes if output_mode == "websocket" else None
+            waiter = listener.register(requested_id, progress_callback, capture,
+                                       preview_callback if IMAGE_PREVIEW_INTERVAL > 0 else None)
+        print(f"📤 [ImageEngine] ComfyUI에 작업 요청 중... ({endpoint.name}, 출력: {output_mode})")
+        try:
+            prompt_id = self._queue_prompt(endpoint, workflow, requested_id)
+        except Exception:
+            if listener:
+                listener.unregister(requested_id)
+            raise
+        if waiter and prompt_id != requested_id:
+            listener.rekey(requested_id, prompt_id, waiter)
+        print(f"   - Prompt ID: {prompt_id}")
+
+        # 6. 작업 완료 대기
+        print(f"⏳ [ImageEngine] 이미지 생성 대기 중...")
+        if waiter:
+            self._wait_for_completion_websocket(endpoint, waiter, prompt_id)
+        else:
+            self._wait_for_completion_polling(endpoint, prompt_id)
+
+        # 7. 출력 이미지 수신
+        transfer_start = time.time()
+        if output_mode == "websocket":
+            images = list(waiter.images)
+            print(f"   - 출력 수신(WebSocket): {len(images)}장")
+        elif output_mode == "view":
+            images = self._fetch_via_view(endpoint, prompt_id)
+        else:
+            images = self._read_output_files(endpoint, prompt_id)
+        if len(images) < batch_size:
+            raise ComfyOutputMissing(f"생성된 이미지 수 부족: {len(images)}/{batch_size} (WebSocket 재연결 중 누락 가능)")
+
+        return images, waiter, time.time() - transfer_start, output_mode
+
     def generate(
         self,
         prompt: str,
         style: str = "realistic",
         size: str = "1024x1024",
-        num_inference_steps: int = 28,
-        guidance_scale: float = 4.5,
+        num_inference_steps: Optional[int] = None,
+        guidance_scale: Optional[float] = None,
         seed: Optional[int] = None,
-        progress_callback: Optional[Callable[[int, int], None]] = None
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        workflow: Optional[str] = None,
+        preview_callback: Optional[Callable[[bytes, str], None]] = None
     ) -> bytes:
+        """프롬프트를 기반으로 이미지 1장 생성 (generate_batch의 batch_size=1)"""
+        return self.generate_batch(
+            prompt, style, size, num_inference_steps, guidance_scale, seed,
+            batch_size=1, progress_callback=progress_callback, workflow=workflow,
+            preview_callback=preview_callback
+        )[0]
+
+    def generate_batch(
+        self,
+        prompt: str,
+        style: str = "realistic",
+        size: str = "1024x1024",
+        num_inference_steps: Optional[int] = None,
+        guidance_scale: Optional[float] = None,
+        seed: Optional[int] = None,
+        batch_size: int = 1,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        workflow: Optional[str] = None,
+        preview_callback: Optional[Callable[[bytes, str], None]] = None
+    ) -> list:
         """
-        프롬프트를 기반으로 이미지 생성
+        프롬프트를 기반으로 이미지 batch_size장을 샘플러 1회로 생성
+
+        같은 시드에서 배치 항목마다 다른 노이즈가 만들어지므로 서로 다른 변형(variation)이 나옵니다.
 
         Args:
             prompt (str): 이미지 생성 프롬프트 (영어, PC1에서 번역됨)
             style (str): 이미지 스타일
             size (str): 이미지 크기 (기본: 1024x1024)
-            num_inference_steps (int): 추론 단계 수 (SD 3.5 권장: 28)
-            guidance_scale (float): CFG 스케일 (SD 3.5 권장: 4.5)
+            num_inference_steps (Optional[int]): 추론 단계 수 (None이면 워크플로우 기본값, SD 3.5 Medium: 28)
+            guidance_scale (Optional[float]): CFG 스케일 (None이면 워크플로우 기본값, SD 3.5 Medium: 4.5)
             seed (Optional[int]): 랜덤 시드
-            progress_callback: 진행률 콜백 (미사용, 호환성 유지)
+            batch_size (int): 한 번에 생성할 이미지 수
+            progress_callback: 진행률 콜백 (step, total) - WebSocket 리스너 사용 시 호출
+            workflow (Optional[str]): 워크플로우 이름 (None이면 IMAGE_DEFAULT_WORKFLOW)
+            preview_callback: 샘플링 미리보기 콜백 (이미지 바이트, "jpeg"|"png") - WebSocket 리스너 사용 시
+                IMAGE_PREVIEW_INTERVAL마다 호출
 
         Returns:
-            bytes: PNG 형식의 이미지 바이트
+            list[bytes]: PNG 형식의 이미지 바이트 (batch_size개, 배치 순서)
         """
         start_time = time.time()
 
@@ -391,89 +800,94 @@ class ImageEngine:
             if not self._wait_for_comfyui():
                 raise ConnectionError("ComfyUI 서버에 연결할 수 없습니다.")
 
-            # 2. 워크플로우 템플릿 로드
-            if self.workflow_template is None:
-                self.workflow_template = self._load_workflow_template()
+            # 2. 워크플로우 선택 (템플릿은 프로세스당 1회 검증·컴파일)
+            if self.workflows is None:
+                self.workflows = get_workflow_registry()
+            compiled = self.workflows.get(workflow)
+            num_inference_steps = compiled.steps if num_inference_steps is None else num_inference_steps
+            guidance_scale = compiled.cfg if guidance_scale is None else guidance_scale
 
             # 3. 파라미터 준비
-            positive_prompt, negative_prompt = self._apply_style_prompt(prompt, style)
+            positive_prompt, style_prompt, negative_prompt = self._apply_style_prompt(prompt, style)
+            if not compiled.has("STYLE_PROMPT"):
+                # 스타일 인코딩 노드가 없는 워크플로우는 프롬프트에 이어 붙임
+                positive_prompt = f"{positive_prompt}, {style_prompt}"
             width, height = self._parse_size(size)
             actual_seed = seed if seed is not None else int(time.time() * 1000) % (2**32)
             output_prefix = f"dot_{uuid.uuid4().hex[:8]}"
 
             print(f"🎨 [ImageEngine] 이미지 생성 시작 (ComfyUI)")
+            print(f"   - 워크플로우: {compiled.name}")
             print(f"   - 프롬프트: {prompt[:50]}...")
             print(f"   - 스타일: {style}")
             print(f"   - 크기: {width}x{height}")
             print(f"   - 스텝: {num_inference_steps}")
             print(f"   - CFG: {guidance_scale}")
             print(f"   - 시드: {actual_seed}")
-
-            # VRAM 사용량 로깅 (생성 전)
-            self._log_vram_usage("이미지 생성 시작 전")
-
-            # 4. 워크플로우에 파라미터 주입
-            workflow = self._inject_parameters(
-                self.workflow_template,
-                positive_prompt,
-                negative_prompt,
-                width,
-                height,
-                actual_seed,
-                num_inference_steps,
-                guidance_scale,
-                output_prefix
-            )
-
-            # 5. ComfyUI에 작업 요청
-            print(f"📤 [ImageEngine] ComfyUI에 작업 요청 중...")
-            prompt_id = self._queue_prompt(workflow)
-            print(f"   - Prompt ID: {prompt_id}")
-
-            # 6. 작업 완료 대기
-            print(f"⏳ [ImageEngine] 이미지 생성 대기 중...")
-            if WEBSOCKET_AVAILABLE:
-                self._wait_for_completion_websocket(prompt_id)
-            else:
-                self._wait_for_completion_polling(prompt_id)
-
-            # 7. 생성된 이미지 파일 조회
-            output_images = self._get_output_images(prompt_id)
-            if not output_images:
-                raise RuntimeError("생성된 이미지를 찾을 수 없습니다.")
-
-            # 8. 첫 번째 이미지 파일 읽기
-            image_path = output_images[0]
-            print(f"   - 출력 파일: {image_path}")
-
-            # 파일이 생성될 때까지 잠시 대기
-            for _ in range(10):
-                if image_path.exists():
+            print(f"   - 배치: {batch_size}장")
+
+            # 4. 워크플로우에 파라미터 주입 (컴파일된 바인딩 위치에 직접 설정)
+            workflow = compiled.instantiate({
+                "POSITIVE_PROMPT": positive_prompt,
+                "STYLE_PROMPT": style_prompt,
+                "NEGATIVE_PROMPT": negative_prompt,
+                "WIDTH": width,
+                "HEIGHT": height,
+                "SEED": actual_seed,
+                "STEPS": num_inference_steps,
+                "CFG": guidance_scale,
+                "OUTPUT_PREFIX": output_prefix,
+            }, batch_size=batch_size)
+
+            # websocket 출력은 리스너가 있어야 가능 (없으면 /view로 대체)
+            output_mode = COMFYUI_OUTPUT_MODE
+            if output_mode == "websocket" and not WEBSOCKET_AVAILABLE:
+                output_mode = "view"
+            if output_mode == "view" and not self._warned_view_temp:
+                self._warned_view_temp = True
+                print("⚠️ [ImageEngine] /view 출력 모드: ComfyUI temp 폴더에 이미지가 재시작 전까지 누적됩니다 "
+                      "(websocket-client 설치 후 COMFYUI_OUTPUT_MODE=websocket 권장)")
+
+            # 5~7. 엔드포인트 선택 → 실행 → 출력 수신 (실행 중 서버가 내려가면 다른 엔드포인트로 재요청)
+            failed = []
+            while True:
+                endpoint = self.pool.choose(compiled.name, exclude=failed)
+                try:
+                    images, waiter, transfer_sec, used_mode = self._run_on_endpoint(
+                        endpoint, workflow, output_mode, batch_size,
+                        progress_callback, preview_callback
+                    )
                     break
-                time.sleep(0.5)
-
-            if not image_path.exists():
-                raise FileNotFoundError(f"이미지 파일을 찾을 수 없습니다: {image_path}")
-
-            with open(image_path, "rb") as f:
-                image_bytes = f.read()
-
-            # ComfyUI 임시 출력 파일 삭제 (PC1에 HTTP 전송 후 유일한 사본이 됨)
-            try:
-                image_path.unlink()
-                print(f"🗑️ [ImageEngine] ComfyUI 임시 파일 삭제: {image_path.name}")
-            except Exception:
-                pass
+                except (ComfyEndpointDown, requests.exceptions.ConnectionError) as e:
+                    self.pool.mark_down(endpoint, e)
+                    failed.append(endpoint)
+                    print(f"🔁 [ImageEngine] {endpoint.name} 장애 - 다른 ComfyUI 엔드포인트로 재요청")
+            self.pool.mark_resident(endpoint, compiled.name)
+
+            # 모델 로드 시간 = 로더 노드 실행 시간 합 (모델이 상주 중이면 캐시되어 0)
+            timings = self._summarize_timings(workflow, waiter, time.time() - start_time, transfer_sec)
+            timings["endpoint"] = endpoint.name
+            timings["failovers"] = len(failed)
+            self.last_timings = timings
+            if timings["model_load_sec"] is not None:
+                state = "상주 모델 재사용" if timings["model_resident"] else "디스크에서 로드"
+                queue_wait = timings["queue_wait_sec"]
+                print(f"   - 큐 대기: {queue_wait:.2f}초" if queue_wait is not None else "   - 큐 대기: 측정 불가")
+                print(f"   - 모델 로드: {timings['model_load_sec']:.2f}초 ({state})")
+                print(f"   - 텍스트 인코딩: {timings['clip_encode_sec']:.2f}초 "
+                      f"(캐시 재사용 {timings['clip_cached']} 노드)")
+                print(f"   - 샘플링: {timings['sampling_sec']:.2f}초 / VAE 디코딩: {timings['vae_decode_sec']:.2f}초")
+            print(f"   - 출력 수신: {transfer_sec:.2f}초 ({used_mode})")
 
             # VRAM 사용량 로깅 (생성 후)
-            self._log_vram_usage("이미지 생성 완료 후")
+            self._log_vram_usage("이미지 생성 완료 후", endpoint)
 
             total_time = time.time() - start_time
-            print(f"✅ [ImageEngine] 이미지 생성 완료!")
-            print(f"   - 파일 크기: {len(image_bytes)} bytes")
-            print(f"   - 총 소요 시간: {total_time:.2f}초")
+            print(f"✅ [ImageEngine] 이미지 생성 완료! ({endpoint.name})")
+            print(f"   - 파일 크기: {', '.join(str(len(b)) for b in images[:batch_size])} bytes")
+            print(f"   - 총 소요 시간: {total_time:.2f}초 (장당 {total_time / batch_size:.2f}초)")
 
-            return image_bytes
+            return images[:batch_size]
 
         except Exception as e:
             # ComfyUI 연결 실패 시 ready 상태 리셋 → 다음 요청에서 재연결 시도
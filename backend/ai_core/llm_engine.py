@@ -151,6 +151,18 @@ class LLMEngine:
                     print(f"⚠️ [LLMEngine] 자동 로드 실패: {e}")
                     print("   다음 요청 시 재시도합니다.")
 
+    def count_tokens(self, text: str) -> int:
+        """
+        모델 토크나이저 기준 토큰 수 (RAG 참고 자료 토큰 예산 계산용)
+
+        모델이 아직 로드되지 않았으면 글자 수 기반 추정치를 반환합니다.
+        토크나이즈는 생성 상태를 건드리지 않으므로 llm_lock 없이 호출합니다.
+        """
+        if not self.model:
+            from ai_core.context_packer import estimate_tokens
+            return estimate_tokens(text)
+        return len(self.model.tokenize(text.encode("utf-8"), add_bos=False))
+
     def chat(self, user_input: str) -> str:
         """
         일반 채팅 모드 (완성된 응답을 한 번에 반환)
@@ -7,24 +7,35 @@ RAG (Retrieval-Augmented Generation) 엔진 모듈
 주요 기능:
     - PDF 문서 로딩 및 텍스트 추출
     - 문서를 작은 청크(chunk)로 분할하여 벡터화
-    - ChromaDB를 이용한 벡터 임베딩 저장
+    - 벡터 저장소(VectorStore)를 이용한 벡터 임베딩 저장
     - 유사도 기반 문서 검색 (Similarity Search)
 
 사용 기술:
     - LangChain: 문서 로딩 및 텍스트 분할
-    - HuggingFace Embeddings: 한국어 특화 임베딩 모델
-    - ChromaDB: 벡터 데이터베이스
+    - HuggingFace Embeddings: 한국어 특화 임베딩 모델 (공유 임베딩 서비스 경유)
+    - ChromaDB (기본) 또는 로컬 ANN 인덱스(hnswlib/FAISS/numpy memmap): 벡터 저장소
+      → RAG_VECTOR_BACKEND 환경변수로 선택 (ai_core/vector_store.py)
 
 작성일: 2025
 작성자: DOT-Project Team
 """
 
 import os
+import time
 import uuid
+import threading
 from langchain_community.document_loaders import PyPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_chroma import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings  # 업데이트된 패키지명
+from ai_core.embedding_service import get_embedding_service, ServiceEmbeddings
+from ai_core.vector_store import create_vector_store
+
+# 2단계 검색 (문서 단위 인덱스 → 후보 문서 내 청크 검색)
+RAG_TWO_STAGE = os.getenv("RAG_TWO_STAGE", "1") == "1"
+RAG_DOC_CANDIDATES = int(os.getenv("RAG_DOC_CANDIDATES", "5"))           # 1단계에서 고를 문서 수
+RAG_TWO_STAGE_MIN_DOCS = int(os.getenv("RAG_TWO_STAGE_MIN_DOCS", "20"))   # 문서 수가 이보다 적으면 전체 검색
+
+# 서버 시작 시 백그라운드 워밍업 여부 (임베딩 모델 로드 + 벡터 인덱스 페이지 캐시)
+RAG_WARMUP = os.getenv("RAG_WARMUP", "1") == "1"
 
 class RAGEngine:
     """
@@ -34,68 +45,98 @@ class RAGEngine:
     CPU 모드로 동작하여 GPU 메모리 부담을 줄이고, 도커 환경에서 안정적으로 작동합니다.
 
     Attributes:
-        embeddings (HuggingFaceEmbeddings): 텍스트를 벡터로 변환하는 임베딩 모델
+        embeddings (ServiceEmbeddings): 텍스트를 벡터로 변환하는 임베딩 어댑터
+            - 프로세스 공유 EmbeddingService 사용 (모델은 프로세스당 1회만 로드)
             - 모델명: 'jhgan/ko-sbert-nli' (한국어 특화)
-            - 디바이스: CPU (VRAM 절약)
-            - 정규화: 활성화 (유사도 계산 정확도 향상)
+            - 디바이스: CPU 기본 (VRAM 절약, EMBEDDING_DEVICE로 변경 가능)
+            - 동시 검색 질의는 query 레인에서 마이크로 배치로 묶여 처리됨
 
-        db_path (str): ChromaDB 데이터 저장 경로
-            - 도커 볼륨 마운트 경로: /app/uploads/chroma_db
-            - 영구 저장됨 (컨테이너 재시작 시에도 유지)
+        doc_store (VectorStore): 문서 단위(제목+요약) 벡터 저장소
+            - 2단계 검색의 1단계: 질의와 가까운 문서 RAG_DOC_CANDIDATES개 선택
+            - id = 문서 파일 경로(source), 청크 저장소와 같은 백엔드의 별도 컬렉션
 
-        vector_store (Chroma): ChromaDB 벡터 저장소 인스턴스
-            - 컬렉션명: 'dot_project_docs'
-            - 문서 임베딩 및 검색 기능 제공
+        vector_store (VectorStore): 벡터 저장소 인스턴스
+            - chroma (기본): /app/uploads/chroma_db, 컬렉션 'dot_project_docs'
+            - local: /app/uploads/vector_index (ANN 그래프 + memmap 벡터 + sqlite 메타데이터)
+              · RAG_VECTOR_QUANT=int8|pq 시 압축 코드로 후보 검색 후 원본 벡터로 재정렬
+            - 영구 저장됨 (컨테이너 재시작 시에도 유지)
 
     Note:
         - GPU가 없는 환경(워커 컨테이너)에서도 안정적으로 동작
         - 임베딩 모델 로딩에 초기 시간이 소요될 수 있음 (약 5-10초)
-        - ChromaDB는 자동으로 디스크에 데이터를 영속화함
+        - 두 백엔드 모두 자동으로 디스크에 데이터를 영속화함
+        - 점수는 백엔드와 관계없이 제곱 L2 거리 (threshold 값 공유)
     """
 
     def __init__(self):
         """
         RAGEngine 초기화
 
-        임베딩 모델을 로드하고 ChromaDB 벡터 저장소에 연결합니다.
+        임베딩 서비스를 연결하고 설정된 벡터 저장소(RAG_VECTOR_BACKEND)를 엽니다.
         모든 처리는 CPU에서 수행되며, 데이터는 영구 저장됩니다.
 
         Raises:
             Exception: 임베딩 모델 로딩 실패 시
-            Exception: ChromaDB 연결 실패 시
+            Exception: 벡터 저장소 연결 실패 시
 
         Examples:
             >>> rag = RAGEngine()
-            📥 [RAGEngine] 임베딩 모델 로딩 중... (CPU 모드)
-            ✅ [RAGEngine] ChromaDB 연결 완료: /ai_models/chroma_db
+            ✅ [RAGEngine] 벡터 저장소 연결 완료: chroma
         """
-        # 1. 임베딩 모델 설정 (중요: VRAM 아끼기 위해 CPU 사용!)
-        # 한국어 성능이 좋은 'jhgan/ko-sbert-nli' 모델 사용
-        # 이 모델은 SentenceBERT 기반으로 문장 간 유사도 측정에 최적화됨
-        print("📥 [RAGEngine] 임베딩 모델 로딩 중... (CPU 모드)")
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name="jhgan/ko-sbert-nli",  # 한국어 자연어 추론(NLI) 학습된 모델
-            model_kwargs={'device': 'cpu'}, 
-            encode_kwargs={'normalize_embeddings': True}  # L2 정규화로 코사인 유사도 계산 최적화
-        )
+        # 1. 임베딩 설정 (중요: VRAM 아끼기 위해 CPU 사용!)
+        # 한국어 성능이 좋은 'jhgan/ko-sbert-nli' 모델을 공유 임베딩 서비스로 사용
+        # RAGEngine이 여러 번 생성되어도 모델은 프로세스당 한 번만 로드됨
+        self.embeddings = ServiceEmbeddings(get_embedding_service(default_device="cpu"))
 
-        # 2. 벡터 DB 연결 (ChromaDB)
-        # 데이터는 도커 볼륨(/app/uploads/chroma_db)에 영구 저장
+        # 2. 벡터 저장소 연결 (기본: ChromaDB, RAG_VECTOR_BACKEND=local 시 로컬 ANN 인덱스)
+        # 데이터는 도커 볼륨(/app/uploads)에 영구 저장
         # 컨테이너가 재시작되어도 데이터가 유지됨
-        self.db_path = "/app/uploads/chroma_db"
-        self.vector_store = Chroma(
-            persist_directory=self.db_path,  # 데이터 저장 경로 (자동 생성)
-            embedding_function=self.embeddings,  # 텍스트 벡터화에 사용할 함수
-            collection_name="dot_project_docs"  # 컬렉션명 (테이블 개념)
-        )
-        print(f"✅ [RAGEngine] ChromaDB 연결 완료: {self.db_path}")
+        self._created_at = time.time()
+        self.vector_store = create_vector_store()
+        self.doc_store = create_vector_store(kind="documents")
+        self._first_query_logged = False
+        self._warmup_thread = None
+        print(f"✅ [RAGEngine] 벡터 저장소 연결 완료: {self.vector_store.name} "
+              f"({time.time() - self._created_at:.2f}초)")
+
+    def warmup(self):
+        """
+        콜드 스타트 워밍업 (재시작 직후 첫 질의 지연 제거)
+
+        1. 임베딩 모델 로드 + 더미 문장 encode
+        2. 벡터 저장소 파일을 페이지 캐시에 올리고 더미 검색 (ANN 그래프/세그먼트 로드)
+        3. 실제 검색 경로 1회 실행
+        """
+        start = time.time()
+        self.embeddings.service.warmup()
+        embed_sec = time.time() - start
+
+        store_stats = self.vector_store.warmup()
+        self.doc_store.warmup()
+        self.search("워밍업 질의", k=1)
+        print(f"🔥 [RAGEngine] 워밍업 완료: 임베딩 {embed_sec:.1f}초, "
+              f"벡터 저장소 {store_stats['seconds']:.1f}초 ({store_stats['bytes'] / (1024 * 1024):.0f} MB), "
+              f"엔진 생성 후 {time.time() - self._created_at:.1f}초")
+
+    def start_background_warmup(self):
+        """워밍업을 백그라운드 스레드로 실행 (LLM 로딩 등 다른 초기화와 병행)"""
+        if self._warmup_thread is None:
+            def _run():
+                try:
+                    self.warmup()
+                except Exception as e:
+                    print(f"⚠️ [RAGEngine] 워밍업 실패 (첫 질의 시 로드됨): {e}")
+
+            self._warmup_thread = threading.Thread(target=_run, name="rag-warmup", daemon=True)
+            self._warmup_thread.start()
+        return self._warmup_thread
 
     def ingest_pdf(self, file_path: str):
         """
         PDF 파일을 읽어서 벡터 데이터베이스에 저장
 
         PDF 문서를 로드하여 텍스트를 추출하고, 작은 청크로 분할한 후
-        벡터화하여 ChromaDB에 저장합니다. 이 과정을 통해 나중에
+        벡터화하여 벡터 저장소에 저장합니다. 이 과정을 통해 나중에
         유사도 검색이 가능해집니다.
 
         Args:
@@ -110,7 +151,7 @@ class RAGEngine:
         Raises:
             Exception: PDF 로딩 실패 (손상된 파일, 암호화된 파일 등)
             Exception: 텍스트 분할 실패
-            Exception: ChromaDB 저장 실패
+            Exception: 벡터 저장소 저장 실패
 
         Process:
             1. 파일 존재 여부 확인
@@ -119,7 +160,7 @@ class RAGEngine:
                 - chunk_size: 500자 (한 청크의 최대 길이)
                 - chunk_overlap: 50자 (앞뒤 청크와 겹치는 부분, 문맥 유지)
             4. 각 청크를 임베딩 모델로 벡터화
-            5. ChromaDB에 저장 (메타데이터 포함)
+            5. 벡터 저장소에 저장 (메타데이터 포함)
 
         Examples:
             >>> rag = RAGEngine()
@@ -150,18 +191,24 @@ class RAGEngine:
         # RecursiveCharacterTextSplitter는 문장, 단락 경계를 고려하여 분할
         text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=500,  # 한 청크의 최대 문자 수
-            chunk_overlap=50  # 이전 청크와 겹치는 문자 수 (문맥 보존)
+            chunk_overlap=50,  # 이전 청크와 겹치는 문자 수 (문맥 보존)
+            add_start_index=True  # 페이지 내 시작 위치 (검색 결과 병합 시 겹침 제거용)
         )
         splits = text_splitter.split_documents(docs)
 
-        # 3. DB에 저장 (벡터 변환은 내부에서 자동 수행)
-        # add_documents()는 각 청크를 self.embeddings로 벡터화한 후
-        # ChromaDB에 저장함 (메타데이터도 함께 저장)
-        self.vector_store.add_documents(documents=splits)
+        # 3. 벡터화 후 저장 (메타데이터도 함께 저장)
+        texts = [s.page_content for s in splits]
+        if texts:
+            self.vector_store.add(
+                ids=[str(uuid.uuid4()) for _ in texts],
+                embeddings=self.embeddings.embed_documents(texts),
+                texts=texts,
+                metadatas=[dict(s.metadata) for s in splits]
+            )
 
         return f"✅ 저장 완료! (총 {len(splits)}개의 조각으로 분할됨)"
 
-    def search(self, query: str, k=3, threshold=1.0):
+    def search(self, query: str, k=3, threshold=1.0, query_vector: list = None):
         """
         질문과 관련된 문서 조각을 유사도 기반으로 검색
 
@@ -181,12 +228,15 @@ class RAGEngine:
                 - threshold보다 점수가 높은 문서는 제외됨
                 - 권장 범위: 0.8 ~ 1.2 (데이터셋에 따라 조정 필요)
 
+            query_vector (list, optional): 미리 계산한 질의 벡터 (답변 캐시 조회에 쓴 벡터 재사용)
+
         Returns:
             list[dict]: 검색된 문서 정보 리스트 (유사도 순으로 정렬)
                 각 딕셔너리는 다음 키를 포함:
                 - content (str): 문서 청크의 텍스트 내용
                 - source (str): 원본 파일 경로
                 - page (int): 페이지 번호 (PDF 기준, 0부터 시작)
+                - start_index (int | None): 페이지 내 청크 시작 위치 (이전 데이터는 None)
                 - score (float): 유사도 점수 (낮을수록 유사함)
 
         Examples:
@@ -206,15 +256,26 @@ class RAGEngine:
 
         Raises:
             Exception: 임베딩 생성 실패 시
-            Exception: ChromaDB 검색 실패 시
+            Exception: 벡터 저장소 검색 실패 시
         """
-        # ChromaDB에서 유사도 검색 수행
-        # similarity_search_with_score()는 (Document, score) 튜플의 리스트 반환
-        # score는 L2 거리 기반 (낮을수록 유사함)
-        docs = self.vector_store.similarity_search_with_score(query, k=k)
+        # 질의 벡터화 (query 레인 → 동시 질의와 마이크로 배치) 후 유사도 검색
+        # score는 제곱 L2 거리 기반 (낮을수록 유사함)
+        started = time.time()
+        if query_vector is None:
+            query_vector = self.embeddings.embed_query(query)
+        hits = self._two_stage_query(query_vector, k, threshold) if RAG_TWO_STAGE else None
+        if hits is None:
+            hits = self.vector_store.query(query_vector, k=k)
+
+        if not self._first_query_logged:
+            # 배포 후 첫 검색 지연 기록 (워밍업 효과 확인용)
+            self._first_query_logged = True
+            print(f"⏱️ [RAGEngine] 첫 검색 {(time.time() - started) * 1000:.0f}ms "
+                  f"(엔진 생성 후 {time.time() - self._created_at:.1f}초)")
 
         results = []
-        for doc, score in docs:
+        for hit in hits:
+            score = hit["score"]
             # ★ 핵심: 점수가 너무 높으면(거리가 멀면) 버린다!
             # (데이터에 따라 이 숫자는 조절 필요, 보통 1.0 ~ 1.2 사이 권장)
             # threshold보다 큰 점수는 관련성이 낮다고 판단하여 제외
@@ -223,17 +284,63 @@ class RAGEngine:
 
             # 결과를 사용하기 쉬운 딕셔너리 형태로 변환
             results.append({
-                "content": doc.page_content,  # 문서 청크의 실제 텍스트
-                "source": doc.metadata.get("source", "unknown"),  # 원본 파일 경로
-                "page": doc.metadata.get("page", 0),  # PDF 페이지 번호
+                "content": hit["content"],  # 문서 청크의 실제 텍스트
+                "source": hit["metadata"].get("source", "unknown"),  # 원본 파일 경로
+                "page": hit["metadata"].get("page", 0),  # PDF 페이지 번호
+                "start_index": hit["metadata"].get("start_index"),  # 페이지 내 시작 위치 (없으면 None)
                 "score": score  # 유사도 점수 (낮을수록 관련성 높음)
             })
 
         return results
 
+    def _two_stage_query(self, query_vector: list, k: int, threshold: float):
+        """
+        2단계 검색: 문서 단위 인덱스로 후보 문서를 고른 뒤 해당 문서의 청크만 검색
+
+        청크 검색 비용이 전체 청크 수가 아닌 후보 문서의 청크 수에 비례합니다.
+
+        Returns:
+            list | None: 검색 결과 (None이면 전체 청크 검색으로 대체)
+                - 문서 인덱스가 작을 때 (RAG_TWO_STAGE_MIN_DOCS 미만)
+                - 후보 문서 안에 threshold를 통과하는 청크가 없을 때
+        """
+        if self.doc_store.count() < RAG_TWO_STAGE_MIN_DOCS:
+            return None
+
+        candidates = self.doc_store.query(query_vector, k=RAG_DOC_CANDIDATES)
+        sources = [c["metadata"].get("source") for c in candidates if c["metadata"].get("source")]
+        if not sources:
+            return None
+
+        hits = self.vector_store.query(query_vector, k=k, where={"source": {"$in": sources}})
+        if not any(hit["score"] <= threshold for hit in hits):
+            return None
+        return hits
+
+    def upsert_document_vector(self, file_path: str, title: str, summary: str, embedding: list = None):
+        """
+        문서 단위 벡터(제목 + 요약) 저장/갱신
+
+        Args:
+            file_path: 문서 파일 경로 (청크 메타데이터 'source'와 동일)
+            title: 문서 제목
+            summary: LLM 문서 요약
+            embedding: 워커에서 미리 계산한 벡터 (없으면 여기서 임베딩)
+        """
+        text = f"{title or ''}\n{summary or ''}".strip()
+        if not text:
+            return
+        if embedding is None:
+            embedding = self.embeddings.embed_documents([text])[0]
+
+        self.doc_store.delete(ids=[file_path])
+        self.doc_store.add(ids=[file_path], embeddings=[embedding], texts=[text],
+                           metadatas=[{"source": file_path, "title": title or ""}])
+        print(f"✅ [RAGEngine] 문서 벡터 저장: {title} ({file_path})")
+
     def delete_by_source(self, file_path: str):
         """
-        특정 파일 경로의 모든 벡터를 ChromaDB에서 삭제
+        특정 파일 경로의 모든 벡터를 벡터 저장소에서 삭제
 
         Args:
             file_path (str): 삭제할 문서의 파일 경로
@@ -246,7 +353,7 @@ class RAGEngine:
 
         Note:
             - 파일 경로는 ingest_pdf() 시 저장된 메타데이터 'source'와 일치해야 함
-            - ChromaDB에서 조건에 맞는 모든 청크를 삭제
+            - 벡터 저장소에서 조건에 맞는 모든 청크를 삭제
 
         Examples:
             >>> rag = RAGEngine()
@@ -254,21 +361,19 @@ class RAGEngine:
             ✅ 삭제 완료! (총 42개의 벡터 삭제됨)
         """
         try:
-            # ChromaDB에서 해당 파일의 모든 문서 조회
+            # 해당 파일의 모든 청크 ID 조회
             # where 조건으로 메타데이터 'source' 필터링
-            results = self.vector_store.get(
-                where={"source": file_path}
-            )
+            ids_to_delete = self.vector_store.get_ids(where={"source": file_path})
+            # 문서 단위 벡터도 함께 삭제 (2단계 검색 후보에서 제외)
+            self.doc_store.delete(ids=self.doc_store.get_ids(where={"source": file_path}))
 
-            if not results or not results.get('ids'):
-                print(f"⚠️ [RAGEngine] 파일 '{file_path}'의 벡터가 ChromaDB에 없음")
+            if not ids_to_delete:
+                print(f"⚠️ [RAGEngine] 파일 '{file_path}'의 벡터가 저장소에 없음")
                 return "⚠️ 해당 파일의 벡터가 없습니다."
 
-            # 조회된 ID 리스트
-            ids_to_delete = results['ids']
             count = len(ids_to_delete)
 
-            # ChromaDB에서 삭제
+            # 벡터 저장소에서 삭제
             self.vector_store.delete(ids=ids_to_delete)
 
             print(f"✅ [RAGEngine] 파일 '{file_path}' 벡터 삭제 완료 (총 {count}개)")
@@ -281,10 +386,10 @@ class RAGEngine:
 
     def store_precomputed_vectors(self, embeddings: list, texts: list, metadatas: list):
         """
-        PC2 Worker에서 사전 계산된 벡터를 ChromaDB에 직접 저장
+        PC2 Worker에서 사전 계산된 벡터를 벡터 저장소에 직접 저장
 
         Worker가 GPU로 임베딩을 생성한 후 HTTP로 전송한 벡터를
-        재계산 없이 ChromaDB에 바로 저장합니다.
+        재계산 없이 벡터 저장소에 바로 저장합니다.
 
         Args:
             embeddings (list): 벡터 임베딩 리스트 (float 리스트의 리스트)
@@ -293,15 +398,17 @@ class RAGEngine:
 
         Returns:
             str: 작업 결과 메시지
+
+        Raises:
+            Exception: 저장 실패 (호출자가 실패 응답 → Worker가 문서 벡터 정리 후 ERROR 처리)
         """
         try:
-            collection = self.vector_store._collection
             ids = [str(uuid.uuid4()) for _ in texts]
 
-            collection.add(
+            self.vector_store.add(
                 ids=ids,
                 embeddings=embeddings,
-                documents=texts,
+                texts=texts,
                 metadatas=metadatas
             )
 
@@ -309,6 +416,27 @@ class RAGEngine:
             return f"✅ 저장 완료! (총 {len(texts)}개의 청크 저장됨)"
 
         except Exception as e:
-            error_msg = f"🔥 사전 계산 벡터 저장 중 에러: {str(e)}"
-            print(error_msg)
-            return error_msg
+            print(f"🔥 사전 계산 벡터 저장 중 에러: {str(e)}")
+            raise
+
+
+# =====================================================================
+# 전역 인스턴스 (싱글톤 패턴)
+# =====================================================================
+_rag_instance = None
+_rag_lock = threading.Lock()
+
+
+def get_rag_engine() -> RAGEngine:
+    """
+    프로세스 공유 RAGEngine 반환
+
+    ai_router(채팅 검색)와 document_router(벡터 저장/삭제)가 같은 인스턴스를 사용하여
+    벡터 저장소를 프로세스당 한 번만 엽니다.
+    """
+    global _rag_instance
+    if _rag_instance is None:
+        with _rag_lock:
+            if _rag_instance is None:
+                _rag_instance = RAGEngine()
+    return _rag_instance
@@ -0,0 +1,184 @@
+# =====================================================================
+# Retrieval Gate - 채팅 턴별 RAG 검색 필요 여부 판단
+# =====================================================================
+# 모든 메시지가 질의 임베딩 + 벡터 검색 비용을 치르지 않도록
+# rag.search 전에 가벼운 판단 단계를 둡니다.
+#
+#   - retrieve: 새 질문 → 평소처럼 검색
+#   - reuse:    "더 자세히", "예를 들어줘" 같은 후속 질문 → 직전 턴의 참고 문서 재사용
+#   - skip:     "고마워", "안녕" 같은 잡담 → 검색 없이 바로 생성
+#
+# 1차는 정규식 휴리스틱, 규칙에 걸리지 않은 메시지는 (선택) 소형 분류기로 판단합니다.
+# 분류기는 RAG_GATE_MODEL_PATH의 joblib 파이프라인(predict_proba + classes_)이며
+# scripts.train_retrieval_gate로 학습합니다. 확신도가 낮으면 항상 retrieve로 둡니다.
+# =====================================================================
+
+import os
+import re
+import threading
+
+RAG_GATE = os.getenv("RAG_GATE", "1") == "1"
+RAG_GATE_MODEL_PATH = os.getenv("RAG_GATE_MODEL_PATH", "")
+RAG_GATE_MIN_CONFIDENCE = float(os.getenv("RAG_GATE_MIN_CONFIDENCE", "0.8"))
+RAG_GATE_FOLLOWUP_MAX_CHARS = int(os.getenv("RAG_GATE_FOLLOWUP_MAX_CHARS", "40"))
+
+DECISION_RETRIEVE = "retrieve"
+DECISION_REUSE = "reuse"
+DECISION_SKIP = "skip"
+
+# 잡담/인사/맞장구 (메시지 전체가 이 패턴일 때만 skip)
+_SMALL_TALK = re.compile(
+    r"^(?:"
+    r"(?:정말\s*|너무\s*|진짜\s*)?(?:감사|고마워|고맙|땡큐|수고)\S*"
+    r"|안녕\S*|반가\S*|하이|헬로|잘\s*가|바이|또\s*봐\S*"
+    r"|네+|넵+|예+|응+|웅+|ㅇㅇ+|ㅇㅋ+|오케이|알겠\S*|알았\S*|좋아\S*|좋네\S*|그렇구나|그렇군요|아하+|오+|와+"
+    r"|ㅋ+|ㅎ+|ㅠ+|ㅜ+"
+    r"|thanks?(?:\s*you)?|thx|ty|ok(?:ay)?|hi|hello|hey|bye|cool|nice|great|got\s*it"
+    r")[\s!.~?^ㅋㅎㅠㅜ]*$",
+    re.IGNORECASE,
+)
+
+# 직전 답변을 이어가는 후속 요청 (짧은 메시지에서만 reuse)
+_FOLLOW_UP = re.compile(
+    r"(?:더\s*(?:자세히|쉽게|길게|짧게|알려|설명)|자세히|구체적으로|쉽게\s*(?:설명|말해)|예를\s*들|예시|"
+    r"요약해|정리해|다시\s*(?:설명|말해|알려)|계속\s*(?:해|말해|설명|알려)|이어서|그\s*다음|방금|"
+    r"위\s*(?:내용|답변)|왜\s*그|어째서|"
+    r"explain\s*more|more\s*detail|elaborate|for\s*example|why\s*is\s*that|continue|go\s*on|summari[sz]e)",
+    re.IGNORECASE,
+)
+
+# "그럼/그건/이거" 같은 지시어·접속어는 새 주제의 첫머리에도 흔하므로
+# 뒤에 내용어 없이 의문사/어미만 붙은 경우("그건 왜?", "그럼 어떻게 해?")에만 후속 질문으로 봄
+_ANAPHORA_ONLY = re.compile(
+    r"^(?:그럼|그러면|그게|그건|그거|이건|이거|계속)[\s,]*"
+    r"(?:(?:왜|어째서|어떻게|뭐|뭔데|무슨\s*(?:뜻|말|의미)|정말|진짜|맞아|그래|해|돼|되|하면|"
+    r"요|야|이야|인가|인데|이에요|예요|은|는|이|가|도)[\s,]*)*[?!.~]*$"
+)
+
+# 새 주제를 묻는 신호 (후속 요청 패턴과 함께 나와도 retrieve 우선)
+_NEW_TOPIC = re.compile(r"(?:규정|정책|문서|파일|절차|매뉴얼|자료에서|찾아|검색)")
+
+
+class RetrievalGate:
+    """
+    채팅 메시지별 검색 여부 판단기
+
+    Attributes:
+        classifier: (선택) joblib 파이프라인. 로드 실패/미설정 시 None
+        avg_retrieval_sec (float): 최근 검색 소요 시간의 지수 이동 평균 (절감 시간 추정용)
+    """
+
+    def __init__(self, model_path: str = RAG_GATE_MODEL_PATH):
+        self.classifier = None
+        self.avg_retrieval_sec = None
+        self._lock = threading.Lock()
+        self.counts = {DECISION_RETRIEVE: 0, DECISION_REUSE: 0, DECISION_SKIP: 0}
+        self.saved_sec = 0.0
+
+        if model_path:
+            try:
+                import joblib
+                self.classifier = joblib.load(model_path)
+                print(f"✅ [RetrievalGate] 분류기 로드: {model_path}")
+            except Exception as e:
+                print(f"⚠️ [RetrievalGate] 분류기 로드 실패 (휴리스틱만 사용): {e}")
+
+    def decide(self, message: str, has_history: bool, last_docs: list = None) -> tuple:
+        """
+        검색 방식 결정
+
+        Args:
+            message: 사용자 메시지
+            has_history: 이전 대화가 있는지 여부
+            last_docs: 직전 턴의 참고 문서 (세션 컨텍스트의 last_docs)
+
+        Returns:
+            tuple: (decision, reason) - decision은 retrieve | reuse | skip
+
+        Examples (python -m doctest ai_core/retrieval_gate.py):
+            >>> gate, docs = RetrievalGate(model_path=""), [{"source": "a.pdf"}]
+            >>> gate.decide("고마워!", True, docs)
+            ('skip', '잡담')
+            >>> gate.decide("더 자세히 알려줘", True, docs)
+            ('reuse', '후속 질문')
+            >>> gate.decide("그건 왜 그래?", True, docs)
+            ('reuse', '후속 질문')
+            >>> gate.decide("그게 무슨 뜻이야?", True, docs)
+            ('reuse', '후속 질문')
+            >>> gate.decide("그럼 어떻게 해?", True, docs)
+            ('reuse', '후속 질문')
+            >>> gate.decide("그럼 연차 신청은?", True, docs)
+            ('retrieve', '새 질문')
+            >>> gate.decide("이거 말고 출장비 정산 기준은?", True, docs)
+            ('retrieve', '새 질문')
+            >>> gate.decide("계속 근무하면 휴가 일수가 늘어나?", True, docs)
+            ('retrieve', '새 질문')
+            >>> gate.decide("더 자세히 알려줘", False, None)
+            ('retrieve', '새 질문')
+        """
+        text = (message or "").strip()
+        if not text:
+            return DECISION_SKIP, "빈 메시지"
+        if _SMALL_TALK.match(text):
+            return DECISION_SKIP, "잡담"
+
+        follow_up = (has_history or last_docs) and len(text) <= RAG_GATE_FOLLOWUP_MAX_CHARS \
+            and (_FOLLOW_UP.search(text) or _ANAPHORA_ONLY.match(text)) and not _NEW_TOPIC.search(text)
+        if follow_up:
+            if last_docs:
+                return DECISION_REUSE, "후속 질문"
+            return DECISION_SKIP, "후속 질문 (직전 참고 문서 없음)"
+
+        if self.classifier is not None:
+            label, confidence = self._classify(text)
+            if label and confidence >= RAG_GATE_MIN_CONFIDENCE:
+                if label == DECISION_REUSE and not last_docs:
+                    return DECISION_RETRIEVE, "분류기 reuse (직전 참고 문서 없음)"
+                if label in (DECISION_REUSE, DECISION_SKIP):
+                    return label, f"분류기 {confidence:.2f}"
+
+        return DECISION_RETRIEVE, "새 질문"
+
+    def _classify(self, text: str) -> tuple:
+        try:
+            proba = self.classifier.predict_proba([text])[0]
+            best = int(proba.argmax())
+            return str(self.classifier.classes_[best]), float(proba[best])
+        except Exception as e:
+            print(f"⚠️ [RetrievalGate] 분류 실패: {e}")
+            return None, 0.0
+
+    def record(self, decision: str, retrieval_sec: float = None) -> float:
+        """
+        판단 결과 기록 → 이번 턴에서 절감한 검색 시간(초, 추정) 반환
+
+        retrieve 턴의 실제 검색 시간으로 평균을 갱신하고,
+        reuse/skip 턴은 그 평균만큼 절감한 것으로 계산합니다.
+        """
+        with self._lock:
+            self.counts[decision] = self.counts.get(decision, 0) + 1
+            if decision == DECISION_RETRIEVE:
+                if retrieval_sec is not None:
+                    prev = self.avg_retrieval_sec
+                    self.avg_retrieval_sec = retrieval_sec if prev is None else 0.8 * prev + 0.2 * retrieval_sec
+                return 0.0
+            saved = self.avg_retrieval_sec or 0.0
+            self.saved_sec += saved
+            return saved
+
+
+# =====================================================================
+# 전역 인스턴스 (싱글톤 패턴)
+# =====================================================================
+_gate_instance = None
+_gate_lock = threading.Lock()
+
+
+def get_retrieval_gate() -> RetrievalGate:
+    """프로세스 공유 RetrievalGate 반환"""
+    global _gate_instance
+    if _gate_instance is None:
+        with _gate_lock:
+            if _gate_instance is None:
+                _gate_instance = RetrievalGate()
+    return _gate_instance
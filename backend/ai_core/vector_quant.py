@@ -0,0 +1,175 @@
+# =====================================================================
+# Vector Quantization - 벡터 양자화 (int8 스칼라 / Product Quantization)
+# =====================================================================
+# local 벡터 저장소(RAG_VECTOR_QUANT)에서 사용하는 압축 코드입니다.
+# 압축 코드만 RAM에 두고 1차 후보를 고른 뒤, 상위 후보만 memmap의
+# 원본 float32 벡터로 정확히 재정렬(re-rank)합니다.
+#
+#   - int8: 차원별 min/max 범위로 8비트 균등 양자화 (4배 압축)
+#   - pq:   차원을 m개 부분공간으로 나누고 부분공간별 256개 중심점 코드 (dim*4/m 배 압축)
+#
+# 두 양자화기 모두 학습 데이터(기존 벡터 샘플)가 필요하며 numpy만 사용합니다.
+# =====================================================================
+
+import numpy as np
+
+_DIST_BLOCK = 16384   # 근사 거리 계산 블록 크기 (행)
+
+
+class Int8Quantizer:
+    """
+    차원별 스칼라 int8 양자화
+
+    x̂ = low + code * scale (code: 0~255)
+    """
+
+    kind = "int8"
+    column_major = False
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.low = None
+        self.scale = None
+
+    @property
+    def trained(self) -> bool:
+        return self.low is not None
+
+    def code_size(self) -> int:
+        return self.dim
+
+    def train(self, sample: np.ndarray):
+        # 극단값 몇 개가 범위를 넓히지 않도록 0.1% / 99.9% 분위수 사용 (범위 밖은 잘림)
+        self.low = np.percentile(sample, 0.1, axis=0).astype(np.float32)
+        high = np.percentile(sample, 99.9, axis=0).astype(np.float32)
+        self.scale = np.maximum(high - self.low, 1e-6) / 255.0
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        codes = np.rint((vectors - self.low) / self.scale)
+        return np.clip(codes, 0, 255).astype(np.uint8)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        return self.low + codes.astype(np.float32) * self.scale
+
+    def distances(self, query: np.ndarray, codes: np.ndarray, norms: np.ndarray) -> np.ndarray:
+        """근사 제곱 L2 거리: ||q||² - 2 q·x̂ + ||x̂||²"""
+        q_scaled = query * self.scale
+        q_low = float(query @ self.low)
+        out = np.empty(len(codes), dtype=np.float32)
+        for begin in range(0, len(codes), _DIST_BLOCK):
+            block = codes[begin:begin + _DIST_BLOCK].astype(np.float32)
+            out[begin:begin + len(block)] = norms[begin:begin + len(block)] - 2.0 * (block @ q_scaled + q_low)
+        return out + float(query @ query)
+
+    def state(self) -> dict:
+        return {"low": self.low, "scale": self.scale}
+
+    def load_state(self, state: dict):
+        self.low = state["low"]
+        self.scale = state["scale"]
+
+
+class ProductQuantizer:
+    """
+    Product Quantization (부분공간별 256 중심점, 비대칭 거리 계산)
+
+    거리 계산 시 코드는 부분공간 우선(m, N) 배치를 사용합니다 (column_major).
+    부분공간별 조회가 연속 메모리에서 일어나 행 우선 배치보다 3~4배 빠릅니다.
+
+    Attributes:
+        m (int): 부분공간 수 (= 벡터당 코드 바이트 수)
+        centroids (np.ndarray): (m, 256, dim/m) 중심점
+    """
+
+    kind = "pq"
+    column_major = True
+
+    def __init__(self, dim: int, m: int = 96, iterations: int = 15, seed: int = 0):
+        # dim을 나누어떨어지게 하는 m 중 요청값 이하 최댓값 사용
+        m = max(1, min(m, dim))
+        while dim % m:
+            m -= 1
+        self.dim = dim
+        self.m = m
+        self.dsub = dim // m
+        self.iterations = iterations
+        self.seed = seed
+        self.centroids = None
+
+    @property
+    def trained(self) -> bool:
+        return self.centroids is not None
+
+    def code_size(self) -> int:
+        return self.m
+
+    def train(self, sample: np.ndarray):
+        rng = np.random.default_rng(self.seed)
+        sample = np.asarray(sample, dtype=np.float32)
+        n_centroids = min(256, len(sample))
+        centroids = np.empty((self.m, 256, self.dsub), dtype=np.float32)
+
+        for j in range(self.m):
+            sub = sample[:, j * self.dsub:(j + 1) * self.dsub]
+            c = sub[rng.choice(len(sub), n_centroids, replace=False)].copy()
+            for _ in range(self.iterations):
+                assign = self._nearest(sub, c)
+                counts = np.bincount(assign, minlength=len(c)).astype(np.float32)
+                sums = np.stack([np.bincount(assign, weights=sub[:, d], minlength=len(c))
+                                 for d in range(self.dsub)], axis=1).astype(np.float32)
+                empty = counts == 0
+                c[~empty] = sums[~empty] / counts[~empty, None]
+                # 빈 군집은 임의의 샘플로 다시 시작
+                if empty.any():
+                    c[empty] = sub[rng.choice(len(sub), int(empty.sum()))]
+            centroids[j, :n_centroids] = c
+            if n_centroids < 256:
+                centroids[j, n_centroids:] = c[0]
+        self.centroids = centroids
+
+    @staticmethod
+    def _nearest(points: np.ndarray, centers: np.ndarray) -> np.ndarray:
+        dist = (points ** 2).sum(1)[:, None] - 2.0 * points @ centers.T + (centers ** 2).sum(1)[None, :]
+        return dist.argmin(axis=1)
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        codes = np.empty((len(vectors), self.m), dtype=np.uint8)
+        for j in range(self.m):
+            sub = vectors[:, j * self.dsub:(j + 1) * self.dsub]
+            codes[:, j] = self._nearest(sub, self.centroids[j])
+        return codes
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        parts = [self.centroids[j][codes[:, j]] for j in range(self.m)]
+        return np.concatenate(parts, axis=1)
+
+    def distances(self, query: np.ndarray, codes: np.ndarray, norms: np.ndarray = None) -> np.ndarray:
+        """
+        비대칭 거리(ADC): 부분공간별 거리표를 만든 뒤 코드로 조회하여 합산
+
+        Args:
+            codes: (m, N) 부분공간 우선 배치 코드
+        """
+        q_sub = query.reshape(self.m, 1, self.dsub)
+        table = ((self.centroids - q_sub) ** 2).sum(axis=2).astype(np.float32)   # (m, 256)
+        out = np.zeros(codes.shape[1], dtype=np.float32)
+        for j in range(self.m):
+            out += table[j].take(codes[j])
+        return out
+
+    def state(self) -> dict:
+        return {"centroids": self.centroids}
+
+    def load_state(self, state: dict):
+        self.centroids = state["centroids"]
+        self.m, _, self.dsub = self.centroids.shape
+
+
+def create_quantizer(kind: str, dim: int, pq_m: int = 96):
+    """양자화기 생성 ("int8" | "pq")"""
+    if kind == "int8":
+        return Int8Quantizer(dim)
+    if kind == "pq":
+        return ProductQuantizer(dim, m=pq_m)
+    raise ValueError(f"알 수 없는 양자화 방식: {kind}")
@@ -0,0 +1,1041 @@
+# =====================================================================
+# Vector Store - RAG 벡터 저장소 인터페이스 및 백엔드
+# =====================================================================
+# RAGEngine이 사용하는 벡터 저장소를 교체 가능하도록 추상화합니다.
+#
+# 백엔드 (RAG_VECTOR_BACKEND):
+#   - chroma (기본): ChromaDB PersistentClient (기존 컬렉션 그대로 사용)
+#   - local: 프로세스 내 ANN 인덱스 + 메모리 맵 파일
+#       · 벡터: vectors.f32 (numpy memmap, 필요한 페이지만 RAM에 올라옴)
+#       · 메타데이터: meta.sqlite (id, 본문, 메타데이터, source 인덱스)
+#       · ANN 그래프: hnswlib 또는 FAISS HNSW (없으면 numpy 전수 탐색)
+#       · 그래프는 memmap/sqlite에서 언제든 재구성 가능한 파생 데이터
+#       · 그래프/코드는 단일 스냅샷 파일(snapshot.<종류>.dvs)로 저장되어
+#         시작 시 순차 읽기 1회로 로드 (벡터/메타데이터는 mmap)
+#       · RAG_VECTOR_QUANT=int8|pq: 그래프 대신 압축 코드만 RAM에 두고
+#         상위 후보를 memmap 원본 벡터로 재정렬 (ai_core/vector_quant.py)
+#
+# 점수(score)는 모든 백엔드에서 Chroma 기본값과 같은 "제곱 L2 거리"
+# (낮을수록 유사)로 통일되어 RAGEngine.search의 threshold가 그대로 적용됩니다.
+# =====================================================================
+
+import io
+import os
+import json
+import time
+import atexit
+import pickle
+import struct
+import sqlite3
+import threading
+
+# =====================================================================
+# 설정
+# =====================================================================
+RAG_VECTOR_BACKEND = os.getenv("RAG_VECTOR_BACKEND", "chroma")            # chroma | local
+RAG_COLLECTION_NAME = os.getenv("RAG_COLLECTION_NAME", "dot_project_docs")
+CHROMA_DB_PATH = os.getenv("CHROMA_DB_PATH", "/app/uploads/chroma_db")
+LOCAL_INDEX_DIR = os.getenv("RAG_LOCAL_INDEX_DIR", "/app/uploads/vector_index")
+
+# ANN 설정 (local 백엔드)
+RAG_ANN_LIBRARY = os.getenv("RAG_ANN_LIBRARY", "auto")                    # auto | hnswlib | faiss | numpy
+RAG_HNSW_M = int(os.getenv("RAG_HNSW_M", "16"))                           # 노드당 연결 수 (메모리 ↔ 정확도)
+RAG_HNSW_EF_CONSTRUCTION = int(os.getenv("RAG_HNSW_EF_CONSTRUCTION", "200"))  # 구축 시 탐색 폭
+RAG_HNSW_EF_SEARCH = int(os.getenv("RAG_HNSW_EF_SEARCH", "64"))          # 검색 시 탐색 폭 (정확도 ↔ 지연)
+RAG_INDEX_FLUSH_SEC = float(os.getenv("RAG_INDEX_FLUSH_SEC", "30"))       # 그래프 디스크 저장 주기
+RAG_ANN_COMPACT_RATIO = float(os.getenv("RAG_ANN_COMPACT_RATIO", "0.2"))  # 삭제 행 비율이 넘으면 그래프 재구성 (FAISS)
+
+# 양자화 설정 (local 백엔드)
+RAG_VECTOR_QUANT = os.getenv("RAG_VECTOR_QUANT", "none")                  # none | int8 | pq
+RAG_PQ_M = int(os.getenv("RAG_PQ_M", "96"))                               # PQ 부분공간 수 (= 벡터당 바이트)
+RAG_QUANT_RERANK = int(os.getenv("RAG_QUANT_RERANK", "10"))               # 재정렬 후보 배수 (k x N)
+RAG_QUANT_TRAIN_SIZE = int(os.getenv("RAG_QUANT_TRAIN_SIZE", "10000"))    # 양자화기 학습 시작 벡터 수
+
+# 콜드 스타트 설정
+RAG_SQLITE_MMAP_BYTES = int(os.getenv("RAG_SQLITE_MMAP_BYTES", str(256 * 1024 * 1024)))  # 메타데이터 mmap 크기
+RAG_WARMUP_MAX_BYTES = int(os.getenv("RAG_WARMUP_MAX_BYTES", str(2 * 1024 ** 3)))        # 워밍업 시 읽을 최대 바이트
+
+_INITIAL_CAPACITY = 1024
+_SNAPSHOT_MAGIC = b"DOTVS001"
+_SNAPSHOT_ALIGN = 4096     # 헤더 영역 및 섹션 정렬 (페이지 크기)
+_TOUCH_CHUNK = 8 * 1024 * 1024
+_SCAN_BLOCK = 65536   # numpy 전수 탐색 블록 크기 (행)
+
+
+class VectorStore:
+    """
+    벡터 저장소 인터페이스
+
+    모든 메서드는 임베딩이 이미 계산된 상태를 전제로 합니다.
+    where 필터는 Chroma 형식을 따릅니다: {"source": 값} 또는 {"source": {"$in": [...]}}
+    """
+
+    name = "base"
+
+    def add(self, ids: list, embeddings: list, texts: list, metadatas: list):
+        """벡터 저장 (저장 직후 검색 가능)"""
+        raise NotImplementedError
+
+    def query(self, embedding: list, k: int = 3, where: dict = None) -> list:
+        """
+        유사도 검색
+
+        Returns:
+            list[dict]: [{"id", "content", "metadata", "score"}, ...] (score 오름차순, 제곱 L2 거리)
+        """
+        raise NotImplementedError
+
+    def get_ids(self, where: dict) -> list:
+        """조건에 맞는 벡터 ID 목록"""
+        raise NotImplementedError
+
+    def delete(self, ids: list):
+        """벡터 삭제"""
+        raise NotImplementedError
+
+    def count(self) -> int:
+        """저장된 벡터 수"""
+        raise NotImplementedError
+
+    def iter_batches(self, batch_size: int = 1000):
+        """
+        저장된 전체 벡터를 배치 단위로 순회 (마이그레이션용)
+
+        Yields:
+            tuple: (ids, embeddings, texts, metadatas)
+        """
+        raise NotImplementedError
+
+    def warmup(self) -> dict:
+        """
+        콜드 스타트 워밍업 (인덱스 파일을 페이지 캐시에 올리고 더미 검색 1회)
+
+        Returns:
+            dict: {"bytes": 읽은 바이트 수, "seconds": 소요 시간}
+        """
+        return {"bytes": 0, "seconds": 0.0}
+
+
+def _touch_files(paths: list, limit: int = RAG_WARMUP_MAX_BYTES) -> int:
+    """파일을 순차 읽기하여 OS 페이지 캐시에 올림 (이후 mmap/랜덤 읽기가 디스크를 건드리지 않음)"""
+    touched = 0
+    for path in paths:
+        if touched >= limit or not os.path.isfile(path):
+            continue
+        with open(path, "rb", buffering=0) as f:
+            if hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+            buf = bytearray(_TOUCH_CHUNK)
+            while touched < limit:
+                n = f.readinto(buf)
+                if not n:
+                    break
+                touched += n
+    return touched
+
+
+def write_snapshot(path: str, header: dict, sections: dict):
+    """
+    단일 파일 스냅샷 기록 (임시 파일에 쓴 뒤 원자적 교체)
+
+    형식: magic(8) + 헤더 길이(8) + JSON 헤더 | 4KB 정렬 섹션들
+    헤더의 "sections"에 섹션별 [오프셋, 길이]가 기록됩니다.
+    """
+    layout = {}
+    offset = _SNAPSHOT_ALIGN
+    for name, data in sections.items():
+        layout[name] = [offset, len(data)]
+        offset += -(-len(data) // _SNAPSHOT_ALIGN) * _SNAPSHOT_ALIGN
+    header = dict(header, sections=layout)
+    header_bytes = json.dumps(header).encode("utf-8")
+    if len(header_bytes) + 16 > _SNAPSHOT_ALIGN:
+        raise ValueError("스냅샷 헤더가 너무 큽니다")
+
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_SNAPSHOT_MAGIC + struct.pack("<Q", len(header_bytes)) + header_bytes)
+        for name, data in sections.items():
+            f.seek(layout[name][0])
+            f.write(data)
+        f.truncate(max(offset, _SNAPSHOT_ALIGN))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def read_snapshot(path: str):
+    """
+    스냅샷 파일을 순차 읽기 1회로 메모리에 로드
+
+    Returns:
+        tuple: (헤더 dict, 파일 전체 memoryview) - 섹션은 view[offset:offset + length]
+    """
+    size = os.path.getsize(path)
+    buf = bytearray(size)
+    with open(path, "rb", buffering=0) as f:
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        view = memoryview(buf)
+        read = 0
+        while read < size:
+            n = f.readinto(view[read:])
+            if not n:
+                break
+            read += n
+    if bytes(buf[:8]) != _SNAPSHOT_MAGIC:
+        raise ValueError(f"스냅샷 형식이 아닙니다: {path}")
+    header_len = struct.unpack("<Q", bytes(buf[8:16]))[0]
+    header = json.loads(bytes(buf[16:16 + header_len]).decode("utf-8"))
+    return header, memoryview(buf)
+
+
+# =====================================================================
+# Chroma 백엔드 (기본)
+# =====================================================================
+class ChromaVectorStore(VectorStore):
+    """
+    ChromaDB 벡터 저장소 (공개 API만 사용)
+
+    기존 langchain_chroma.Chroma가 만든 컬렉션(dot_project_docs)을 그대로 엽니다.
+    """
+
+    name = "chroma"
+
+    def __init__(self, db_path: str = CHROMA_DB_PATH, collection_name: str = RAG_COLLECTION_NAME):
+        import chromadb
+        self.db_path = db_path
+        self.client = chromadb.PersistentClient(path=db_path)
+        # 임베딩은 항상 외부(EmbeddingService)에서 계산하므로 컬렉션 기본 임베딩 함수는 사용하지 않음
+        self.collection = self.client.get_or_create_collection(name=collection_name, embedding_function=None)
+
+    def add(self, ids, embeddings, texts, metadatas):
+        self.collection.add(ids=ids, embeddings=embeddings, documents=texts, metadatas=metadatas)
+
+    def query(self, embedding, k=3, where=None):
+        n = self.collection.count()
+        if n == 0:
+            return []
+        result = self.collection.query(
+            query_embeddings=[embedding],
+            n_results=min(k, n),
+            where=where,
+            include=["documents", "metadatas", "distances"]
+        )
+        rows = []
+        for id_, doc, meta, dist in zip(result["ids"][0], result["documents"][0],
+                                        result["metadatas"][0], result["distances"][0]):
+            rows.append({"id": id_, "content": doc, "metadata": meta or {}, "score": float(dist)})
+        return rows
+
+    def get_ids(self, where):
+        return self.collection.get(where=where, include=[])["ids"]
+
+    def delete(self, ids):
+        if ids:
+            self.collection.delete(ids=ids)
+
+    def count(self):
+        return self.collection.count()
+
+    def warmup(self):
+        start = time.time()
+        paths = []
+        for root, _, files in os.walk(self.db_path):
+            paths.extend(os.path.join(root, name) for name in files)
+        touched = _touch_files(paths)
+        # 첫 질의 시 HNSW 세그먼트를 메모리로 올리는 지연 로드를 미리 수행
+        sample = self.collection.peek(1)
+        if sample["embeddings"]:
+            self.query(sample["embeddings"][0], k=1)
+        return {"bytes": touched, "seconds": time.time() - start}
+
+    def iter_batches(self, batch_size=1000):
+        offset = 0
+        while True:
+            batch = self.collection.get(limit=batch_size, offset=offset,
+                                        include=["embeddings", "documents", "metadatas"])
+            if not batch["ids"]:
+                return
+            yield batch["ids"], batch["embeddings"], batch["documents"], batch["metadatas"]
+            offset += len(batch["ids"])
+
+
+# =====================================================================
+# ANN 인덱스 어댑터 (local 백엔드)
+# =====================================================================
+class _NumpyIndex:
+    """그래프 없이 memmap 전수 탐색 (정확, 라이브러리 불필요)"""
+
+    library = "numpy"
+
+    def __init__(self, dim: int, **kwargs):
+        self.dim = dim
+        self.count = 0
+
+    def add(self, vectors, labels):
+        self.count = max(self.count, int(labels[-1]) + 1) if len(labels) else self.count
+
+    def memory_bytes(self) -> int:
+        # 매 질의마다 memmap 전체를 읽으므로 원본 벡터 전체가 페이지 캐시에 상주
+        return self.count * self.dim * 4
+
+    def search(self, store, query, k):
+        return store._exact_search(query, k)
+
+    def mark_deleted(self, label):
+        pass
+
+    def to_bytes(self) -> bytes:
+        return b""
+
+    def from_bytes(self, data, capacity):
+        return False
+
+    def resize(self, capacity):
+        pass
+
+    def set_ef(self, ef):
+        pass
+
+
+class _HnswlibIndex:
+    """hnswlib HNSW 그래프 (제곱 L2 공간)"""
+
+    library = "hnswlib"
+
+    def __init__(self, dim: int, capacity: int = _INITIAL_CAPACITY, m: int = RAG_HNSW_M,
+                 ef_construction: int = RAG_HNSW_EF_CONSTRUCTION, ef_search: int = RAG_HNSW_EF_SEARCH):
+        import hnswlib
+        self.dim = dim
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.index = hnswlib.Index(space="l2", dim=dim)
+        self.index.init_index(max_elements=capacity, M=m, ef_construction=ef_construction,
+                              allow_replace_deleted=False)
+        self.index.set_ef(ef_search)
+
+    @property
+    def count(self):
+        return self.index.get_current_count()
+
+    def add(self, vectors, labels):
+        self.index.add_items(vectors, labels)
+
+    def memory_bytes(self) -> int:
+        # 추정치: 원본 벡터 사본 + 레벨0 연결(2M) + 라벨
+        return self.count * (self.dim * 4 + self.m * 2 * 4 + 16)
+
+    def search(self, store, query, k):
+        import numpy as np
+        live = self.index.get_current_count() - len(store._deleted_rows)
+        k = min(k, max(live, 0))
+        if k == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        self.index.set_ef(max(self.ef_search, k))
+        labels, distances = self.index.knn_query(query.reshape(1, -1), k=k)
+        return labels[0].astype(np.int64), distances[0]
+
+    def mark_deleted(self, label):
+        try:
+            self.index.mark_deleted(int(label))
+        except RuntimeError:
+            pass
+
+    def to_bytes(self) -> bytes:
+        return pickle.dumps(self.index, protocol=5)
+
+    def from_bytes(self, data, capacity):
+        self.index = pickle.loads(data)
+        if self.index.get_max_elements() < capacity:
+            self.index.resize_index(capacity)
+        self.index.set_ef(self.ef_search)
+        return True
+
+    def resize(self, capacity):
+        self.index.resize_index(capacity)
+
+    def set_ef(self, ef):
+        self.ef_search = ef
+        self.index.set_ef(ef)
+
+
+class _FaissIndex:
+    """
+    FAISS IndexHNSWFlat (IndexIDMap2로 감싸 라벨 = memmap 행 번호)
+
+    FAISS HNSW는 개별 삭제를 지원하지 않으므로 삭제 행은 그래프에 남기고 검색 시 여유 있게 조회해 거릅니다.
+    그래프에 남은 삭제 행이 RAG_ANN_COMPACT_RATIO를 넘으면 살아 있는 행만으로 재구성합니다 (compact).
+    """
+
+    library = "faiss"
+
+    def __init__(self, dim: int, m: int = RAG_HNSW_M, ef_construction: int = RAG_HNSW_EF_CONSTRUCTION,
+                 ef_search: int = RAG_HNSW_EF_SEARCH, store=None, **kwargs):
+        import faiss
+        self.dim = dim
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.store = store
+        self.hnsw = faiss.IndexHNSWFlat(dim, m, faiss.METRIC_L2)
+        self.hnsw.hnsw.efConstruction = ef_construction
+        self.hnsw.hnsw.efSearch = ef_search
+        self.index = faiss.IndexIDMap2(self.hnsw)
+        self.count = 0              # 그래프가 반영한 memmap 행 수 (마지막 라벨 + 1)
+        self._stale = set()         # 그래프에 남아 있는 삭제 행
+
+    def add(self, vectors, labels):
+        import numpy as np
+        if len(labels) == 0:
+            return
+        self.index.add_with_ids(np.ascontiguousarray(vectors, dtype=np.float32),
+                                np.asarray(labels, dtype=np.int64))
+        self.count = max(self.count, int(labels[-1]) + 1)
+
+    def memory_bytes(self) -> int:
+        # 추정치: IndexFlat 원본 벡터 + 레벨0 연결(2M) + 라벨
+        return self.index.ntotal * (self.dim * 4 + self.m * 2 * 4 + 8)
+
+    def search(self, store, query, k):
+        import numpy as np
+        if self.index.ntotal == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        # 그래프에 남은 삭제 행을 건너뛸 수 있도록 여유 있게 조회
+        fetch = min(self.index.ntotal, k + len(self._stale))
+        self.hnsw.hnsw.efSearch = max(self.ef_search, fetch)
+        distances, labels = self.index.search(query.reshape(1, -1), fetch)
+        return labels[0].astype(np.int64), distances[0]
+
+    def mark_deleted(self, label):
+        if int(label) < self.count:
+            self._stale.add(int(label))
+
+    def needs_compaction(self) -> bool:
+        return bool(self._stale) and len(self._stale) > RAG_ANN_COMPACT_RATIO * self.index.ntotal
+
+    def rebuild(self, vectors, size: int, deleted: set):
+        """memmap의 살아 있는 행(0 ~ size)만으로 그래프 구축"""
+        import numpy as np
+        for begin in range(0, size, _SCAN_BLOCK):
+            rows = np.arange(begin, min(begin + _SCAN_BLOCK, size))
+            if deleted:
+                rows = rows[~np.isin(rows, list(deleted))]
+            if len(rows):
+                self.add(np.asarray(vectors[rows]), rows)
+        self.count = size
+
+    def to_bytes(self) -> bytes:
+        import faiss
+        return faiss.serialize_index(self.index).tobytes()
+
+    def from_bytes(self, data, capacity):
+        import faiss
+        import numpy as np
+        index = faiss.deserialize_index(np.frombuffer(data, dtype=np.uint8))
+        if not isinstance(index, faiss.IndexIDMap2):
+            # 이전 형식 스냅샷 (IDMap 없음) → memmap에서 재구성
+            return False
+        labels = faiss.vector_to_array(index.id_map)
+        self.hnsw = faiss.downcast_index(index.index)
+        self.index = index
+        self.hnsw.hnsw.efSearch = self.ef_search
+        self.count = int(labels.max()) + 1 if len(labels) else 0
+        deleted = self.store._deleted_rows if self.store is not None else set()
+        self._stale = {int(row) for row in labels[np.isin(labels, list(deleted))]} if deleted else set()
+        return True
+
+    def resize(self, capacity):
+        pass
+
+    def set_ef(self, ef):
+        self.ef_search = ef
+        self.hnsw.hnsw.efSearch = ef
+
+
+class _QuantizedIndex:
+    """
+    압축 코드(int8 / PQ) 인덱스
+
+    코드만 RAM에 두고 근사 거리로 k x RAG_QUANT_RERANK개 후보를 고른 뒤,
+    후보만 memmap 원본 벡터로 정확히 재정렬합니다.
+    벡터 수가 RAG_QUANT_TRAIN_SIZE에 도달하기 전에는 양자화기를 학습하지 않고
+    원본 벡터 전수 탐색을 사용합니다.
+    """
+
+    def __init__(self, dim: int, kind: str, store=None, capacity: int = _INITIAL_CAPACITY,
+                 pq_m: int = RAG_PQ_M, rerank: int = RAG_QUANT_RERANK,
+                 train_size: int = RAG_QUANT_TRAIN_SIZE, **kwargs):
+        import numpy as np
+        from ai_core.vector_quant import create_quantizer
+        self.library = kind
+        self.dim = dim
+        self.store = store
+        self.rerank = rerank
+        self.train_size = train_size
+        self.quantizer = create_quantizer(kind, dim, pq_m=pq_m)
+        # PQ는 부분공간 우선(code_size, N) 배치로 보관 (ADC 조회 속도)
+        self.column_major = self.quantizer.column_major
+        self.codes = self._alloc_codes(capacity)
+        self.norms = np.zeros(capacity, dtype=np.float32)
+        self.count = 0
+
+    def _alloc_codes(self, capacity: int):
+        import numpy as np
+        shape = (self.quantizer.code_size(), capacity) if self.column_major \
+            else (capacity, self.quantizer.code_size())
+        return np.zeros(shape, dtype=np.uint8)
+
+    def _capacity(self) -> int:
+        return self.codes.shape[1] if self.column_major else self.codes.shape[0]
+
+    def _live_codes(self):
+        return self.codes[:, :self.count] if self.column_major else self.codes[:self.count]
+
+    def _encode_rows(self, begin: int, end: int):
+        import numpy as np
+        for b in range(begin, end, _SCAN_BLOCK):
+            e = min(b + _SCAN_BLOCK, end)
+            codes = self.quantizer.encode(np.asarray(self.store._vectors[b:e]))
+            if self.column_major:
+                self.codes[:, b:e] = codes.T
+            else:
+                self.codes[b:e] = codes
+            decoded = self.quantizer.decode(codes)
+            self.norms[b:e] = np.einsum("ij,ij->i", decoded, decoded)
+
+    def _train(self, end: int):
+        import numpy as np
+        start = time.time()
+        rng = np.random.default_rng(0)
+        rows = np.sort(rng.choice(end, min(end, self.train_size), replace=False))
+        self.quantizer.train(np.asarray(self.store._vectors[rows]))
+        self._encode_rows(0, end)
+        print(f"🗜️ [VectorStore] {self.library} 양자화기 학습 완료 ({end}개 인코딩, {time.time() - start:.1f}초)")
+
+    def add(self, vectors, labels):
+        if len(labels) == 0:
+            return
+        begin, end = int(labels[0]), int(labels[-1]) + 1
+        self.resize(end)
+        if self.quantizer.trained:
+            self._encode_rows(begin, end)
+        elif end >= self.train_size:
+            self._train(end)
+        self.count = max(self.count, end)
+
+    def search(self, store, query, k):
+        import numpy as np
+        if not self.quantizer.trained:
+            return store._exact_search(query, k)
+        dist = self.quantizer.distances(query, self._live_codes(), self.norms[:self.count])
+        if store._deleted_rows:
+            dist[np.fromiter(store._deleted_rows, dtype=np.int64)] = np.inf
+        candidates = min(self.count, k * self.rerank)
+        rows = np.argpartition(dist, candidates - 1)[:candidates]
+        rows = rows[np.isfinite(dist[rows])]
+        # 후보만 원본 float32 벡터로 재정렬 (memmap에서 해당 행만 읽음)
+        return store._exact_search(query, k, rows=rows)
+
+    def mark_deleted(self, label):
+        pass
+
+    def memory_bytes(self) -> int:
+        extra = sum(v.nbytes for v in self.quantizer.state().values() if v is not None)
+        return self.count * (self.quantizer.code_size() + 4) + extra
+
+    def to_bytes(self) -> bytes:
+        import numpy as np
+        state = {k: v for k, v in self.quantizer.state().items() if v is not None}
+        buf = io.BytesIO()
+        np.savez(buf, codes=self._live_codes(), norms=self.norms[:self.count],
+                 count=np.int64(self.count), trained=np.bool_(self.quantizer.trained), **state)
+        return buf.getvalue()
+
+    def from_bytes(self, data, capacity):
+        import numpy as np
+        with np.load(io.BytesIO(data)) as data:
+            if bool(data["trained"]):
+                self.quantizer.load_state({k: data[k] for k in data.files
+                                           if k not in ("codes", "norms", "count", "trained")})
+            self.count = int(data["count"])
+            self.resize(max(capacity, self.count))
+            if self.column_major:
+                self.codes[:, :self.count] = data["codes"]
+            else:
+                self.codes[:self.count] = data["codes"]
+            self.norms[:self.count] = data["norms"]
+        return True
+
+    def resize(self, capacity):
+        import numpy as np
+        old_capacity = self._capacity()
+        if capacity <= old_capacity:
+            return
+        new_capacity = max(capacity, old_capacity * 2)
+        codes = self._alloc_codes(new_capacity)
+        if self.column_major:
+            codes[:, :old_capacity] = self.codes
+        else:
+            codes[:old_capacity] = self.codes
+        norms = np.zeros(new_capacity, dtype=np.float32)
+        norms[:old_capacity] = self.norms
+        self.codes, self.norms = codes, norms
+
+    def set_ef(self, ef):
+        pass
+
+
+def resolve_ann_library(library: str = RAG_ANN_LIBRARY) -> str:
+    """사용 가능한 ANN 라이브러리 결정 (auto: hnswlib → faiss → numpy)"""
+    candidates = ["hnswlib", "faiss", "numpy"] if library == "auto" else [library]
+    for name in candidates:
+        if name == "numpy":
+            return "numpy"
+        try:
+            __import__(name)
+            return name
+        except ImportError:
+            continue
+    return "numpy"
+
+
+def create_ann_index(library: str, dim: int, capacity: int = _INITIAL_CAPACITY, m: int = RAG_HNSW_M,
+                     ef_construction: int = RAG_HNSW_EF_CONSTRUCTION, ef_search: int = RAG_HNSW_EF_SEARCH,
+                     store=None):
+    """ANN 인덱스 어댑터 생성 (library: hnswlib | faiss | numpy | int8 | pq)"""
+    kwargs = dict(m=m, ef_construction=ef_construction, ef_search=ef_search)
+    if library in ("int8", "pq"):
+        return _QuantizedIndex(dim, library, store=store, capacity=capacity)
+    if library == "hnswlib":
+        return _HnswlibIndex(dim, capacity=capacity, **kwargs)
+    if library == "faiss":
+        return _FaissIndex(dim, store=store, **kwargs)
+    return _NumpyIndex(dim)
+
+
+# =====================================================================
+# Local 백엔드 (ANN + memmap)
+# =====================================================================
+class LocalAnnVectorStore(VectorStore):
+    """
+    프로세스 내 ANN 벡터 저장소
+
+    벡터 원본은 memmap 파일, 메타데이터는 sqlite에 저장되며 이 둘이 원본 데이터입니다.
+    ANN 그래프는 주기적으로(RAG_INDEX_FLUSH_SEC) 디스크에 저장되고,
+    시작 시 그래프에 없는 꼬리 부분은 memmap에서 다시 추가하여 복구합니다.
+
+    Attributes:
+        index_dir (str): 인덱스 디렉토리
+        library (str): 사용 중인 인덱스 종류 (hnswlib | faiss | numpy | int8 | pq)
+            - quant가 int8/pq이면 ANN 라이브러리 대신 압축 코드 인덱스 사용
+    """
+
+    name = "local"
+
+    def __init__(self, index_dir: str = LOCAL_INDEX_DIR, library: str = RAG_ANN_LIBRARY,
+                 m: int = RAG_HNSW_M, ef_construction: int = RAG_HNSW_EF_CONSTRUCTION,
+                 ef_search: int = RAG_HNSW_EF_SEARCH, quant: str = RAG_VECTOR_QUANT):
+        os.makedirs(index_dir, exist_ok=True)
+        self.index_dir = index_dir
+        self.library = quant if quant in ("int8", "pq") else resolve_ann_library(library)
+        self.hnsw_params = {"m": m, "ef_construction": ef_construction, "ef_search": ef_search}
+
+        self._lock = threading.RLock()
+        self._vectors_path = os.path.join(index_dir, "vectors.f32")
+        self._state_path = os.path.join(index_dir, "state.json")
+        self._index_path = os.path.join(index_dir, f"snapshot.{self.library}.dvs")
+        self._meta_path = os.path.join(index_dir, "meta.sqlite")
+
+        self._db = sqlite3.connect(self._meta_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # 메타데이터 읽기는 mmap으로 (read 시스템 콜/버퍼 복사 없이 페이지 캐시 직접 참조)
+        self._db.execute(f"PRAGMA mmap_size={RAG_SQLITE_MMAP_BYTES}")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            " row INTEGER PRIMARY KEY, id TEXT UNIQUE, content TEXT,"
+            " metadata TEXT, source TEXT, deleted INTEGER DEFAULT 0)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_chunks_source ON chunks(source)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_chunks_deleted ON chunks(deleted)")
+        self._db.commit()
+
+        state = self._read_state()
+        self.dim = state.get("dim")
+        self.capacity = state.get("capacity", 0)
+        self.size = self._db.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM chunks").fetchone()[0]
+        self._deleted_rows = {r[0] for r in self._db.execute("SELECT row FROM chunks WHERE deleted = 1")}
+
+        self._vectors = None
+        self._ann = None
+        self._dirty = False
+        if self.dim:
+            self._open_vectors()
+            self._open_ann()
+
+        self._flusher = threading.Thread(target=self._flush_loop, name="vector-index-flush", daemon=True)
+        self._flusher.start()
+        atexit.register(self.flush)
+        print(f"✅ [VectorStore] local 인덱스 열기 완료: {index_dir} "
+              f"({self.size - len(self._deleted_rows)}개, {self.library})")
+
+    # -----------------------------------------------------------------
+    # 파일 관리
+    # -----------------------------------------------------------------
+    def _read_state(self) -> dict:
+        if os.path.exists(self._state_path):
+            with open(self._state_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        return {}
+
+    def _write_state(self):
+        state = {"dim": self.dim, "capacity": self.capacity, "library": self.library,
+                 "hnsw": self.hnsw_params}
+        tmp = self._state_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp, self._state_path)
+
+    def _open_vectors(self):
+        import numpy as np
+        if self.capacity == 0:
+            self.capacity = _INITIAL_CAPACITY
+        needed = self.capacity * self.dim * 4
+        if not os.path.exists(self._vectors_path) or os.path.getsize(self._vectors_path) < needed:
+            with open(self._vectors_path, "ab") as f:
+                f.truncate(needed)
+        self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r+",
+                                  shape=(self.capacity, self.dim))
+
+    def _grow(self, required: int):
+        """memmap 용량 확장 (2배씩)"""
+        if required <= self.capacity:
+            return
+        new_capacity = self.capacity
+        while new_capacity < required:
+            new_capacity *= 2
+        self._vectors.flush()
+        self._vectors = None
+        self.capacity = new_capacity
+        self._open_vectors()
+        if self._ann is not None:
+            self._ann.resize(new_capacity)
+        self._write_state()
+
+    def _open_ann(self):
+        """
+        ANN 그래프 스냅샷 로드 후 그래프에 없는 꼬리 행을 memmap에서 복구
+
+        인덱스 종류(RAG_VECTOR_QUANT, RAG_ANN_LIBRARY)를 바꾸면 해당 스냅샷 파일이 없으므로
+        memmap 원본 벡터에서 새 인덱스를 재구성합니다 (제자리 변환).
+        """
+        self._ann = create_ann_index(self.library, self.dim, capacity=self.capacity, store=self,
+                                     **self.hnsw_params)
+        loaded = False
+        try:
+            if os.path.exists(self._index_path):
+                start = time.time()
+                header, buf = read_snapshot(self._index_path)
+                if header.get("dim") == self.dim and header.get("rows", 0) <= self.size:
+                    offset, length = header["sections"]["index"]
+                    loaded = self._ann.from_bytes(buf[offset:offset + length], self.capacity)
+                    print(f"📂 [VectorStore] 스냅샷 로드: {len(buf) / (1024 * 1024):.1f} MB "
+                          f"({time.time() - start:.2f}초)")
+                del buf
+        except Exception as e:
+            print(f"⚠️ [VectorStore] ANN 그래프 로드 실패, 재구성합니다: {e}")
+            self._ann = create_ann_index(self.library, self.dim, capacity=self.capacity, store=self,
+                                         **self.hnsw_params)
+
+        indexed = self._ann.count if loaded else 0
+        if indexed < self.size:
+            import numpy as np
+            start = time.time()
+            for begin in range(indexed, self.size, _SCAN_BLOCK):
+                end = min(begin + _SCAN_BLOCK, self.size)
+                self._ann.add(np.asarray(self._vectors[begin:end]), np.arange(begin, end))
+            for row in self._deleted_rows:
+                self._ann.mark_deleted(row)
+            self._dirty = True
+            print(f"🔧 [VectorStore] ANN 그래프 복구: {self.size - indexed}개 행 ({time.time() - start:.1f}초)")
+
+    def flush(self):
+        """memmap과 ANN 그래프 스냅샷을 디스크에 저장"""
+        with self._lock:
+            if self._vectors is not None:
+                self._vectors.flush()
+            if self._dirty and self._ann is not None:
+                header = {"version": 1, "library": self.library, "dim": self.dim,
+                          "rows": self._ann.count, "deleted": len(self._deleted_rows),
+                          "hnsw": self.hnsw_params, "saved_at": time.time()}
+                write_snapshot(self._index_path, header, {"index": self._ann.to_bytes()})
+                self._dirty = False
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(RAG_INDEX_FLUSH_SEC)
+            try:
+                self.compact()
+                if self._dirty:
+                    self.flush()
+            except Exception as e:
+                print(f"⚠️ [VectorStore] 인덱스 저장 실패: {e}")
+
+    def compact(self) -> bool:
+        """
+        그래프에 남은 삭제 행이 많으면(RAG_ANN_COMPACT_RATIO) 살아 있는 행만으로 그래프 재구성
+
+        구축은 락 밖에서 하고, 그 사이 추가/삭제된 행만 반영한 뒤 교체하므로 검색을 막지 않습니다.
+        삭제를 그래프에서 직접 지우지 못하는 인덱스(FAISS HNSW)만 해당됩니다.
+        """
+        import numpy as np
+        with self._lock:
+            if self._ann is None or not getattr(self._ann, "needs_compaction", lambda: False)():
+                return False
+            vectors, size, deleted = self._vectors, self.size, set(self._deleted_rows)
+
+        start = time.time()
+        fresh = create_ann_index(self.library, self.dim, capacity=self.capacity, store=self, **self.hnsw_params)
+        fresh.rebuild(vectors, size, deleted)
+
+        with self._lock:
+            if self.size > size:
+                fresh.add(np.asarray(self._vectors[size:self.size]), np.arange(size, self.size))
+            for row in self._deleted_rows - deleted:
+                fresh.mark_deleted(row)
+            self._ann = fresh
+            self._dirty = True
+        print(f"🧹 [VectorStore] 삭제 행 {len(deleted)}개 제외하고 그래프 재구성 ({time.time() - start:.1f}초)")
+        return True
+
+    # -----------------------------------------------------------------
+    # 조회 헬퍼
+    # -----------------------------------------------------------------
+    @staticmethod
+    def _where_clause(where: dict):
+        """Chroma 형식 where → SQL 조건 (source는 인덱스 컬럼, 그 외는 json_extract)"""
+        clauses, params = [], []
+        for key, cond in (where or {}).items():
+            column = "source" if key == "source" else f"json_extract(metadata, '$.{key}')"
+            if isinstance(cond, dict) and "$in" in cond:
+                values = list(cond["$in"])
+                if not values:
+                    clauses.append("0")
+                    continue
+                clauses.append(f"{column} IN ({','.join('?' * len(values))})")
+                params.extend(values)
+            elif isinstance(cond, dict) and "$eq" in cond:
+                clauses.append(f"{column} = ?")
+                params.append(cond["$eq"])
+            else:
+                clauses.append(f"{column} = ?")
+                params.append(cond)
+        return (" AND ".join(clauses) or "1"), params
+
+    def _rows_to_results(self, rows, distances) -> list:
+        if len(rows) == 0:
+            return []
+        placeholders = ",".join("?" * len(rows))
+        meta = {
+            r[0]: r for r in self._db.execute(
+                f"SELECT row, id, content, metadata FROM chunks WHERE row IN ({placeholders}) AND deleted = 0",
+                [int(x) for x in rows]
+            )
+        }
+        results = []
+        for row, dist in zip(rows, distances):
+            r = meta.get(int(row))
+            if r is None:
+                continue
+            results.append({"id": r[1], "content": r[2], "metadata": json.loads(r[3] or "{}"),
+                            "score": float(dist)})
+        return results
+
+    def _exact_search(self, query, k, rows=None):
+        """memmap 전수(또는 후보 행) 탐색 → (행 번호, 제곱 L2 거리)"""
+        import numpy as np
+        best_rows, best_dist = [], []
+        q_norm = float(query @ query)
+
+        if rows is None:
+            blocks = ((begin, np.arange(begin, min(begin + _SCAN_BLOCK, self.size)))
+                      for begin in range(0, self.size, _SCAN_BLOCK))
+        else:
+            rows = np.sort(np.asarray(rows, dtype=np.int64))
+            blocks = ((None, rows[i:i + _SCAN_BLOCK]) for i in range(0, len(rows), _SCAN_BLOCK))
+
+        for begin, block_rows in blocks:
+            if len(block_rows) == 0:
+                continue
+            if begin is not None:
+                block = np.asarray(self._vectors[begin:begin + len(block_rows)])
+            else:
+                block = np.asarray(self._vectors[block_rows])
+            dist = np.einsum("ij,ij->i", block, block) - 2.0 * (block @ query) + q_norm
+            if self._deleted_rows and rows is None:
+                mask = np.isin(block_rows, list(self._deleted_rows))
+                dist[mask] = np.inf
+            take = min(k, len(dist))
+            idx = np.argpartition(dist, take - 1)[:take]
+            best_rows.append(block_rows[idx])
+            best_dist.append(dist[idx])
+
+        if not best_rows:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        all_rows = np.concatenate(best_rows)
+        all_dist = np.concatenate(best_dist)
+        order = np.argsort(all_dist)[:k]
+        keep = np.isfinite(all_dist[order])
+        return all_rows[order][keep], all_dist[order][keep]
+
+    # -----------------------------------------------------------------
+    # VectorStore 구현
+    # -----------------------------------------------------------------
+    def add(self, ids, embeddings, texts, metadatas):
+        import numpy as np
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if vectors.ndim != 2 or len(vectors) == 0:
+            return
+
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                self._open_vectors()
+                self._ann = create_ann_index(self.library, self.dim, capacity=self.capacity, store=self,
+                                             **self.hnsw_params)
+                self._write_state()
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"벡터 차원 불일치: {vectors.shape[1]} (인덱스: {self.dim})")
+
+            start = self.size
+            end = start + len(vectors)
+            self._grow(end)
+            self._vectors[start:end] = vectors
+
+            self._db.executemany(
+                "INSERT INTO chunks (row, id, content, metadata, source) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (start + i, ids[i], texts[i], json.dumps(metadatas[i] or {}, ensure_ascii=False),
+                     (metadatas[i] or {}).get("source"))
+                    for i in range(len(vectors))
+                ]
+            )
+            self._db.commit()
+            self._vectors.flush()
+            self._ann.add(vectors, np.arange(start, end))
+            self.size = end
+            self._dirty = True
+
+    def query(self, embedding, k=3, where=None):
+        import numpy as np
+        with self._lock:
+            if not self.size or self.dim is None:
+                return []
+            q = np.asarray(embedding, dtype=np.float32)
+
+            if where:
+                # 조건 검색: 후보 행만 memmap에서 정확 탐색 (후보 수에 비례하는 비용)
+                clause, params = self._where_clause(where)
+                rows = [r[0] for r in self._db.execute(
+                    f"SELECT row FROM chunks WHERE deleted = 0 AND {clause}", params)]
+                if not rows:
+                    return []
+                found_rows, distances = self._exact_search(q, k, rows=rows)
+            else:
+                found_rows, distances = self._ann.search(self, q, k)
+
+            keep = [i for i, r in enumerate(found_rows) if r >= 0 and int(r) not in self._deleted_rows]
+            found_rows = [found_rows[i] for i in keep][:k]
+            distances = [distances[i] for i in keep][:k]
+            return self._rows_to_results(found_rows, distances)
+
+    def get_ids(self, where):
+        clause, params = self._where_clause(where)
+        with self._lock:
+            return [r[0] for r in self._db.execute(
+                f"SELECT id FROM chunks WHERE deleted = 0 AND {clause}", params)]
+
+    def delete(self, ids):
+        if not ids:
+            return
+        with self._lock:
+            placeholders = ",".join("?" * len(ids))
+            rows = [r[0] for r in self._db.execute(
+                f"SELECT row FROM chunks WHERE id IN ({placeholders}) AND deleted = 0", list(ids))]
+            self._db.execute(f"UPDATE chunks SET deleted = 1, content = NULL WHERE id IN ({placeholders})",
+                             list(ids))
+            self._db.commit()
+            for row in rows:
+                self._deleted_rows.add(row)
+                self._ann.mark_deleted(row)
+            self._dirty = True
+
+    def count(self):
+        return self.size - len(self._deleted_rows)
+
+    def iter_batches(self, batch_size=1000):
+        import numpy as np
+        last_row = -1
+        while True:
+            with self._lock:
+                rows = self._db.execute(
+                    "SELECT row, id, content, metadata FROM chunks WHERE deleted = 0 AND row > ? "
+                    "ORDER BY row LIMIT ?", (last_row, batch_size)).fetchall()
+                if not rows:
+                    return
+                vectors = np.asarray(self._vectors[[r[0] for r in rows]])
+            last_row = rows[-1][0]
+            yield ([r[1] for r in rows], vectors, [r[2] for r in rows],
+                   [json.loads(r[3] or "{}") for r in rows])
+
+    def warmup(self):
+        import numpy as np
+        start = time.time()
+        with self._lock:
+            rows = min(self.size, self.capacity)
+        # 실제 사용 중인 벡터 영역 + 메타데이터만 순차 읽기 (memmap 여유 용량은 제외)
+        touched = _touch_files([self._meta_path])
+        if rows and self.dim:
+            with open(self._vectors_path, "rb", buffering=0) as f:
+                remaining = min(rows * self.dim * 4, RAG_WARMUP_MAX_BYTES)
+                buf = bytearray(_TOUCH_CHUNK)
+                while remaining > 0:
+                    n = f.readinto(buf)
+                    if not n:
+                        break
+                    remaining -= n
+                    touched += n
+            self.query(np.asarray(self._vectors[0]), k=1)
+        return {"bytes": touched, "seconds": time.time() - start}
+
+    def index_memory_bytes(self) -> int:
+        """검색 시 RAM에 상주하는 인덱스 크기 (추정치, 벤치마크/마이그레이션 보고용)"""
+        with self._lock:
+            return self._ann.memory_bytes() if self._ann is not None else 0
+
+    def set_ef_search(self, ef: int):
+        """검색 시 탐색 폭 변경 (정확도 ↔ 지연 조정)"""
+        with self._lock:
+            self.hnsw_params["ef_search"] = ef
+            if self._ann is not None:
+                self._ann.set_ef(ef)
+
+
+def create_vector_store(backend: str = RAG_VECTOR_BACKEND, kind: str = "chunks") -> VectorStore:
+    """
+    설정된 백엔드로 벡터 저장소 생성
+
+    Args:
+        backend: "chroma" | "local"
+        kind: "chunks" (문서 조각) | "documents" (문서 단위 제목+요약, 2단계 검색 1단계용)
+            - documents는 별도 컬렉션/디렉토리를 사용하며, 개수가 적어 양자화하지 않음
+    """
+    if backend == "local":
+        if kind == "documents":
+            return LocalAnnVectorStore(index_dir=f"{LOCAL_INDEX_DIR}_documents", quant="none")
+        return LocalAnnVectorStore()
+    if backend != "chroma":
+        print(f"⚠️ [VectorStore] 알 수 없는 백엔드 '{backend}' → chroma 사용")
+    if kind == "documents":
+        return ChromaVectorStore(collection_name=f"{RAG_COLLECTION_NAME}_documents")
+    return ChromaVectorStore()
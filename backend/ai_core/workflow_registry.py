@@ -0,0 +1,192 @@
+# =====================================================================
+# Workflow Registry - ComfyUI 워크플로우 템플릿 등록/검증/파라미터 바인딩
+# =====================================================================
+# workflows/*.json 템플릿을 프로세스당 한 번 읽어 검증하고,
+# {{PLACEHOLDER}} 위치를 (노드 ID, 입력 이름) 바인딩으로 미리 컴파일합니다.
+#
+# 작업마다 템플릿 전체를 json.dumps → str.replace × 8 → json.loads 하던 방식 대신
+# 노드별 inputs dict만 얕게 복사한 뒤 바인딩 위치에 값을 바로 넣습니다.
+# (링크 배열 ["5", 0] 등 변경되지 않는 값은 템플릿과 공유)
+#
+# 템플릿 형식:
+#   {
+#     "meta": {"name": "sd35_medium", "label": "...", "steps": 28, "cfg": 4.5},
+#     "prompt": { ComfyUI API 형식 노드 }
+#   }
+#   - 플레이스홀더는 입력값 전체가 "{{NAME}}"이어야 함 (문자열 일부 치환 불가)
+#   - meta.name이 없으면 파일 이름(확장자 제외)을 사용
+#
+# 요청별 선택: ImageEngine.generate_batch(workflow="sd35_medium" | "sd35_large_turbo" ...)
+# =====================================================================
+
+import os
+import json
+import hashlib
+import threading
+from pathlib import Path
+
+WORKFLOW_DIR = Path(__file__).parent / "workflows"
+IMAGE_DEFAULT_WORKFLOW = os.environ.get("IMAGE_DEFAULT_WORKFLOW", "sd35_medium")
+
+# 플레이스홀더 → 값 타입
+PLACEHOLDERS = {
+    "POSITIVE_PROMPT": str,
+    "STYLE_PROMPT": str,
+    "NEGATIVE_PROMPT": str,
+    "WIDTH": int,
+    "HEIGHT": int,
+    "SEED": int,
+    "STEPS": int,
+    "CFG": float,
+    "OUTPUT_PREFIX": str,
+}
+REQUIRED_PLACEHOLDERS = ("POSITIVE_PROMPT", "WIDTH", "HEIGHT", "SEED", "OUTPUT_PREFIX")
+
+OUTPUT_NODE_TYPES = ("SaveImage", "PreviewImage", "SaveImageWebsocket")
+LATENT_NODE_TYPES = ("EmptySD3LatentImage", "EmptyLatentImage")
+
+
+class CompiledWorkflow:
+    """
+    검증 + 바인딩 컴파일이 끝난 워크플로우
+
+    Attributes:
+        name (str): 레지스트리 이름
+        label (str): 표시 이름
+        steps (int): 기본 샘플링 스텝
+        cfg (float): 기본 CFG
+        nodes (dict): 템플릿 노드 (읽기 전용으로 취급)
+        bindings (dict): 플레이스홀더 → [(노드 ID, 입력 이름)]
+        latent_nodes (list): batch_size를 설정할 빈 latent 노드 ID
+        fingerprint (str): 템플릿 내용 해시 (템플릿이 바뀌면 달라짐 - 결과 캐시 키용)
+    """
+
+    def __init__(self, name: str, template: dict, source: str = ""):
+        meta = template.get("meta") or {}
+        self.name = meta.get("name") or name
+        self.label = meta.get("label") or self.name
+        self.steps = int(meta.get("steps", 28))
+        self.cfg = float(meta.get("cfg", 4.5))
+        self.source = source
+        self.nodes = template.get("prompt", template)
+        self.bindings = {}
+        self.latent_nodes = []
+        self._compile()
+        self.fingerprint = hashlib.sha1(json.dumps(self.nodes, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+    def _compile(self):
+        """템플릿 검증 및 플레이스홀더 위치 수집 (오류 시 ValueError)"""
+        where = self.source or self.name
+        if not isinstance(self.nodes, dict) or not self.nodes:
+            raise ValueError(f"[{where}] 노드가 없습니다.")
+
+        has_output = False
+        for node_id, node in self.nodes.items():
+            if not isinstance(node, dict) or not isinstance(node.get("class_type"), str) \
+                    or not isinstance(node.get("inputs"), dict):
+                raise ValueError(f"[{where}] 노드 {node_id}: class_type/inputs 형식 오류")
+            class_type = node["class_type"]
+            has_output = has_output or class_type in OUTPUT_NODE_TYPES
+            if class_type in LATENT_NODE_TYPES:
+                self.latent_nodes.append(node_id)
+
+            for input_name, value in node["inputs"].items():
+                if isinstance(value, list):
+                    # 링크 [노드 ID, 출력 인덱스]
+                    if len(value) != 2 or str(value[0]) not in self.nodes:
+                        raise ValueError(f"[{where}] 노드 {node_id}.{input_name}: 존재하지 않는 노드 링크 {value}")
+                elif isinstance(value, str) and "{{" in value:
+                    placeholder = value[2:-2] if value.startswith("{{") and value.endswith("}}") else None
+                    if placeholder not in PLACEHOLDERS:
+                        raise ValueError(f"[{where}] 노드 {node_id}.{input_name}: 알 수 없는 플레이스홀더 {value}")
+                    self.bindings.setdefault(placeholder, []).append((node_id, input_name))
+
+        missing = [p for p in REQUIRED_PLACEHOLDERS if p not in self.bindings]
+        if missing:
+            raise ValueError(f"[{where}] 필수 플레이스홀더 누락: {', '.join(missing)}")
+        if not has_output:
+            raise ValueError(f"[{where}] 출력 노드({'/'.join(OUTPUT_NODE_TYPES)})가 없습니다.")
+
+    def has(self, placeholder: str) -> bool:
+        return placeholder in self.bindings
+
+    def instantiate(self, values: dict, batch_size: int = 1) -> dict:
+        """
+        작업용 워크플로우 생성 (노드/inputs dict 얕은 복사 + 바인딩 위치에 값 설정)
+
+        Args:
+            values: 플레이스홀더 이름 → 값 (템플릿에 없는 이름은 무시)
+            batch_size: 빈 latent 노드의 batch_size
+
+        Returns:
+            dict: ComfyUI /prompt에 보낼 노드 dict
+        """
+        workflow = {
+            node_id: {"class_type": node["class_type"], "inputs": dict(node["inputs"])}
+            for node_id, node in self.nodes.items()
+        }
+        for placeholder, targets in self.bindings.items():
+            if placeholder not in values:
+                raise ValueError(f"[{self.name}] 값이 없는 플레이스홀더: {placeholder}")
+            value = PLACEHOLDERS[placeholder](values[placeholder])
+            for node_id, input_name in targets:
+                workflow[node_id]["inputs"][input_name] = value
+        for node_id in self.latent_nodes:
+            workflow[node_id]["inputs"]["batch_size"] = batch_size
+        return workflow
+
+    def describe(self) -> dict:
+        return {"name": self.name, "label": self.label, "steps": self.steps, "cfg": self.cfg}
+
+
+class WorkflowRegistry:
+    """workflows 디렉토리의 템플릿을 한 번 읽어 CompiledWorkflow로 보관"""
+
+    def __init__(self, workflow_dir: Path = WORKFLOW_DIR, default: str = IMAGE_DEFAULT_WORKFLOW):
+        self.workflows = {}
+        for path in sorted(Path(workflow_dir).glob("*.json")):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    compiled = CompiledWorkflow(path.stem, json.load(f), source=path.name)
+            except (ValueError, json.JSONDecodeError) as e:
+                # 잘못된 템플릿 하나 때문에 다른 워크플로우까지 못 쓰게 되지 않도록 건너뜀
+                print(f"⚠️ [WorkflowRegistry] 템플릿 검증 실패 (제외): {path.name} - {e}")
+                continue
+            self.workflows[compiled.name] = compiled
+
+        if not self.workflows:
+            raise FileNotFoundError(f"사용 가능한 워크플로우 템플릿이 없습니다: {workflow_dir}")
+        self.default = default if default in self.workflows else next(iter(self.workflows))
+        print(f"✅ [WorkflowRegistry] 워크플로우 {len(self.workflows)}개 등록: "
+              f"{', '.join(self.workflows)} (기본: {self.default})")
+
+    def get(self, name: str = None) -> CompiledWorkflow:
+        """이름으로 워크플로우 조회 (None이면 기본 워크플로우, 없는 이름은 KeyError)"""
+        if not name:
+            return self.workflows[self.default]
+        if name not in self.workflows:
+            raise KeyError(f"등록되지 않은 워크플로우: {name} (사용 가능: {', '.join(self.workflows)})")
+        return self.workflows[name]
+
+    def names(self) -> list:
+        return list(self.workflows)
+
+    def describe(self) -> list:
+        return [dict(wf.describe(), default=(name == self.default)) for name, wf in self.workflows.items()]
+
+
+# =====================================================================
+# 전역 인스턴스 (싱글톤 패턴)
+# =====================================================================
+_registry_instance = None
+_registry_lock = threading.Lock()
+
+
+def get_workflow_registry() -> WorkflowRegistry:
+    """프로세스 공유 WorkflowRegistry 반환"""
+    global _registry_instance
+    if _registry_instance is None:
+        with _registry_lock:
+            if _registry_instance is None:
+                _registry_instance = WorkflowRegistry()
+    return _registry_instance
@@ -0,0 +1,245 @@
+"""
+GPU 작업 접수 제어 - 제출 시점 대기 순번/예상 시간 안내 + 과부하 시 거절 또는 예약 (PC1)
+
+대기열 깊이: worker.gpu_manager.get_queue_depth
+    (Celery 큐 길이 _get_queue_length와 접수 후 미완료 작업 수 중 큰 값) + 예약(deferred) 작업 수
+작업당 소요 시간: gpu_manager.record_job_duration으로 쌓은 최근 GPU_DURATION_WINDOW건 평균
+    (표본이 없으면 타입별 기본값)
+
+예상 대기 시간: worker.gpu_scheduler.estimate_wait
+    GPU 1장을 이미지/STT가 번갈아 쓰므로, 현재 활성 모델과 대기열(앞선 작업 + 새 작업)을 Worker와 같은
+    전환 정책(should_switch - 비용 모델/기아 방지 시간 또는 fixed)으로 재생하여 새 작업의 시작 시각을 구합니다.
+    예: cost 정책에서 이미지가 밀려 있으면 STT는 이미지 대기열이 빌 때까지 또는
+        GPU_SCHED_MAX_WAIT_STT_SEC까지 기다린다고 계산됩니다.
+    같은 타입 Worker가 여러 개면 작업당 소요 시간을 Worker 수로 나눕니다.
+
+임계값(대기 순번 ADMISSION_{TYPE}_MAX_QUEUE, 예상 대기 ADMISSION_{TYPE}_MAX_WAIT_SEC)을 넘으면:
+    - reject: 429 + Retry-After (이미지 기본값 - 사용자가 바로 결과를 기다리는 작업)
+    - defer:  Celery에 넣지 않고 admission:deferred:{type}에 보관 → dispatch_deferred_jobs_task(Beat)가
+              대기열이 줄면 순서대로 발행 (STT 기본값 - 업로드한 파일은 나중에 처리돼도 됨)
+              예약 목록이 ADMISSION_MAX_DEFERRED를 넘으면 거절
+
+사용처:
+    - image_router.generate_image, meeting_router.upload_meeting: check → publish (accept: 발행 / defer: 예약)
+    - worker.tasks.dispatch_deferred_jobs_task: dispatch_deferred
+"""
+
+import json
+import os
+import time
+
+from fastapi import HTTPException
+
+from app.config import redis_client
+from worker import gpu_manager, gpu_scheduler
+
+ADMISSION = os.getenv("ADMISSION", "1") == "1"
+ADMISSION_MAX_DEFERRED = int(os.getenv("ADMISSION_MAX_DEFERRED", "200"))
+
+ADMISSION_LIMITS = {
+    "image": {
+        "max_queue": int(os.getenv("ADMISSION_IMAGE_MAX_QUEUE", "30")),
+        "max_wait_sec": int(os.getenv("ADMISSION_IMAGE_MAX_WAIT_SEC", "900")),
+        "mode": os.getenv("ADMISSION_IMAGE_MODE", "reject"),
+        "workers": int(os.getenv("ADMISSION_IMAGE_WORKERS", "1")),
+        "default_job_sec": 40.0,
+    },
+    "stt": {
+        "max_queue": int(os.getenv("ADMISSION_STT_MAX_QUEUE", "20")),
+        "max_wait_sec": int(os.getenv("ADMISSION_STT_MAX_WAIT_SEC", "7200")),
+        "mode": os.getenv("ADMISSION_STT_MODE", "defer"),
+        "workers": int(os.getenv("ADMISSION_STT_WORKERS", "1")),
+        "default_job_sec": 300.0,
+    },
+}
+
+_KEY_DEFERRED = "admission:deferred:{}"
+
+
+def _deferred_count(task_type: str) -> int:
+    try:
+        return redis_client.llen(_KEY_DEFERRED.format(task_type))
+    except Exception:
+        return 0
+
+
+def _avg_job_sec(task_type: str) -> tuple:
+    """(평균 소요 시간, 표본 수)"""
+    samples = gpu_manager.get_job_durations(task_type)
+    if not samples:
+        return ADMISSION_LIMITS[task_type]["default_job_sec"], 0
+    return sum(samples) / len(samples), len(samples)
+
+
+def estimate(task_type: str, include_deferred: bool = True) -> dict:
+    """
+    지금 제출하는 작업의 대기 순번 / 예상 시작·완료 시간
+
+    Args:
+        task_type: "image" 또는 "stt"
+        include_deferred: 예약 작업도 앞선 작업으로 셈 (예약 작업 발행 판단 시에는 False)
+
+    Returns:
+        dict: {"position", "ahead", "waitSec", "etaSec", "avgJobSec", "samples"}
+    """
+    snapshot = gpu_manager.get_scheduler_snapshot()
+    ahead = snapshot["queue"][task_type]
+    if include_deferred:
+        ahead += _deferred_count(task_type)
+    snapshot["queue"][task_type] = ahead
+
+    avg_sec, samples = _avg_job_sec(task_type)
+    snapshot["job_sec"] = {
+        queue_type: _avg_job_sec(queue_type)[0] / max(1, ADMISSION_LIMITS[queue_type]["workers"])
+        for queue_type in ADMISSION_LIMITS
+    }
+    # Worker와 같은 전환 정책으로 대기열 재생 (다른 타입이 먼저 실행되는 시간 포함)
+    wait_sec = gpu_scheduler.estimate_wait(task_type, snapshot)
+
+    return {
+        "position": ahead + 1,
+        "ahead": ahead,
+        "waitSec": int(wait_sec),
+        "etaSec": int(wait_sec + avg_sec),
+        "avgJobSec": round(avg_sec, 1),
+        "samples": samples,
+    }
+
+
+def check(task_type: str) -> dict:
+    """
+    접수 판단
+
+    Returns:
+        dict: estimate 결과 + {"action": "accept" | "defer" | "reject", "retryAfterSec"}
+    """
+    result = estimate(task_type)
+    limits = ADMISSION_LIMITS[task_type]
+    over_queue = result["position"] > limits["max_queue"]
+    over_wait = result["waitSec"] > limits["max_wait_sec"]
+
+    result["action"] = "accept"
+    result["retryAfterSec"] = 0
+    if ADMISSION and (over_queue or over_wait):
+        # 예상 대기가 한도 아래로 내려갈 때까지의 시간 (대기열 초과만이면 작업 몇 건 분량)
+        excess_jobs = max(0, result["position"] - limits["max_queue"])
+        retry_after = max(result["waitSec"] - limits["max_wait_sec"], excess_jobs * result["avgJobSec"], 30)
+        result["retryAfterSec"] = int(retry_after)
+        if limits["mode"] == "defer" and _deferred_count(task_type) < ADMISSION_MAX_DEFERRED:
+            result["action"] = "defer"
+        else:
+            result["action"] = "reject"
+        print(f"🚦 [Admission] {task_type} {result['action']} - 순번 {result['position']}, "
+              f"예상 대기 {result['waitSec']}초 (한도 {limits['max_queue']}건/{limits['max_wait_sec']}초)")
+    return result
+
+
+def reject(task_type: str, decision: dict):
+    """429 응답 (Retry-After 포함)"""
+    label = "이미지 생성" if task_type == "image" else "음성 변환"
+    minutes = max(1, round(decision["waitSec"] / 60))
+    raise HTTPException(
+        status_code=429,
+        detail=f"{label} 대기열이 가득 찼습니다 (대기 {decision['ahead']}건, 예상 대기 약 {minutes}분). "
+               f"잠시 후 다시 시도해주세요.",
+        headers={"Retry-After": str(decision["retryAfterSec"])}
+    )
+
+
+def register(task_type: str, task_id: str):
+    """Celery에 발행한 작업을 미완료 작업으로 등록 (Worker가 종료 시 clear_pending)"""
+    gpu_manager.mark_pending(task_type, task_id)
+
+
+def defer(task_type: str, task_name: str, task_id: str, kwargs: dict) -> int:
+    """
+    작업을 예약 목록에 보관 (dispatch_deferred가 대기열이 줄면 발행)
+
+    Returns:
+        int: 예약 목록 내 순번
+    """
+    entry = {"task": task_name, "task_id": task_id, "kwargs": kwargs, "deferred_at": time.time()}
+    return redis_client.rpush(_KEY_DEFERRED.format(task_type), json.dumps(entry, ensure_ascii=False))
+
+
+def publish(task_type: str, task, task_id: str, kwargs: dict, decision: dict) -> dict:
+    """
+    접수 결정대로 Celery 작업 발행 (defer면 예약 목록에 보관)
+
+    발행이 실패하면(브로커 장애 등) 미완료 등록을 되돌린 뒤 예약 목록에 넣어 dispatch_deferred가 재발행합니다.
+    되돌리지 않으면 고아 항목이 GPU_PENDING_MAX_AGE 동안 대기열 깊이를 1 이상으로 유지하여
+    스케줄러가 다른 타입으로 전환하지 못하고 매번 기아 방지 시간까지 기다리게 됩니다.
+
+    Returns:
+        dict: 실제 처리 결과가 반영된 decision (발행 실패로 예약했으면 action=defer)
+    """
+    if decision["action"] != "defer":
+        register(task_type, task_id)
+        try:
+            task.apply_async(kwargs=kwargs, task_id=task_id)
+            return decision
+        except Exception as e:
+            gpu_manager.clear_pending(task_type, [task_id])
+            print(f"⚠️ [Admission] {task_type} 작업 발행 실패 → 예약 목록에 보관 ({task_id}): {e}")
+            decision = {**decision, "action": "defer"}
+    defer(task_type, task.name, task_id, kwargs)
+    return decision
+
+
+def describe(decision: dict) -> dict:
+    """API 응답용 대기열 정보"""
+    return {
+        "position": decision["position"],
+        "ahead": decision["ahead"],
+        "etaSec": decision["etaSec"],
+        "etaAt": int(time.time() + decision["etaSec"]),
+        "deferred": decision["action"] == "defer",
+    }
+
+
+def queue_message(decision: dict) -> str:
+    """진행률 조회에 표시할 대기 메시지"""
+    minutes = max(1, round(decision["etaSec"] / 60))
+    if decision["action"] == "defer":
+        return f"대기열이 많아 예약되었습니다 (예상 완료 약 {minutes}분 후)"
+    if decision["ahead"] == 0:
+        return "작업 대기 중... (곧 시작)"
+    return f"작업 대기 중... (앞선 작업 {decision['ahead']}건, 예상 완료 약 {minutes}분 후)"
+
+
+def dispatch_deferred(send_task) -> dict:
+    """
+    대기열이 한도 아래로 내려간 만큼 예약 작업을 순서대로 발행 (Celery Beat에서 주기적 호출)
+
+    Args:
+        send_task: (task_name, kwargs, task_id) → 발행 함수
+
+    Returns:
+        dict: {타입: 발행 수}
+    """
+    dispatched = {}
+    for task_type, limits in ADMISSION_LIMITS.items():
+        key = _KEY_DEFERRED.format(task_type)
+        count = 0
+        while True:
+            current = estimate(task_type, include_deferred=False)
+            if current["position"] > limits["max_queue"] or current["waitSec"] > limits["max_wait_sec"]:
+                break
+            raw = redis_client.lpop(key)
+            if raw is None:
+                break
+            entry = json.loads(raw)
+            gpu_manager.mark_pending(task_type, entry["task_id"])
+            try:
+                send_task(entry["task"], entry["kwargs"], entry["task_id"])
+            except Exception as e:
+                # 발행 실패 → 맨 앞에 되돌려 다음 주기에 재시도
+                gpu_manager.clear_pending(task_type, [entry["task_id"]])
+                redis_client.lpush(key, raw)
+                print(f"⚠️ [Admission] 예약 작업 발행 실패 ({entry['task']}): {e}")
+                break
+            count += 1
+        if count:
+            dispatched[task_type] = count
+            print(f"🚦 [Admission] 예약된 {task_type} 작업 {count}건 발행 (남은 예약 {_deferred_count(task_type)}건)")
+    return dispatched
@@ -0,0 +1,275 @@
+"""
+의미 기반 답변 캐시 - 자주 묻는 질문의 답변 재사용 (ANSWER_CACHE=1일 때만 동작)
+
+질의 임베딩의 코사인 유사도가 임계값 이상이고, 답변에 사용된 참고 문서들의 버전이
+그대로일 때 저장된 답변을 LLM 호출 없이 반환합니다.
+
+Redis 키:
+    answer_cache:entry:{id}      답변 항목 JSON (질의, 임베딩, 답변, 참고 문서, 문서 버전) - 카테고리별 TTL
+    answer_cache:ids             항목 ID 집합
+    answer_cache:added           추가된 항목 ID 스트림 → 프로세스별 임베딩 행렬에 새 항목만 덧붙임
+    answer_cache:gen             항목 삭제/무효화(및 added 스트림 정리) 시 증가 → 임베딩 행렬 전체 재적재 신호
+    answer_cache:docver:{source} 문서 버전 (삭제/재학습 시 증가)
+    answer_cache:by_source:{source}  문서를 인용한 항목 ID 집합 (문서 삭제 시 즉시 무효화)
+"""
+
+import base64
+import json
+import os
+import threading
+import time
+import uuid
+
+import numpy as np
+
+from app.config import redis_client
+
+ANSWER_CACHE = os.getenv("ANSWER_CACHE", "0") == "1"
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.95"))
+ANSWER_CACHE_TTL = int(os.getenv("ANSWER_CACHE_TTL", "21600"))          # 기본 6시간 (참고 문서 없음/미지정 카테고리)
+ANSWER_CACHE_CATEGORY_TTLS = os.getenv("ANSWER_CACHE_CATEGORY_TTLS", "업무:86400,개인:3600,아이디어:3600")
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "5000"))
+
+_PREFIX = "answer_cache"
+_IDS_KEY = f"{_PREFIX}:ids"
+_GEN_KEY = f"{_PREFIX}:gen"
+_ADDED_KEY = f"{_PREFIX}:added"
+
+
+def _parse_category_ttls(spec: str) -> dict:
+    ttls = {}
+    for item in spec.split(","):
+        if ":" in item:
+            name, seconds = item.rsplit(":", 1)
+            try:
+                ttls[name.strip()] = int(seconds)
+            except ValueError:
+                print(f"⚠️ [AnswerCache] 잘못된 카테고리 TTL 설정 무시: {item}")
+    return ttls
+
+
+def _entry_key(entry_id: str) -> str:
+    return f"{_PREFIX}:entry:{entry_id}"
+
+
+def _version_key(source: str) -> str:
+    return f"{_PREFIX}:docver:{source}"
+
+
+def _by_source_key(source: str) -> str:
+    return f"{_PREFIX}:by_source:{source}"
+
+
+def _normalize(vector) -> np.ndarray:
+    v = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(v))
+    return v / norm if norm > 0 else v
+
+
+class AnswerCache:
+    """
+    질의 임베딩 유사도 기반 답변 캐시
+
+    항목은 Redis에 저장하여 여러 워커 프로세스가 공유하고,
+    유사도 계산용 임베딩 행렬만 프로세스 메모리에 둡니다.
+    새 항목은 answer_cache:added 스트림에서 읽어 덧붙이고, 삭제/무효화(answer_cache:gen 변경) 때만 전체 재적재합니다.
+    """
+
+    def __init__(self):
+        self.category_ttls = _parse_category_ttls(ANSWER_CACHE_CATEGORY_TTLS)
+        self._lock = threading.Lock()
+        self._gen = None
+        self._last_added = "0-0"
+        self._ids = []
+        self._id_set = set()
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+
+    # -----------------------------------------------------------------
+    # 조회
+    # -----------------------------------------------------------------
+    def _refresh(self):
+        """삭제/무효화가 있었으면 임베딩 행렬 재적재, 아니면 새로 추가된 항목만 덧붙임"""
+        gen = redis_client.get(_GEN_KEY)
+        if gen != self._gen:
+            self._reload(gen)
+            return
+        added = redis_client.xread({_ADDED_KEY: self._last_added})
+        if not added:
+            return
+        messages = added[0][1]
+        self._last_added = messages[-1][0]
+        self._append([fields["id"] for _, fields in messages])
+
+    def _reload(self, gen):
+        """전체 재적재 (스트림 위치를 먼저 읽어 두어 재적재 중 추가된 항목도 다음 조회 때 덧붙임)"""
+        last = redis_client.xrevrange(_ADDED_KEY, count=1)
+        self._last_added = last[0][0] if last else "0-0"
+        self._ids, self._id_set = [], set()
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        expired = self._append(list(redis_client.smembers(_IDS_KEY)))
+        if expired:
+            # TTL 만료 항목 정리 (gen은 올리지 않음: 다른 프로세스 행렬에는 무해)
+            redis_client.srem(_IDS_KEY, *expired)
+        self._gen = gen
+
+    def _append(self, ids: list) -> list:
+        """항목 임베딩을 행렬에 추가 → 만료된(값이 없는) ID 목록 반환"""
+        ids = [i for i in dict.fromkeys(ids) if i not in self._id_set]
+        raw = redis_client.mget([_entry_key(i) for i in ids]) if ids else []
+        vectors, expired = [], []
+        for entry_id, value in zip(ids, raw):
+            if value is None:
+                expired.append(entry_id)
+                continue
+            entry = json.loads(value)
+            self._ids.append(entry_id)
+            self._id_set.add(entry_id)
+            vectors.append(np.frombuffer(base64.b64decode(entry["embedding"]), dtype=np.float32))
+        if vectors:
+            new = np.stack(vectors)
+            self._matrix = np.vstack([self._matrix, new]) if self._matrix.size else new
+        return expired
+
+    def lookup(self, query_vector) -> dict:
+        """
+        유사 질의의 저장된 답변 조회
+
+        Returns:
+            dict | None: {"answer", "docs", "query", "similarity"} (없으면 None)
+        """
+        q = _normalize(query_vector)
+        with self._lock:
+            self._refresh()
+            if not self._ids or self._matrix.shape[1] != len(q):
+                return None
+            sims = self._matrix @ q
+            best = int(sims.argmax())
+            similarity = float(sims[best])
+            entry_id = self._ids[best]
+        if similarity < ANSWER_CACHE_SIMILARITY:
+            return None
+
+        value = redis_client.get(_entry_key(entry_id))
+        if value is None:
+            return None
+        entry = json.loads(value)
+
+        # 인용 문서 버전 확인 (재학습/삭제된 문서를 인용한 답변은 폐기)
+        versions = entry.get("versions", {})
+        if versions:
+            current = redis_client.mget([_version_key(s) for s in versions])
+            if any(int(cur or 0) != ver for cur, ver in zip(current, versions.values())):
+                self._remove(entry_id, versions)
+                return None
+
+        return {"answer": entry["answer"], "docs": entry.get("docs") or [],
+                "query": entry.get("query"), "similarity": similarity}
+
+    # -----------------------------------------------------------------
+    # 저장 / 무효화
+    # -----------------------------------------------------------------
+    def store(self, query: str, query_vector, answer: str, docs: list):
+        """생성된 답변 저장 (TTL은 인용 문서 카테고리 중 가장 짧은 값)"""
+        if not answer or redis_client.scard(_IDS_KEY) >= ANSWER_CACHE_MAX_ENTRIES:
+            return
+
+        sources = sorted({d.get("source") for d in docs or [] if d.get("source")})
+        current = redis_client.mget([_version_key(s) for s in sources]) if sources else []
+        versions = {s: int(v or 0) for s, v in zip(sources, current)}
+        ttl = self._ttl_for_sources(sources)
+
+        entry_id = uuid.uuid4().hex
+        entry = {
+            "query": query,
+            "embedding": base64.b64encode(_normalize(query_vector).tobytes()).decode("ascii"),
+            "answer": answer,
+            "docs": docs or [],
+            "versions": versions,
+            "created_at": time.time(),
+        }
+        pipe = redis_client.pipeline()
+        pipe.setex(_entry_key(entry_id), ttl, json.dumps(entry, ensure_ascii=False))
+        pipe.sadd(_IDS_KEY, entry_id)
+        for source in sources:
+            pipe.sadd(_by_source_key(source), entry_id)
+            pipe.expire(_by_source_key(source), max(ttl, ANSWER_CACHE_TTL))
+        pipe.xadd(_ADDED_KEY, {"id": entry_id})
+        pipe.xlen(_ADDED_KEY)
+        added = pipe.execute()[-1]
+        if added > ANSWER_CACHE_MAX_ENTRIES:
+            # 스트림이 길어지면 비우고 전체 재적재 1회로 대체 (추가 N건당 1회)
+            pipe = redis_client.pipeline()
+            pipe.delete(_ADDED_KEY)
+            pipe.incr(_GEN_KEY)
+            pipe.execute()
+        print(f"💾 [AnswerCache] 답변 저장 (TTL {ttl}s, 참고 문서 {len(sources)}개)")
+
+    def invalidate_source(self, source: str):
+        """문서 삭제/재학습 시 호출: 문서 버전 증가 + 해당 문서를 인용한 답변 삭제"""
+        entry_ids = list(redis_client.smembers(_by_source_key(source)))
+        pipe = redis_client.pipeline()
+        pipe.incr(_version_key(source))
+        if entry_ids:
+            pipe.delete(*[_entry_key(i) for i in entry_ids])
+            pipe.srem(_IDS_KEY, *entry_ids)
+        pipe.delete(_by_source_key(source))
+        pipe.incr(_GEN_KEY)
+        pipe.execute()
+        if entry_ids:
+            print(f"🗑️ [AnswerCache] 문서 변경으로 캐시 답변 {len(entry_ids)}개 무효화: {source}")
+
+    def _remove(self, entry_id: str, versions: dict):
+        pipe = redis_client.pipeline()
+        pipe.delete(_entry_key(entry_id))
+        pipe.srem(_IDS_KEY, entry_id)
+        for source in versions:
+            pipe.srem(_by_source_key(source), entry_id)
+        pipe.incr(_GEN_KEY)
+        pipe.execute()
+
+    def _ttl_for_sources(self, sources: list) -> int:
+        """인용 문서의 카테고리별 TTL 중 최솟값 (DB 조회 실패 시 기본 TTL)"""
+        if not sources or not self.category_ttls:
+            return ANSWER_CACHE_TTL
+        try:
+            from app.database import SessionLocal
+            from app import models
+            chroma_ids = [os.path.splitext(os.path.basename(s))[0] for s in sources]
+            db = SessionLocal()
+            try:
+                categories = [row[0] for row in db.query(models.Document.category)
+                              .filter(models.Document.chroma_id.in_(chroma_ids)).all()]
+            finally:
+                db.close()
+        except Exception as e:
+            print(f"⚠️ [AnswerCache] 문서 카테고리 조회 실패 (기본 TTL 사용): {e}")
+            return ANSWER_CACHE_TTL
+        ttls = [self.category_ttls.get(c, ANSWER_CACHE_TTL) for c in categories]
+        return min(ttls) if ttls else ANSWER_CACHE_TTL
+
+
+# =====================================================================
+# 전역 인스턴스 (싱글톤 패턴)
+# =====================================================================
+_cache_instance = None
+_cache_lock = threading.Lock()
+
+
+def get_answer_cache() -> AnswerCache:
+    """프로세스 공유 AnswerCache 반환"""
+    global _cache_instance
+    if _cache_instance is None:
+        with _cache_lock:
+            if _cache_instance is None:
+                _cache_instance = AnswerCache()
+    return _cache_instance
+
+
+def invalidate_source(source: str):
+    """문서 변경 알림 (캐시 비활성 시 아무것도 하지 않음, 실패해도 호출 측 작업은 계속)"""
+    if not ANSWER_CACHE:
+        return
+    try:
+        get_answer_cache().invalidate_source(source)
+    except Exception as e:
+        print(f"⚠️ [AnswerCache] 무효화 실패: {e}")
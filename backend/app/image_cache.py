@@ -0,0 +1,154 @@
+"""
+생성 이미지 결과 캐시 - 같은 파라미터(시드 포함) 재요청 시 GPU 생성 생략 (PC1 디스크)
+
+키: 정규화된 생성 파라미터의 SHA-256
+    (영문 프롬프트, 스타일, 크기, 워크플로우 이름/스텝/CFG/템플릿 해시, 시드, 배치 내 순번)
+    ComfyUI는 시드가 같으면 배치 i번째 이미지의 노이즈가 배치 크기와 무관하게 같으므로
+    순번 단위로 키를 만듭니다.
+
+저장: IMAGE_CACHE_DIR/{key}.png (Worker 업로드 시 cache_key와 함께 저장)
+조회 적중 시 파일 수정 시각을 갱신하고, 저장 시 전체 크기가 IMAGE_CACHE_MAX_MB를
+넘으면 오래 쓰이지 않은 파일부터 삭제합니다 (여러 API 프로세스가 디렉토리를 공유).
+
+사용처:
+    - image_router.generate_image: 시드를 지정한 요청이 모두 적중하면 Worker 없이 즉시 완료
+    - generate_image_task: GPU 획득 전 /image/internal/cache/fill로 확인 (재시도·중복 요청)
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+IMAGE_CACHE = os.getenv("IMAGE_CACHE", "1") == "1"
+IMAGE_CACHE_DIR = os.getenv("IMAGE_CACHE_DIR", "/app/uploads/image_cache")
+IMAGE_CACHE_MAX_MB = int(os.getenv("IMAGE_CACHE_MAX_MB", "2048"))
+
+_evict_lock = threading.Lock()
+
+
+def _normalize_size(size: str) -> str:
+    """ImageEngine._parse_size와 같은 규칙 (64의 배수, 512~2048)"""
+    try:
+        width, height = map(int, str(size).lower().split("x"))
+        width = max(512, min(2048, (width // 64) * 64))
+        height = max(512, min(2048, (height // 64) * 64))
+        return f"{width}x{height}"
+    except Exception:
+        return "1024x1024"
+
+
+def cache_key(prompt: str, style: str, size: str, workflow: str, seed: int, index: int = 0) -> str:
+    """생성 파라미터 → 결과 캐시 키 (스텝/CFG/템플릿은 워크플로우 레지스트리에서 조회)"""
+    from ai_core.workflow_registry import get_workflow_registry
+    compiled = get_workflow_registry().get(workflow)
+    params = {
+        "prompt": " ".join((prompt or "").split()),
+        "style": style or "realistic",
+        "size": _normalize_size(size),
+        "workflow": compiled.name,
+        "steps": compiled.steps,
+        "cfg": compiled.cfg,
+        "template": compiled.fingerprint,
+        "seed": int(seed),
+        "index": int(index),
+    }
+    return hashlib.sha256(json.dumps(params, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def _path(key: str) -> str:
+    # 키는 16진수 해시만 허용 (경로 조작 방지)
+    if not key or not all(c in "0123456789abcdef" for c in key):
+        raise ValueError(f"잘못된 캐시 키: {key}")
+    return os.path.join(IMAGE_CACHE_DIR, f"{key}.png")
+
+
+def contains(key: str) -> bool:
+    try:
+        return os.path.exists(_path(key))
+    except ValueError:
+        return False
+
+
+def copy_to(key: str, dest_path: str) -> int:
+    """
+    캐시 이미지를 dest_path로 복사 (적중 시 사용 시각 갱신)
+
+    Returns:
+        int | None: 복사한 파일 크기 (캐시에 없으면 None)
+    """
+    path = _path(key)
+    try:
+        shutil.copyfile(path, dest_path)
+        os.utime(path, None)
+    except FileNotFoundError:
+        return None
+    return os.path.getsize(dest_path)
+
+
+def fill(items: list, image_dir: str) -> dict:
+    """
+    여러 이미지를 캐시에서 채움 (모두 적중할 때만 복사 → 일부만 있으면 GPU 생성이 어차피 필요)
+
+    Args:
+        items: [{"image_id", "cache_key"}]
+        image_dir: 이미지 저장 디렉토리
+
+    Returns:
+        dict | None: {image_id: 파일 크기} (하나라도 없으면 None)
+    """
+    if not IMAGE_CACHE or not items or not all(contains(item["cache_key"]) for item in items):
+        return None
+    sizes = {}
+    for item in items:
+        size = copy_to(item["cache_key"], os.path.join(image_dir, f"{item['image_id']}.png"))
+        if size is None:
+            # 확인 직후 다른 프로세스가 축출한 경우
+            return None
+        sizes[item["image_id"]] = size
+    return sizes
+
+
+def store(key: str, src_path: str):
+    """생성 결과를 캐시에 저장 후 용량 초과분 축출 (실패해도 업로드는 계속)"""
+    if not IMAGE_CACHE or not key:
+        return
+    try:
+        os.makedirs(IMAGE_CACHE_DIR, exist_ok=True)
+        path = _path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        shutil.copyfile(src_path, tmp_path)
+        os.replace(tmp_path, path)
+        _evict()
+    except Exception as e:
+        print(f"⚠️ [ImageCache] 캐시 저장 실패: {e}")
+
+
+def _evict():
+    """전체 크기가 IMAGE_CACHE_MAX_MB를 넘으면 사용 시각(mtime)이 오래된 파일부터 삭제"""
+    limit = IMAGE_CACHE_MAX_MB * 1024 * 1024
+    with _evict_lock:
+        entries = []
+        total = 0
+        with os.scandir(IMAGE_CACHE_DIR) as it:
+            for entry in it:
+                if entry.name.endswith(".png") and entry.is_file():
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+        if total <= limit:
+            return
+        entries.sort()
+        removed = 0
+        for _, size, path in entries:
+            if total <= limit * 0.9:   # 여유분까지 비워 매 저장마다 축출하지 않도록
+                break
+            try:
+                os.remove(path)
+                total -= size
+                removed += 1
+            except FileNotFoundError:
+                pass
+        print(f"🗑️ [ImageCache] 용량 초과로 {removed}개 축출 (현재 {total / 1024 / 1024:.0f}MB)")
+
@@ -0,0 +1,121 @@
+"""
+생성 이미지 썸네일(WebP) 파생본 - 갤러리/목록용 작은 이미지
+
+원본 PNG(1024px, 1~2MB)를 목록 타일마다 내려받지 않도록 업로드 시점에
+IMAGE_THUMB_SIZES 크기별 WebP 썸네일과 원본 크기(가로/세로) 메타데이터를 만듭니다.
+
+저장:
+    IMAGE_DIR/thumbs/{이미지 ID}_{크기}.webp   긴 변 기준 축소 (비율 유지)
+    IMAGE_DIR/thumbs/{이미지 ID}.json          {"width", "height", "sizes"}
+
+제공: GET /image/file/{file_name}?size=256 (요청 크기 이상인 가장 작은 썸네일)
+    파일 이름이 UUID라 내용이 바뀌지 않으므로 장기 캐시 헤더(immutable)를 붙입니다.
+    이전에 생성된 이미지는 첫 요청 시 만들어 둡니다 (지연 백필).
+"""
+
+import json
+import os
+
+IMAGE_THUMB_SIZES = sorted(int(s) for s in os.getenv("IMAGE_THUMB_SIZES", "256,512").split(",") if s.strip())
+IMAGE_THUMB_QUALITY = int(os.getenv("IMAGE_THUMB_QUALITY", "80"))
+
+CACHE_HEADERS = {"Cache-Control": "public, max-age=31536000, immutable"}
+
+
+def _thumb_dir(image_dir: str) -> str:
+    return os.path.join(image_dir, "thumbs")
+
+
+def _stem(file_name: str) -> str:
+    return os.path.splitext(os.path.basename(file_name))[0]
+
+
+def _thumb_path(image_dir: str, file_name: str, size: int) -> str:
+    return os.path.join(_thumb_dir(image_dir), f"{_stem(file_name)}_{size}.webp")
+
+
+def _meta_path(image_dir: str, file_name: str) -> str:
+    return os.path.join(_thumb_dir(image_dir), f"{_stem(file_name)}.json")
+
+
+def pick_size(requested: int) -> int:
+    """요청 크기 이상인 가장 작은 썸네일 크기 (없으면 가장 큰 크기)"""
+    for size in IMAGE_THUMB_SIZES:
+        if size >= requested:
+            return size
+    return IMAGE_THUMB_SIZES[-1]
+
+
+def create_derivatives(image_dir: str, file_name: str) -> dict:
+    """
+    원본 이미지에서 크기별 WebP 썸네일 + 메타데이터 생성
+
+    Returns:
+        dict: {"width", "height", "sizes": {크기: 바이트}}
+    """
+    from PIL import Image
+
+    os.makedirs(_thumb_dir(image_dir), exist_ok=True)
+    src_path = os.path.join(image_dir, os.path.basename(file_name))
+    with Image.open(src_path) as img:
+        img.load()
+        width, height = img.size
+        source = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+
+    sizes = {}
+    for size in IMAGE_THUMB_SIZES:
+        thumb = source.copy()
+        thumb.thumbnail((size, size), Image.LANCZOS)
+        path = _thumb_path(image_dir, file_name, size)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        thumb.save(tmp_path, format="WEBP", quality=IMAGE_THUMB_QUALITY, method=4)
+        os.replace(tmp_path, path)
+        sizes[size] = os.path.getsize(path)
+
+    meta = {"width": width, "height": height, "sizes": sizes}
+    meta_path = _meta_path(image_dir, file_name)
+    tmp_path = f"{meta_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, meta_path)
+    return meta
+
+
+def get_meta(image_dir: str, file_name: str) -> dict:
+    """저장된 메타데이터 (없으면 None - 아직 생성 중이거나 백필 전)"""
+    try:
+        with open(_meta_path(image_dir, file_name), encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def get_thumbnail(image_dir: str, file_name: str, requested: int) -> str:
+    """
+    썸네일 경로 반환 (없으면 원본에서 생성 - 이전 이미지 지연 백필)
+
+    Returns:
+        str | None: 썸네일 경로 (원본이 없으면 None)
+    """
+    path = _thumb_path(image_dir, file_name, pick_size(requested))
+    if os.path.exists(path):
+        return path
+    if not os.path.exists(os.path.join(image_dir, os.path.basename(file_name))):
+        return None
+    create_derivatives(image_dir, file_name)
+    print(f"🖼️ [Thumbnail] 지연 백필 생성: {file_name}")
+    return path
+
+
+def delete_derivatives(image_dir: str, file_name: str):
+    """이미지 삭제 시 썸네일/메타데이터 삭제"""
+    for path in [_thumb_path(image_dir, file_name, size) for size in IMAGE_THUMB_SIZES] + \
+            [_meta_path(image_dir, file_name)]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def thumbnail_url(file_name: str, size: int) -> str:
+    return f"/image/file/{file_name}?size={size}"
@@ -4,6 +4,7 @@ AI Router - AI 채팅, 스트리밍, PDF 업로드 처리
 
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
 from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from app import models
@@ -12,18 +13,23 @@ from app.config import redis_client
 import shutil
 import json
 import os
+import re
 import threading
 import time
 import uuid
 
 from ai_core.llm_engine import LLMEngine, llm_lock
-from ai_core.rag_engine import RAGEngine
+from ai_core.rag_engine import get_rag_engine, RAG_WARMUP
+from ai_core.embedding_service import get_embedding_service, LANE_QUERY, LANE_DOCUMENT
+from ai_core.context_packer import pack_context
+from ai_core.retrieval_gate import RAG_GATE, DECISION_RETRIEVE, DECISION_REUSE, get_retrieval_gate
+from app.answer_cache import ANSWER_CACHE, get_answer_cache
 from worker.tasks import ingest_pdf_task, save_chat_task, update_summary_task
 
 router = APIRouter(prefix="/ai", tags=["AI Core"])
 
 llm = LLMEngine()
-rag = RAGEngine()
+rag = get_rag_engine()
 
 
 # Pydantic 요청 모델
@@ -41,9 +47,16 @@ class SummaryUpdateRequest(BaseModel):
 class ChatStopRequest(BaseModel):
     session_id: int
 
+class EmbedRequest(BaseModel):
+    texts: list[str]
+    lane: str = LANE_DOCUMENT
+
 
 def load_ai_models():
-    """서버 시작 시 LLM 모델 로딩"""
+    """서버 시작 시 LLM 모델 로딩 (RAG 워밍업은 백그라운드에서 병행)"""
+    if RAG_WARMUP:
+        rag.start_background_warmup()
+
     print("🚀 [AI Router] LLM 모델 로딩 시작...")
     try:
         llm.load_model()
@@ -52,17 +65,94 @@ def load_ai_models():
         print(f"🔥 [AI Router] 모델 로딩 실패: {e}")
 
 
+def _load_last_docs(session_id: int) -> list:
+    """세션 컨텍스트(Redis)에 저장된 직전 턴의 참고 문서"""
+    try:
+        cached_context = redis_client.get(f"session:{session_id}:context")
+        return json.loads(cached_context).get("last_docs") if cached_context else None
+    except Exception:
+        return None
+
+
+def _lookup_answer(query_vector) -> dict:
+    """답변 캐시 조회 (Redis 오류 시 캐시 없이 진행)"""
+    try:
+        return get_answer_cache().lookup(query_vector)
+    except Exception as e:
+        print(f"⚠️ [AnswerCache] 조회 실패 (무시): {e}")
+        return None
+
+
+def _store_answer(user_msg: str, query_vector, answer: str, search_results: list):
+    """생성된 답변을 답변 캐시에 저장 (실패해도 응답에는 영향 없음)"""
+    try:
+        get_answer_cache().store(user_msg, query_vector, answer, search_results)
+    except Exception as e:
+        print(f"⚠️ [AnswerCache] 저장 실패 (무시): {e}")
+
+
+async def _gated_search(user_msg: str, has_history: bool = False, last_docs: list = None) -> tuple:
+    """
+    검색 게이트 판단 → (retrieve 턴) 답변 캐시 조회 → 검색
+
+    답변 캐시는 전역 공유이고 질의 벡터만으로 찾으므로, 이전 대화(history)를 이어 생성하는 턴은
+    조회도 저장도 하지 않습니다 (다른 사용자의 대화 맥락이 섞인 답변을 재사용하지 않도록).
+
+    Returns:
+        tuple: (search_results, cache_vector, cached)
+            - cache_vector: 답변 캐시에 저장할 질의 벡터 (캐시 대상 턴이 아니면 None)
+            - cached: 답변 캐시 적중 항목 {"answer", "docs", ...} (없으면 None)
+    """
+    gate = get_retrieval_gate() if RAG_GATE else None
+    decision, reason = gate.decide(user_msg, has_history, last_docs) if gate else (DECISION_RETRIEVE, "게이트 꺼짐")
+
+    if decision != DECISION_RETRIEVE:
+        saved = gate.record(decision)
+        print(f"🚦 [Gate] {decision} ({reason}) - 검색 생략, 약 {saved * 1000:.0f}ms 절감 "
+              f"(누적 {gate.saved_sec:.1f}s, {gate.counts})")
+        return (list(last_docs) if decision == DECISION_REUSE else []), None, None
+
+    started = time.perf_counter()
+    query_vector = None
+    if ANSWER_CACHE and not has_history:
+        # 캐시 조회와 검색이 같은 질의 벡터를 사용 (임베딩 1회)
+        query_vector = await run_in_threadpool(rag.embeddings.embed_query, user_msg)
+        cached = await run_in_threadpool(_lookup_answer, query_vector)
+        if cached:
+            print(f"⚡ [AnswerCache] 적중 (유사도 {cached['similarity']:.3f}): {cached['query']}")
+            return cached["docs"], None, cached
+
+    search_results = await run_in_threadpool(rag.search, user_msg, 3, 1.0, query_vector)
+    elapsed = time.perf_counter() - started
+    if gate:
+        gate.record(decision, elapsed)
+        print(f"🚦 [Gate] retrieve ({reason}) - 검색 {elapsed * 1000:.0f}ms")
+    return search_results, query_vector, None
+
+
+def _build_context(search_results: list) -> str:
+    """검색 결과를 병합·중복 제거 후 토큰 예산 안에 배치하여 참고 자료 텍스트 생성"""
+    packed = pack_context(search_results, count_tokens=llm.count_tokens)
+    print(f"📦 [Context] 청크 {packed['chunks']}개 → 구간 {packed['segments']}개, "
+          f"프리필 {packed['naive_tokens']} → {packed['tokens']} 토큰 "
+          f"({packed['naive_tokens'] - packed['tokens']} 절감)")
+    return packed["text"]
+
+
 @router.post("/chat")
 async def chat_endpoint(req: ChatRequest):
     """RAG 기반 일반 채팅 (비스트리밍, 완성된 응답 한 번에 반환)"""
     user_msg = req.message
     print(f"📩 [User] {user_msg}")
 
-    search_results = rag.search(user_msg, k=3)
+    # 잡담은 검색 생략, 그 외에는 스레드풀에서 검색 → 동시 질의들이 임베딩 서비스에서 한 배치로 묶임
+    search_results, cache_vector, cached = await _gated_search(user_msg)
+    if cached:
+        return {"reply": cached["answer"], "context_used": cached["docs"], "cached": True}
 
     if search_results:
         print(f"🔎 [RAG] 관련 문서 {len(search_results)}개 발견")
-        context_text = "\n".join([res['content'] for res in search_results])
+        context_text = await run_in_threadpool(_build_context, search_results)
         final_prompt = f"""
         [지시사항]
         당신은 유능한 AI 어시스턴트입니다.
@@ -89,6 +179,8 @@ async def chat_endpoint(req: ChatRequest):
 
     llm.ensure_loaded()
     response = llm.chat(final_prompt)
+    if cache_vector is not None:
+        await run_in_threadpool(_store_answer, user_msg, cache_vector, response, search_results)
     return {"reply": response, "context_used": search_results}
 
 
@@ -125,6 +217,9 @@ def get_chat_history(session_id: int, db: Session = Depends(get_db)):
     ]
 
     result = {"summary": session.current_summary, "messages": messages_list}
+    last_docs = next((msg.reference_docs for msg in reversed(db_messages) if msg.reference_docs), None)
+    if last_docs:
+        result["last_docs"] = last_docs
 
     redis_client.setex(redis_key, 3600, json.dumps(result, ensure_ascii=False))
     print(f"✅ [Cache Refill] 세션 {session_id} - 요약 + 최근 {len(messages_list)}개 메시지 저장")
@@ -132,7 +227,8 @@ def get_chat_history(session_id: int, db: Session = Depends(get_db)):
     return result
 
 
-def background_producer(session_id: int, user_msg: str, final_input: str, history: list, search_results: list):
+def background_producer(session_id: int, user_msg: str, final_input: str, history: list, search_results: list,
+                        cache_vector=None):
     """백그라운드 스레드에서 LLM 응답 생성 → Redis 큐 푸시 (Producer)"""
     stream_key = f"session:{session_id}:stream_queue"
     stop_key = f"session:{session_id}:stop"
@@ -182,6 +278,26 @@ def background_producer(session_id: int, user_msg: str, final_input: str, histor
 
     redis_client.expire(stream_key, 60)
 
+    if cache_vector is not None:
+        _store_answer(user_msg, cache_vector, full_ai_response, search_results)
+
+
+def _replay_cached_answer(session_id: int, user_msg: str, cached: dict):
+    """답변 캐시 적중 시 LLM 없이 저장된 답변을 SSE로 바로 전송 (대화 기록은 평소처럼 저장)"""
+    docs = cached["docs"]
+    if docs:
+        yield f"DOCS_DATA:{json.dumps(docs, ensure_ascii=False)}\n\n"
+    # 토큰 스트림과 같은 형태로 전송 (줄바꿈은 단독 조각으로 보내 SSE 구분자와 섞이지 않게 함)
+    for piece in re.findall(r"\n|[^\n]{1,16}", cached["answer"]):
+        yield f"TEXT_DATA:{piece}\n\n"
+
+    save_chat_task.delay(
+        session_id=session_id,
+        user_msg=user_msg,
+        ai_msg=cached["answer"],
+        ref_docs_json=json.dumps(docs, ensure_ascii=False) if docs else None
+    )
+
 
 @router.post("/chat/stream")
 async def chat_stream_endpoint(req: ChatStreamRequest):
@@ -189,17 +305,21 @@ async def chat_stream_endpoint(req: ChatStreamRequest):
     session_id = req.session_id
     user_msg = req.message
 
-    search_results = rag.search(user_msg, k=3)
+    # 후속 질문은 직전 턴의 참고 문서 재사용, 잡담은 검색 생략
+    last_docs = _load_last_docs(session_id) if RAG_GATE else None
+    search_results, cache_vector, cached = await _gated_search(user_msg, bool(req.history), last_docs)
+    if cached:
+        return StreamingResponse(_replay_cached_answer(session_id, user_msg, cached), media_type="text/event-stream")
 
     if search_results:
-        context_text = "\n".join([res['content'] for res in search_results])
+        context_text = await run_in_threadpool(_build_context, search_results)
         final_input = f"""[참고 자료]\n{context_text}\n\n[질문]\n{user_msg}\n\n자료를 바탕으로 답변하세요."""
     else:
         final_input = user_msg
 
     t = threading.Thread(
         target=background_producer,
-        args=(session_id, user_msg, final_input, req.history, search_results),
+        args=(session_id, user_msg, final_input, req.history, search_results, cache_vector),
         daemon=True
     )
     t.start()
@@ -329,6 +449,15 @@ async def generate_chat_background(req: ChatRequest):
     return {"task_id": task_id, "status": "processing"}
 
 
+@router.post("/internal/embed")
+def internal_embed(req: EmbedRequest):
+    """공유 임베딩 서비스 내부 API (EMBEDDING_SERVICE_URL로 이 서버를 지정한 워커가 호출)"""
+    if req.lane not in (LANE_QUERY, LANE_DOCUMENT):
+        raise HTTPException(status_code=400, detail=f"알 수 없는 레인: {req.lane}")
+    embeddings = get_embedding_service(default_device="cpu").encode(req.texts, req.lane)
+    return {"embeddings": embeddings}
+
+
 @router.get("/tasks/{task_id}")
 async def get_task_result(task_id: str):
     """백그라운드 LLM 작업 결과 조회 (Worker polling용)"""
@@ -12,6 +12,7 @@ PDF 파일 업로드 및 관리 기능 제공:
 
 from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File, Form, Request
 from fastapi.responses import FileResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from sqlalchemy import desc, or_
 from datetime import datetime
@@ -27,6 +28,7 @@ from app import models
 from app.crud import create_system_log
 from app.config import redis_client
 from app.utils import format_file_size
+from app.answer_cache import invalidate_source
 
 # Celery Worker에게 RAG 작업 요청 (런타임에 lazy import)
 # Worker가 없는 환경에서도 기본 업로드 기능은 동작하도록 함
@@ -43,19 +45,15 @@ def get_celery_tasks():
             print(f"⚠️ [Document Router] Celery 태스크 로드 실패 (RAG 비활성화): {e}")
     return ingest_pdf_task
 
-# RAGEngine 싱글톤 (PC1에서 직접 벡터 저장/삭제용)
-_rag_engine = None
-
+# RAGEngine 싱글톤 (PC1에서 직접 벡터 저장/삭제용, ai_router와 같은 인스턴스 공유)
 def get_rag_engine():
-    """RAGEngine을 런타임에 로드 (lazy singleton)"""
-    global _rag_engine
-    if _rag_engine is None:
-        try:
-            from ai_core.rag_engine import RAGEngine
-            _rag_engine = RAGEngine()
-        except Exception as e:
-            print(f"⚠️ [Document Router] RAGEngine 로드 실패: {e}")
-    return _rag_engine
+    """프로세스 공유 RAGEngine을 런타임에 로드 (lazy singleton)"""
+    try:
+        from ai_core.rag_engine import get_rag_engine as _get_rag_engine
+        return _get_rag_engine()
+    except Exception as e:
+        print(f"⚠️ [Document Router] RAGEngine 로드 실패: {e}")
+        return None
 
 
 router = APIRouter(
@@ -342,6 +340,17 @@ def update_document(document_id: int, data: DocumentUpdate, db: Session = Depend
     db.commit()
     db.refresh(document)
 
+    # 제목/요약이 바뀌면 문서 단위 벡터(2단계 검색 1단계용)도 갱신
+    if (data.title is not None or data.summary is not None) \
+            and document.file_ext == "pdf" and document.chroma_id and document.status == "INDEXED":
+        rag = get_rag_engine()
+        if rag:
+            try:
+                file_path = os.path.join(UPLOAD_DIR, f"{document.chroma_id}.{document.file_ext}")
+                rag.upsert_document_vector(file_path, document.title, document.summary)
+            except Exception as e:
+                print(f"⚠️ [Document Update] 문서 벡터 갱신 실패: {e}")
+
     return {
         "message": "문서가 수정되었습니다.",
         "document": {
@@ -380,6 +389,8 @@ def delete_document(document_id: int, request: Request, user_id: int = Query(...
             try:
                 result = rag.delete_by_source(file_path)
                 vector_deleted = True
+                # 이 문서를 인용한 캐시 답변 무효화
+                invalidate_source(file_path)
                 print(f"🗑️ [Document Delete] ChromaDB 벡터 직접 삭제 완료: {result}")
             except Exception as e:
                 print(f"⚠️ [Document Delete] 벡터 삭제 실패: {e}")
@@ -499,12 +510,76 @@ async def internal_store_vectors(request: Request):
     if not rag:
         raise HTTPException(status_code=500, detail="RAGEngine을 로드할 수 없습니다.")
 
-    result = rag.store_precomputed_vectors(
-        embeddings=embeddings,
-        texts=texts,
-        metadatas=metadatas
+    # 저장 실패는 500으로 응답 → Worker가 실패로 보고 이미 저장한 청크를 정리 (200이면 누락된 채 INDEXED)
+    try:
+        result = rag.store_precomputed_vectors(
+            embeddings=embeddings,
+            texts=texts,
+            metadatas=metadatas
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"벡터 저장 실패: {e}")
+
+    # 재학습된 문서를 인용한 캐시 답변 무효화 (문서 버전 증가)
+    for source in {m.get("source") for m in metadatas if m.get("source")}:
+        invalidate_source(source)
+
+    return {"message": result}
+
+
+@router.post("/internal/store-document-vector")
+async def internal_store_document_vector(request: Request):
+    """
+    Worker가 문서 단위 벡터(제목 + 요약)를 전송하는 내부 API
+
+    ingest_pdf_task가 요약 생성 후 호출하며, 2단계 검색의 1단계(후보 문서 선택)에 사용됩니다.
+
+    Body (JSON):
+        source: 문서 파일 경로 (청크 메타데이터 source와 동일)
+        title: 문서 제목
+        summary: 문서 요약
+        embedding: 제목 + 요약 벡터 (없으면 PC1에서 임베딩)
+    """
+    data = await request.json()
+
+    source = data.get("source")
+    if not source:
+        raise HTTPException(status_code=400, detail="source 필드가 필요합니다.")
+
+    rag = get_rag_engine()
+    if not rag:
+        raise HTTPException(status_code=500, detail="RAGEngine을 로드할 수 없습니다.")
+
+    await run_in_threadpool(
+        rag.upsert_document_vector,
+        source, data.get("title"), data.get("summary"), data.get("embedding")
     )
+    return {"message": "문서 벡터 저장 완료"}
+
+
+@router.post("/internal/delete-vectors")
+async def internal_delete_vectors(request: Request):
+    """
+    Worker가 학습에 실패한 문서의 벡터를 지우는 내부 API
+
+    ingest_pdf_task는 페이지 윈도우마다 바로 저장하므로, 중간에 실패하면 이미 저장된 청크와
+    문서 단위 벡터를 삭제하여 ERROR 문서가 검색되지 않도록 합니다.
+
+    Body (JSON):
+        source: 문서 파일 경로 (청크 메타데이터 source와 동일)
+    """
+    data = await request.json()
+
+    source = data.get("source")
+    if not source:
+        raise HTTPException(status_code=400, detail="source 필드가 필요합니다.")
+
+    rag = get_rag_engine()
+    if not rag:
+        raise HTTPException(status_code=500, detail="RAGEngine을 로드할 수 없습니다.")
 
+    result = await run_in_threadpool(rag.delete_by_source, source)
+    invalidate_source(source)
     return {"message": result}
 
 
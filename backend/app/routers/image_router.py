@@ -14,7 +14,8 @@ Note:
 """
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Request, UploadFile, File, Form
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from sqlalchemy import desc
 from datetime import datetime, timedelta, timezone
@@ -24,6 +25,8 @@ import uuid
 import os
 import re
 import json
+import random
+import base64
 
 # 한국 시간대 (UTC+9)
 KST = timezone(timedelta(hours=9))
@@ -33,9 +36,14 @@ from app.config import redis_client
 from app.utils import format_file_size
 from app import models
 from app.crud import create_system_log
+from app import image_cache
+from app import image_thumbnails
+from app import admission
 
 # Worker Task import
 from worker.tasks import generate_image_task
+from worker import image_batch
+from ai_core.workflow_registry import get_workflow_registry
 
 
 router = APIRouter(
@@ -58,6 +66,14 @@ class ImageGenerateRequest(BaseModel):
     prompt: str
     style: Optional[str] = "realistic"  # realistic, anime, cartoon, sketch, etc.
     size: Optional[str] = "1024x1024"   # 512x512, 1024x1024, etc.
+    variations: Optional[int] = 1       # 한 번에 생성할 이미지 수 (샘플러 1회, 최대 IMAGE_MAX_BATCH)
+    workflow: Optional[str] = None      # ComfyUI 워크플로우 (GET /image/workflows, None이면 기본)
+    seed: Optional[int] = None          # 시드 (지정 시 같은 요청은 결과 캐시에서 즉시 반환)
+
+
+class ImageCacheFillRequest(BaseModel):
+    """Worker 결과 캐시 채우기 요청 (items: [{"image_id", "cache_key"}])"""
+    items: list
 
 
 # ============================================================================
@@ -141,6 +157,16 @@ Instead, write a flowing natural language description (e.g., "A clear blue sky w
 
 
 
+def _thumbnail_fields(file_name: str, size: int) -> dict:
+    """목록 타일용 썸네일 URL + 원본 가로/세로 (메타데이터가 아직 없으면 None)"""
+    meta = image_thumbnails.get_meta(IMAGE_DIR, file_name) or {}
+    return {
+        "thumbnailUrl": image_thumbnails.thumbnail_url(file_name, size),
+        "width": meta.get("width"),
+        "height": meta.get("height"),
+    }
+
+
 def format_datetime_kst(dt: datetime) -> str:
     """UTC datetime을 한국 시간(KST)으로 변환하여 포맷팅"""
     if dt is None:
@@ -161,13 +187,15 @@ def generate_image(data: ImageGenerateRequest, request: Request, db: Session = D
     프롬프트를 기반으로 AI 이미지를 생성합니다. (비동기)
 
     프로세스:
-    1. 한글 프롬프트인 경우 PC1 LLM으로 영어 번역
-    2. DB에 초기 레코드 생성 (status="PROCESSING")
-    3. PC2 Worker에 이미지 생성 작업 전달
-    4. 즉시 응답 반환 (task_id 포함)
+    1. 시드 지정 시 결과 캐시 확인 (모두 적중하면 접수 제어/3~4 생략)
+    2. 접수 제어 - 대기열이 한도를 넘으면 429 (app.admission)
+    3. DB에 초기 레코드 생성 (status="PROCESSING")
+    4. 한글 프롬프트인 경우 PC1 LLM으로 영어 번역
+    5. PC2 Worker에 이미지 생성 작업 전달
+    6. 즉시 응답 반환 (task_id, 대기 순번/예상 완료 시간 포함)
 
     Args:
-        data: 이미지 생성 요청 데이터 (user_id, prompt, style, size)
+        data: 이미지 생성 요청 데이터 (user_id, prompt, style, size, variations, workflow, seed)
 
     Returns:
         생성 요청 정보 (이미지는 Worker에서 비동기 생성)
@@ -176,6 +204,9 @@ def generate_image(data: ImageGenerateRequest, request: Request, db: Session = D
         - 스타일: realistic, anime, cartoon, sketch, watercolor
         - 크기: 512x512, 768x768, 1024x1024
         - 한글 프롬프트 자동 번역 지원
+        - variations > 1: 같은 프롬프트로 여러 장을 샘플러 1회에 생성 (응답 images 목록)
+        - seed 지정 + 같은 파라미터로 생성한 적 있음: GPU 없이 결과 캐시에서 즉시 완료 (cached=True)
+        - 대기열 초과 시 429 + Retry-After (ADMISSION_IMAGE_MODE=defer면 예약 후 대기열이 줄면 실행)
     """
     # 사용자 존재 확인
     user = db.query(models.User).filter(models.User.id == data.user_id).first()
@@ -186,41 +217,93 @@ def generate_image(data: ImageGenerateRequest, request: Request, db: Session = D
     if not data.prompt.strip():
         raise HTTPException(status_code=400, detail="프롬프트를 입력해주세요.")
 
-    # 1. 한글 프롬프트 번역 (PC1 LLM 사용)
+    # 워크플로우 검증
+    if data.workflow and data.workflow not in get_workflow_registry().names():
+        raise HTTPException(status_code=400, detail=f"지원하지 않는 워크플로우입니다: {data.workflow}")
+
     original_prompt = data.prompt.strip()
-    english_prompt = _translate_with_llm(original_prompt)
 
-    # 2. 이미지 ID 생성
-    image_id = str(uuid.uuid4())
+    # 1. 이미지 ID 생성 (variations 수만큼)
+    variations = max(1, min(data.variations or 1, image_batch.IMAGE_MAX_BATCH))
+    image_ids = [str(uuid.uuid4()) for _ in range(variations)]
+    image_id = image_ids[0]
     file_ext = "png"
-    file_name = f"{image_id}.{file_ext}"
+    task_id = str(uuid.uuid4())
+
+    # 2. 결과 캐시 확인 (시드를 지정한 같은 요청 → 번역/Worker/GPU 없이 즉시 완료)
+    #    번역 결과는 요청마다 달라질 수 있으므로 키는 원본 프롬프트 기준
+    sizes = None
+    if data.seed is not None:
+        sizes = image_cache.fill([
+            {"image_id": iid,
+             "cache_key": image_cache.cache_key(original_prompt, data.style, data.size, data.workflow, data.seed, index)}
+            for index, iid in enumerate(image_ids)
+        ], IMAGE_DIR)
+    cached = bool(sizes)
+
+    # 접수 제어 (캐시 적중은 GPU를 쓰지 않으므로 생략) - 거절이면 DB 레코드를 만들기 전에 429
+    decision = None if cached else admission.check("image")
+    if decision and decision["action"] == "reject":
+        admission.reject("image", decision)
 
     # 3. DB에 초기 레코드 생성 (status는 없으므로 img_size=0으로 처리 중 표시)
-    new_image = models.GeneratedImage(
-        user_id=data.user_id,
-        prompt=original_prompt,  # 원본 한글 프롬프트 저장
-        img_file=file_name,
-        img_ext=file_ext,
-        img_size=0  # Worker 완료 후 업데이트
-    )
+    new_images = [
+        models.GeneratedImage(
+            user_id=data.user_id,
+            prompt=original_prompt,  # 원본 한글 프롬프트 저장
+            img_file=f"{variation_id}.{file_ext}",
+            img_ext=file_ext,
+            img_size=sizes[variation_id] if cached else 0  # Worker 완료 후 업데이트
+        )
+        for variation_id in image_ids
+    ]
 
-    db.add(new_image)
+    db.add_all(new_images)
     db.commit()
-    db.refresh(new_image)
-
-    # 4. Worker에 이미지 생성 작업 전달
-    task = generate_image_task.delay(
-        image_id=image_id,
-        prompt=english_prompt,  # 번역된 영어 프롬프트 전달
-        style=data.style,
-        size=data.size,
-        user_id=data.user_id
-    )
-
-    print(f"🎨 [API] 이미지 생성 요청 → Worker")
-    print(f"   - Image ID: {image_id}")
-    print(f"   - Task ID: {task.id}")
-    print(f"   - Prompt: {english_prompt[:50]}...")
+    for image in new_images:
+        db.refresh(image)
+    new_image = new_images[0]
+
+    if cached:
+        redis_client.setex(f"image_task:{task_id}:progress", 600, json.dumps(
+            {"status": "completed", "progress": 100, "message": "이미지 생성이 완료되었습니다! (캐시)"},
+            ensure_ascii=False))
+        print(f"⚡ [API] 이미지 결과 캐시 적중 - Worker 생략 ({len(sizes)}장, Task ID: {task_id})")
+    else:
+        # 4. 한글 프롬프트 번역 (PC1 LLM 사용)
+        english_prompt = _translate_with_llm(original_prompt)
+        seed = data.seed if data.seed is not None else random.randrange(2 ** 32)
+
+        # 5. 배치 대기열 등록 후 Worker에 이미지 생성 작업 전달
+        #    (같은 파라미터의 대기 요청은 먼저 실행되는 Worker가 묶어서 생성)
+        #    시드를 지정한 요청은 등록하지 않음 → 다른 작업의 시드/순번으로 생성되지 않음
+        if data.seed is None:
+            image_batch.register_job(
+                image_batch.batch_key(english_prompt, data.style, data.size, data.workflow),
+                task_id, image_ids, data.user_id, cache_prompt=original_prompt
+            )
+        task_kwargs = {
+            "image_id": image_id,
+            "prompt": english_prompt,  # 번역된 영어 프롬프트 전달
+            "style": data.style,
+            "size": data.size,
+            "user_id": data.user_id,
+            "image_ids": image_ids,
+            "workflow": data.workflow,
+            "seed": seed,
+            "cache_prompt": original_prompt,
+        }
+        # 발행 실패 시 미완료 등록을 되돌리고 예약 목록으로 (DB 레코드가 이미 있으므로 500 대신 나중에 발행)
+        decision = admission.publish("image", generate_image_task, task_id, task_kwargs, decision)
+        redis_client.setex(f"image_task:{task_id}:progress", max(600, decision["etaSec"] + 600), json.dumps(
+            {"status": "pending", "progress": 0, "message": admission.queue_message(decision)},
+            ensure_ascii=False))
+
+        queue_label = "예약" if decision["action"] == "defer" else f"순번 {decision['position']}"
+        print(f"🎨 [API] 이미지 생성 요청 → Worker ({queue_label}, 예상 {decision['etaSec']}초)")
+        print(f"   - Image ID: {image_id} (x{variations})")
+        print(f"   - Task ID: {task_id}")
+        print(f"   - Prompt: {english_prompt[:50]}...")
 
     # 시스템 로그 기록
     create_system_log(
@@ -233,17 +316,25 @@ def generate_image(data: ImageGenerateRequest, request: Request, db: Session = D
         details=f"이미지 생성 요청: {original_prompt[:50]}..."
     )
 
+    images = [
+        {
+            "id": image.id,
+            "prompt": image.prompt,
+            "fileName": image.img_file,
+            "imageUrl": f"/image/file/{image.img_file}",
+            "thumbnailUrl": image_thumbnails.thumbnail_url(image.img_file, 512),
+            "status": "completed" if cached else "processing",
+            "createdAt": format_datetime_kst(image.created_at)
+        }
+        for image in new_images
+    ]
     return {
         "message": "이미지 생성 요청이 접수되었습니다. 백그라운드에서 생성 중입니다.",
-        "image": {
-            "id": new_image.id,
-            "prompt": new_image.prompt,
-            "fileName": new_image.img_file,
-            "imageUrl": f"/image/file/{new_image.img_file}",
-            "status": "processing",
-            "createdAt": format_datetime_kst(new_image.created_at)
-        },
-        "taskId": task.id
+        "image": images[0],
+        "images": images,
+        "taskId": task_id,
+        "cached": cached,
+        "queue": admission.describe(decision) if decision else None
     }
 
 
@@ -251,6 +342,12 @@ def generate_image(data: ImageGenerateRequest, request: Request, db: Session = D
 # 2. 이미지 목록 조회 (갤러리)
 # ============================================================================
 
+@router.get("/workflows")
+def get_image_workflows():
+    """선택 가능한 이미지 생성 워크플로우 목록 (이름, 표시 이름, 기본 스텝/CFG)"""
+    return {"workflows": get_workflow_registry().describe()}
+
+
 @router.get("/list/{user_id}")
 def get_image_list(
     user_id: int,
@@ -301,6 +398,7 @@ def get_image_list(
         "promptPreview": img.prompt[:50] + "..." if len(img.prompt) > 50 else img.prompt,
         "fileName": img.img_file,
         "imageUrl": f"/image/file/{img.img_file}",
+        **_thumbnail_fields(img.img_file, 512),
         "fileSize": img.img_size,
         "fileSizeText": format_file_size(img.img_size) if img.img_size > 0 else "생성 중...",
         "status": "completed" if img.img_size > 0 else "processing",
@@ -333,19 +431,25 @@ def get_image_generation_status(task_id: str):
         task_id: Celery Task ID
 
     Returns:
-        진행률 정보 (status, progress, message)
+        진행률 정보 (status, progress, message, 샘플링 중이면 previewUrl/previewStep)
 
     Note:
         - Worker에서 Redis에 저장한 진행률 정보를 조회
         - 프론트엔드에서 폴링으로 호출
+        - 샘플링 진행률은 ComfyUI 스텝 기준 35% ~ 85%
     """
     redis_key = f"image_task:{task_id}:progress"
 
     try:
-        cached_data = redis_client.get(redis_key)
+        cached_data, preview_data = redis_client.mget(redis_key, f"image_task:{task_id}:preview")
 
         if cached_data:
             progress_data = json.loads(cached_data)
+            if preview_data and progress_data.get("status") == "processing":
+                preview = json.loads(preview_data)
+                # step을 쿼리에 붙여 새 미리보기가 저장될 때마다 <img> src가 바뀌도록 함
+                progress_data["previewStep"] = preview.get("step", 0)
+                progress_data["previewUrl"] = f"/image/preview/{task_id}?step={preview.get('step', 0)}"
             return progress_data
         else:
             # 캐시에 데이터가 없으면 대기 중 상태
@@ -364,6 +468,32 @@ def get_image_generation_status(task_id: str):
         }
 
 
+@router.get("/preview/{task_id}")
+def get_image_generation_preview(task_id: str):
+    """
+    샘플링 중인 이미지의 저해상도 미리보기를 반환합니다.
+
+    Note:
+        - Worker가 ComfyUI 미리보기 프레임을 IMAGE_PREVIEW_INTERVAL마다 Redis에 저장 (최신 1장)
+        - ComfyUI가 --preview-method 옵션 없이 실행되면 미리보기가 없음 (404)
+        - 생성 완료/실패 시 삭제됨
+    """
+    try:
+        preview_data = redis_client.get(f"image_task:{task_id}:preview")
+    except Exception as e:
+        print(f"⚠️ [Preview] Redis 조회 실패: {e}")
+        preview_data = None
+    if not preview_data:
+        raise HTTPException(status_code=404, detail="미리보기가 없습니다.")
+
+    preview = json.loads(preview_data)
+    return Response(
+        content=base64.b64decode(preview["data"]),
+        media_type=f"image/{preview.get('format', 'jpeg')}",
+        headers={"Cache-Control": "no-store"}
+    )
+
+
 # ============================================================================
 # 3-1. 내부 이미지 업로드 (Worker → PC1 HTTP 전송용)
 # ============================================================================
@@ -371,7 +501,8 @@ def get_image_generation_status(task_id: str):
 @router.post("/internal/upload")
 async def internal_upload_image(
     file: UploadFile = File(...),
-    image_id: str = Form(...)
+    image_id: str = Form(...),
+    cache_key: Optional[str] = Form(None)
 ):
     """
     PC2 Worker에서 생성된 이미지를 HTTP로 수신하여 PC1 로컬 디스크에 저장합니다.
@@ -383,6 +514,7 @@ async def internal_upload_image(
     Args:
         file: 이미지 파일 (PNG)
         image_id: 이미지 UUID (파일명으로 사용)
+        cache_key: 결과 캐시 키 (있으면 app.image_cache에도 저장)
 
     Returns:
         저장된 파일 정보 (경로, 이름, 크기)
@@ -397,14 +529,39 @@ async def internal_upload_image(
     file_size = len(content)
     print(f"📥 [API] 워커 이미지 수신 완료: {file_name} ({file_size} bytes)")
 
+    # 목록용 WebP 썸네일 + 가로/세로 메타데이터 (실패해도 첫 요청 시 지연 생성)
+    meta = {}
+    try:
+        meta = await run_in_threadpool(image_thumbnails.create_derivatives, IMAGE_DIR, file_name)
+    except Exception as e:
+        print(f"⚠️ [API] 썸네일 생성 실패 (요청 시 재시도): {e}")
+
+    if cache_key:
+        await run_in_threadpool(image_cache.store, cache_key, file_path)
+
     return {
         "status": "success",
         "file_path": file_path,
         "file_name": file_name,
-        "file_size": file_size
+        "file_size": file_size,
+        "width": meta.get("width"),
+        "height": meta.get("height")
     }
 
 
+@router.post("/internal/cache/fill")
+def internal_fill_from_cache(data: ImageCacheFillRequest):
+    """
+    결과 캐시에서 이미지 파일 채우기 (Worker가 GPU 획득 전에 호출)
+
+    요청한 이미지가 모두 캐시에 있을 때만 복사합니다 (일부만 있으면 어차피 생성 필요).
+
+    Returns:
+        {"sizes": {image_id: 파일 크기}} - 하나라도 없으면 sizes=None
+    """
+    return {"sizes": image_cache.fill(data.items, IMAGE_DIR)}
+
+
 # ============================================================================
 # 4. 이미지 상세 조회
 # ============================================================================
@@ -434,6 +591,7 @@ def get_image_detail(image_id: int, db: Session = Depends(get_db)):
         "fileSize": image.img_size,
         "fileSizeText": format_file_size(image.img_size) if image.img_size > 0 else "생성 중...",
         "imageUrl": f"/image/file/{image.img_file}",
+        **_thumbnail_fields(image.img_file, 512),
         "status": "completed" if image.img_size > 0 else "processing",
         "authorId": image.user_id,
         "authorName": author.name if author else "알 수 없음",
@@ -446,22 +604,33 @@ def get_image_detail(image_id: int, db: Session = Depends(get_db)):
 # ============================================================================
 
 @router.get("/file/{file_name}")
-def get_image_file(file_name: str):
+def get_image_file(
+    file_name: str,
+    size: Optional[int] = Query(None, ge=16, le=2048, description="썸네일 긴 변 크기 (없으면 원본 PNG)")
+):
     """
     이미지 파일을 반환합니다.
 
     Args:
         file_name: 이미지 파일명
+        size: 썸네일 크기 (지정 시 IMAGE_THUMB_SIZES 중 가장 가까운 WebP 썸네일)
 
     Returns:
-        이미지 파일
+        이미지 파일 (파일 이름이 UUID라 내용이 바뀌지 않으므로 장기 캐시)
     """
+    file_name = os.path.basename(file_name)
     file_path = os.path.join(IMAGE_DIR, file_name)
 
+    if size:
+        thumb_path = image_thumbnails.get_thumbnail(IMAGE_DIR, file_name, size)
+        if thumb_path is None:
+            raise HTTPException(status_code=404, detail="이미지 파일을 찾을 수 없습니다.")
+        return FileResponse(thumb_path, media_type="image/webp", headers=image_thumbnails.CACHE_HEADERS)
+
     if not os.path.exists(file_path):
         raise HTTPException(status_code=404, detail="이미지 파일을 찾을 수 없습니다.")
 
-    return FileResponse(file_path, media_type="image/png")
+    return FileResponse(file_path, media_type="image/png", headers=image_thumbnails.CACHE_HEADERS)
 
 
 # ============================================================================
@@ -490,6 +659,7 @@ def delete_image(image_id: int, request: Request, user_id: int = None, db: Sessi
     file_path = os.path.join(IMAGE_DIR, image.img_file)
     if os.path.exists(file_path):
         os.remove(file_path)
+    image_thumbnails.delete_derivatives(IMAGE_DIR, image.img_file)
 
     # DB에서 삭제
     db.delete(image)
@@ -535,6 +705,7 @@ def get_recent_images(user_id: int, limit: int = 6, db: Session = Depends(get_db
             "prompt": img.prompt,
             "promptPreview": img.prompt[:30] + "..." if len(img.prompt) > 30 else img.prompt,
             "imageUrl": f"/image/file/{img.img_file}",
+            **_thumbnail_fields(img.img_file, 256),
             "status": "completed" if img.img_size > 0 else "processing",
             "createdAt": format_datetime_kst(img.created_at)
         } for img in images]
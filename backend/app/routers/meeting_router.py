@@ -24,6 +24,7 @@ from app.database import get_db
 from app import models
 from app.crud import create_system_log
 from app.config import redis_client
+from app import admission
 from app.utils import format_duration, get_status_text
 
 # Celery STT 작업 (런타임에 lazy import)
@@ -277,7 +278,10 @@ async def upload_meeting(
         file: 음성 파일
 
     Returns:
-        생성된 회의록 정보
+        생성된 회의록 정보 (queue: STT 대기 순번 / 예상 완료 시간)
+
+    Note:
+        STT 대기열이 한도를 넘으면 예약 후 대기열이 줄면 실행 (ADMISSION_STT_MODE=reject면 429)
     """
     # 사용자 존재 확인
     user = db.query(models.User).filter(models.User.id == user_id).first()
@@ -294,6 +298,11 @@ async def upload_meeting(
             detail=f"지원하지 않는 파일 형식입니다. 지원 형식: {', '.join(allowed_extensions)}"
         )
 
+    # 접수 제어 - 거절이면 파일을 저장하기 전에 429
+    decision = admission.check("stt")
+    if decision["action"] == "reject":
+        admission.reject("stt", decision)
+
     # 파일 저장
     file_id = str(uuid.uuid4())
     file_name = f"{file_id}.{file_ext}"
@@ -324,19 +333,27 @@ async def upload_meeting(
     db.commit()
     db.refresh(new_meeting)
 
-    # Celery STT 작업 발행 (PC2 Worker의 gpu_stt 큐로 전달)
+    # Celery STT 작업 발행 (PC2 Worker의 gpu_stt 큐로 전달, 대기열 초과 시 예약)
     stt_task_id = None
     stt_task = _get_stt_task()
     if stt_task:
         try:
-            audio_filename = file_name  # {uuid}.{ext} 형식
-            result = stt_task.delay(
-                meeting_id=new_meeting.id,
-                audio_filename=audio_filename,
-                language="ko"
-            )
-            stt_task_id = result.id
-            print(f"[Meeting Upload] STT 작업 발행 완료 (Celery Task ID: {stt_task_id})")
+            task_id = str(uuid.uuid4())
+            task_kwargs = {
+                "meeting_id": new_meeting.id,
+                "audio_filename": file_name,  # {uuid}.{ext} 형식
+                "language": "ko",
+            }
+            # 발행 실패 시 미완료 등록을 되돌리고 예약 목록으로 (dispatch_deferred가 재발행)
+            decision = admission.publish("stt", stt_task, task_id, task_kwargs, decision)
+            if decision["action"] == "defer":
+                print(f"[Meeting Upload] STT 작업 예약 (Task ID: {task_id})")
+            else:
+                print(f"[Meeting Upload] STT 작업 발행 완료 (Celery Task ID: {task_id}, 순번 {decision['position']})")
+            stt_task_id = task_id
+            redis_client.setex(f"stt_task:{task_id}:progress", max(600, decision["etaSec"] + 600), json.dumps(
+                {"status": "pending", "progress": 0, "message": admission.queue_message(decision)},
+                ensure_ascii=False))
         except Exception as e:
             print(f"[Meeting Upload] STT 작업 발행 실패: {e}")
     else:
@@ -361,7 +378,8 @@ async def upload_meeting(
             "status": new_meeting.status,
             "taskId": new_meeting.task_id,
             "sttTaskId": stt_task_id
-        }
+        },
+        "queue": admission.describe(decision) if stt_task_id else None
     }
 
 
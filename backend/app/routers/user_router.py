@@ -10,6 +10,7 @@ from typing import Optional
 from pydantic import BaseModel
 from app.database import get_db
 from app import models
+from app import image_thumbnails
 from app.utils import format_file_size, format_duration, verify_password, hash_password
 
 
@@ -135,6 +136,8 @@ def get_recent_images(user_id: int, limit: int = 5, db: Session = Depends(get_db
         "id": img.id,
         "prompt": img.prompt[:50] + "..." if len(img.prompt) > 50 else img.prompt,
         "imgFile": img.img_file,
+        "imageUrl": f"/image/file/{img.img_file}",
+        "thumbnailUrl": image_thumbnails.thumbnail_url(img.img_file, 256),
         "imgExt": img.img_ext,
         "imgSize": format_file_size(img.img_size),
         "date": img.created_at.strftime("%Y-%m-%d")
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+벡터 저장소 콜드 스타트 벤치마크 - 배포(재시작) 후 첫 빠른 질의까지의 시간
+
+합성 local 인덱스를 만든 뒤 새 프로세스를 띄워 "재시작 직후" 상황을 재현합니다.
+자식 프로세스 시작 전에 인덱스 파일을 OS 페이지 캐시에서 내보내므로 (posix_fadvise DONTNEED)
+실제 재배포처럼 디스크에서 읽는 비용이 포함됩니다.
+
+측정 항목:
+    - 저장소 열기 시간 (스냅샷 순차 읽기 + memmap/sqlite 열기)
+    - 워밍업 시간 (--warmup 시)
+    - 첫 질의 지연
+    - 첫 빠른 질의까지의 시간 (프로세스 시작 기준, 질의 지연이 웜 상태 p50의 2배 이하로 떨어진 시점)
+
+임베딩 모델 로드 시간은 포함하지 않습니다 (벡터 저장소만 측정).
+
+실행법 (backend 디렉토리에서):
+    python -m benchmarks.bench_cold_start --size 200000 --dim 768 --lib hnswlib
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.bench_vector_index import build_store, make_corpus, make_queries
+
+
+def evict_page_cache(index_dir: str):
+    """인덱스 디렉토리 파일을 페이지 캐시에서 제거 (root 권한 불필요)"""
+    for name in os.listdir(index_dir):
+        path = os.path.join(index_dir, name)
+        if os.path.isfile(path) and hasattr(os, "posix_fadvise"):
+            with open(path, "rb") as f:
+                os.fsync(f.fileno())
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+
+
+def child(args):
+    """새 프로세스에서 저장소를 열고 빠른 질의가 나올 때까지 질의"""
+    t0 = time.perf_counter()
+    from ai_core.vector_store import LocalAnnVectorStore
+    store = LocalAnnVectorStore(index_dir=args.index_dir, library=args.lib, quant=args.quant)
+    open_sec = time.perf_counter() - t0
+
+    warmup_sec = 0.0
+    if args.warmup:
+        warmup_sec = store.warmup()["seconds"]
+
+    queries = np.load(args.queries_path)
+    latencies = []
+    first_fast = None
+    for q in queries:
+        start = time.perf_counter()
+        store.query(q, k=args.k)
+        latency = (time.perf_counter() - start) * 1000
+        latencies.append(latency)
+        if first_fast is None and latency <= args.fast_ms:
+            first_fast = time.perf_counter() - t0
+    store._dirty = False
+
+    print(json.dumps({
+        "open_sec": open_sec,
+        "warmup_sec": warmup_sec,
+        "first_query_ms": latencies[0],
+        "slow_queries": sum(1 for x in latencies if x > args.fast_ms),
+        "time_to_fast_sec": first_fast,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="벡터 저장소 콜드 스타트 벤치마크")
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--lib", default="hnswlib")
+    parser.add_argument("--quant", default="none")
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--runs", type=int, default=3)
+    # 자식 프로세스용 인자
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--index-dir", help=argparse.SUPPRESS)
+    parser.add_argument("--queries-path", help=argparse.SUPPRESS)
+    parser.add_argument("--warmup", type=int, default=0, help=argparse.SUPPRESS)
+    parser.add_argument("--fast-ms", type=float, default=0.0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args)
+        return
+
+    work_dir = tempfile.mkdtemp(prefix="bench_cold_")
+    try:
+        print(f"📝 합성 인덱스 생성 중... ({args.size:,} x {args.dim}, {args.lib}, quant={args.quant})")
+        corpus = make_corpus(os.path.join(work_dir, "corpus.f32"), args.size, args.dim)
+        index_dir = os.path.join(work_dir, "index")
+        store, _ = build_store(index_dir, corpus, args.lib, 16, 200, args.quant)
+        queries = make_queries(corpus, args.queries)
+        queries_path = os.path.join(work_dir, "queries.npy")
+        np.save(queries_path, queries)
+
+        # 웜 상태 기준 지연 (같은 프로세스, 페이지 캐시 적재 후)
+        store.warmup()
+        warm = []
+        for q in queries:
+            start = time.perf_counter()
+            store.query(q, k=args.k)
+            warm.append((time.perf_counter() - start) * 1000)
+        warm_p50 = float(np.percentile(warm, 50))
+        fast_ms = max(2 * warm_p50, warm_p50 + 1.0)
+        store._dirty = True
+        store.flush()
+        del store, corpus
+
+        results = {}
+        for warmup in (0, 1):
+            runs = []
+            for _ in range(args.runs):
+                evict_page_cache(index_dir)
+                cmd = [sys.executable, "-m", "benchmarks.bench_cold_start", "--child",
+                       "--index-dir", index_dir, "--queries-path", queries_path, "--lib", args.lib,
+                       "--quant", args.quant, "--k", str(args.k), "--warmup", str(warmup),
+                       "--fast-ms", str(fast_ms)]
+                out = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+                runs.append(json.loads(out.strip().splitlines()[-1]))
+            results[warmup] = runs
+
+        print("\n" + "=" * 84)
+        print(f"웜 상태 p50: {warm_p50:.2f}ms (빠른 질의 기준 ≤ {fast_ms:.2f}ms), {args.runs}회 중앙값")
+        print("=" * 84)
+        print(f"{'모드':<14}{'열기(s)':>10}{'워밍업(s)':>12}{'첫 질의(ms)':>14}{'느린 질의':>10}{'첫 빠른 질의(s)':>18}")
+        print("=" * 84)
+        for warmup, runs in results.items():
+            def med(key):
+                values = [r[key] for r in runs if r[key] is not None]
+                return float(np.median(values)) if values else float("nan")
+            name = "워밍업" if warmup else "워밍업 없음"
+            print(f"{name:<14}{med('open_sec'):>10.2f}{med('warmup_sec'):>12.2f}{med('first_query_ms'):>14.1f}"
+                  f"{med('slow_queries'):>10.0f}{med('time_to_fast_sec'):>18.2f}")
+        print("=" * 84)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
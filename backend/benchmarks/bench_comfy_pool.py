@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+ComfyUI 엔드포인트 풀 벤치마크 - 엔드포인트 수에 따른 이미지 처리량 + 장애 전환 확인
+
+같은 프로세스에 ComfyUI 스텁 서버(benchmarks.comfy_stub)를 띄우고, Worker 여러 개(스레드별 ImageEngine)가
+작업을 나눠 처리하는 시간을 측정합니다 (GPU / 실제 ComfyUI 불필요).
+    1. 엔드포인트 1개 (기존 단일 COMFYUI_BASE_URL과 같음)
+    2. 엔드포인트 N개 (COMFYUI_BASE_URLS)
+    3. --kill-after 지정 시: N개 중 1개를 실행 도중 종료 → 모든 작업이 다른 엔드포인트에서 완료되는지 확인
+
+실행법 (backend 디렉토리에서):
+    python -m benchmarks.bench_comfy_pool --endpoints 3 --jobs 18 --job-sec 1.0 --kill-after 3
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import queue
+import threading
+import time
+
+# 짧은 스텁 작업에 맞춰 헬스 체크 주기 단축 (ai_core.comfy_pool import 전에 설정)
+os.environ.setdefault("COMFYUI_HEALTH_INTERVAL", "0.5")
+os.environ.setdefault("COMFYUI_DOWN_RETRY_SEC", "60")
+
+from ai_core.image_engine import ImageEngine
+from benchmarks.comfy_stub import StubComfyUI
+
+BASE_PORT = 18201
+
+
+def run_scenario(num_endpoints: int, jobs: int, workers: int, job_sec: float, load_sec: float,
+                 kill_after: float = None, port_offset: int = 0) -> dict:
+    stubs = [StubComfyUI(BASE_PORT + port_offset + i, job_sec, load_sec).start() for i in range(num_endpoints)]
+    urls = [stub.base_url for stub in stubs]
+    engines = [ImageEngine(base_urls=urls) for _ in range(workers)]
+
+    todo = queue.Queue()
+    for i in range(jobs):
+        todo.put(i)
+    results = {"done": 0, "failed": 0, "failovers": 0, "by_endpoint": {}}
+    lock = threading.Lock()
+
+    def worker(engine: ImageEngine):
+        while True:
+            try:
+                job = todo.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                engine.generate(f"benchmark prompt {job}", seed=job)
+                timings = engine.last_timings
+                with lock:
+                    results["done"] += 1
+                    results["failovers"] += timings.get("failovers", 0)
+                    name = timings.get("endpoint")
+                    results["by_endpoint"][name] = results["by_endpoint"].get(name, 0) + 1
+            except Exception:
+                with lock:
+                    results["failed"] += 1
+
+    killer = None
+    if kill_after is not None and num_endpoints > 1:
+        killer = threading.Timer(kill_after, stubs[0].stop)
+        killer.start()
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        threads = [threading.Thread(target=worker, args=(engine,)) for engine in engines]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    elapsed = time.perf_counter() - start
+
+    if killer:
+        killer.cancel()
+    for stub in stubs:
+        stub.stop()
+    results["elapsed"] = elapsed
+    results["throughput"] = results["done"] / elapsed if elapsed else 0.0
+    return results
+
+
+def report(label: str, result: dict):
+    print(f"📊 {label}")
+    print(f"   - 완료 {result['done']}건 / 실패 {result['failed']}건 / 장애 전환 {result['failovers']}회")
+    print(f"   - 소요 {result['elapsed']:.2f}초 → {result['throughput']:.2f} 작업/초")
+    for name, count in sorted(result["by_endpoint"].items(), key=lambda item: str(item[0])):
+        print(f"     · {name}: {count}건")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ComfyUI 엔드포인트 풀 벤치마크")
+    parser.add_argument("--endpoints", type=int, default=3)
+    parser.add_argument("--jobs", type=int, default=18)
+    parser.add_argument("--workers", type=int, default=None, help="동시 Worker 수 (기본: 엔드포인트 × 2)")
+    parser.add_argument("--job-sec", type=float, default=1.0, help="스텁 이미지 1장 생성 시간 (초)")
+    parser.add_argument("--load-sec", type=float, default=2.0, help="스텁 모델 콜드 로드 시간 (초)")
+    parser.add_argument("--kill-after", type=float, default=None, help="N개 시나리오에서 첫 엔드포인트 종료 시점 (초)")
+    args = parser.parse_args()
+    workers = args.workers or args.endpoints * 2
+
+    single = run_scenario(1, args.jobs, workers, args.job_sec, args.load_sec)
+    report("엔드포인트 1개", single)
+
+    pooled = run_scenario(args.endpoints, args.jobs, workers, args.job_sec, args.load_sec, port_offset=10)
+    report(f"엔드포인트 {args.endpoints}개", pooled)
+    print(f"   - 처리량 {pooled['throughput'] / max(single['throughput'], 1e-9):.1f}배")
+
+    if args.kill_after is not None:
+        failover = run_scenario(args.endpoints, args.jobs, workers, args.job_sec, args.load_sec,
+                                kill_after=args.kill_after, port_offset=20)
+        report(f"엔드포인트 {args.endpoints}개 중 1개 {args.kill_after}초 후 종료", failover)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+PDF 텍스트 추출 벤치마크 - 기존 PyPDFLoader vs 병렬 추출 (worker.pdf_extract)
+
+대용량 합성 PDF(기본 500페이지)를 생성한 뒤 다음 방식의 추출 시간을 비교합니다.
+    1. PyPDFLoader.load()              (기존 ingest_pdf_task 방식)
+    2. pypdf 프로세스 풀 병렬 추출
+    3. PyMuPDF 프로세스 풀 병렬 추출    (fitz 설치 시)
+
+실행법 (backend 디렉토리에서):
+    python -m benchmarks.bench_pdf_extract --pages 500 --workers 4
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+WORDS = (
+    "system network server storage security policy report quarterly revenue budget "
+    "project schedule meeting document customer service product market analysis "
+    "strategy operation employee training compliance contract delivery quality"
+).split()
+
+
+def make_synthetic_pdf(path: str, pages: int, lines_per_page: int = 60, seed: int = 42):
+    """텍스트가 빽빽한 합성 PDF 생성 (외부 라이브러리 없이 PDF 1.4 직접 작성)"""
+    rng = random.Random(seed)
+    objects = []
+
+    def add(obj: bytes) -> int:
+        objects.append(obj)
+        return len(objects)
+
+    catalog_id = add(b"")            # 나중에 채움
+    pages_id = add(b"")
+    font_id = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    page_ids = []
+    for _ in range(pages):
+        lines = []
+        for _ in range(lines_per_page):
+            line = " ".join(rng.choice(WORDS) for _ in range(14))
+            lines.append(f"({line}) '")
+        content = ("BT /F1 9 Tf 40 800 Td 12 TL\n" + "\n".join(lines) + "\nET").encode("latin-1")
+        content_id = add(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (pages_id, font_id, content_id)
+        ))
+
+    objects[catalog_id - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id
+    kids = b" ".join(b"%d 0 R" % pid for pid in page_ids)
+    objects[pages_id - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for i, obj in enumerate(objects, start=1):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n" % i + obj + b"\nendobj\n")
+        xref_pos = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for off in offsets:
+            f.write(b"%010d 00000 n \n" % off)
+        f.write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+                % (len(objects) + 1, catalog_id, xref_pos))
+
+
+def bench_pypdfloader(path: str) -> tuple:
+    start = time.perf_counter()
+    try:
+        from langchain_community.document_loaders import PyPDFLoader
+        docs = PyPDFLoader(path).load()
+        chars = sum(len(d.page_content) for d in docs)
+    except ImportError:
+        # langchain 미설치 환경: PyPDFLoader와 동일한 단일 스레드 pypdf 루프
+        from pypdf import PdfReader
+        chars = sum(len(p.extract_text() or "") for p in PdfReader(path).pages)
+    return time.perf_counter() - start, chars
+
+
+def bench_parallel(path: str, pages: int, window: int, backend: str) -> tuple:
+    from worker import pdf_extract
+    start = time.perf_counter()
+    chars = 0
+    last_page = -1
+    for _, _, page_texts in pdf_extract.iter_page_windows_parallel(path, pages, window, backend):
+        for page_no, text in page_texts:
+            assert page_no == last_page + 1, "페이지 순서가 보장되지 않음"
+            last_page = page_no
+            chars += len(text)
+    return time.perf_counter() - start, chars
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PDF 추출 벤치마크")
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--window", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=None, help="프로세스 수 (기본: PDF_EXTRACT_WORKERS)")
+    parser.add_argument("--pdf", default=None, help="합성 PDF 대신 사용할 실제 PDF 경로")
+    args = parser.parse_args()
+
+    if args.workers:
+        os.environ["PDF_EXTRACT_WORKERS"] = str(args.workers)
+    os.environ["PDF_PARALLEL_MIN_PAGES"] = "0"
+    from worker import pdf_extract
+
+    tmp_path = None
+    path = args.pdf
+    if path is None:
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+            tmp_path = tmp.name
+        print(f"📝 합성 PDF 생성 중... ({args.pages}페이지)")
+        make_synthetic_pdf(tmp_path, args.pages)
+        path = tmp_path
+        print(f"   - 파일 크기: {os.path.getsize(path) / (1024 * 1024):.1f} MB")
+
+    try:
+        from pypdf import PdfReader
+        pages = len(PdfReader(path).pages)
+
+        # 프로세스 풀 워밍업 (spawn 비용은 워커 수명 동안 1회)
+        list(pdf_extract.iter_page_windows_parallel(path, min(pages, args.window), args.window, "pypdf"))
+
+        results = []
+        base_time, base_chars = bench_pypdfloader(path)
+        results.append(("PyPDFLoader.load() (기존)", base_time, base_chars))
+
+        t, c = bench_parallel(path, pages, args.window, "pypdf")
+        results.append((f"pypdf 병렬 ({pdf_extract.PDF_EXTRACT_WORKERS} procs)", t, c))
+
+        if pdf_extract._pymupdf_available():
+            t, c = bench_parallel(path, pages, args.window, "pymupdf")
+            results.append((f"PyMuPDF 병렬 ({pdf_extract.PDF_EXTRACT_WORKERS} procs)", t, c))
+        else:
+            print("ℹ️ PyMuPDF(fitz) 미설치 - pymupdf 백엔드 생략")
+
+        print("\n" + "=" * 64)
+        print(f"{'방식':<34}{'시간(s)':>10}{'페이지/s':>10}{'속도향상':>10}")
+        print("=" * 64)
+        for name, elapsed, chars in results:
+            print(f"{name:<34}{elapsed:>10.2f}{pages / elapsed:>10.1f}{base_time / elapsed:>9.1f}x")
+        print("=" * 64)
+    finally:
+        pdf_extract.shutdown_executor()
+        if tmp_path and os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+if __name__ == "__main__":
+    main()
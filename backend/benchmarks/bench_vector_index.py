@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+벡터 인덱스 벤치마크 - local 벡터 저장소 (ai_core.vector_store) 재현율/지연 측정
+
+합성 코퍼스(군집 분포, L2 정규화 = ko-sbert 임베딩과 같은 조건)를 만들어
+LocalAnnVectorStore에 넣고, ANN 라이브러리/양자화/ef_search 조합별로 다음을 측정합니다.
+    - 구축 시간 (memmap + sqlite + 그래프/코드 추가)
+    - 인덱스 RAM (그래프 또는 압축 코드, 추정치)
+    - recall@k (numpy 전수 탐색 정답 대비 - 기존 float32 레이아웃 기준)
+    - 단일 질의 지연 p50 / p99 (ms)
+
+실행법 (backend 디렉토리에서):
+    python -m benchmarks.bench_vector_index --sizes 10000,100000 --libs hnswlib,faiss,numpy
+    python -m benchmarks.bench_vector_index --sizes 1000000 --libs hnswlib --ef 32,64,128
+    python -m benchmarks.bench_vector_index --sizes 100000 --libs hnswlib --quant int8,pq
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+GEN_BLOCK = 50000
+
+
+def make_corpus(path: str, n: int, dim: int, clusters: int = 256, seed: int = 0) -> np.memmap:
+    """군집 구조를 가진 정규화 벡터를 memmap 파일로 생성 (1M x 768도 메모리에 다 올리지 않음)"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    data = np.memmap(path, dtype=np.float32, mode="w+", shape=(n, dim))
+    for begin in range(0, n, GEN_BLOCK):
+        end = min(begin + GEN_BLOCK, n)
+        assign = rng.integers(0, clusters, end - begin)
+        block = centers[assign] + 0.8 * rng.standard_normal((end - begin, dim)).astype(np.float32)
+        block /= np.linalg.norm(block, axis=1, keepdims=True)
+        data[begin:end] = block
+    data.flush()
+    return data
+
+
+def make_queries(corpus: np.memmap, count: int, seed: int = 1) -> np.ndarray:
+    """코퍼스 점 근처의 질의 생성 (실제 질의처럼 관련 청크가 존재하는 분포)"""
+    rng = np.random.default_rng(seed)
+    base = np.asarray(corpus[np.sort(rng.choice(len(corpus), count, replace=False))])
+    queries = base + 0.3 * rng.standard_normal(base.shape).astype(np.float32) / np.sqrt(base.shape[1])
+    return (queries / np.linalg.norm(queries, axis=1, keepdims=True)).astype(np.float32)
+
+
+def ground_truth(corpus: np.memmap, queries: np.ndarray, k: int) -> np.ndarray:
+    """블록 단위 전수 탐색으로 정답 top-k 계산 (정규화 벡터: 내적 최대 = L2 최소)"""
+    best_idx = np.zeros((len(queries), 0), dtype=np.int64)
+    best_sim = np.zeros((len(queries), 0), dtype=np.float32)
+    for begin in range(0, len(corpus), GEN_BLOCK):
+        block = np.asarray(corpus[begin:begin + GEN_BLOCK])
+        sims = queries @ block.T
+        idx = np.argpartition(-sims, min(k, sims.shape[1] - 1), axis=1)[:, :k]
+        best_idx = np.concatenate([best_idx, idx + begin], axis=1)
+        best_sim = np.concatenate([best_sim, np.take_along_axis(sims, idx, axis=1)], axis=1)
+        order = np.argsort(-best_sim, axis=1)[:, :k]
+        best_idx = np.take_along_axis(best_idx, order, axis=1)
+        best_sim = np.take_along_axis(best_sim, order, axis=1)
+    return best_idx
+
+
+def build_store(index_dir: str, corpus: np.memmap, library: str, m: int, ef_construction: int,
+                quant: str = "none"):
+    from ai_core.vector_store import LocalAnnVectorStore
+    store = LocalAnnVectorStore(index_dir=index_dir, library=library, m=m, ef_construction=ef_construction,
+                                quant=quant)
+    start = time.perf_counter()
+    for begin in range(0, len(corpus), 10000):
+        end = min(begin + 10000, len(corpus))
+        store.add(
+            ids=[str(i) for i in range(begin, end)],
+            embeddings=np.asarray(corpus[begin:end]),
+            texts=[""] * (end - begin),
+            metadatas=[{"source": f"doc-{i // 100}", "page": 0} for i in range(begin, end)]
+        )
+    return store, time.perf_counter() - start
+
+
+def run_queries(store, queries: np.ndarray, truth: np.ndarray, k: int) -> tuple:
+    latencies = []
+    hits = 0
+    for q, expected in zip(queries, truth):
+        start = time.perf_counter()
+        found = store.query(q, k=k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += len({int(r["id"]) for r in found} & set(expected.tolist()))
+    lat = np.array(latencies)
+    return hits / truth.size, float(np.percentile(lat, 50)), float(np.percentile(lat, 99))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="벡터 인덱스 재현율/지연 벤치마크")
+    parser.add_argument("--sizes", default="10000,100000", help="코퍼스 크기 목록 (쉼표 구분)")
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--libs", default="hnswlib,faiss,numpy")
+    parser.add_argument("--m", type=int, default=16, help="HNSW M")
+    parser.add_argument("--ef-construction", type=int, default=200)
+    parser.add_argument("--ef", default="16,64,128", help="ef_search 목록 (쉼표 구분)")
+    parser.add_argument("--quant", default="", help="추가로 측정할 양자화 방식 (예: int8,pq)")
+    args = parser.parse_args()
+
+    from ai_core.vector_store import resolve_ann_library
+
+    work_dir = tempfile.mkdtemp(prefix="bench_vector_")
+    rows = []
+    try:
+        for n in [int(x) for x in args.sizes.split(",")]:
+            print(f"📝 합성 코퍼스 생성 중... ({n:,} x {args.dim})")
+            corpus = make_corpus(os.path.join(work_dir, f"corpus_{n}.f32"), n, args.dim)
+            queries = make_queries(corpus, min(args.queries, n))
+            truth = ground_truth(corpus, queries, args.k)
+
+            configs = [(lib, "none") for lib in args.libs.split(",")]
+            configs += [("numpy", q) for q in args.quant.split(",") if q]
+            for lib, quant in configs:
+                if quant == "none" and resolve_ann_library(lib) != lib:
+                    print(f"ℹ️ {lib} 미설치 - 생략")
+                    continue
+                name = lib if quant == "none" else quant
+                index_dir = os.path.join(work_dir, f"index_{n}_{name}")
+                store, build_time = build_store(index_dir, corpus, lib, args.m, args.ef_construction, quant)
+                memory_mb = store.index_memory_bytes() / (1024 * 1024)
+                # 전수 탐색/양자화 탐색은 ef와 무관하므로 1회만 측정
+                efs = [0] if name in ("numpy", "int8", "pq") else [int(x) for x in args.ef.split(",")]
+                for ef in efs:
+                    if ef:
+                        store.set_ef_search(ef)
+                    recall, p50, p99 = run_queries(store, queries, truth, args.k)
+                    rows.append((n, name, ef or "-", build_time, memory_mb, recall, p50, p99))
+                    print(f"   {name:<8} ef={ef or '-':<5} mem={memory_mb:.1f}MB  recall@{args.k}={recall:.3f}  "
+                          f"p50={p50:.2f}ms  p99={p99:.2f}ms")
+                store._dirty = False
+                shutil.rmtree(index_dir, ignore_errors=True)
+
+            del corpus
+            os.unlink(os.path.join(work_dir, f"corpus_{n}.f32"))
+
+        print("\n" + "=" * 90)
+        print(f"{'N':>10}{'인덱스':>10}{'ef':>6}{'구축(s)':>10}{'RAM(MB)':>12}"
+              f"{f'recall@{args.k}':>12}{'p50(ms)':>10}{'p99(ms)':>10}")
+        print("=" * 90)
+        for n, name, ef, build_time, memory_mb, recall, p50, p99 in rows:
+            print(f"{n:>10,}{name:>10}{ef:>6}{build_time:>10.1f}{memory_mb:>12.1f}"
+                  f"{recall:>12.3f}{p50:>10.2f}{p99:>10.2f}")
+        print("=" * 90)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
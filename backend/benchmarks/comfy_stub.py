@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+ComfyUI 스텁 서버 - ComfyPool / ImageEngine 부하 분산·장애 전환 확인용 (GPU 불필요)
+
+ImageEngine이 사용하는 HTTP API만 흉내 냅니다 (표준 라이브러리만 사용, WebSocket 없음 →
+ImageEngine은 /history 확인으로 완료를 감지).
+    POST /prompt          작업 큐 등록 (GPU 1장처럼 한 번에 1개씩 순서대로 실행)
+    GET  /queue           queue_running / queue_pending
+    GET  /system_stats    devices[0].vram_total / vram_free (모델 로드 시 여유 감소)
+    GET  /history/{id}    완료된 작업의 status / outputs
+    GET  /view            더미 PNG
+    POST /free            상주 모델 해제
+
+작업 시간: UNet 로더 노드의 모델이 상주 중이 아니면 --load-sec(콜드 로드) + 배치 크기 × --job-sec
+
+실행법 (backend 디렉토리에서):
+    python -m benchmarks.comfy_stub --port 18201 --job-sec 0.5 --load-sec 2
+"""
+
+import argparse
+import json
+import queue
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+STUB_PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 1024
+VRAM_TOTAL = 8 * 1024 ** 3
+MODEL_VRAM = 5 * 1024 ** 3
+
+
+class StubComfyUI:
+    """스텁 서버 1개 (start/stop으로 같은 프로세스에서 여러 개 실행 가능)"""
+
+    def __init__(self, port: int, job_sec: float = 0.5, load_sec: float = 2.0, host: str = "127.0.0.1"):
+        self.host = host
+        self.port = port
+        self.job_sec = job_sec
+        self.load_sec = load_sec
+        self.loaded_model = None
+        self.running = None
+        self.pending = []
+        self.history = {}
+        self.completed = 0
+        self._jobs = queue.Queue()
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self):
+        self._server = ThreadingHTTPServer((self.host, self.port), self._handler_class())
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        threading.Thread(target=self._execute_loop, daemon=True).start()
+        return self
+
+    def stop(self):
+        """서버 종료 (실행 중 장애 재현 - 이후 요청은 연결 거부)"""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+            self._jobs.put(None)
+
+    # ------------------------------------------------------------------
+    # 작업 실행 (GPU 1장: 순서대로 1개씩)
+    # ------------------------------------------------------------------
+    def _enqueue(self, prompt: dict, prompt_id: str):
+        with self._lock:
+            self.pending.append(prompt_id)
+        self._jobs.put((prompt_id, prompt))
+
+    def _execute_loop(self):
+        while True:
+            item = self._jobs.get()
+            if item is None or self._server is None:
+                return
+            prompt_id, prompt = item
+            with self._lock:
+                self.pending.remove(prompt_id)
+                self.running = prompt_id
+
+            model = next((node["inputs"].get("unet_name") for node in prompt.values()
+                          if "UnetLoader" in node.get("class_type", "")), "default")
+            batch = next((node["inputs"].get("batch_size", 1) for node in prompt.values()
+                          if "LatentImage" in node.get("class_type", "")), 1)
+            seconds = batch * self.job_sec
+            if model != self.loaded_model:
+                seconds += self.load_sec
+                self.loaded_model = model
+            time.sleep(seconds)
+            if self._server is None:
+                return
+
+            outputs = {
+                node_id: {"images": [{"filename": f"{prompt_id}_{i}.png", "subfolder": "", "type": "temp"}
+                                     for i in range(batch)]}
+                for node_id, node in prompt.items()
+                if node.get("class_type") in ("PreviewImage", "SaveImage")
+            }
+            with self._lock:
+                self.history[prompt_id] = {"status": {"completed": True, "status_str": "success"},
+                                           "outputs": outputs}
+                self.running = None
+                self.completed += 1
+
+    # ------------------------------------------------------------------
+    # HTTP 핸들러
+    # ------------------------------------------------------------------
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body: bytes, content_type: str = "application/json"):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _json(self, data, status: int = 200):
+                self._send(status, json.dumps(data).encode("utf-8"))
+
+            def _stopped(self) -> bool:
+                # 종료 후 keep-alive 연결로 들어온 요청도 응답 없이 끊음 (서버 다운 재현)
+                if stub._server is None:
+                    self.close_connection = True
+                    return True
+                return False
+
+            def do_GET(self):
+                if self._stopped():
+                    return
+                path = urlparse(self.path).path
+                if path == "/system_stats":
+                    used = MODEL_VRAM if stub.loaded_model else 0
+                    self._json({"devices": [{"name": f"stub:{stub.port}", "vram_total": VRAM_TOTAL,
+                                             "vram_free": VRAM_TOTAL - used}]})
+                elif path == "/queue":
+                    with stub._lock:
+                        running = [[0, stub.running]] if stub.running else []
+                        pending = [[i + 1, pid] for i, pid in enumerate(stub.pending)]
+                    self._json({"queue_running": running, "queue_pending": pending})
+                elif path.startswith("/history/"):
+                    prompt_id = path.rsplit("/", 1)[-1]
+                    with stub._lock:
+                        entry = stub.history.get(prompt_id)
+                    self._json({prompt_id: entry} if entry else {})
+                elif path == "/view":
+                    self._send(200, STUB_PNG, "image/png")
+                else:
+                    self._send(404, b"{}")
+
+            def do_POST(self):
+                if self._stopped():
+                    return
+                path = urlparse(self.path).path
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if path == "/prompt":
+                    prompt_id = body.get("prompt_id") or str(uuid.uuid4())
+                    stub._enqueue(body["prompt"], prompt_id)
+                    self._json({"prompt_id": prompt_id, "number": len(stub.pending)})
+                elif path == "/free":
+                    stub.loaded_model = None
+                    self._json({})
+                else:
+                    self._send(404, b"{}")
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ComfyUI 스텁 서버")
+    parser.add_argument("--port", type=int, default=18201)
+    parser.add_argument("--job-sec", type=float, default=0.5, help="이미지 1장 생성 시간 (초)")
+    parser.add_argument("--load-sec", type=float, default=2.0, help="모델 콜드 로드 시간 (초)")
+    args = parser.parse_args()
+
+    stub = StubComfyUI(args.port, args.job_sec, args.load_sec).start()
+    print(f"🧪 ComfyUI 스텁 실행: {stub.base_url} (작업 {args.job_sec}초, 콜드 로드 {args.load_sec}초)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()
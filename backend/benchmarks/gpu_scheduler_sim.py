@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+GPU 스케줄러 시뮬레이터 - 작업 추적(trace)을 재생하여 모델 전환 정책 비교 (GPU / Redis 불필요)
+
+GPU 1장에서 이미지/STT 작업을 worker.gpu_scheduler.should_switch로 처리하는 과정을 이산 사건으로 재생합니다.
+    - 작업이 끝날 때마다(그리고 GPU가 비어 있을 때) 전환 여부 결정 (gpu_manager.after_task / try_acquire와 같은 시점)
+    - 전환 시 현재 모델 언로드 + 새 모델 로드 시간만큼 GPU 정지
+    - 유휴 중에는 모델을 유지 (유휴 해제 release_if_idle은 재현하지 않음)
+
+작업 추적 입력 (하나 선택):
+    - 기본: 합성 작업 (이미지는 여러 장을 연달아 요청하는 묶음 도착, STT는 드문 긴 작업)
+    - --trace FILE: JSON Lines ({"type": "image" | "stt", "arrival": 초, "service": 초})
+    - --from-redis: 운영 Worker가 gpu:trace에 남긴 완료 작업 + gpu:swap_stats의 실측 전환 시간
+      (--dump FILE로 저장해 두면 이후 --trace로 같은 작업을 반복 재생)
+
+측정 항목: 타입별 평균/p95/최대 대기(접수 → 시작), 가중 평균 대기(GPU_SCHED_WEIGHTS), 전환 횟수/시간
+
+실행법 (backend 디렉토리에서):
+    python -m benchmarks.gpu_scheduler_sim --hours 4 --image-per-min 0.8 --stt-per-min 0.06
+    python -m benchmarks.gpu_scheduler_sim --from-redis --dump trace.jsonl
+"""
+
+import argparse
+import json
+import random
+from collections import deque
+
+from worker import gpu_scheduler
+
+TYPES = ("image", "stt")
+
+
+def synthetic_trace(hours: float, image_per_min: float, stt_per_min: float,
+                    image_sec: float, stt_sec: float, burst_max: int, seed: int) -> list:
+    """합성 작업 추적 (포아송 도착, 작업 시간은 로그정규 분포)"""
+    rng = random.Random(seed)
+    horizon = hours * 3600
+    jobs = []
+
+    def service(mean: float) -> float:
+        return mean * rng.lognormvariate(0, 0.3)
+
+    t = 0.0
+    while image_per_min > 0:
+        t += rng.expovariate(image_per_min / 60)
+        if t > horizon:
+            break
+        # 사용자 1명이 프롬프트를 바꿔가며 연달아 요청하는 묶음
+        for k in range(rng.randint(1, burst_max)):
+            jobs.append({"type": "image", "arrival": t + k * rng.uniform(3, 10), "service": service(image_sec)})
+
+    t = 0.0
+    while stt_per_min > 0:
+        t += rng.expovariate(stt_per_min / 60)
+        if t > horizon:
+            break
+        jobs.append({"type": "stt", "arrival": t, "service": service(stt_sec)})
+
+    return sorted(jobs, key=lambda job: job["arrival"])
+
+
+def load_trace(path: str) -> list:
+    with open(path, encoding="utf-8") as f:
+        jobs = [json.loads(line) for line in f if line.strip()]
+    return sorted(jobs, key=lambda job: job["arrival"])
+
+
+def simulate(jobs: list, policy: str, costs: dict) -> dict:
+    """
+    작업 추적을 정책 하나로 재생
+
+    Args:
+        jobs: 접수 시각 순 작업 목록
+        policy: "cost" | "fixed"
+        costs: {"load_sec": {타입: 초}, "unload_sec": {타입: 초}}
+    """
+    waiting = {task_type: deque() for task_type in TYPES}
+    waits = {task_type: [] for task_type in TYPES}
+    served_sec = {task_type: [] for task_type in TYPES}
+    current, batch = "none", 0
+    swaps, swap_time = 0, 0.0
+    start = jobs[0]["arrival"] if jobs else 0.0
+    t, i = start, 0
+
+    while i < len(jobs) or any(waiting.values()):
+        while i < len(jobs) and jobs[i]["arrival"] <= t:
+            waiting[jobs[i]["type"]].append(jobs[i])
+            i += 1
+        if not any(waiting.values()):
+            t = jobs[i]["arrival"]
+            continue
+
+        if current == "none":
+            # 빈 GPU: 가장 먼저 접수된 작업의 모델 로드
+            current = min((q[0]["arrival"], task_type) for task_type, q in waiting.items() if q)[1]
+            t += costs["load_sec"][current]
+            swap_time += costs["load_sec"][current]
+            batch = 0
+        else:
+            other = gpu_scheduler.other_type(current)
+            snapshot = {
+                "queue": {task_type: len(q) for task_type, q in waiting.items()},
+                "oldest_wait": {task_type: (t - q[0]["arrival"]) if q else 0.0 for task_type, q in waiting.items()},
+                "batch_count": batch,
+                # 운영과 같이 최근 GPU_DURATION_WINDOW건 평균
+                "job_sec": {task_type: sum(s[-50:]) / len(s[-50:]) for task_type, s in served_sec.items() if s},
+                **costs,
+            }
+            switch, _ = gpu_scheduler.should_switch(current, other, snapshot, policy)
+            if switch:
+                cost = costs["unload_sec"][current] + costs["load_sec"][other]
+                t += cost
+                swap_time += cost
+                swaps += 1
+                current, batch = other, 0
+            elif batch >= gpu_scheduler.GPU_MAX_BATCH and not waiting[other]:
+                batch = 0
+
+        job = waiting[current].popleft()
+        waits[current].append(t - job["arrival"])
+        t += job["service"]
+        served_sec[current].append(job["service"])
+        batch += 1
+
+    result = {"policy": policy, "swaps": swaps, "swap_time": swap_time, "makespan": t - start, "types": {}}
+    weighted, weight_sum = 0.0, 0.0
+    for task_type in TYPES:
+        values = sorted(waits[task_type])
+        if not values:
+            continue
+        weight = gpu_scheduler.GPU_SCHED_WEIGHTS[task_type]
+        weighted += weight * sum(values)
+        weight_sum += weight * len(values)
+        result["types"][task_type] = {
+            "jobs": len(values),
+            "mean": sum(values) / len(values),
+            "p95": values[min(len(values) - 1, int(len(values) * 0.95))],
+            "max": values[-1],
+        }
+    result["weighted_mean"] = weighted / weight_sum if weight_sum else 0.0
+    return result
+
+
+def report(result: dict):
+    print(f"📊 정책: {result['policy']}")
+    for task_type, stats in result["types"].items():
+        print(f"   - {task_type}: {stats['jobs']}건, 대기 평균 {stats['mean']:.1f}초 / "
+              f"p95 {stats['p95']:.1f}초 / 최대 {stats['max']:.1f}초")
+    print(f"   - 가중 평균 대기 {result['weighted_mean']:.1f}초, 전환 {result['swaps']}회 "
+          f"(로드/언로드 {result['swap_time']:.0f}초), 전체 {result['makespan'] / 60:.1f}분")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GPU 스케줄러 시뮬레이터")
+    parser.add_argument("--trace", help="작업 추적 JSON Lines 파일")
+    parser.add_argument("--from-redis", action="store_true", help="운영 Redis의 gpu:trace / gpu:swap_stats 사용")
+    parser.add_argument("--dump", help="재생한 작업 추적을 JSON Lines로 저장")
+    parser.add_argument("--policies", default="fixed,cost")
+    parser.add_argument("--hours", type=float, default=4.0)
+    parser.add_argument("--image-per-min", type=float, default=0.8, help="이미지 요청 묶음 도착률 (분당)")
+    parser.add_argument("--stt-per-min", type=float, default=0.06, help="STT 작업 도착률 (분당)")
+    parser.add_argument("--image-sec", type=float, default=15.0, help="이미지 작업 평균 시간 (초)")
+    parser.add_argument("--stt-sec", type=float, default=180.0, help="STT 작업 평균 시간 (초)")
+    parser.add_argument("--burst-max", type=int, default=4, help="이미지 묶음 최대 요청 수")
+    parser.add_argument("--load-image", type=float, default=gpu_scheduler.DEFAULT_LOAD_SEC["image"])
+    parser.add_argument("--load-stt", type=float, default=gpu_scheduler.DEFAULT_LOAD_SEC["stt"])
+    parser.add_argument("--unload-image", type=float, default=gpu_scheduler.DEFAULT_UNLOAD_SEC["image"])
+    parser.add_argument("--unload-stt", type=float, default=gpu_scheduler.DEFAULT_UNLOAD_SEC["stt"])
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    costs = {
+        "load_sec": {"image": args.load_image, "stt": args.load_stt},
+        "unload_sec": {"image": args.unload_image, "stt": args.unload_stt},
+    }
+    if args.from_redis:
+        from worker import gpu_manager
+        jobs = gpu_manager.get_job_traces()
+        costs = gpu_manager.get_swap_costs()
+        print(f"📥 Redis 작업 추적 {len(jobs)}건, 전환 비용 {costs}")
+    elif args.trace:
+        jobs = load_trace(args.trace)
+    else:
+        jobs = synthetic_trace(args.hours, args.image_per_min, args.stt_per_min,
+                               args.image_sec, args.stt_sec, args.burst_max, args.seed)
+    if not jobs:
+        print("⚠️ 재생할 작업이 없습니다")
+        return
+
+    if args.dump:
+        with open(args.dump, "w", encoding="utf-8") as f:
+            for job in jobs:
+                f.write(json.dumps(job) + "\n")
+
+    counts = {task_type: sum(1 for job in jobs if job["type"] == task_type) for task_type in TYPES}
+    print(f"🧪 작업 {len(jobs)}건 (이미지 {counts['image']}, STT {counts['stt']}), "
+          f"로드 {costs['load_sec']} / 언로드 {costs['unload_sec']}")
+    results = [simulate(jobs, policy.strip(), costs) for policy in args.policies.split(",")]
+    for result in results:
+        report(result)
+
+    if len(results) > 1:
+        base = results[0]
+        for result in results[1:]:
+            change = (1 - result["weighted_mean"] / max(base["weighted_mean"], 1e-9)) * 100
+            print(f"📈 {result['policy']} vs {base['policy']}: 가중 평균 대기 {change:.0f}% 감소, "
+                  f"전환 {base['swaps']} → {result['swaps']}회")
+
+
+if __name__ == "__main__":
+    main()
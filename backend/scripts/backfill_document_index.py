@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+문서 단위 벡터 인덱스 백필 - 2단계 검색 도입 이전에 학습된 문서 처리
+
+INDEXED 상태인 PDF 문서의 제목 + 요약을 임베딩하여 문서 단위 인덱스에 저장합니다.
+새로 학습되는 문서는 ingest_pdf_task가 자동으로 저장하므로 최초 1회만 실행하면 됩니다.
+문서 인덱스에 없는 문서는 2단계 검색 후보가 되지 못하므로, 백필 전에는
+RAG_TWO_STAGE=0으로 두거나 문서 수를 RAG_TWO_STAGE_MIN_DOCS 미만으로 유지하세요.
+
+실행법 (backend 디렉토리에서, 백엔드 중지 상태):
+    python -m scripts.backfill_document_index
+"""
+
+import os
+
+from app.database import SessionLocal
+from app import models
+from app.routers.document_router import UPLOAD_DIR
+from ai_core.rag_engine import get_rag_engine
+
+
+def main():
+    rag = get_rag_engine()
+    db = SessionLocal()
+    stored = 0
+    skipped = 0
+    try:
+        documents = db.query(models.Document).filter(
+            models.Document.status == "INDEXED",
+            models.Document.file_ext == "pdf"
+        ).all()
+        print(f"📚 대상 문서 {len(documents)}개")
+
+        for doc in documents:
+            if not doc.chroma_id or not (doc.title or doc.summary):
+                skipped += 1
+                continue
+            file_path = os.path.join(UPLOAD_DIR, f"{doc.chroma_id}.{doc.file_ext}")
+            rag.upsert_document_vector(file_path, doc.title, doc.summary)
+            stored += 1
+    finally:
+        db.close()
+
+    flush = getattr(rag.doc_store, "flush", None)
+    if flush:
+        rag.doc_store._dirty = True
+        flush()
+    print(f"✅ 문서 벡터 백필 완료: {stored}개 저장, {skipped}개 건너뜀 (문서 인덱스 총 {rag.doc_store.count()}개)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+벡터 저장소 마이그레이션 - 양자화 저장 방식(RAG_VECTOR_QUANT) 변환
+
+    1. local 인덱스 제자리 변환: memmap 원본 벡터는 그대로 두고
+       인덱스만 float32 그래프 ↔ int8 / PQ 코드로 다시 만듭니다.
+    2. Chroma 컬렉션 → local 인덱스: 기존 dot_project_docs 컬렉션의 벡터/본문/메타데이터를
+       재임베딩 없이 local 저장소로 복사합니다 (Chroma 데이터는 삭제하지 않음).
+
+변환 후 메모리 사용량(float32 원본 대비)과 recall@k(float32 전수 탐색 대비)를 보고합니다.
+인덱스 파일을 쓰는 동안에는 백엔드를 중지해 두어야 합니다 (단일 쓰기 프로세스).
+
+실행법 (backend 디렉토리에서):
+    python -m scripts.migrate_vector_store --quant int8
+    python -m scripts.migrate_vector_store --from-chroma --quant pq
+    python -m scripts.migrate_vector_store --quant none --cleanup      # float32 그래프로 되돌리기
+"""
+
+import argparse
+import glob
+import os
+import time
+
+import numpy as np
+
+
+def copy_from_chroma(target, batch_size: int) -> int:
+    from ai_core.vector_store import ChromaVectorStore
+    source = ChromaVectorStore()
+    total = source.count()
+    copied = 0
+    print(f"📦 Chroma 컬렉션 복사 시작 ({total}개)")
+    for ids, embeddings, texts, metadatas in source.iter_batches(batch_size):
+        target.add(ids=ids, embeddings=embeddings, texts=texts, metadatas=metadatas)
+        copied += len(ids)
+        print(f"   - {copied}/{total}")
+    return copied
+
+
+def measure_recall(store, k: int, samples: int, seed: int = 0) -> float:
+    """저장된 벡터 근처의 질의로 현재 인덱스 vs float32 전수 탐색 recall@k 측정"""
+    rng = np.random.default_rng(seed)
+    live = [r for r in range(store.size) if r not in store._deleted_rows]
+    if not live:
+        return 1.0
+    rows = rng.choice(live, min(samples, len(live)), replace=False)
+    hits = 0
+    total = 0
+    for row in rows:
+        q = np.asarray(store._vectors[row], dtype=np.float32)
+        q = q + 0.01 * rng.standard_normal(q.shape).astype(np.float32)
+        truth, _ = store._exact_search(q, k)
+        truth = [int(r) for r in truth if int(r) not in store._deleted_rows]
+        found, _ = store._ann.search(store, q, k)
+        hits += len(set(truth) & {int(r) for r in found})
+        total += len(truth)
+    return hits / total if total else 1.0
+
+
+def main():
+    from ai_core.vector_store import LOCAL_INDEX_DIR, LocalAnnVectorStore
+
+    parser = argparse.ArgumentParser(description="벡터 저장소 양자화 마이그레이션")
+    parser.add_argument("--quant", choices=["none", "int8", "pq"], required=True)
+    parser.add_argument("--index-dir", default=LOCAL_INDEX_DIR)
+    parser.add_argument("--from-chroma", action="store_true", help="Chroma 컬렉션을 local 인덱스로 복사")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--samples", type=int, default=200, help="recall 측정 질의 수")
+    parser.add_argument("--cleanup", action="store_true", help="사용하지 않는 이전 인덱스 파일 삭제")
+    args = parser.parse_args()
+
+    start = time.time()
+    if args.from_chroma:
+        if os.path.exists(os.path.join(args.index_dir, "meta.sqlite")):
+            raise SystemExit(f"❌ 대상 디렉토리에 이미 local 인덱스가 있습니다: {args.index_dir}")
+        store = LocalAnnVectorStore(index_dir=args.index_dir, quant=args.quant)
+        copy_from_chroma(store, args.batch_size)
+    else:
+        # 인덱스 파일이 없는 종류로 열면 memmap 원본에서 인덱스를 재구성 (제자리 변환)
+        store = LocalAnnVectorStore(index_dir=args.index_dir, quant=args.quant)
+    store._dirty = True
+    store.flush()
+    elapsed = time.time() - start
+
+    count = store.count()
+    float_bytes = count * (store.dim or 0) * 4
+    index_bytes = store.index_memory_bytes()
+    recall = measure_recall(store, args.k, args.samples) if count else 1.0
+
+    if args.cleanup:
+        current = os.path.basename(store._index_path)
+        for path in glob.glob(os.path.join(args.index_dir, "snapshot.*")):
+            if os.path.basename(path) != current:
+                os.unlink(path)
+                print(f"🗑️ 이전 인덱스 삭제: {path}")
+
+    print("\n" + "=" * 60)
+    print(f"인덱스 종류      : {store.library}")
+    print(f"벡터 수          : {count:,}")
+    print(f"float32 원본     : {float_bytes / (1024 * 1024):.1f} MB")
+    print(f"인덱스 RAM(추정) : {index_bytes / (1024 * 1024):.1f} MB")
+    print(f"recall@{args.k:<9}: {recall:.3f} (float32 전수 탐색 대비)")
+    print(f"소요 시간        : {elapsed:.1f}초")
+    print("=" * 60)
+    print(f"👉 적용: RAG_VECTOR_BACKEND=local RAG_VECTOR_QUANT={args.quant}")
+
+
+if __name__ == "__main__":
+    main()
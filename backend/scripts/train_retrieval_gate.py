@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+검색 게이트 분류기 학습 - 휴리스틱으로 판단하지 못한 메시지용 (선택 기능)
+
+CSV(text,label) 데이터로 문자 n-gram TF-IDF + 로지스틱 회귀 파이프라인을 학습하여
+joblib 파일로 저장합니다. label은 retrieve | reuse | skip 중 하나입니다.
+CPU에서 메시지당 1ms 미만으로 동작하므로 임베딩 + 벡터 검색보다 훨씬 저렴합니다.
+
+실행법 (backend 디렉토리에서):
+    python -m scripts.train_retrieval_gate --csv gate_samples.csv --out /app/uploads/retrieval_gate.joblib
+
+적용: RAG_GATE_MODEL_PATH=/app/uploads/retrieval_gate.joblib
+"""
+
+import argparse
+import csv
+from collections import Counter
+
+LABELS = ("retrieve", "reuse", "skip")
+
+
+def load_samples(path: str):
+    texts, labels = [], []
+    with open(path, encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            label = (row.get("label") or "").strip()
+            text = (row.get("text") or "").strip()
+            if text and label in LABELS:
+                texts.append(text)
+                labels.append(label)
+    return texts, labels
+
+
+def main():
+    import joblib
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.model_selection import cross_val_score
+    from sklearn.pipeline import make_pipeline
+
+    parser = argparse.ArgumentParser(description="검색 게이트 분류기 학습")
+    parser.add_argument("--csv", required=True, help="text,label 헤더가 있는 CSV")
+    parser.add_argument("--out", required=True, help="저장할 joblib 경로")
+    args = parser.parse_args()
+
+    texts, labels = load_samples(args.csv)
+    counts = Counter(labels)
+    print(f"📝 학습 데이터 {len(texts)}개: {dict(counts)}")
+    if len(counts) < 2:
+        raise SystemExit("❌ 레이블이 2종류 이상 필요합니다.")
+
+    pipeline = make_pipeline(
+        TfidfVectorizer(analyzer="char_wb", ngram_range=(1, 3), sublinear_tf=True),
+        LogisticRegression(max_iter=1000, class_weight="balanced"),
+    )
+    folds = min(5, min(counts.values()))
+    if folds >= 2:
+        scores = cross_val_score(pipeline, texts, labels, cv=folds)
+        print(f"📊 {folds}-fold 정확도: {scores.mean():.3f} (±{scores.std():.3f})")
+
+    pipeline.fit(texts, labels)
+    joblib.dump(pipeline, args.out)
+    print(f"✅ 저장 완료: {args.out}")
+    print(f"👉 적용: RAG_GATE_MODEL_PATH={args.out}")
+
+
+if __name__ == "__main__":
+    main()
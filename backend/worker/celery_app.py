@@ -123,6 +123,7 @@ celery_app.conf.update(
         "generate_image_task": {"queue": "gpu_image"},
         "transcribe_audio_task": {"queue": "gpu_stt"},
         "release_gpu_if_idle_task": {"queue": "celery"},
+        "dispatch_deferred_jobs_task": {"queue": "celery"},
     },
 )
 
@@ -131,6 +132,7 @@ celery_app.conf.update(
 # =====================================================================
 # GPU 유휴 체크: 30초마다 확인하여 미사용 GPU 모델 자동 해제
 # 양쪽 큐(이미지/STT) 모두 대기 없고 타임아웃 경과 시 VRAM 해제
+# 예약 작업 발행: 15초마다 접수 제어(app.admission)로 예약된 작업을 대기열이 줄어든 만큼 발행
 # =====================================================================
 
 celery_app.conf.beat_schedule = {
@@ -139,6 +141,11 @@ celery_app.conf.beat_schedule = {
         "task": "release_gpu_if_idle_task",
         "schedule": 30.0,  # 30초마다 체크
     },
+    # 대기열 초과로 예약된 GPU 작업 발행
+    "dispatch-deferred-gpu-jobs": {
+        "task": "dispatch_deferred_jobs_task",
+        "schedule": 15.0,
+    },
 }
 
 # =====================================================================
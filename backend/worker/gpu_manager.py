@@ -9,11 +9,45 @@ PC2 Worker에서 GPU VRAM을 공유하는 모델들의 로드/언로드를 관
     - 동적 로드: ComfyUI 이미지 (SD 3.5) ~4.5GB
     - 동적 로드: Faster Whisper STT ~3.5GB
 
-스케줄링 정책:
+스케줄링 정책 (전환 결정은 worker.gpu_scheduler):
     - 같은 타입 작업: 모델 전환 없이 즉시 실행
-    - 다른 타입 작업: 현재 배치(최대 5개)가 끝날 때까지 대기
-    - 배치 한도 도달 OR 현재 타입 대기 없음: 모델 전환 실행
+    - 다른 타입 작업: 전환 비용(언로드 + 로드, 실측)과 타입별 작업 시간/가중치로
+      지금 전환할지 현재 타입 대기 작업을 마저 처리할지 결정 (기아 방지 한도 포함)
+    - 현재 타입 대기 없음: 모델 전환 실행
     - 대기 작업 없으면 모델 언로드하지 않음
+    - GPU_SCHED_POLICY=fixed로 이전 동작(GPU_MAX_BATCH개마다 전환) 복원 가능
+    - 완료 작업마다 (타입, 접수 시각, 소요 시간)을 gpu:trace에 남겨
+      benchmarks.gpu_scheduler_sim으로 정책을 오프라인 비교
+
+상주(residency) 정책:
+    - 이미지 작업마다 ComfyUI /free를 호출하지 않음 → SD 3.5 UNet/CLIP/VAE가 VRAM에 상주
+    - 해제 시점: 다른 타입으로 전환(스왑)할 때 VRAM이 모자라면, 또는 타입별 유휴 시간(GPU_IDLE_RELEASE_SEC) 경과 시
+    - COMFYUI_FREE_POLICY=always로 이전 동작(작업마다 /free) 복원 가능
+    - 작업별 모델 로드 시간을 gpu:load_stats에 누적하여 get_status()로 확인
+
+VRAM 공존(co-residency) - GPU_CORESIDENT=1:
+    - 전환 시 VRAM 여유(torch.cuda.mem_get_info + 새 모델을 올릴 프로세스의 torch 캐시 - probe_vram)가
+      새 모델 크기 + GPU_VRAM_HEADROOM_MB
+      이상이면 이전 모델을 언로드하지 않고 둘 다 상주 (gpu:resident) → 이후 전환은 언로드/로드 없이 즉시
+    - 모자라면(메모리 압박) 이전처럼 언로드 후 로드, 측정할 수 없으면 항상 언로드 (안전 쪽)
+    - 모델 크기는 실제 로드/해제 때 측정한 VRAM 변화량(gpu:vram_stats), 측정 전에는 GPU_VRAM_{IMAGE,STT}_MB
+    - 두 모델이 모두 상주하면 스케줄러 전환 비용을 0으로 보고 작업 시간/가중치만으로 순서 결정
+    - 활성 모델이 아닌 상주 모델도 타입별 유휴 시간이 지나면 release_if_idle이 해제
+
+GPU 임대(lease) - 여러 Worker 프로세스가 GPU 1장을 나눠 쓸 때:
+    - 획득/전환/반납/사전 언로드를 Lua 스크립트로 원자 실행 (두 Worker가 동시에 전환을 결정하지 않음)
+    - 임대 보유자: gpu:lease:holders (zset: 토큰 → 만료 시각 ms), 작업 중 하트비트 스레드가 갱신
+    - 전환 중(언로드 + 로드)에는 gpu:switching 토큰으로 다른 Worker의 획득을 막음
+    - Worker가 죽으면 GPU_LEASE_TTL_SEC 후 임대가 만료되어 gpu:active_model이 다른 타입으로 전환 가능
+    - 같은 모델을 동시에 쓸 수 있는 Worker 수: GPU_{IMAGE,STT}_MAX_WORKERS
+      (Whisper는 프로세스마다 따로 로드하므로 STT는 기본 1)
+
+GPU 대기 작업 (재시도 폴링 대신 이벤트 기반):
+    - 획득하지 못한 작업은 _LUA_ACQUIRE 안에서 원자적으로 gpu:ready:{type}에 보관되고 Celery Task는 바로 종료
+    - 전환 완료(_LUA_FINISH_SWITCH) / 임대 반납(_LUA_RELEASE) 시 그 타입이 GPU를 쓸 수 있게 된 만큼
+      꺼내 같은 task_id로 즉시 재발행 (획득 판단과 보관이 같은 스크립트라 깨우기 누락 없음)
+    - Worker가 전환 도중 죽는 등 깨울 주체가 없어진 경우: Beat(release_if_idle)가
+      GPU_PARK_SWEEP_SEC보다 오래 보관된 작업을 다시 발행
 
 Celery 큐 구조:
     - celery (기본): 일반 작업 (채팅 저장, RAG 등)
@@ -26,10 +60,15 @@ Celery 큐 구조:
 
 import os
 import gc
+import json
 import time
+import uuid
+import threading
 import redis
 import requests as http_requests
 
+from worker import gpu_scheduler
+
 # Redis 설정
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 redis_client = redis.from_url(REDIS_URL, decode_responses=True)
@@ -42,13 +81,53 @@ COMFYUI_BASE_URL = f"http://{COMFYUI_HOST}:{COMFYUI_PORT}"
 # =====================================================================
 # 설정값
 # =====================================================================
-GPU_MAX_BATCH = 5                           # 모델 전환 전 최대 연속 처리 수
-GPU_RETRY_COUNTDOWN = 5                     # 대기 시 재시도 간격 (초)
+GPU_MAX_BATCH = gpu_scheduler.GPU_MAX_BATCH  # fixed 정책: 모델 전환 전 최대 연속 처리 수
+GPU_PARK_SWEEP_SEC = int(os.getenv("GPU_PARK_SWEEP_SEC", "60"))   # 이보다 오래 보관된 대기 작업은 Beat가 재발행
+COMFYUI_FREE_POLICY = os.getenv("COMFYUI_FREE_POLICY", "residency")   # residency | always
+
+# VRAM 공존: 두 모델이 예산 안에 들어가면 전환 시 언로드하지 않음
+GPU_CORESIDENT = os.getenv("GPU_CORESIDENT", "1") == "1"
+GPU_VRAM_HEADROOM_MB = int(os.getenv("GPU_VRAM_HEADROOM_MB", "1536"))   # 추론 중 활성화/작업 메모리 여유
+# 측정 전 모델 크기 추정값 (MB) - SD 3.5 GGUF + CLIP/VAE, Whisper large-v3 int8
+GPU_VRAM_FOOTPRINT_MB = {
+    "image": int(os.getenv("GPU_VRAM_IMAGE_MB", "4600")),
+    "stt": int(os.getenv("GPU_VRAM_STT_MB", "3600")),
+}
+
+# 타입별 유휴 해제 시간 (초) - 이미지는 재로드 비용이 커서 더 오래 유지
+GPU_IDLE_RELEASE_SEC = {
+    "image": int(os.getenv("GPU_IMAGE_IDLE_RELEASE_SEC", "300")),
+    "stt": int(os.getenv("GPU_STT_IDLE_RELEASE_SEC", "30")),
+}
 
 # Redis 키
 _KEY_ACTIVE_MODEL = "gpu:active_model"      # 현재 활성 모델: "image" | "stt" | "none"
 _KEY_BATCH_COUNT = "gpu:batch_count"        # 현재 모델의 연속 처리 수
 _KEY_LAST_ACTIVITY = "gpu:last_activity"    # 마지막 GPU 사용 타임스탬프
+_KEY_LOAD_STATS = "gpu:load_stats"          # 타입별 모델 로드 시간 누적 (hash)
+_KEY_PENDING = "gpu:pending:{}"             # 타입별 접수 후 미완료 작업 (zset: task_id → 접수 시각)
+_KEY_DURATIONS = "gpu:durations:{}"         # 타입별 최근 작업 소요 시간 (list, 최신이 앞)
+_KEY_SWAP_STATS = "gpu:swap_stats"          # 타입별 로드/언로드 시간 지수 이동 평균 (hash)
+_KEY_NEXT_MODEL = "gpu:next_model"          # 사전 언로드 후 다음에 올릴 모델 (다른 타입이 먼저 올리지 않도록)
+_KEY_TRACE = "gpu:trace"                    # 완료 작업 추적 (list, 스케줄러 시뮬레이터 재생용)
+
+GPU_DURATION_WINDOW = int(os.getenv("GPU_DURATION_WINDOW", "50"))       # 소요 시간 통계 표본 수
+GPU_PENDING_MAX_AGE = int(os.getenv("GPU_PENDING_MAX_AGE_SEC", "21600"))  # 이보다 오래된 미완료 작업은 유실로 간주
+GPU_TRACE_MAX = int(os.getenv("GPU_TRACE_MAX", "5000"))                 # 작업 추적 보관 수
+_NEXT_MODEL_TTL = 120                                                   # 사전 언로드 예약 유지 시간 (초)
+
+# GPU 임대: 하트비트가 끊긴 Worker의 임대는 이 시간 후 만료 (ComfyUI VRAM 해제 확인 최대 30초보다 길게)
+GPU_LEASE_TTL_SEC = int(os.getenv("GPU_LEASE_TTL_SEC", "90"))
+GPU_LEASE_MAX_HOLDERS = {
+    "image": int(os.getenv("GPU_IMAGE_MAX_WORKERS", "4")),   # ComfyUI가 내부 큐로 순서대로 실행
+    "stt": int(os.getenv("GPU_STT_MAX_WORKERS", "1")),       # 프로세스마다 Whisper 로드 → VRAM 중복
+}
+_KEY_LEASE_HOLDERS = "gpu:lease:holders"    # 현재 모델 임대 보유자 (zset: 토큰 → 만료 시각 ms)
+_KEY_SWITCHING = "gpu:switching"            # 모델 전환/사전 언로드 중인 Worker 토큰 (PX TTL)
+_KEY_EPOCH = "gpu:epoch"                    # 모델 전환 횟수 (전환마다 증가)
+_KEY_READY = "gpu:ready:{}"                 # GPU를 기다리는 작업 (list: {"task", "args", "kwargs", "task_id", "parked_at"})
+_KEY_RESIDENT = "gpu:resident"              # VRAM에 올라와 있는 모델 (hash: 타입 → 마지막 사용 시각)
+_KEY_VRAM_STATS = "gpu:vram_stats"          # 타입별 실측 모델 크기 MB 지수 이동 평균 (hash)
 
 # Celery 큐 이름 (Redis 키와 동일)
 QUEUE_IMAGE = "gpu_image"
@@ -75,13 +154,6 @@ def _get_active_model() -> str:
         return "none"
 
 
-def _set_active_model(model_type: str):
-    try:
-        redis_client.set(_KEY_ACTIVE_MODEL, model_type)
-    except Exception as e:
-        print(f"⚠️ [GPU] Redis 상태 업데이트 실패: {e}")
-
-
 def _get_batch_count() -> int:
     try:
         val = redis_client.get(_KEY_BATCH_COUNT)
@@ -90,13 +162,6 @@ def _get_batch_count() -> int:
         return 0
 
 
-def _increment_batch():
-    try:
-        return redis_client.incr(_KEY_BATCH_COUNT)
-    except Exception:
-        return 0
-
-
 def _reset_batch():
     try:
         redis_client.set(_KEY_BATCH_COUNT, 0)
@@ -106,7 +171,8 @@ def _reset_batch():
 
 def _update_activity():
     try:
-        redis_client.setex(_KEY_LAST_ACTIVITY, 120, str(time.time()))
+        ttl = max(GPU_IDLE_RELEASE_SEC.values()) + 120
+        redis_client.setex(_KEY_LAST_ACTIVITY, ttl, str(time.time()))
     except Exception:
         pass
 
@@ -119,6 +185,458 @@ def _get_queue_length(queue_name: str) -> int:
         return 0
 
 
+# =====================================================================
+# GPU 임대 (Lua 원자 연산 + 하트비트)
+# =====================================================================
+# 전환 여부 판단(gpu_scheduler)은 Python에서 하고, 판단에 쓴 활성 모델이 그대로일 때만
+# 상태를 바꾸도록 Lua 스크립트 안에서 다시 확인합니다 (compare-and-set).
+# 시각은 Worker마다 시계가 다를 수 있으므로 Redis 서버 TIME 기준 (ms).
+
+_LUA_NOW = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+"""
+
+# 대기 작업 깨우기: 타입의 gpu:ready 목록에서 최대 n개 꺼내 반환 (n < 0이면 전부)
+_LUA_POP_READY = """
+local function pop_ready(key, n)
+    if n == 0 then
+        return {}
+    end
+    local items = redis.call('LRANGE', key, 0, n - 1)
+    if n < 0 then
+        redis.call('DEL', key)
+    else
+        redis.call('LTRIM', key, n, -1)
+    end
+    return items
+end
+"""
+
+# KEYS: active, batch, holders, switching, next_model, epoch, ready:{task_type}
+# ARGV: task_type, token, ttl_ms, max_holders, 전환 승인한 현재 모델('' = 미승인), 예약 모델 대기 작업 여부('1'|'0'),
+#       판단 시점의 활성 모델, 대기 보관할 작업 JSON('' = 보관 안 함)
+_LUA_ACQUIRE = _LUA_NOW + """
+local function wait(reason, detail)
+    if ARGV[8] ~= '' then
+        redis.call('RPUSH', KEYS[7], ARGV[8])
+    end
+    return {'wait', reason, detail or ''}
+end
+redis.call('ZREMRANGEBYSCORE', KEYS[3], '-inf', now)
+local active = redis.call('GET', KEYS[1]) or 'none'
+if active ~= ARGV[7] then
+    return {'retry', active}
+end
+if redis.call('EXISTS', KEYS[4]) == 1 then
+    return wait('switching')
+end
+local expiry = now + tonumber(ARGV[3])
+if active == ARGV[1] then
+    if redis.call('ZCARD', KEYS[3]) >= tonumber(ARGV[4]) then
+        return wait('busy', active)
+    end
+    redis.call('ZADD', KEYS[3], expiry, ARGV[2])
+    return {'ok', active, redis.call('INCR', KEYS[2])}
+end
+if redis.call('ZCARD', KEYS[3]) > 0 then
+    return wait('held', active)
+end
+if active == 'none' then
+    local reserved = redis.call('GET', KEYS[5])
+    if reserved and reserved ~= ARGV[1] and ARGV[6] == '1' then
+        return wait('reserved', reserved)
+    end
+elseif ARGV[5] ~= active then
+    return wait('not_approved', active)
+end
+redis.call('SET', KEYS[1], ARGV[1])
+redis.call('SET', KEYS[2], 1)
+redis.call('DEL', KEYS[5])
+redis.call('SET', KEYS[4], ARGV[2], 'PX', ARGV[3])
+redis.call('ZADD', KEYS[3], expiry, ARGV[2])
+return {'switch', active, redis.call('INCR', KEYS[6])}
+"""
+
+# KEYS: active, batch, holders, switching, next_model, ready:{task_type}
+# ARGV: token, task_type, vacate('1' = 남은 보유자가 없으면 모델 비우기), next_model('' = 없음), ttl_ms, next_model_ttl_sec,
+#       max_holders
+# 모델을 비우지 않으면 같은 타입 대기 작업을 빈 자리만큼 깨움 (비우면 _LUA_FINISH_SWITCH가 깨움)
+_LUA_RELEASE = _LUA_NOW + _LUA_POP_READY + """
+redis.call('ZREM', KEYS[3], ARGV[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[3], '-inf', now)
+local remaining = redis.call('ZCARD', KEYS[3])
+local active = redis.call('GET', KEYS[1]) or 'none'
+local function keep(status)
+    local woken = {}
+    if active == ARGV[2] and redis.call('EXISTS', KEYS[4]) == 0 then
+        woken = pop_ready(KEYS[6], math.max(0, tonumber(ARGV[7]) - remaining))
+    end
+    return {status, remaining, woken}
+end
+if ARGV[3] ~= '1' then
+    return keep('released')
+end
+if remaining > 0 or redis.call('EXISTS', KEYS[4]) == 1 or active ~= ARGV[2] then
+    return keep('kept')
+end
+redis.call('SET', KEYS[1], 'none')
+redis.call('SET', KEYS[2], 0)
+redis.call('SET', KEYS[4], ARGV[1], 'PX', ARGV[5])
+if ARGV[4] ~= '' then
+    redis.call('SET', KEYS[5], ARGV[4], 'EX', ARGV[6])
+end
+return {'vacated', 0, {}}
+"""
+
+# KEYS: active, holders, switching / ARGV: model_type, token, ttl_ms
+# 상주 모델 해제(유휴 해제) 전 전환 토큰 선점: 그 타입이 활성이 아니고(임대 보유자는 활성 타입의 것이므로
+# 이 타입 보유자도 없음) 다른 전환이 진행 중이 아닐 때만 → 해제하는 동안 _LUA_ACQUIRE가 'switching'으로 대기
+_LUA_EVICT = _LUA_NOW + """
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', now)
+local active = redis.call('GET', KEYS[1]) or 'none'
+if active == ARGV[1] or redis.call('EXISTS', KEYS[3]) == 1 then
+    return 0
+end
+redis.call('SET', KEYS[3], ARGV[2], 'PX', ARGV[3])
+return 1
+"""
+
+# KEYS: holders, switching / ARGV: token, ttl_ms
+_LUA_RENEW = _LUA_NOW + """
+local alive = 0
+local score = redis.call('ZSCORE', KEYS[1], ARGV[1])
+if score and tonumber(score) >= now then
+    redis.call('ZADD', KEYS[1], now + tonumber(ARGV[2]), ARGV[1])
+    alive = 1
+elseif score then
+    redis.call('ZREM', KEYS[1], ARGV[1])
+end
+if redis.call('GET', KEYS[2]) == ARGV[1] then
+    redis.call('PEXPIRE', KEYS[2], ARGV[2])
+    alive = 1
+end
+return alive
+"""
+
+# KEYS: switching, holders, active, next_model, ready:image, ready:stt / ARGV: token, max_image, max_stt
+# 전환 완료 → 활성 모델의 대기 작업을 빈 자리만큼 깨움
+#   (사전 언로드/유휴 해제로 비웠으면 예약 모델의 대기 작업, 예약이 없으면 양쪽 모두)
+_LUA_FINISH_SWITCH = _LUA_NOW + _LUA_POP_READY + """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return {}
+end
+redis.call('DEL', KEYS[1])
+local ready = {image = {KEYS[5], tonumber(ARGV[2])}, stt = {KEYS[6], tonumber(ARGV[3])}}
+local active = redis.call('GET', KEYS[3]) or 'none'
+if active == 'none' then
+    active = redis.call('GET', KEYS[4])
+    if not active then
+        local woken = pop_ready(KEYS[5], -1)
+        for _, item in ipairs(pop_ready(KEYS[6], -1)) do
+            table.insert(woken, item)
+        end
+        return woken
+    end
+end
+local target = ready[active]
+if not target then
+    return {}
+end
+local holders = redis.call('ZCOUNT', KEYS[2], now, '+inf')
+return pop_ready(target[1], math.max(0, target[2] - holders))
+"""
+
+_scripts = {}
+_lease_lock = threading.Lock()
+_held_leases = {}           # 이 프로세스가 보유한 임대: {task_type 또는 "unload": 토큰}
+_heartbeat_thread = None
+
+
+def _eval(source: str, keys: list, args: list):
+    """Lua 스크립트 실행 (EVALSHA, 스크립트 캐시가 비었으면 redis-py가 EVAL로 재시도)"""
+    script = _scripts.get(source)
+    if script is None:
+        script = _scripts[source] = redis_client.register_script(source)
+    return script(keys=keys, args=args)
+
+
+def _lease_ttl_ms() -> int:
+    return GPU_LEASE_TTL_SEC * 1000
+
+
+def _hold(key: str, token: str):
+    with _lease_lock:
+        _held_leases[key] = token
+    _ensure_heartbeat()
+
+
+def _drop(key: str):
+    with _lease_lock:
+        return _held_leases.pop(key, None)
+
+
+def _ensure_heartbeat():
+    """임대 갱신 스레드 시작 (프로세스당 1개 - Celery prefork 자식 프로세스에서 처음 획득할 때)"""
+    global _heartbeat_thread
+    if _heartbeat_thread is None:
+        with _lease_lock:
+            if _heartbeat_thread is None:
+                _heartbeat_thread = threading.Thread(target=_heartbeat_loop, name="gpu-lease-heartbeat",
+                                                     daemon=True)
+                _heartbeat_thread.start()
+
+
+def _heartbeat_loop():
+    """
+    보유 중인 임대(및 전환 토큰)를 TTL의 1/3마다 연장 - 긴 STT 작업 중에도 임대 유지
+    (유휴 중에도 계속 돌며 다른 프로세스가 보낸 STT 해제 신호를 반영 - _sync_local_models)
+    """
+    interval = max(1.0, GPU_LEASE_TTL_SEC / 3)
+    while True:
+        time.sleep(interval)
+        try:
+            _sync_local_models()
+        except Exception as e:
+            print(f"⚠️ [GPU] STT 상주 상태 동기화 실패: {e}")
+        with _lease_lock:
+            held = list(_held_leases.items())
+        for key, token in held:
+            try:
+                alive = _eval(_LUA_RENEW, [_KEY_LEASE_HOLDERS, _KEY_SWITCHING], [token, _lease_ttl_ms()])
+            except Exception as e:
+                print(f"⚠️ [GPU] 임대 갱신 실패 ({key}): {e}")
+                continue
+            if not alive:
+                print(f"⚠️ [GPU] {key} 임대 만료 - 다른 Worker가 GPU를 가져갈 수 있음")
+                with _lease_lock:
+                    if _held_leases.get(key) == token:
+                        del _held_leases[key]
+
+
+def _finish_switch(token: str):
+    """전환/사전 언로드 완료 → 다른 Worker 획득 허용 + 이제 실행할 수 있는 대기 작업 재발행"""
+    try:
+        woken = _eval(_LUA_FINISH_SWITCH,
+                      [_KEY_SWITCHING, _KEY_LEASE_HOLDERS, _KEY_ACTIVE_MODEL, _KEY_NEXT_MODEL,
+                       _KEY_READY.format("image"), _KEY_READY.format("stt")],
+                      [token, GPU_LEASE_MAX_HOLDERS["image"], GPU_LEASE_MAX_HOLDERS["stt"]])
+    except Exception as e:
+        print(f"⚠️ [GPU] 전환 완료 표시 실패 (TTL 후 자동 해제): {e}")
+        return
+    _republish(woken)
+
+
+def _republish(entries: list):
+    """gpu:ready에서 꺼낸 대기 작업을 같은 task_id로 다시 발행 (Celery 큐 라우팅 그대로)"""
+    if not entries:
+        return
+    from worker.celery_app import celery_app
+
+    for raw in entries:
+        try:
+            entry = json.loads(raw)
+            celery_app.send_task(entry["task"], args=entry.get("args") or [], kwargs=entry.get("kwargs") or {},
+                                 task_id=entry["task_id"])
+            waited = time.time() - entry.get("parked_at", time.time())
+            print(f"🔔 [GPU] 대기 작업 재발행: {entry['task']} ({entry['task_id']}, {waited:.1f}초 대기)")
+        except Exception as e:
+            # 재발행 실패 → 다시 보관 (Beat 정리 주기에 재시도)
+            print(f"⚠️ [GPU] 대기 작업 재발행 실패: {e}")
+            try:
+                entry_type = json.loads(raw).get("type", "image")
+                redis_client.rpush(_KEY_READY.format(entry_type), raw)
+            except Exception:
+                pass
+
+
+def park_entry(task_type: str, task_name: str, task_id: str, args: list = None, kwargs: dict = None) -> dict:
+    """try_acquire(wait_entry=...)에 넘길 대기 작업 정보 (GPU를 쓸 수 있게 되면 그대로 재발행)"""
+    return {"type": task_type, "task": task_name, "task_id": task_id,
+            "args": list(args or []), "kwargs": dict(kwargs or {})}
+
+
+def wake_stale_parked() -> dict:
+    """
+    GPU_PARK_SWEEP_SEC보다 오래 보관된 대기 작업 재발행 (Beat 주기 호출 - 깨우기 이벤트를 놓친 경우 대비)
+
+    재발행된 작업은 GPU를 얻지 못하면 다시 보관되므로 순서만 뒤로 밀립니다.
+    """
+    woken = {}
+    for task_type in _QUEUE_MAP:
+        key = _KEY_READY.format(task_type)
+        try:
+            oldest = redis_client.lindex(key, 0)
+            if not oldest or time.time() - json.loads(oldest).get("parked_at", 0) < GPU_PARK_SWEEP_SEC:
+                continue
+            pipe = redis_client.pipeline(transaction=True)
+            pipe.lrange(key, 0, -1)
+            pipe.delete(key)
+            entries = pipe.execute()[0]
+        except Exception:
+            continue
+        if entries:
+            print(f"🧹 [GPU] 오래 보관된 {task_type} 대기 작업 {len(entries)}개 재발행")
+            _republish(entries)
+            woken[task_type] = len(entries)
+    return woken
+
+
+def get_parked_count(task_type: str) -> int:
+    try:
+        return redis_client.llen(_KEY_READY.format(task_type))
+    except Exception:
+        return 0
+
+
+def _release_lease(token: str, task_type: str, vacate: bool = False, next_model: str = None) -> str:
+    """
+    임대 반납 (vacate=True면 남은 보유자가 없을 때 모델을 비우고 전환 토큰을 잡음)
+
+    Returns:
+        "released" | "kept" (다른 Worker가 사용 중 / 전환 중) | "vacated" (언로드 후 _finish_switch 필요)
+    """
+    try:
+        result = _eval(_LUA_RELEASE,
+                       [_KEY_ACTIVE_MODEL, _KEY_BATCH_COUNT, _KEY_LEASE_HOLDERS, _KEY_SWITCHING, _KEY_NEXT_MODEL,
+                        _KEY_READY.format(task_type)],
+                       [token, task_type, "1" if vacate else "0", next_model or "", _lease_ttl_ms(),
+                        _NEXT_MODEL_TTL, GPU_LEASE_MAX_HOLDERS[task_type]])
+    except Exception as e:
+        print(f"⚠️ [GPU] 임대 반납 실패 (TTL 후 자동 만료): {e}")
+        return "kept"
+    _republish(result[2])
+    return result[0]
+
+
+def _vacate(task_type: str, next_model: str = None, token: str = None) -> bool:
+    """
+    현재 모델을 다른 Worker가 쓰고 있지 않으면 비우고 언로드 (사전 언로드 / 유휴 해제)
+
+    사전 언로드(next_model 지정)는 next_model과 VRAM에 함께 들어가면 언로드하지 않고 활성 모델만 비웁니다.
+    """
+    token = token or uuid.uuid4().hex
+    if _release_lease(token, task_type, vacate=True, next_model=next_model) != "vacated":
+        return False
+    _hold("unload", token)
+    try:
+        fits, free_mb, need_mb = _fits_alongside(next_model) if next_model else (False, None, None)
+        if fits:
+            print(f"🤝 [GPU] {task_type} 모델 상주 유지 - VRAM 여유 {free_mb:.0f}MB ≥ "
+                  f"{next_model} 필요 {need_mb:.0f}MB (언로드 생략)")
+        else:
+            _unload_model(task_type)
+    finally:
+        _drop("unload")
+        _finish_switch(token)
+    return True
+
+
+def _sync_local_models():
+    """
+    다른 프로세스(전환한 Worker / 유휴 해제 Beat)가 STT를 상주 목록에서 뺐으면 이 프로세스의 Whisper를 내림
+    (STT 모델은 프로세스 메모리에 있어 다른 프로세스가 대신 언로드할 수 없음 → 신호만 보내고 여기서 해제)
+
+    try_acquire와 임대 하트비트 스레드에서 호출하므로 유휴 상태로 남아 있어도 곧 반영됩니다.
+    이 프로세스가 STT 임대를 보유 중이면(작업 실행 중) 내리지 않습니다.
+    """
+    if _stt_model is None or "stt" in _held_leases:
+        return
+    if _get_active_model() != "stt" and "stt" not in _get_resident():
+        started = time.time()
+        if _unload_stt_model():
+            # 실제로 해제한 프로세스에서만 언로드 시간 기록 (스케줄러 전환 비용)
+            record_swap_cost("unload", "stt", time.time() - started)
+
+
+# =====================================================================
+# 접수 작업 / 소요 시간 통계 (app.admission의 대기 순번·예상 시간 계산용)
+# =====================================================================
+# Celery 큐 길이에는 실행 중이거나 GPU 대기로 gpu:ready에 보관된 작업이 빠지므로
+# 접수 시 mark_pending, 종료 시 clear_pending으로 미완료 작업을 따로 셉니다.
+
+def mark_pending(task_type: str, task_id: str):
+    try:
+        redis_client.zadd(_KEY_PENDING.format(task_type), {task_id: time.time()})
+    except Exception:
+        pass
+
+
+def clear_pending(task_type: str, task_ids: list):
+    try:
+        if task_ids:
+            redis_client.zrem(_KEY_PENDING.format(task_type), *task_ids)
+    except Exception:
+        pass
+
+
+def get_pending_count(task_type: str) -> int:
+    """접수 후 아직 끝나지 않은 작업 수 (GPU_PENDING_MAX_AGE보다 오래된 항목은 정리)"""
+    key = _KEY_PENDING.format(task_type)
+    try:
+        pipe = redis_client.pipeline()
+        pipe.zremrangebyscore(key, "-inf", time.time() - GPU_PENDING_MAX_AGE)
+        pipe.zcard(key)
+        return int(pipe.execute()[1])
+    except Exception:
+        return 0
+
+
+def get_queue_depth(task_type: str) -> int:
+    """대기 + 실행 중 작업 수 (Celery 큐 길이와 미완료 작업 수 중 큰 값)"""
+    return max(_get_queue_length(_QUEUE_MAP[task_type]), get_pending_count(task_type))
+
+
+def get_oldest_pending_age(task_type: str) -> float:
+    """접수 후 가장 오래 끝나지 않은 작업의 경과 시간 (초, 없으면 0)"""
+    try:
+        oldest = redis_client.zrange(_KEY_PENDING.format(task_type), 0, 0, withscores=True)
+        return max(0.0, time.time() - oldest[0][1]) if oldest else 0.0
+    except Exception:
+        return 0.0
+
+
+def record_job_duration(task_type: str, seconds: float, task_ids: list = None):
+    """
+    GPU 작업 1건의 소요 시간 기록 (GPU 획득 ~ 결과 저장, 최근 GPU_DURATION_WINDOW건 유지)
+
+    task_ids를 주면 접수 시각(mark_pending)과 함께 gpu:trace에도 남깁니다 (clear_pending 전에 호출).
+    """
+    key = _KEY_DURATIONS.format(task_type)
+    try:
+        arrivals = []
+        if task_ids:
+            arrivals = [score for score in redis_client.zmscore(_KEY_PENDING.format(task_type), task_ids)
+                        if score is not None]
+        pipe = redis_client.pipeline()
+        pipe.lpush(key, round(float(seconds), 2))
+        pipe.ltrim(key, 0, GPU_DURATION_WINDOW - 1)
+        for arrival in arrivals:
+            pipe.lpush(_KEY_TRACE, json.dumps({"type": task_type, "arrival": round(arrival, 3),
+                                               "service": round(float(seconds), 3)}))
+        if arrivals:
+            pipe.ltrim(_KEY_TRACE, 0, GPU_TRACE_MAX - 1)
+        pipe.execute()
+    except Exception:
+        pass
+
+
+def get_job_traces() -> list:
+    """완료 작업 추적 (접수 시각 순) - [{"type", "arrival", "service"}, ...]"""
+    try:
+        traces = [json.loads(raw) for raw in redis_client.lrange(_KEY_TRACE, 0, -1)]
+    except Exception:
+        return []
+    return sorted(traces, key=lambda item: item["arrival"])
+
+
+def get_job_durations(task_type: str) -> list:
+    try:
+        return [float(v) for v in redis_client.lrange(_KEY_DURATIONS.format(task_type), 0, -1)]
+    except Exception:
+        return []
+
+
 # =====================================================================
 # 모델 로드/언로드 (ComfyUI + STT)
 # =====================================================================
@@ -127,6 +645,8 @@ def _free_comfyui_vram():
     """ComfyUI 컨테이너의 VRAM 해제 요청 (해제 완료 확인)"""
     try:
         print("🔄 [GPU] ComfyUI VRAM 해제 요청 중...")
+        gpu = _comfyui_device_stats()
+        before_mb = _comfyui_used_mb(gpu) if gpu else None
         resp = http_requests.post(
             f"{COMFYUI_BASE_URL}/free",
             json={"free_memory": True},
@@ -140,36 +660,21 @@ def _free_comfyui_vram():
             return
 
         # VRAM 해제 완료 확인 (최대 30초, 2초 간격 폴링)
+        # STT가 같은 GPU에 상주할 수 있으므로 장치 전체 사용량이 아니라 ComfyUI 자신의 예약량으로 판단
         for attempt in range(15):
             time.sleep(2)
-            try:
-                stats_resp = http_requests.get(
-                    f"{COMFYUI_BASE_URL}/system_stats",
-                    timeout=5
-                )
-                if stats_resp.status_code != 200:
-                    continue
-
-                devices = stats_resp.json().get("system", {}).get("devices", [])
-                if not devices:
-                    continue
-
-                gpu = devices[0]
-                vram_total = gpu.get("vram_total", 0)
-                vram_free = gpu.get("vram_free", 0)
-
-                if vram_total > 0:
-                    vram_used_mb = (vram_total - vram_free) / (1024 * 1024)
-                    free_pct = (vram_free / vram_total) * 100
-                    print(f"📊 [GPU] ComfyUI VRAM: {vram_used_mb:.0f}MB 사용 중 "
-                          f"({free_pct:.0f}% 여유, 시도 {attempt + 1}/15)")
-
-                    # VRAM 사용량이 1GB 미만이면 해제 완료로 판단
-                    if vram_used_mb < 1024:
-                        print("✅ [GPU] ComfyUI VRAM 해제 확인 완료")
-                        return
-            except Exception:
+            gpu = _comfyui_device_stats()
+            if not gpu:
                 continue
+            used_mb = _comfyui_used_mb(gpu)
+            print(f"📊 [GPU] ComfyUI VRAM: {used_mb:.0f}MB 사용 중 (시도 {attempt + 1}/15)")
+
+            # VRAM 사용량이 1GB 미만이면 해제 완료로 판단
+            if used_mb < 1024:
+                if before_mb is not None:
+                    record_vram_footprint("image", before_mb - used_mb)
+                print("✅ [GPU] ComfyUI VRAM 해제 확인 완료")
+                return
 
         print("⚠️ [GPU] ComfyUI VRAM 해제 확인 타임아웃 (30초) - 계속 진행")
 
@@ -189,15 +694,22 @@ def _load_stt_model():
         from faster_whisper import WhisperModel
         print("📥 [GPU] Faster Whisper 모델 로딩 중... (GPU)")
         _clear_cuda_cache()
+        free_before, _ = _torch_vram_mb()
 
         # 로컬 모델 경로 (폐쇄망 - 외부 다운로드 불가)
         model_path = os.getenv("STT_MODEL_PATH", "/models/faster-whisper-large-v3")
+        started = time.time()
         _stt_model = WhisperModel(
             model_path,
             device="cuda",
             compute_type="int8"
         )
-        print("✅ [GPU] Faster Whisper 모델 로딩 완료")
+        load_sec = time.time() - started
+        record_model_load("stt", load_sec, cold=True)
+        free_after, _ = _torch_vram_mb()
+        if free_before is not None and free_after is not None:
+            record_vram_footprint("stt", free_before - free_after)
+        print(f"✅ [GPU] Faster Whisper 모델 로딩 완료 ({load_sec:.1f}초)")
         return _stt_model
 
     except ImportError:
@@ -208,11 +720,16 @@ def _load_stt_model():
         return None
 
 
-def _unload_stt_model():
-    """Faster Whisper STT 모델을 VRAM에서 언로드"""
+def _unload_stt_model() -> bool:
+    """
+    Faster Whisper STT 모델을 VRAM에서 언로드
+
+    Returns:
+        bool: 이 프로세스에서 실제로 해제했는지 (모델이 다른 프로세스에 있으면 False)
+    """
     global _stt_model
     if _stt_model is None:
-        return
+        return False
     try:
         print("🔄 [GPU] Faster Whisper 모델 언로드 중...")
         del _stt_model
@@ -222,6 +739,7 @@ def _unload_stt_model():
     except Exception as e:
         _stt_model = None
         print(f"⚠️ [GPU] STT 모델 언로드 중 오류: {e}")
+    return True
 
 
 def _clear_cuda_cache():
@@ -236,91 +754,342 @@ def _clear_cuda_cache():
         pass
 
 
-def _switch_to(model_type: str):
+def _unload_model(model_type: str):
     """
-    GPU 모델 전환
+    활성 모델 언로드 + 언로드 시간 기록 (스케줄러 전환 비용)
 
-    현재 모델을 언로드하고 새 모델 타입으로 전환합니다.
-    ComfyUI는 /prompt 요청 시 자동 로드되므로 여기서 직접 로드하지 않습니다.
-    STT는 명시적으로 로드합니다.
+    STT가 다른 프로세스에 로드되어 있으면 상주 목록에서만 빼서 그 프로세스에 해제를 맡기고
+    (_sync_local_models) 언로드 시간은 기록하지 않습니다 (0초가 전환 비용 평균에 섞이지 않도록).
     """
-    current = _get_active_model()
-    print(f"🔄 [GPU] 모델 전환: {current} → {model_type}")
-
-    # 현재 모델 언로드
-    if current == "image":
+    started = time.time()
+    if model_type == "image":
         _free_comfyui_vram()
-    elif current == "stt":
-        _unload_stt_model()
+    elif model_type == "stt":
+        if not _unload_stt_model():
+            _clear_resident(model_type)
+            print("📨 [GPU] STT 모델은 다른 Worker 프로세스에 있음 - 상주 해제 신호만 전달")
+            return
+    else:
+        return
+    _clear_resident(model_type)
+    record_swap_cost("unload", model_type, time.time() - started)
+
+
+# =====================================================================
+# VRAM 예산 (STT / 이미지 모델 공존)
+# =====================================================================
+_MB = 1024 * 1024
+
+
+def _comfyui_device_stats():
+    """ComfyUI /system_stats의 첫 번째 GPU 정보 (조회 실패 시 None)"""
+    try:
+        resp = http_requests.get(f"{COMFYUI_BASE_URL}/system_stats", timeout=5)
+        if resp.status_code != 200:
+            return None
+        stats = resp.json()
+        devices = stats.get("devices") or stats.get("system", {}).get("devices", [])
+        return devices[0] if devices else None
+    except Exception:
+        return None
+
+
+def _comfyui_used_mb(gpu: dict) -> float:
+    """ComfyUI 프로세스가 잡고 있는 VRAM (torch 예약량, 구버전은 장치 전체 사용량)"""
+    if gpu.get("torch_vram_total") is not None:
+        return gpu["torch_vram_total"] / _MB
+    return (gpu.get("vram_total", 0) - gpu.get("vram_free", 0)) / _MB
+
+
+def _torch_vram_mb() -> tuple:
+    """(장치 전체 여유, 이 프로세스 torch 캐시 중 미사용분) MB - CUDA가 없으면 (None, 0)"""
+    try:
+        import torch
+        if not torch.cuda.is_available():
+            return None, 0.0
+        free, _total = torch.cuda.mem_get_info()
+        cached = torch.cuda.memory_reserved() - torch.cuda.memory_allocated()
+        return free / _MB, max(0, cached) / _MB
+    except Exception:
+        return None, 0.0
+
+
+def probe_vram(model_type: str = None) -> dict:
+    """
+    model_type을 올릴 프로세스가 쓸 수 있는 GPU VRAM 여유 측정 (MB)
+
+    - torch.cuda.mem_get_info: 장치 전체 여유 (ComfyUI 컨테이너를 포함한 모든 프로세스 사용량 반영)
+    - 캐싱 할당기가 잡아두고 쓰지 않는 메모리는 그 프로세스만 재사용 가능 → 올릴 모델의 프로세스 것만 더함
+        stt:   이 Worker의 torch 캐시 중 미사용분
+        image: ComfyUI /system_stats torch_vram_free
+        None:  장치 여유만 (상태 조회용)
+    Worker에서 CUDA를 쓸 수 없으면 ComfyUI가 본 vram_free (장치 여유 + ComfyUI 캐시, image 외에는 캐시 제외)
+
+    Returns:
+        dict: {"free_mb": 여유 (측정 불가면 None), "comfyui_mb": ComfyUI 사용량, "source"}
+    """
+    device_free, own_cached = _torch_vram_mb()
+    gpu = _comfyui_device_stats()
+    comfyui_cached = gpu.get("torch_vram_free", 0) / _MB if gpu else 0.0
+    if device_free is not None:
+        free = device_free
+        source = "torch"
+        if model_type == "stt":
+            free += own_cached
+        elif model_type == "image" and gpu:
+            free += comfyui_cached
+            source = "torch+comfyui"
+    elif gpu and gpu.get("vram_total"):
+        free = gpu.get("vram_free", 0) / _MB - (0.0 if model_type == "image" else comfyui_cached)
+        source = "comfyui"
+    else:
+        return {"free_mb": None, "comfyui_mb": None, "source": None}
+    return {
+        "free_mb": round(free),
+        "comfyui_mb": round(_comfyui_used_mb(gpu)) if gpu else None,
+        "source": source,
+    }
+
+
+def record_vram_footprint(model_type: str, mb: float):
+    """모델 로드/해제 시 측정한 VRAM 변화량 기록 (지수 이동 평균, 100MB 미만은 측정 노이즈로 무시)"""
+    if mb < 100:
+        return
+    field = f"footprint:{model_type}"
+    try:
+        previous = redis_client.hget(_KEY_VRAM_STATS, field)
+        value = gpu_scheduler.ewma(float(previous) if previous else None, mb)
+        redis_client.hset(_KEY_VRAM_STATS, field, round(value))
+    except Exception:
+        pass
+
+
+def _footprint_mb(model_type: str) -> float:
+    try:
+        measured = redis_client.hget(_KEY_VRAM_STATS, f"footprint:{model_type}")
+        if measured:
+            return float(measured)
+    except Exception:
+        pass
+    return float(GPU_VRAM_FOOTPRINT_MB[model_type])
+
+
+def _get_resident() -> dict:
+    """VRAM에 올라와 있는 모델 {타입: 마지막 사용 시각}"""
+    try:
+        return {model_type: float(ts) for model_type, ts in redis_client.hgetall(_KEY_RESIDENT).items()}
+    except Exception:
+        return {}
+
+
+def _mark_resident(model_type: str):
+    try:
+        redis_client.hset(_KEY_RESIDENT, model_type, time.time())
+    except Exception:
+        pass
 
-    # 새 모델 설정
-    _set_active_model(model_type)
-    _reset_batch()
-    _update_activity()
 
-    # STT는 명시적 로드 필요 (ComfyUI는 요청 시 자동 로드)
+def _clear_resident(model_type: str):
+    try:
+        redis_client.hdel(_KEY_RESIDENT, model_type)
+    except Exception:
+        pass
+
+
+def _is_loaded(model_type: str) -> bool:
+    """model_type이 이미 VRAM에 있는지 (STT는 이 프로세스의 Whisper 기준)"""
     if model_type == "stt":
-        _load_stt_model()
+        return _stt_model is not None
+    return model_type in _get_resident()
+
+
+def _fits_alongside(model_type: str) -> tuple:
+    """
+    다른 모델을 VRAM에 둔 채 model_type을 실행할 수 있는지 (GPU_CORESIDENT 꺼짐 / 측정 불가면 False)
+
+    Returns:
+        (가능 여부, 여유 MB, 필요 MB)
+    """
+    if not GPU_CORESIDENT:
+        return False, None, None
+    free = probe_vram(model_type)["free_mb"]
+    if free is None:
+        return False, None, None
+    need = GPU_VRAM_HEADROOM_MB + (0 if _is_loaded(model_type) else _footprint_mb(model_type))
+    return free >= need, free, need
+
+
+def _make_room(model_type: str):
+    """model_type을 올리기 전 VRAM 확보 - 예산 안이면 다른 모델을 상주시킨 채 두고, 모자라면 언로드"""
+    for other in _get_resident():
+        if other == model_type:
+            continue
+        fits, free_mb, need_mb = _fits_alongside(model_type)
+        if fits:
+            print(f"🤝 [GPU] {other} 모델 상주 유지 - VRAM 여유 {free_mb:.0f}MB ≥ {model_type} 필요 {need_mb:.0f}MB")
+            continue
+        if free_mb is not None:
+            print(f"💾 [GPU] VRAM 부족 ({free_mb:.0f}MB < {need_mb:.0f}MB) → {other} 언로드")
+        _unload_model(other)
+
+
+def _evict_resident(model_type: str) -> bool:
+    """
+    활성이 아닌 상주 모델 해제 (_vacate와 같이 전환 토큰을 원자적으로 잡은 뒤 언로드 → _finish_switch)
+
+    토큰을 잡은 뒤 유휴 조건을 다시 확인하므로, 확인과 해제 사이에 그 모델로 전환한 작업을 건드리지 않습니다.
+    """
+    token = uuid.uuid4().hex
+    try:
+        claimed = _eval(_LUA_EVICT, [_KEY_ACTIVE_MODEL, _KEY_LEASE_HOLDERS, _KEY_SWITCHING],
+                        [model_type, token, _lease_ttl_ms()])
+    except Exception as e:
+        print(f"⚠️ [GPU] 상주 모델 해제 토큰 획득 실패: {e}")
+        return False
+    if not claimed:
+        return False
+    _hold("unload", token)
+    try:
+        last_used = _get_resident().get(model_type)
+        if (last_used is None or time.time() - last_used < GPU_IDLE_RELEASE_SEC[model_type]
+                or get_queue_depth(model_type) > 0):
+            return False
+        print(f"⏰ [GPU] 유휴 타임아웃 → 상주 중인 {model_type} 모델 해제")
+        _unload_model(model_type)
+        return True
+    finally:
+        _drop("unload")
+        _finish_switch(token)
+
+
+def _release_idle_residents(active: str) -> list:
+    """활성 모델이 아닌 상주 모델(공존으로 남겨둔 모델) 중 타입별 유휴 시간이 지난 것 해제"""
+    released = []
+    now = time.time()
+    for model_type, last_used in _get_resident().items():
+        if model_type == active or model_type not in GPU_IDLE_RELEASE_SEC:
+            continue
+        if now - last_used < GPU_IDLE_RELEASE_SEC[model_type] or get_queue_depth(model_type) > 0:
+            continue
+        if _evict_resident(model_type):
+            released.append(model_type)
+    return released
+
+
+def _switch_to(previous: str, model_type: str, token: str):
+    """
+    GPU 모델 전환 (Redis 상태는 _LUA_ACQUIRE가 이미 바꿈 - 여기서는 실제 언로드/로드)
+
+    VRAM 예산 안이면 이전 모델을 상주시킨 채, 모자라면 언로드하고 새 모델을 준비합니다.
+    ComfyUI는 /prompt 요청 시 자동 로드되므로 여기서 직접 로드하지 않습니다.
+    STT는 명시적으로 로드합니다.
+    끝나면 전환 토큰을 풀어 같은 모델의 다른 Worker도 획득할 수 있게 합니다.
+    """
+    print(f"🔄 [GPU] 모델 전환: {previous} → {model_type}")
+    try:
+        # 이전 모델(및 공존 중인 모델) 상주 유지 또는 언로드
+        if previous != "none" and previous not in _get_resident():
+            _mark_resident(previous)
+        _make_room(model_type)
+        _update_activity()
+
+        # STT는 명시적 로드 필요 (ComfyUI는 요청 시 자동 로드)
+        if model_type == "stt":
+            _load_stt_model()
+    finally:
+        _finish_switch(token)
 
 
 # =====================================================================
 # 공개 API: 배치 인식 GPU 획득
 # =====================================================================
 
-def try_acquire(task_type: str) -> bool:
+def try_acquire(task_type: str, wait_entry: dict = None) -> bool:
     """
     GPU 자원 획득 시도 (배치 인식 스케줄링)
 
     Args:
         task_type: "image" 또는 "stt"
+        wait_entry: 획득 실패 시 gpu:ready에 보관할 작업 (park_entry) - GPU를 쓸 수 있게 되면 즉시 재발행
 
     Returns:
         True: 획득 성공, 작업 진행 가능
-        False: 획득 실패, 다른 모델의 배치가 진행 중이므로 나중에 재시도
+        False: 획득 실패, 다른 모델의 작업을 먼저 처리 (wait_entry를 줬으면 보관됨 → Task는 그대로 종료)
 
     스케줄링 정책:
-        1. 같은 모델 → 즉시 진행 (배치 카운터 증가)
-        2. 모델 없음 → 로드 후 진행
-        3. 다른 모델 + 배치 한도 미달 + 대기 작업 있음 → 거부 (재시도)
-        4. 다른 모델 + 배치 한도 도달 OR 대기 없음 → 전환 후 진행
-    """
-    current = _get_active_model()
+        1. 같은 모델 → 즉시 진행 (배치 카운터 증가, 동시 Worker 수 한도 내)
+        2. 모델 없음 → 로드 후 진행 (사전 언로드로 다른 타입이 예약되어 있고 그 작업이 대기 중이면 재시도)
+        3. 다른 모델 + gpu_scheduler가 유지 결정 → 거부 (재시도)
+        4. 다른 모델 + gpu_scheduler가 전환 결정 + 임대 보유자 없음 → 전환 후 진행
+        (다른 Worker가 전환 중이면 재시도)
 
-    # Case 1: 같은 모델이 이미 활성 → 즉시 진행
-    if current == task_type:
-        count = _increment_batch()
-        _update_activity()
-        print(f"✅ [GPU] {task_type} 작업 진행 (배치 {count}/{GPU_MAX_BATCH})")
-        return True
+    획득하면 임대를 보유하고, after_task에서 반납합니다.
+    """
+    _sync_local_models()
+    token = uuid.uuid4().hex
+    park = ""
+    if wait_entry:
+        park = json.dumps({**wait_entry, "parked_at": time.time()}, ensure_ascii=False)
+
+    # 전환 판단은 Lua 밖에서 → 판단에 쓴 활성 모델이 그 사이 바뀌었으면 스크립트가 "retry" (다시 판단)
+    # 보관(park)은 반드시 Lua 안에서 해야 깨우기를 놓치지 않으므로 retry가 아닐 때까지 반복
+    # (retry는 다른 Worker가 활성 모델을 바꿨다는 뜻이라 곧 멈춤)
+    while True:
+        current = _get_active_model()
+        approved, reason = "", ""
+        reserved_waiting = "0"
+        if current == "none":
+            reserved = _get_next_model()
+            if reserved and reserved != task_type and get_queue_depth(reserved) > 0:
+                reserved_waiting = "1"
+        elif current != task_type:
+            switch, reason = gpu_scheduler.should_switch(current, task_type, _scheduler_snapshot(current))
+            if switch:
+                approved = current
+
+        try:
+            result = _eval(_LUA_ACQUIRE,
+                           [_KEY_ACTIVE_MODEL, _KEY_BATCH_COUNT, _KEY_LEASE_HOLDERS, _KEY_SWITCHING,
+                            _KEY_NEXT_MODEL, _KEY_EPOCH, _KEY_READY.format(task_type)],
+                           [task_type, token, _lease_ttl_ms(), GPU_LEASE_MAX_HOLDERS[task_type], approved,
+                            reserved_waiting, current, park])
+        except Exception as e:
+            # Redis 장애 시 이전처럼 진행 (단일 Worker 가정)
+            print(f"⚠️ [GPU] 임대 획득 실패 - 임대 없이 진행: {e}")
+            return True
+        if result[0] != "retry":
+            break
+
+    status = result[0]
+    if status == "wait":
+        detail = {
+            "switching": "다른 Worker가 모델 전환 중",
+            "busy": f"{task_type} 동시 Worker 한도 ({GPU_LEASE_MAX_HOLDERS[task_type]})",
+            "held": f"{result[2]} 작업 실행 중",
+            "reserved": f"{result[2]} 전환 예약됨",
+            "not_approved": reason,
+        }.get(result[1], result[1])
+        print(f"⏳ [GPU] {task_type} 대기 - {detail}{' (보관, 전환 시 재발행)' if park else ''}")
+        return False
 
-    # Case 2: GPU 비어있음 → 새 모델 로드
-    if current == "none":
-        _switch_to(task_type)
-        _increment_batch()
-        print(f"✅ [GPU] {task_type} 모델 새로 로드 (배치 1/{GPU_MAX_BATCH})")
+    _hold(task_type, token)
+    if status == "switch":
+        previous = result[1]
+        if previous != "none":
+            print(f"🔄 [GPU] 모델 전환 결정 ({reason}): {previous} → {task_type}")
+        _switch_to(previous, task_type, token)
+        _mark_resident(task_type)
+        print(f"✅ [GPU] {task_type} 모델 로드 (전환 #{result[2]})")
         return True
 
-    # Case 3 & 4: 다른 모델이 활성 중
-    current_queue = _QUEUE_MAP.get(current, "")
-    current_pending = _get_queue_length(current_queue)
-    current_batch = _get_batch_count()
-
-    if current_batch < GPU_MAX_BATCH and current_pending > 0:
-        # Case 3: 현재 모델 배치 한도 미달 + 대기 작업 있음 → 대기
-        print(f"⏳ [GPU] {task_type} 대기 - {current} 배치 처리 중 "
-              f"({current_batch}/{GPU_MAX_BATCH}, 대기 {current_pending}개)")
-        return False
-
-    # Case 4: 배치 한도 도달 OR 대기 작업 없음 → 전환
-    reason = "배치 한도 도달" if current_batch >= GPU_MAX_BATCH else "대기 작업 없음"
-    print(f"🔄 [GPU] 모델 전환 결정 ({reason}): {current} → {task_type}")
-    _switch_to(task_type)
-    _increment_batch()
+    _update_activity()
+    _mark_resident(task_type)
+    print(f"✅ [GPU] {task_type} 작업 진행 (연속 {result[2]}번째)")
     return True
 
 
 def _cleanup_comfyui_cache():
-    """ComfyUI 내부 캐시 경량 정리 (모델은 유지, 중간 텐서만 해제)"""
+    """ComfyUI /free 호출 (모델 언로드 + 캐시 해제, COMFYUI_FREE_POLICY=always일 때만 작업마다 호출)"""
     try:
         resp = http_requests.post(
             f"{COMFYUI_BASE_URL}/free",
@@ -333,60 +1102,246 @@ def _cleanup_comfyui_cache():
         pass
 
 
+def record_model_load(task_type: str, seconds: float, cold: bool):
+    """
+    작업별 모델 로드 시간 기록 (상주 정책으로 절감된 시간 확인용)
+
+    Args:
+        task_type: "image" 또는 "stt"
+        seconds: 이번 작업에서 모델 로드에 걸린 시간 (상주 모델 재사용 시 0에 가까움)
+        cold: 디스크에서 새로 로드했는지 여부
+    """
+    try:
+        pipe = redis_client.pipeline()
+        pipe.hincrby(_KEY_LOAD_STATS, f"{task_type}:jobs", 1)
+        pipe.hincrbyfloat(_KEY_LOAD_STATS, f"{task_type}:load_sec", float(seconds))
+        if cold:
+            pipe.hincrby(_KEY_LOAD_STATS, f"{task_type}:cold_loads", 1)
+            pipe.hset(_KEY_LOAD_STATS, f"{task_type}:last_cold_load_sec", round(float(seconds), 3))
+        pipe.execute()
+    except Exception:
+        pass
+    if cold:
+        record_swap_cost("load", task_type, seconds)
+
+
+# =====================================================================
+# 스케줄러 입력 (전환 비용 / 대기 상태)
+# =====================================================================
+
+def record_swap_cost(kind: str, task_type: str, seconds: float):
+    """
+    모델 로드/언로드 시간 기록 (지수 이동 평균, gpu_scheduler 전환 비용)
+
+    Args:
+        kind: "load" (콜드 로드) 또는 "unload" (VRAM 해제 확인까지)
+    """
+    field = f"{kind}:{task_type}"
+    try:
+        previous = redis_client.hget(_KEY_SWAP_STATS, field)
+        value = gpu_scheduler.ewma(float(previous) if previous else None, seconds)
+        redis_client.hset(_KEY_SWAP_STATS, field, round(value, 3))
+    except Exception:
+        pass
+
+
+def get_swap_costs() -> dict:
+    """{"load_sec": {타입: 초}, "unload_sec": {타입: 초}} (측정 전이면 gpu_scheduler 기본값)"""
+    try:
+        raw = redis_client.hgetall(_KEY_SWAP_STATS)
+    except Exception:
+        raw = {}
+    return {
+        "load_sec": {t: float(raw.get(f"load:{t}", gpu_scheduler.DEFAULT_LOAD_SEC[t])) for t in _QUEUE_MAP},
+        "unload_sec": {t: float(raw.get(f"unload:{t}", gpu_scheduler.DEFAULT_UNLOAD_SEC[t])) for t in _QUEUE_MAP},
+    }
+
+
+def _scheduler_snapshot(current: str) -> dict:
+    """gpu_scheduler.should_switch 입력 (대기 수는 현재 실행 중인 작업을 빼지 않은 근사값)"""
+    job_sec = {}
+    for task_type in _QUEUE_MAP:
+        samples = get_job_durations(task_type)
+        if samples:
+            job_sec[task_type] = sum(samples) / len(samples)
+    snapshot = {
+        "queue": {task_type: get_queue_depth(task_type) for task_type in _QUEUE_MAP},
+        "oldest_wait": {task_type: get_oldest_pending_age(task_type) for task_type in _QUEUE_MAP},
+        "batch_count": _get_batch_count(),
+        "job_sec": job_sec,
+    }
+    snapshot.update(get_swap_costs())
+    resident = _get_resident()
+    if GPU_CORESIDENT and all(task_type in resident for task_type in _QUEUE_MAP):
+        # 두 모델이 모두 상주 → 전환에 언로드/로드가 없음 (작업 시간/가중치만으로 결정)
+        snapshot["load_sec"] = {task_type: 0.0 for task_type in _QUEUE_MAP}
+        snapshot["unload_sec"] = {task_type: 0.0 for task_type in _QUEUE_MAP}
+    return snapshot
+
+
+def get_scheduler_snapshot() -> dict:
+    """현재 활성 모델 기준 스케줄러 입력 (PC1 접수 제어의 gpu_scheduler.estimate_wait용)"""
+    current = _get_active_model()
+    snapshot = _scheduler_snapshot(current)
+    snapshot["current"] = current if current in _QUEUE_MAP else None
+    return snapshot
+
+
+def _get_next_model():
+    try:
+        return redis_client.get(_KEY_NEXT_MODEL)
+    except Exception:
+        return None
+
+
+def _is_switching() -> bool:
+    try:
+        return bool(redis_client.exists(_KEY_SWITCHING))
+    except Exception:
+        return False
+
+
+def _get_lease_holders() -> int:
+    """만료되지 않은 임대 보유자 수"""
+    try:
+        return redis_client.zcount(_KEY_LEASE_HOLDERS, time.time() * 1000, "+inf")
+    except Exception:
+        return 0
+
+
+def record_clip_encode(seconds: float):
+    """이미지 작업별 텍스트 인코딩(CLIPTextEncode) 시간 기록 (스타일/네거티브 인코딩 캐시 효과 확인용)"""
+    try:
+        pipe = redis_client.pipeline()
+        pipe.hincrby(_KEY_LOAD_STATS, "image:clip_jobs", 1)
+        pipe.hincrbyfloat(_KEY_LOAD_STATS, "image:clip_sec", float(seconds))
+        pipe.execute()
+    except Exception:
+        pass
+
+
+# 이미지 작업 단계 (queue_wait: ComfyUI 큐 대기, transfer: 출력 수신, upload: PC1 전송)
+IMAGE_STAGES = ("queue_wait", "sampling", "vae_decode", "transfer", "upload")
+
+
+def record_image_stages(stages: dict):
+    """
+    이미지 작업 단계별 시간 기록 (이미지 지연이 어느 단계에서 생기는지 확인용)
+
+    Args:
+        stages: {단계 이름: 초} (IMAGE_STAGES 중 측정된 값만, None은 건너뜀)
+    """
+    try:
+        pipe = redis_client.pipeline()
+        for stage in IMAGE_STAGES:
+            seconds = stages.get(stage)
+            if seconds is None:
+                continue
+            pipe.hincrby(_KEY_LOAD_STATS, f"image:{stage}:jobs", 1)
+            pipe.hincrbyfloat(_KEY_LOAD_STATS, f"image:{stage}:sec", float(seconds))
+        pipe.execute()
+    except Exception:
+        pass
+
+
+def _get_load_stats() -> dict:
+    try:
+        raw = redis_client.hgetall(_KEY_LOAD_STATS)
+    except Exception:
+        return {}
+    stats = {}
+    for task_type in _QUEUE_MAP:
+        jobs = int(raw.get(f"{task_type}:jobs", 0))
+        cold = int(raw.get(f"{task_type}:cold_loads", 0))
+        load_sec = float(raw.get(f"{task_type}:load_sec", 0.0))
+        last_cold = float(raw.get(f"{task_type}:last_cold_load_sec", 0.0))
+        stats[task_type] = {
+            "jobs": jobs,
+            "cold_loads": cold,
+            "total_load_sec": round(load_sec, 1),
+            # 상주 정책이 없었다면 매 작업이 콜드 로드였을 것으로 가정한 절감 추정치
+            "estimated_saved_sec": round(max(0.0, last_cold * jobs - load_sec), 1),
+        }
+    clip_jobs = int(raw.get("image:clip_jobs", 0))
+    if clip_jobs and "image" in stats:
+        stats["image"]["avg_clip_encode_sec"] = round(float(raw.get("image:clip_sec", 0.0)) / clip_jobs, 3)
+    if "image" in stats:
+        stage_avgs = {}
+        for stage in IMAGE_STAGES:
+            stage_jobs = int(raw.get(f"image:{stage}:jobs", 0))
+            if stage_jobs:
+                stage_avgs[stage] = round(float(raw.get(f"image:{stage}:sec", 0.0)) / stage_jobs, 3)
+        if stage_avgs:
+            stats["image"]["avg_stage_sec"] = stage_avgs
+    return stats
+
+
 def after_task(task_type: str):
     """
     GPU 작업 완료 후 호출
 
-    배치 한도에 도달했고 다른 타입의 대기 작업이 있으면
-    현재 모델을 언로드하여 다음 작업이 빠르게 전환할 수 있도록 합니다.
-    대기 작업이 없으면 현재 모델을 유지합니다.
+    gpu_scheduler가 다른 타입으로 전환하기로 결정하면 현재 모델을 언로드하고
+    다음 모델을 예약하여(gpu:next_model) 다음 작업이 빠르게 전환할 수 있도록 합니다.
+    대기 작업이 없으면 현재 모델을 유지합니다 (유휴 시간 경과 시 release_if_idle이 해제).
 
     Args:
         task_type: 완료된 작업 타입 ("image" 또는 "stt")
     """
+    token = _drop(task_type) or uuid.uuid4().hex
     _update_activity()
+    if task_type in _get_resident():
+        _mark_resident(task_type)
     current_batch = _get_batch_count()
 
-    # 이미지 작업 후 ComfyUI 내부 캐시 정리 (연속 실행 시 메모리 단편화 방지)
     if task_type == "image":
-        _cleanup_comfyui_cache()
-
-    if current_batch >= GPU_MAX_BATCH:
-        # 배치 한도 도달 → 다른 타입 대기 작업 확인
-        other_type = "stt" if task_type == "image" else "image"
-        other_queue = _QUEUE_MAP.get(other_type, "")
-        other_pending = _get_queue_length(other_queue)
-
-        if other_pending > 0:
-            # 다른 타입 대기 중 → 미리 언로드하여 전환 준비
-            print(f"📋 [GPU] 배치 {current_batch}개 완료, "
-                  f"{other_type} 대기 {other_pending}개 → 사전 언로드")
-            if task_type == "image":
-                _free_comfyui_vram()
-            elif task_type == "stt":
-                _unload_stt_model()
-            _set_active_model("none")
-            _reset_batch()
+        if COMFYUI_FREE_POLICY == "always":
+            _cleanup_comfyui_cache()
+            _clear_resident("image")
         else:
-            # 대기 작업 없음 → 현재 모델 유지 (불필요한 전환 방지)
-            print(f"📋 [GPU] 배치 {current_batch}개 완료, "
-                  f"대기 작업 없음 → {task_type} 모델 유지")
-            _reset_batch()  # 카운터만 리셋
+            pending = _get_queue_length(QUEUE_IMAGE)
+            print(f"🧊 [GPU] ComfyUI 모델 상주 유지 (이미지 대기 {pending}개, "
+                  f"유휴 {GPU_IDLE_RELEASE_SEC['image']}초 후 해제)")
+
+    if _get_active_model() != task_type:
+        _release_lease(token, task_type)
+        return
+
+    other_type = gpu_scheduler.other_type(task_type)
+    snapshot = _scheduler_snapshot(task_type)
+    switch, reason = gpu_scheduler.should_switch(task_type, other_type, snapshot)
+
+    if switch:
+        # 다른 타입으로 전환 결정 → 이 Worker가 마지막 보유자면 미리 언로드하고 다음 모델 예약
+        if _vacate(task_type, next_model=other_type, token=token):
+            print(f"📋 [GPU] {task_type} {current_batch}개 연속 처리 후 전환 ({reason}), "
+                  f"{other_type} 대기 {snapshot['queue'][other_type]}개 → {other_type} 예약")
+        else:
+            print(f"📋 [GPU] {other_type} 전환 대기 - 다른 Worker가 {task_type} 사용 중")
+        return
+
+    _release_lease(token, task_type)
+    if current_batch >= GPU_MAX_BATCH and snapshot["queue"][other_type] == 0:
+        # 대기 작업 없음 → 현재 모델 유지 (불필요한 전환 방지)
+        print(f"📋 [GPU] 배치 {current_batch}개 완료, "
+              f"대기 작업 없음 → {task_type} 모델 유지")
+        _reset_batch()  # 카운터만 리셋
 
 
 def release_if_idle():
     """
     유휴 GPU 자원 자동 해제 (Celery Beat에서 주기적 호출)
 
-    양쪽 큐 모두 대기 작업이 없고 타임아웃이 경과하면 VRAM을 해제합니다.
+    양쪽 큐 모두 대기 작업이 없고 타입별 유휴 시간(GPU_IDLE_RELEASE_SEC)이 경과하면 VRAM을 해제합니다.
     대기 작업이 있으면 해제하지 않습니다.
 
     Returns:
         dict: 해제 결과
     """
+    woken = wake_stale_parked()
     current = _get_active_model()
+    evicted = _release_idle_residents(current)
     if current == "none":
-        return {"status": "idle"}
+        return {"status": "idle", "woken": woken, "evicted": evicted}
 
     # 어느 쪽이든 대기 작업이 있으면 해제하지 않음
     image_pending = _get_queue_length(QUEUE_IMAGE)
@@ -402,19 +1357,16 @@ def release_if_idle():
         last_activity = redis_client.get(_KEY_LAST_ACTIVITY)
         if last_activity:
             elapsed = time.time() - float(last_activity)
-            if elapsed < 30:
+            if elapsed < GPU_IDLE_RELEASE_SEC.get(current, 30):
                 return {"status": "waiting", "model": current, "idle": round(elapsed)}
     except Exception:
         pass
 
     # 타임아웃 경과 + 대기 없음 → 해제
+    # 실행 중인 Worker가 없을 때만 원자적으로 비우고 언로드
+    if not _vacate(current):
+        return {"status": "active", "model": current, "holders": _get_lease_holders()}
     print(f"⏰ [GPU] 유휴 타임아웃 → {current} 모델 해제")
-    if current == "image":
-        _free_comfyui_vram()
-    elif current == "stt":
-        _unload_stt_model()
-    _set_active_model("none")
-    _reset_batch()
     return {"status": "released", "model": current}
 
 
@@ -433,4 +1385,23 @@ def get_status() -> dict:
         "max_batch": GPU_MAX_BATCH,
         "queue_image_pending": _get_queue_length(QUEUE_IMAGE),
         "queue_stt_pending": _get_queue_length(QUEUE_STT),
+        "jobs_unfinished": {task_type: get_pending_count(task_type) for task_type in _QUEUE_MAP},
+        "scheduler": {**gpu_scheduler.describe(), **get_swap_costs()},
+        "parked": {task_type: get_parked_count(task_type) for task_type in _QUEUE_MAP},
+        "lease": {
+            "holders": _get_lease_holders(),
+            "max_holders": GPU_LEASE_MAX_HOLDERS,
+            "switching": _is_switching(),
+            "ttl_sec": GPU_LEASE_TTL_SEC,
+        },
+        "vram": {
+            "coresident": GPU_CORESIDENT,
+            "resident": sorted(_get_resident()),
+            "headroom_mb": GPU_VRAM_HEADROOM_MB,
+            "footprint_mb": {task_type: round(_footprint_mb(task_type)) for task_type in _QUEUE_MAP},
+            **probe_vram(),
+        },
+        "free_policy": COMFYUI_FREE_POLICY,
+        "idle_release_sec": GPU_IDLE_RELEASE_SEC,
+        "model_load": _get_load_stats(),
     }
@@ -0,0 +1,180 @@
+"""
+GPU 모델 전환 스케줄러 (비용 모델 기반)
+
+GPU 1장을 이미지(ComfyUI)와 STT(Faster Whisper)가 번갈아 쓸 때, 다른 타입 작업이 기다리는 시점마다
+"지금 전환" vs "현재 타입 대기 작업을 마저 처리"의 가중 대기 시간을 비교해 전환 여부를 정합니다.
+Redis/GPU 없이 동작하는 순수 함수만 두어 gpu_manager(실제 전환)와
+benchmarks.gpu_scheduler_sim(기록된 작업 추적 재생)이 같은 결정 로직을 씁니다.
+
+비용 모델 (현재 C, 대기 중인 다른 타입 O, 대기 수 n, 작업당 시간 d, 가중치 w, 전환 시간 S):
+    - 유지: C 대기 작업을 먼저 처리 → O 작업 n_O개가 n_C × d_C 만큼 더 기다림
+    - 전환: O 작업을 먼저 처리 → C 작업 n_C개가 S(C→O) + n_O × d_O + S(O→C) 만큼 더 기다림
+    w_O·n_O·n_C·d_C > w_C·n_C·(S(C→O) + n_O·d_O + S(O→C)) 이면 전환
+    (n_C가 양변에서 약분되어 "짧고 급한 작업 먼저"(Smith 규칙)에 전환 비용을 더한 형태)
+    S(A→B) = A 언로드 시간 + B 로드 시간 (gpu_manager가 실제 전환마다 측정한 지수 이동 평균)
+
+기아 방지:
+    O 작업 중 가장 오래 기다린 작업이 GPU_SCHED_MAX_WAIT_SEC[O]를 넘으면 비용과 무관하게 전환
+
+정책 (GPU_SCHED_POLICY):
+    - cost (기본): 위 비용 모델
+    - fixed: 이전 동작 (같은 타입 GPU_MAX_BATCH개 처리 후 전환)
+
+예상 대기 (estimate_wait): 현재 대기열을 새 도착 없이 should_switch로 재생 → app.admission 접수 ETA
+"""
+
+import os
+from collections import deque
+
+# =====================================================================
+# 설정값
+# =====================================================================
+GPU_SCHED_POLICY = os.getenv("GPU_SCHED_POLICY", "cost")     # cost | fixed
+GPU_MAX_BATCH = int(os.getenv("GPU_MAX_BATCH", "5"))         # fixed 정책: 모델 전환 전 최대 연속 처리 수
+
+# 타입별 대기 시간 가중치 (이미지는 사용자가 화면에서 기다리므로 업로드 후 나중에 확인하는 STT보다 높게)
+GPU_SCHED_WEIGHTS = {
+    "image": float(os.getenv("GPU_SCHED_WEIGHT_IMAGE", "1.0")),
+    "stt": float(os.getenv("GPU_SCHED_WEIGHT_STT", "0.3")),
+}
+
+# 기아 방지: 가장 오래 기다린 작업의 대기 시간이 이보다 길면 무조건 전환 (초)
+GPU_SCHED_MAX_WAIT_SEC = {
+    "image": float(os.getenv("GPU_SCHED_MAX_WAIT_IMAGE_SEC", "300")),
+    "stt": float(os.getenv("GPU_SCHED_MAX_WAIT_STT_SEC", "1800")),
+}
+
+# 측정값이 없을 때 쓰는 기본 비용 (초) - RTX 4060 8GB 기준 대략값
+DEFAULT_LOAD_SEC = {"image": 20.0, "stt": 10.0}
+DEFAULT_UNLOAD_SEC = {"image": 6.0, "stt": 1.0}
+DEFAULT_JOB_SEC = {"image": 40.0, "stt": 300.0}
+
+SWAP_EWMA_ALPHA = 0.3    # 전환 시간 지수 이동 평균 가중치 (최근 측정값 비중)
+
+
+def other_type(task_type: str) -> str:
+    return "stt" if task_type == "image" else "image"
+
+
+def ewma(previous, value: float, alpha: float = SWAP_EWMA_ALPHA) -> float:
+    """지수 이동 평균 (이전 값이 없으면 측정값 그대로)"""
+    if previous is None:
+        return float(value)
+    return (1 - alpha) * float(previous) + alpha * float(value)
+
+
+def swap_sec(snapshot: dict, from_type: str, to_type: str) -> float:
+    """from_type 언로드 + to_type 로드 시간"""
+    unload = snapshot.get("unload_sec", {}).get(from_type, DEFAULT_UNLOAD_SEC.get(from_type, 0.0))
+    load = snapshot.get("load_sec", {}).get(to_type, DEFAULT_LOAD_SEC.get(to_type, 0.0))
+    return unload + load
+
+
+def should_switch(current: str, waiting: str, snapshot: dict, policy: str = None) -> tuple:
+    """
+    current 모델이 활성일 때 waiting 타입으로 전환할지 결정
+
+    Args:
+        current: 현재 활성 모델 타입
+        waiting: 전환 후보 타입 (GPU를 기다리는 작업의 타입)
+        snapshot: {
+            "queue": {타입: 대기 작업 수 (실행 중 제외)},
+            "oldest_wait": {타입: 가장 오래 기다린 작업의 대기 시간(초)},
+            "batch_count": 현재 모델로 연속 처리한 수,
+            "job_sec": {타입: 작업당 평균 시간}, "load_sec": {...}, "unload_sec": {...},
+        }
+        policy: "cost" | "fixed" (None이면 GPU_SCHED_POLICY)
+
+    Returns:
+        (전환 여부, 사유)
+    """
+    policy = policy or GPU_SCHED_POLICY
+    queue = snapshot.get("queue", {})
+    n_cur = queue.get(current, 0)
+    n_wait = queue.get(waiting, 0)
+
+    if n_wait <= 0:
+        return False, "대기 작업 없음"
+    if n_cur <= 0:
+        return True, f"{current} 대기 작업 없음"
+
+    batch_count = snapshot.get("batch_count", 0)
+    if policy == "fixed":
+        if batch_count >= GPU_MAX_BATCH:
+            return True, "배치 한도 도달"
+        return False, f"{current} 배치 처리 중 ({batch_count}/{GPU_MAX_BATCH}, 대기 {n_cur}개)"
+
+    oldest = snapshot.get("oldest_wait", {}).get(waiting, 0.0)
+    if oldest >= GPU_SCHED_MAX_WAIT_SEC[waiting]:
+        return True, f"기아 방지 ({waiting} {oldest:.0f}초 대기)"
+
+    job_sec = snapshot.get("job_sec", {})
+    d_cur = job_sec.get(current) or DEFAULT_JOB_SEC[current]
+    d_wait = job_sec.get(waiting) or DEFAULT_JOB_SEC[waiting]
+    swap_out = swap_sec(snapshot, current, waiting)
+    swap_back = swap_sec(snapshot, waiting, current)
+
+    stay_cost = GPU_SCHED_WEIGHTS[waiting] * n_wait * d_cur
+    switch_cost = GPU_SCHED_WEIGHTS[current] * (swap_out + n_wait * d_wait + swap_back)
+    if stay_cost > switch_cost:
+        return True, f"비용 비교 (유지 {stay_cost:.0f} > 전환 {switch_cost:.0f})"
+    return False, (f"{current} 유지 (유지 {stay_cost:.0f} ≤ 전환 {switch_cost:.0f}, "
+                   f"{current} 대기 {n_cur}개, {waiting} 대기 {n_wait}개)")
+
+
+def estimate_wait(task_type: str, snapshot: dict, policy: str = None) -> float:
+    """
+    지금 접수하는 task_type 작업 1건이 GPU를 받기까지의 예상 대기 시간 (초)
+
+    snapshot의 대기 작업(새 작업 제외)을 should_switch로 처리하는 과정을 새 도착 없이 재생합니다.
+    기존 작업의 접수 시각은 알 수 없으므로 oldest_wait ~ 지금 사이에 고르게 분포한다고 봅니다.
+
+    Args:
+        snapshot: should_switch 입력 + "current": 현재 활성 모델 타입 (없으면 빈 GPU)
+    """
+    policy = policy or GPU_SCHED_POLICY
+    waiting = {}
+    for queue_type in DEFAULT_JOB_SEC:
+        n = snapshot.get("queue", {}).get(queue_type, 0)
+        oldest = snapshot.get("oldest_wait", {}).get(queue_type, 0.0)
+        waiting[queue_type] = deque(-oldest + oldest * i / n for i in range(n))
+    waiting[task_type].append(0.0)
+    job_sec = {queue_type: snapshot.get("job_sec", {}).get(queue_type) or DEFAULT_JOB_SEC[queue_type]
+               for queue_type in waiting}
+
+    current = snapshot.get("current")
+    batch = snapshot.get("batch_count", 0)
+    t = 0.0
+    while True:
+        if current not in waiting:
+            # 빈 GPU: 가장 먼저 접수된 작업의 모델 로드
+            current = min((q[0], queue_type) for queue_type, q in waiting.items() if q)[1]
+            t += snapshot.get("load_sec", {}).get(current, DEFAULT_LOAD_SEC[current])
+            batch = 0
+        else:
+            other = other_type(current)
+            state = dict(snapshot, job_sec=job_sec, batch_count=batch,
+                         queue={queue_type: len(q) for queue_type, q in waiting.items()},
+                         oldest_wait={queue_type: (t - q[0]) if q else 0.0 for queue_type, q in waiting.items()})
+            switch, _ = should_switch(current, other, state, policy)
+            if switch:
+                t += swap_sec(snapshot, current, other)
+                current, batch = other, 0
+            elif batch >= GPU_MAX_BATCH and not waiting[other]:
+                batch = 0
+
+        waiting[current].popleft()
+        if current == task_type and not waiting[current]:
+            return t
+        t += job_sec[current]
+        batch += 1
+
+
+def describe() -> dict:
+    """get_status()용 설정 요약"""
+    return {
+        "policy": GPU_SCHED_POLICY,
+        "max_batch": GPU_MAX_BATCH,
+        "weights": GPU_SCHED_WEIGHTS,
+        "max_wait_sec": GPU_SCHED_MAX_WAIT_SEC,
+    }
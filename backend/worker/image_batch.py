@@ -0,0 +1,133 @@
+"""
+이미지 생성 배치 묶기 (Redis 선점 기반)
+
+같은 (프롬프트, 스타일, 크기, 워크플로우)의 대기 요청을 ComfyUI 프롬프트 1개
+(EmptySD3LatentImage batch_size=N)로 묶어 샘플러 1회로 생성합니다.
+
+흐름:
+    1. PC1 image_router: Celery 작업 등록 전에 image_batch:{key} 리스트에 작업 정보 추가
+    2. Worker: GPU 획득 후 같은 키의 대기 작업을 SET NX로 선점 (image_claim:{task_id})
+    3. 선점한 Worker가 한 번에 생성하여 각 작업의 GeneratedImage에 나눠 저장
+    4. 선점당한 작업의 Celery Task는 실행 시 선점 여부를 확인하고 바로 종료
+
+프롬프트가 다른 요청은 묶지 않습니다. ComfyUI 기본 노드는 배치 항목별로
+다른 텍스트 조건(conditioning)을 줄 수 없기 때문입니다.
+사용자가 시드를 지정한 요청도 대기열에 등록하지 않습니다. 묶이면 선점한 작업의 시드와
+배치 내 순번으로 생성되어 "같은 시드 → 같은 이미지(결과 캐시 적중)"가 깨지기 때문입니다.
+(시드 지정 작업이 선점하는 쪽이 되는 것은 무방: 자기 이미지는 배치 앞쪽 순번 0..n-1)
+
+작성일: 2025
+작성자: DOT-Project Team
+"""
+
+import os
+import json
+import hashlib
+import redis
+
+# Redis 설정
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+redis_client = redis.from_url(REDIS_URL, decode_responses=True)
+
+# =====================================================================
+# 설정값
+# =====================================================================
+IMAGE_MAX_BATCH = int(os.getenv("IMAGE_MAX_BATCH", "4"))   # 샘플러 1회 최대 이미지 수 (8GB VRAM, 1024px 기준)
+_BATCH_TTL = 3600                                          # 대기/선점 정보 보관 시간 (초)
+
+# Redis 키
+_KEY_PENDING = "image_batch:{key}"            # 묶을 수 있는 대기 작업 리스트 (작업 정보 JSON)
+_KEY_CLAIM = "image_claim:{task_id}"          # 작업을 선점한 Task ID
+_KEY_CLAIMED_JOBS = "image_batch_jobs:{task_id}"   # 선점한 작업 목록 (재시도 시 재사용)
+
+
+def batch_key(prompt: str, style: str, size: str, workflow: str = None) -> str:
+    """배치 호환 키 (생성 파라미터가 모두 같아야 같은 키, 스텝/CFG는 워크플로우 기본값)"""
+    normalized = json.dumps([" ".join(prompt.split()), style, size, workflow or ""], ensure_ascii=False)
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+def register_job(key: str, task_id: str, image_ids: list, user_id: int = None, cache_prompt: str = None):
+    """대기 작업 등록 (Celery 작업 등록 전에 호출, cache_prompt: 결과 캐시 키용 원본 프롬프트)"""
+    job = json.dumps({"task_id": task_id, "image_ids": image_ids, "user_id": user_id,
+                      "cache_prompt": cache_prompt}, ensure_ascii=False)
+    pending_key = _KEY_PENDING.format(key=key)
+    try:
+        pipe = redis_client.pipeline()
+        pipe.rpush(pending_key, job)
+        pipe.expire(pending_key, _BATCH_TTL)
+        pipe.execute()
+    except Exception as e:
+        print(f"⚠️ [ImageBatch] 대기 작업 등록 실패 (단독 실행): {e}")
+
+
+def get_claimer(task_id: str) -> str:
+    """작업을 선점한 Task ID (선점되지 않았으면 None)"""
+    try:
+        return redis_client.get(_KEY_CLAIM.format(task_id=task_id))
+    except Exception:
+        return None
+
+
+def claim_own(key: str, task_id: str) -> bool:
+    """자기 작업만 선점 (캐시 적중으로 생성 없이 끝날 때, 다른 Task가 묶어 가지 않도록)"""
+    try:
+        if not redis_client.set(_KEY_CLAIM.format(task_id=task_id), task_id, nx=True, ex=_BATCH_TTL):
+            return get_claimer(task_id) == task_id
+        pending_key = _KEY_PENDING.format(key=key)
+        for raw in redis_client.lrange(pending_key, 0, -1):
+            if json.loads(raw)["task_id"] == task_id:
+                redis_client.lrem(pending_key, 1, raw)
+        return True
+    except Exception:
+        return True
+
+
+def claim_jobs(key: str, own_job: dict, max_images: int = IMAGE_MAX_BATCH) -> list:
+    """
+    자기 작업 + 같은 키의 대기 작업을 최대 max_images장까지 선점
+
+    Returns:
+        list | None: 선점한 작업 목록 (자기 작업이 첫 번째), 자기 작업이 이미 다른 Task에 선점됐으면 None
+    """
+    own_id = own_job["task_id"]
+    pending_key = _KEY_PENDING.format(key=key)
+    claimed_key = _KEY_CLAIMED_JOBS.format(task_id=own_id)
+
+    try:
+        # 재시도 실행: 이전에 선점한 작업 목록을 그대로 사용
+        previous = redis_client.get(claimed_key)
+        if previous:
+            return json.loads(previous)
+
+        if not redis_client.set(_KEY_CLAIM.format(task_id=own_id), own_id, nx=True, ex=_BATCH_TTL):
+            if get_claimer(own_id) != own_id:
+                return None
+
+        jobs = [own_job]
+        total = len(own_job["image_ids"])
+        for raw in redis_client.lrange(pending_key, 0, -1):
+            job = json.loads(raw)
+            if job["task_id"] == own_id:
+                redis_client.lrem(pending_key, 1, raw)
+                continue
+            if total + len(job["image_ids"]) > max_images:
+                continue
+            if redis_client.set(_KEY_CLAIM.format(task_id=job["task_id"]), own_id, nx=True, ex=_BATCH_TTL):
+                redis_client.lrem(pending_key, 1, raw)
+                jobs.append(job)
+                total += len(job["image_ids"])
+
+        redis_client.setex(claimed_key, _BATCH_TTL, json.dumps(jobs))
+        return jobs
+    except Exception as e:
+        print(f"⚠️ [ImageBatch] 배치 선점 실패 (단독 실행): {e}")
+        return [own_job]
+
+
+def finish(own_task_id: str):
+    """배치 처리 종료 (재시도용 선점 목록 삭제, 선점 키는 TTL로 만료)"""
+    try:
+        redis_client.delete(_KEY_CLAIMED_JOBS.format(task_id=own_task_id))
+    except Exception:
+        pass
@@ -0,0 +1,203 @@
+"""
+PDF 스트리밍 학습 파이프라인 (페이지 윈도우 단위)
+
+ingest_pdf_task에서 사용하는 추출 → 분할/임베딩 → 저장 파이프라인입니다.
+문서 전체를 메모리에 올리지 않고 페이지 윈도우(기본 8페이지) 단위로 흘려보내므로
+최대 메모리 사용량이 문서 크기와 무관하게 일정하고, 저장이 끝난 윈도우는
+즉시 검색 가능합니다.
+
+구조:
+    [다운로드] → 임시 파일 (청크 단위 스트리밍, 전체 바이트를 메모리에 두지 않음)
+    [추출 스레드 → 프로세스 풀(pdf_extract)] --(bounded queue)--> [분할+임베딩 스레드] --(bounded queue)--> [저장(호출 스레드)]
+
+    - 각 단계는 크기가 제한된 큐로 연결되어 있어 뒤 단계가 느리면 앞 단계가 대기합니다 (backpressure)
+    - 추출/임베딩/저장이 서로 다른 윈도우를 동시에 처리합니다 (배치 오버랩)
+    - 진행률은 실제 저장 완료된 페이지 수 기준으로 보고합니다
+
+작성일: 2025
+작성자: DOT-Project Team
+"""
+
+import os
+import queue
+import threading
+import requests as http_requests
+
+from worker.pdf_extract import iter_page_windows_parallel
+
+# =====================================================================
+# 설정값
+# =====================================================================
+PDF_PAGE_WINDOW = int(os.getenv("PDF_PAGE_WINDOW", "8"))          # 한 번에 처리할 페이지 수
+PDF_PIPELINE_DEPTH = int(os.getenv("PDF_PIPELINE_DEPTH", "2"))    # 단계 사이 큐 최대 길이
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024                                 # 다운로드 청크 크기 (1MB)
+
+# 요약 생성용 텍스트 최대 길이 (_generate_document_summary와 동일)
+SUMMARY_TEXT_LIMIT = 3000
+
+_SENTINEL = object()
+
+
+def download_to_file(url: str, dest_path: str, timeout: int = 60) -> int:
+    """
+    HTTP 응답을 청크 단위로 파일에 기록 (전체 바이트를 메모리에 올리지 않음)
+
+    Returns:
+        int: 기록된 바이트 수
+    """
+    written = 0
+    with http_requests.get(url, timeout=timeout, stream=True) as resp:
+        if resp.status_code != 200:
+            raise RuntimeError(f"PDF 다운로드 실패: {resp.status_code} - {resp.text}")
+        with open(dest_path, "wb") as f:
+            for chunk in resp.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                if chunk:
+                    f.write(chunk)
+                    written += len(chunk)
+    return written
+
+
+def count_pages(pdf_path: str) -> int:
+    """PDF 전체 페이지 수 조회 (페이지 객체만 파싱, 텍스트는 추출하지 않음)"""
+    from pypdf import PdfReader
+    return len(PdfReader(pdf_path).pages)
+
+
+class _StageThread(threading.Thread):
+    """파이프라인 단계 스레드 (예외를 저장해 두었다가 호출 스레드에서 다시 발생)"""
+
+    def __init__(self, target, name: str):
+        super().__init__(name=name, daemon=True)
+        self._target_fn = target
+        self.error = None
+
+    def run(self):
+        try:
+            self._target_fn()
+        except BaseException as e:
+            self.error = e
+
+
+def _put(q: queue.Queue, item, stop: threading.Event) -> bool:
+    """중단 신호를 확인하면서 큐에 넣기 (큐가 가득 차면 대기 = backpressure)"""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def run_ingest_pipeline(pdf_path: str, source: str, splitter, embed_fn, store_fn,
+                        on_progress=None, window: int = PDF_PAGE_WINDOW,
+                        depth: int = PDF_PIPELINE_DEPTH, page_windows=None) -> dict:
+    """
+    페이지 윈도우 단위 스트리밍 학습 실행
+
+    Args:
+        pdf_path: 로컬 PDF 파일 경로
+        source: 벡터 메타데이터에 기록할 원본 경로 (삭제 시 기준)
+        splitter: LangChain 텍스트 분할기 (split_documents 지원)
+        embed_fn: 텍스트 리스트 → 벡터 리스트 함수
+        store_fn: (embeddings, texts, metadatas) 저장 함수 (반환 후 즉시 검색 가능)
+        on_progress: (완료 페이지, 전체 페이지, 누적 청크 수) 콜백
+        window: 윈도우 페이지 수
+        depth: 단계 사이 큐 최대 길이
+        page_windows: 페이지 윈도우 이터레이터 (기본: 프로세스 풀 병렬 추출)
+
+    Returns:
+        dict: {"pages": 전체 페이지 수, "chunks": 저장된 청크 수, "summary_texts": 요약용 앞부분 텍스트}
+    """
+    from langchain_core.documents import Document as LCDocument
+
+    total_pages = count_pages(pdf_path)
+    if page_windows is None:
+        page_windows = iter_page_windows_parallel(pdf_path, total_pages, window)
+
+    extracted_q = queue.Queue(maxsize=max(1, depth))
+    embedded_q = queue.Queue(maxsize=max(1, depth))
+    stop = threading.Event()
+
+    def extract_stage():
+        try:
+            for start, end, pages in page_windows:
+                if not _put(extracted_q, (start, end, pages), stop):
+                    return
+        finally:
+            _put(extracted_q, _SENTINEL, stop)
+
+    def embed_stage():
+        try:
+            while not stop.is_set():
+                try:
+                    item = extracted_q.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                if item is _SENTINEL:
+                    return
+                start, end, pages = item
+                docs = [
+                    LCDocument(page_content=text, metadata={"source": source, "page": page_no})
+                    for page_no, text in pages if text.strip()
+                ]
+                splits = splitter.split_documents(docs) if docs else []
+                texts = [s.page_content for s in splits]
+                metadatas = [
+                    {"source": source, "page": s.metadata.get("page", 0), "start_index": s.metadata.get("start_index", 0)}
+                    for s in splits
+                ]
+                embeddings = embed_fn(texts) if texts else []
+                if not _put(embedded_q, (start, end, texts, metadatas, embeddings), stop):
+                    return
+        finally:
+            _put(embedded_q, _SENTINEL, stop)
+
+    extractor = _StageThread(extract_stage, "pdf-extract")
+    embedder = _StageThread(embed_stage, "pdf-embed")
+    extractor.start()
+    embedder.start()
+
+    pages_done = 0
+    chunks_done = 0
+    summary_texts = []
+    summary_len = 0
+
+    try:
+        while True:
+            try:
+                item = embedded_q.get(timeout=0.5)
+            except queue.Empty:
+                # 앞 단계가 실패한 채 종료되었는지 확인
+                for stage in (extractor, embedder):
+                    if stage.error is not None:
+                        raise stage.error
+                continue
+
+            if item is _SENTINEL:
+                break
+
+            start, end, texts, metadatas, embeddings = item
+            if texts:
+                store_fn(embeddings, texts, metadatas)
+                chunks_done += len(texts)
+
+                for text in texts:
+                    if summary_len >= SUMMARY_TEXT_LIMIT:
+                        break
+                    summary_texts.append(text)
+                    summary_len += len(text)
+
+            pages_done = end
+            if on_progress:
+                on_progress(pages_done, total_pages, chunks_done)
+
+        for stage in (extractor, embedder):
+            if stage.error is not None:
+                raise stage.error
+    finally:
+        stop.set()
+        extractor.join(timeout=5)
+        embedder.join(timeout=5)
+
+    return {"pages": total_pages, "chunks": chunks_done, "summary_texts": summary_texts}
@@ -15,10 +15,15 @@ import json
 import redis
 import os
 import time
+import base64
+import random
 import tempfile
 import requests as http_requests
 from dotenv import load_dotenv
-from worker.gpu_manager import try_acquire, after_task, release_if_idle, GPU_RETRY_COUNTDOWN
+from worker.gpu_manager import try_acquire, after_task, release_if_idle, record_model_load, record_clip_encode, \
+    record_image_stages, record_job_duration, clear_pending, park_entry
+from worker import image_batch
+from app import image_cache
 
 load_dotenv()
 
@@ -29,22 +34,11 @@ redis_client = redis.from_url(REDIS_URL, decode_responses=True)
 # PC1 백엔드 API URL
 MASTER_API_URL = os.getenv("MASTER_API_URL", "http://backend:8000")
 
-# 임베딩 모델 (지연 초기화)
-_embedding_model = None
-
+# 임베딩 모델 (프로세스 공유 임베딩 서비스)
 def get_embedding_model():
-    """임베딩 모델 싱글톤 반환"""
-    global _embedding_model
-    if _embedding_model is None:
-        from langchain_huggingface import HuggingFaceEmbeddings
-        print("📥 [Worker] 임베딩 모델 로딩 중... (GPU 모드)")
-        _embedding_model = HuggingFaceEmbeddings(
-            model_name="jhgan/ko-sbert-nli",
-            model_kwargs={'device': 'cuda'},
-            encode_kwargs={'normalize_embeddings': True}
-        )
-        print("✅ [Worker] 임베딩 모델 로딩 완료")
-    return _embedding_model
+    """공유 임베딩 서비스 반환 (document 레인 배칭, 워커는 GPU 기본)"""
+    from ai_core.embedding_service import get_embedding_service
+    return get_embedding_service(default_device="cuda")
 
 # 이미지 생성 엔진 (지연 초기화)
 _image_engine = None
@@ -74,6 +68,11 @@ def _update_task_progress(task_type: str, task_id: str, progress: int, message:
         print(f"⚠️ [{task_type.upper()} Progress] Redis 저장 실패: {e}")
 
 
+def _gpu_wait_entry(task, task_type: str) -> dict:
+    """GPU 대기 보관용 작업 정보 (재발행 시 같은 인자/task_id로 다시 실행)"""
+    return park_entry(task_type, task.name, task.request.id, task.request.args, task.request.kwargs)
+
+
 def _call_llm_summary(prompt: str, label: str = "요약") -> str:
     """PC1 LLM API를 호출하여 요약 생성 (문서/회의 공용)"""
     try:
@@ -207,6 +206,9 @@ def save_chat_task(session_id: int, user_msg: str, ai_msg: str, ref_docs_json: s
 
             context_data["messages"].append({"sender": "user", "content": user_msg})
             context_data["messages"].append({"sender": "assistant", "content": ai_msg})
+            # 후속 질문 검색 게이트(reuse)용 직전 참고 문서 (검색을 생략한 턴은 이전 값 유지)
+            if parsed_ref_docs:
+                context_data["last_docs"] = parsed_ref_docs
 
             current_count = len(context_data["messages"])
             print(f"✅ [Worker] Redis 캐시 업데이트 완료 (현재 메시지 수: {current_count}개)")
@@ -297,11 +299,45 @@ def update_summary_task(session_id: int, current_summary: str, oldest_messages:
 # PDF 벡터화 Task
 # =====================================================================
 
+def _store_document_vector(model, file_path: str, title: str, summary: str):
+    """문서 단위 벡터를 GPU로 계산하여 PC1에 저장 (실패해도 학습 결과에는 영향 없음)"""
+    text = f"{title or ''}\n{summary or ''}".strip()
+    if not text:
+        return
+    try:
+        embedding = model.embed_documents([text])[0]
+        resp = http_requests.post(
+            f"{MASTER_API_URL}/document/internal/store-document-vector",
+            json={"source": file_path, "title": title, "summary": summary, "embedding": embedding},
+            timeout=30
+        )
+        if resp.status_code != 200:
+            print(f"⚠️ [Worker] 문서 벡터 저장 실패: {resp.status_code} - {resp.text}")
+    except Exception as e:
+        print(f"⚠️ [Worker] 문서 벡터 저장 실패 (전체 검색으로 대체됨): {e}")
+
+
+def _delete_document_vectors(file_path: str):
+    """학습 실패 시 이미 저장된 청크/문서 벡터 삭제 요청 (실패 문서가 검색되지 않도록)"""
+    try:
+        resp = http_requests.post(
+            f"{MASTER_API_URL}/document/internal/delete-vectors",
+            json={"source": file_path},
+            timeout=60
+        )
+        if resp.status_code == 200:
+            print(f"🗑️ [Worker] 실패한 문서의 벡터 삭제: {resp.json().get('message')}")
+        else:
+            print(f"⚠️ [Worker] 실패한 문서의 벡터 삭제 실패: {resp.status_code} - {resp.text}")
+    except Exception as e:
+        print(f"⚠️ [Worker] 실패한 문서의 벡터 삭제 실패: {e}")
+
+
 @celery_app.task(name="ingest_pdf_task", bind=True)
 def ingest_pdf_task(self, file_path: str):
-    """PDF를 벡터화하여 PC1 ChromaDB에 저장"""
-    from langchain_community.document_loaders import PyPDFLoader
+    """PDF를 페이지 윈도우 단위로 스트리밍 벡터화하여 PC1 ChromaDB에 저장"""
     from langchain_text_splitters import RecursiveCharacterTextSplitter
+    from worker.pdf_pipeline import download_to_file, run_ingest_pipeline
 
     task_id = self.request.id
     print(f"📥 [Worker] PDF 학습 시작: {file_path} (Task ID: {task_id})")
@@ -314,49 +350,51 @@ def ingest_pdf_task(self, file_path: str):
     db = SessionLocal()
     tmp_path = None
     try:
-        # 1. PC1에서 PDF 다운로드
+        # 1. PC1에서 PDF 다운로드 (청크 단위로 임시 파일에 기록)
         _update_task_progress("rag", task_id, 10, "PDF 파일을 다운로드하고 있습니다...")
         download_url = f"{MASTER_API_URL}/document/internal/file/{file_name}"
-        resp = http_requests.get(download_url, timeout=60)
-        if resp.status_code != 200:
-            raise RuntimeError(f"PDF 다운로드 실패: {resp.status_code} - {resp.text}")
-
         with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
-            tmp.write(resp.content)
             tmp_path = tmp.name
+        download_to_file(download_url, tmp_path, timeout=60)
 
         _update_task_progress("rag", task_id, 20, "PDF 다운로드가 완료되었습니다.")
 
-        # 2. PDF 파싱 + 청크 분할
-        _update_task_progress("rag", task_id, 25, "PDF 내용을 분석하고 있습니다...")
-        loader = PyPDFLoader(tmp_path)
-        docs = loader.load()
-        text_splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
-        splits = text_splitter.split_documents(docs)
-        _update_task_progress("rag", task_id, 35, f"텍스트 분할 완료 ({len(splits)}개 청크)")
-
-        # 3. 임베딩 생성
-        _update_task_progress("rag", task_id, 40, "임베딩 모델을 준비하고 있습니다...")
+        # 2~4. 페이지 윈도우 단위 추출 → 분할 → 임베딩 → 저장 (단계별 오버랩)
+        _update_task_progress("rag", task_id, 22, "임베딩 모델을 준비하고 있습니다...")
         model = get_embedding_model()
-        _update_task_progress("rag", task_id, 50, "문서 임베딩을 생성하고 있습니다...")
-        texts = [s.page_content for s in splits]
-        metadatas = [{"source": file_path, "page": s.metadata.get("page", 0)} for s in splits]
-        embeddings = model.embed_documents(texts)
-
-        # 4. PC1으로 벡터 전송
-        _update_task_progress("rag", task_id, 60, "벡터 데이터를 서버로 전송하고 있습니다...")
+        text_splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50, add_start_index=True)
         store_url = f"{MASTER_API_URL}/document/internal/store-vectors"
-        store_resp = http_requests.post(
-            store_url,
-            json={"embeddings": embeddings, "texts": texts, "metadatas": metadatas},
-            timeout=120
+
+        def store_batch(embeddings, texts, metadatas):
+            store_resp = http_requests.post(
+                store_url,
+                json={"embeddings": embeddings, "texts": texts, "metadatas": metadatas},
+                timeout=120
+            )
+            if store_resp.status_code != 200:
+                raise RuntimeError(f"벡터 저장 실패: {store_resp.status_code} - {store_resp.text}")
+
+        def report_progress(pages_done, total_pages, chunks_done):
+            # 25% ~ 65% 구간을 실제 저장 완료 페이지 비율로 채움
+            progress = 25 + int(40 * pages_done / max(total_pages, 1))
+            _update_task_progress(
+                "rag", task_id, progress,
+                f"문서 학습 중... ({pages_done}/{total_pages} 페이지, {chunks_done}개 청크 저장)"
+            )
+
+        _update_task_progress("rag", task_id, 25, "PDF 내용을 분석하고 있습니다...")
+        stats = run_ingest_pipeline(
+            tmp_path, file_path, text_splitter,
+            embed_fn=model.embed_documents,
+            store_fn=store_batch,
+            on_progress=report_progress
         )
-        if store_resp.status_code != 200:
-            raise RuntimeError(f"벡터 저장 실패: {store_resp.status_code} - {store_resp.text}")
+        if stats["chunks"] == 0:
+            raise RuntimeError("PDF에서 추출된 텍스트가 없습니다.")
 
         # 5. LLM 문서 요약
         _update_task_progress("rag", task_id, 70, "AI가 문서를 요약하고 있습니다...")
-        doc_summary = _generate_document_summary(texts)
+        doc_summary = _generate_document_summary(stats["summary_texts"])
 
         # 6. DB 업데이트
         _update_task_progress("rag", task_id, 90, "데이터베이스를 업데이트하고 있습니다...")
@@ -367,7 +405,10 @@ def ingest_pdf_task(self, file_path: str):
                 doc.summary = doc_summary
             db.commit()
 
-        result = f"저장 완료! (총 {len(splits)}개의 조각으로 분할됨)"
+            # 7. 문서 단위 벡터 저장 (제목 + 요약, 2단계 검색의 후보 문서 선택용)
+            _store_document_vector(model, file_path, doc.title, doc.summary)
+
+        result = f"저장 완료! (총 {stats['pages']}페이지, {stats['chunks']}개의 조각으로 분할됨)"
         _update_task_progress("rag", task_id, 100, "문서 벡터화가 완료되었습니다!", "completed")
         return result
 
@@ -376,6 +417,9 @@ def ingest_pdf_task(self, file_path: str):
         print(f"🔥 {error_msg}")
         _update_task_progress("rag", task_id, 0, f"문서 처리 실패: {str(e)}", "failed")
 
+        # 페이지 윈도우마다 바로 저장했으므로 이미 저장된 청크가 검색되지 않도록 삭제
+        _delete_document_vectors(file_path)
+
         try:
             doc = db.query(models.Document).filter(models.Document.chroma_id == chroma_id).first()
             if doc:
@@ -395,94 +439,245 @@ def ingest_pdf_task(self, file_path: str):
 # 이미지 생성 Task (ComfyUI)
 # =====================================================================
 
+def _fill_from_image_cache(items: list) -> dict:
+    """PC1 결과 캐시에서 이미지 채우기 요청 (모두 적중 시 {image_id: 크기}, 아니면 None)"""
+    try:
+        response = http_requests.post(f"{MASTER_API_URL}/image/internal/cache/fill",
+                                      json={"items": items}, timeout=10)
+        if response.status_code == 200:
+            return response.json().get("sizes")
+    except Exception as e:
+        print(f"⚠️ [Worker] 결과 캐시 확인 실패 (생성 진행): {e}")
+    return None
+
+
+# 샘플링 진행률을 채우는 구간 (ComfyUI 스텝 진행률 → 35% ~ 85%)
+_IMAGE_SAMPLING_PROGRESS = (35, 85)
+
+
+def _store_image_preview(task_ids: list, image_bytes: bytes, image_format: str, step: int, total: int):
+    """샘플링 미리보기(저해상도)를 Redis에 저장 (GET /image/preview/{task_id}로 제공, 최신 1장만 유지)"""
+    payload = json.dumps({"format": image_format, "step": step, "max": total,
+                          "data": base64.b64encode(image_bytes).decode("ascii")})
+    try:
+        pipe = redis_client.pipeline()
+        for task_id in task_ids:
+            pipe.setex(f"image_task:{task_id}:preview", 600, payload)
+        pipe.execute()
+    except Exception as e:
+        print(f"⚠️ [IMAGE Preview] Redis 저장 실패: {e}")
+
+
+def _clear_image_preview(task_ids: list):
+    try:
+        redis_client.delete(*[f"image_task:{task_id}:preview" for task_id in task_ids])
+    except Exception:
+        pass
+
+
+def _update_image_sizes(sizes: dict):
+    """GeneratedImage.img_size 갱신 ({파일명: 크기}, 0이 아니면 완료 표시)"""
+    db = SessionLocal()
+    try:
+        for file_name, file_size in sizes.items():
+            image_record = db.query(models.GeneratedImage).filter(
+                models.GeneratedImage.img_file == file_name
+            ).first()
+            if image_record:
+                image_record.img_size = file_size
+        db.commit()
+    except Exception as db_err:
+        print(f"⚠️ [Worker] DB 업데이트 실패: {db_err}")
+        db.rollback()
+    finally:
+        db.close()
+
+
 @celery_app.task(name="generate_image_task", bind=True, max_retries=20)
 def generate_image_task(self, image_id: str, prompt: str, style: str = "realistic",
-                        size: str = "1024x1024", user_id: int = None):
-    """ComfyUI로 이미지를 비동기 생성 후 PC1에 전송"""
+                        size: str = "1024x1024", user_id: int = None, image_ids: list = None,
+                        workflow: str = None, seed: int = None, cache_prompt: str = None):
+    """
+    ComfyUI로 이미지를 비동기 생성 후 PC1에 전송
+
+    같은 파라미터로 대기 중인 다른 요청(image_batch)을 선점하여 샘플러 1회로 함께 생성하고,
+    결과를 요청 순서대로 각 GeneratedImage에 나눠 저장합니다.
+    image_ids: 변형(variations) 요청의 이미지 ID 목록 (없으면 [image_id])
+    workflow: 워크플로우 이름 (None이면 기본 워크플로우, 스텝/CFG는 워크플로우 기본값)
+    seed: 시드 (PC1에서 결정, 재시도해도 같은 결과 → 결과 캐시 적중)
+    cache_prompt: 결과 캐시 키용 원본 프롬프트 (번역 결과가 요청마다 달라질 수 있음)
+
+    결과 캐시(app.image_cache): GPU 획득 전에 PC1 캐시를 확인하여 모두 있으면 생성을 생략하고,
+    생성한 이미지는 (시드, 배치 내 순번) 키와 함께 업로드하여 PC1이 캐시에 저장합니다.
+    """
     task_id = self.request.id
+    image_ids = image_ids or [image_id]
     print(f"🎨 [Worker] 이미지 생성 시작 (Task ID: {task_id})")
-    print(f"   - Image ID: {image_id}, Style: {style}, Size: {size}")
+    print(f"   - Image ID: {image_id} (x{len(image_ids)}), Style: {style}, Size: {size}")
     print(f"   - Prompt: {prompt[:50]}...")
 
+    # 다른 Task의 배치에 이미 포함된 요청 → 선점한 Task가 처리
+    claimer = image_batch.get_claimer(task_id)
+    if claimer and claimer != task_id:
+        print(f"🧩 [Worker] 배치에 포함되어 건너뜀 (처리 Task: {claimer})")
+        clear_pending("image", [task_id])
+        return {"status": "batched", "batched_into": claimer}
+
+    key = image_batch.batch_key(prompt, style, size, workflow)
+    cache_prompt = cache_prompt or prompt
+
+    # 결과 캐시 확인 (같은 요청 재제출/재시도 → GPU 없이 완료)
+    if seed is not None:
+        sizes = _fill_from_image_cache([
+            {"image_id": iid, "cache_key": image_cache.cache_key(cache_prompt, style, size, workflow, seed, index)}
+            for index, iid in enumerate(image_ids)
+        ])
+        if sizes and image_batch.claim_own(key, task_id):
+            _update_image_sizes({f"{iid}.png": file_size for iid, file_size in sizes.items()})
+            _update_task_progress("image", task_id, 100, "이미지 생성이 완료되었습니다! (캐시)", "completed")
+            print(f"⚡ [Worker] 결과 캐시 적중 - GPU 생성 생략 ({len(sizes)}장)")
+            clear_pending("image", [task_id])
+            return {"status": "completed", "cached": True,
+                    "files": [{"file_name": f"{iid}.png", "file_size": s} for iid, s in sizes.items()]}
+    else:
+        seed = random.randrange(2 ** 32)
+
     # GPU 자원 획득
-    if not try_acquire("image"):
-        print(f"⏳ [Worker] GPU 사용 중 - {GPU_RETRY_COUNTDOWN}초 후 재시도")
-        raise self.retry(countdown=GPU_RETRY_COUNTDOWN)
+    if not try_acquire("image", _gpu_wait_entry(self, "image")):
+        # 재시도 폴링 대신 gpu:ready에 보관 → GPU를 쓸 수 있게 되면 같은 task_id로 즉시 재발행
+        print(f"🅿️ [Worker] GPU 사용 중 - 대기 보관 (Task ID: {task_id})")
+        return {"status": "parked"}
+    gpu_start = time.time()
+
+    # 같은 파라미터의 대기 요청 선점
+    jobs = image_batch.claim_jobs(key, {"task_id": task_id, "image_ids": image_ids, "user_id": user_id,
+                                        "cache_prompt": cache_prompt})
+    if jobs is None:
+        clear_pending("image", [task_id])
+        after_task("image")
+        claimer = image_batch.get_claimer(task_id)
+        print(f"🧩 [Worker] 배치에 포함되어 건너뜀 (처리 Task: {claimer})")
+        return {"status": "batched", "batched_into": claimer}
+
+    batch_task_ids = [job["task_id"] for job in jobs]
+    total = sum(len(job["image_ids"]) for job in jobs)
+    if len(jobs) > 1:
+        print(f"🧩 [Worker] 대기 요청 {len(jobs) - 1}건을 묶어 {total}장 배치 생성")
+
+    def update_progress(progress, message, status="processing"):
+        for batch_task_id in batch_task_ids:
+            _update_task_progress("image", batch_task_id, progress, message, status)
+
+    # ComfyUI 샘플링 스텝 → 진행률 (퍼센트가 바뀔 때만 Redis 갱신)
+    sampling = {"step": 0, "max": 0, "progress": None}
+
+    def on_sampling_progress(step, max_steps):
+        sampling["step"], sampling["max"] = step, max_steps
+        low, high = _IMAGE_SAMPLING_PROGRESS
+        progress = low + int((high - low) * step / max(max_steps, 1))
+        if progress != sampling["progress"]:
+            sampling["progress"] = progress
+            update_progress(progress, f"이미지 생성 중... ({step}/{max_steps} 스텝)")
 
-    _update_task_progress("image", task_id, 5, "이미지 생성 준비 중...")
-    file_name = f"{image_id}.png"
+    def on_preview(image_bytes, image_format):
+        _store_image_preview(batch_task_ids, image_bytes, image_format, sampling["step"], sampling["max"])
+
+    update_progress(5, "이미지 생성 준비 중...")
 
     try:
         # 1. 이미지 엔진 초기화
-        _update_task_progress("image", task_id, 10, "이미지 엔진 초기화 중...")
+        update_progress(10, "이미지 엔진 초기화 중...")
         engine = _get_image_engine()
 
         # 2. ComfyUI 연결 확인
         if not engine.is_loaded():
-            _update_task_progress("image", task_id, 15, "ComfyUI 서버 연결 중...")
+            update_progress(15, "ComfyUI 서버 연결 중...")
             engine.load_model()
-            _update_task_progress("image", task_id, 30, "ComfyUI 연결 완료")
+            update_progress(30, "ComfyUI 연결 완료")
         else:
-            _update_task_progress("image", task_id, 30, "ComfyUI 준비 완료 (연결됨)")
+            update_progress(30, "ComfyUI 준비 완료 (연결됨)")
 
-        # 3. 이미지 생성
-        _update_task_progress("image", task_id, 35, "ComfyUI에서 이미지 생성 중...")
-        image_bytes = engine.generate(
+        # 3. 이미지 생성 (배치 전체를 프롬프트 1개로)
+        update_progress(35, "ComfyUI에서 이미지 생성 중...")
+        images = engine.generate_batch(
             prompt=prompt, style=style, size=size,
-            num_inference_steps=28, guidance_scale=4.5,
-            progress_callback=None
+            seed=seed, batch_size=total, progress_callback=on_sampling_progress, workflow=workflow,
+            preview_callback=on_preview
         )
+        timings = engine.last_timings
+        if timings.get("model_load_sec") is not None:
+            record_model_load("image", timings["model_load_sec"], cold=not timings["model_resident"])
+        if timings.get("clip_encode_sec") is not None:
+            record_clip_encode(timings["clip_encode_sec"])
 
-        _update_task_progress("image", task_id, 87, "이미지 생성 완료, PC1으로 전송 중...")
+        update_progress(87, "이미지 생성 완료, PC1으로 전송 중...")
 
-        # 4. PC1으로 이미지 HTTP 전송
-        file_size = len(image_bytes)
+        # 4. PC1으로 이미지 HTTP 전송 + DB 업데이트 (요청 순서대로 분배)
         upload_url = f"{MASTER_API_URL}/image/internal/upload"
-        upload_response = http_requests.post(
-            upload_url,
-            files={"file": (file_name, image_bytes, "image/png")},
-            data={"image_id": image_id},
-            timeout=30
-        )
-        if upload_response.status_code != 200:
-            raise RuntimeError(f"PC1 이미지 업로드 실패: {upload_response.status_code} - {upload_response.text}")
-
-        upload_result = upload_response.json()
-        file_path = upload_result.get("file_path", f"/app/uploads/images/{file_name}")
-        print(f"✅ [Worker] PC1 이미지 전송 완료: {file_name} ({file_size} bytes)")
-
-        _update_task_progress("image", task_id, 90, "PC1 저장 완료")
-
-        # 5. DB 업데이트
-        _update_task_progress("image", task_id, 95, "데이터베이스 업데이트 중...")
-        if user_id:
-            db = SessionLocal()
-            try:
-                image_record = db.query(models.GeneratedImage).filter(
-                    models.GeneratedImage.img_file == file_name
-                ).first()
-                if image_record:
-                    image_record.img_size = file_size
-                    db.commit()
-            except Exception as db_err:
-                print(f"⚠️ [Worker] DB 업데이트 실패: {db_err}")
-                db.rollback()
-            finally:
-                db.close()
-
-        _update_task_progress("image", task_id, 100, "이미지 생성이 완료되었습니다!", "completed")
-        return {"status": "completed", "file_path": file_path, "file_name": file_name, "file_size": file_size}
+        upload_start = time.time()
+        files = []
+        batch_index = 0
+        for job in jobs:
+            for job_image_id in job["image_ids"]:
+                image_bytes = images[batch_index]
+                file_name = f"{job_image_id}.png"
+                file_size = len(image_bytes)
+                # 결과 캐시 키: 배치 전체 시드 + 배치 내 순번 (묶인 요청도 실제 생성 파라미터 기준)
+                result_key = image_cache.cache_key(job.get("cache_prompt") or prompt, style, size,
+                                                   workflow, seed, batch_index)
+                batch_index += 1
+                upload_response = http_requests.post(
+                    upload_url,
+                    files={"file": (file_name, image_bytes, "image/png")},
+                    data={"image_id": job_image_id, "cache_key": result_key},
+                    timeout=30
+                )
+                if upload_response.status_code != 200:
+                    raise RuntimeError(f"PC1 이미지 업로드 실패: {upload_response.status_code} - {upload_response.text}")
+
+                upload_result = upload_response.json()
+                file_path = upload_result.get("file_path", f"/app/uploads/images/{file_name}")
+                print(f"✅ [Worker] PC1 이미지 전송 완료: {file_name} ({file_size} bytes)")
+                files.append({"task_id": job["task_id"], "file_path": file_path,
+                              "file_name": file_name, "file_size": file_size})
+
+        upload_sec = time.time() - upload_start
+        record_image_stages({
+            "queue_wait": timings.get("queue_wait_sec"),
+            "sampling": timings.get("sampling_sec"),
+            "vae_decode": timings.get("vae_decode_sec"),
+            "transfer": timings.get("transfer_sec"),
+            "upload": upload_sec,
+        })
+        print(f"⏱️ [Worker] PC1 전송: {upload_sec:.2f}초 ({len(files)}장)")
+
+        update_progress(90, "PC1 저장 완료")
+
+        update_progress(95, "데이터베이스 업데이트 중...")
+        _update_image_sizes({item["file_name"]: item["file_size"] for item in files})
+
+        update_progress(100, "이미지 생성이 완료되었습니다!", "completed")
+        _clear_image_preview(batch_task_ids)
+        image_batch.finish(task_id)
+        # 접수 제어·스케줄러 통계: 묶어서 처리한 요청 수만큼 나눈 요청당 GPU 점유 시간 (+ 작업 추적)
+        record_job_duration("image", (time.time() - gpu_start) / len(jobs), batch_task_ids)
+        clear_pending("image", batch_task_ids)
+        own_files = [item for item in files if item["task_id"] == task_id]
+        return {"status": "completed", "file_path": own_files[0]["file_path"],
+                "file_name": own_files[0]["file_name"], "file_size": own_files[0]["file_size"],
+                "files": own_files, "batched_tasks": batch_task_ids[1:]}
 
     except Exception as e:
         error_str = str(e)
 
-        # ComfyUI 크래시 → 자동 재시도
+        # ComfyUI 크래시 / 출력 이미지 누락 → 자동 재시도 (선점한 배치 그대로 재시도 - 묶인 요청도 실패 처리하지 않음)
+        from ai_core.image_engine import ComfyOutputMissing
         comfyui_crash_keywords = ['resolve', 'Connection', 'refused', 'lost', 'RemoteDisconnected']
         is_comfyui_crash = any(kw.lower() in error_str.lower() for kw in comfyui_crash_keywords)
 
-        if is_comfyui_crash:
-            print(f"⚠️ [Worker] ComfyUI 연결 실패 - 30초 후 재시도")
-            _update_task_progress("image", task_id, 5, "ComfyUI 재연결 대기 중... (자동 재시도)")
+        if is_comfyui_crash or isinstance(e, ComfyOutputMissing):
+            print(f"⚠️ [Worker] ComfyUI 연결 실패/출력 누락 - 30초 후 재시도")
+            update_progress(5, "ComfyUI 재연결 대기 중... (자동 재시도)")
             try:
                 raise self.retry(countdown=30)
             except self.MaxRetriesExceededError:
@@ -490,7 +685,10 @@ def generate_image_task(self, image_id: str, prompt: str, style: str = "realisti
 
         error_msg = f"이미지 생성 실패: {error_str}"
         print(f"🔥 [Worker] {error_msg}")
-        _update_task_progress("image", task_id, 0, error_msg, "failed")
+        update_progress(0, error_msg, "failed")
+        _clear_image_preview(batch_task_ids)
+        image_batch.finish(task_id)
+        clear_pending("image", batch_task_ids)
         return {"status": "failed", "error": error_msg}
 
     finally:
@@ -507,6 +705,17 @@ def release_gpu_if_idle_task():
     return release_if_idle()
 
 
+@celery_app.task(name="dispatch_deferred_jobs_task")
+def dispatch_deferred_jobs_task():
+    """접수 제어로 예약된 GPU 작업을 대기열이 줄어든 만큼 발행 (Celery Beat 주기적 호출)"""
+    from app import admission
+
+    def send(task_name, kwargs, task_id):
+        celery_app.send_task(task_name, kwargs=kwargs, task_id=task_id)
+
+    return admission.dispatch_deferred(send)
+
+
 # =====================================================================
 # STT (Speech-to-Text) Task - Faster Whisper
 # =====================================================================
@@ -520,9 +729,11 @@ def transcribe_audio_task(self, meeting_id: int, audio_filename: str, language:
     print(f"🎤 [Worker] STT 작업 시작 (Task ID: {task_id}, Meeting: {meeting_id})")
 
     # GPU 자원 획득
-    if not try_acquire("stt"):
-        print(f"⏳ [Worker] GPU 사용 중 - {GPU_RETRY_COUNTDOWN}초 후 재시도")
-        raise self.retry(countdown=GPU_RETRY_COUNTDOWN)
+    if not try_acquire("stt", _gpu_wait_entry(self, "stt")):
+        # 재시도 폴링 대신 gpu:ready에 보관 → GPU를 쓸 수 있게 되면 같은 task_id로 즉시 재발행
+        print(f"🅿️ [Worker] GPU 사용 중 - 대기 보관 (Task ID: {task_id})")
+        return {"status": "parked"}
+    gpu_start = time.time()
 
     _update_task_progress("stt", task_id, 5, "음성 변환 준비 중...")
 
@@ -599,6 +810,7 @@ def transcribe_audio_task(self, meeting_id: int, audio_filename: str, language:
             db.commit()
 
         _update_task_progress("stt", task_id, 100, "음성 변환이 완료되었습니다!", "completed")
+        record_job_duration("stt", time.time() - gpu_start, [task_id])
         return {"status": "completed", "meeting_id": meeting_id, "segments": segment_count, "duration": total_duration}
 
     except Exception as e:
@@ -620,4 +832,5 @@ def transcribe_audio_task(self, meeting_id: int, audio_filename: str, language:
         if tmp_path and os.path.exists(tmp_path):
             os.unlink(tmp_path)
         db.close()
+        clear_pending("stt", [task_id])
         after_task("stt")
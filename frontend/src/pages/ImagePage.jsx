@@ -124,7 +124,8 @@ export default function ImagePage({ user, setUser }) {
                 setGenerationProgress({
                     progress: data.progress,
                     message: data.message,
-                    status: data.status
+                    status: data.status,
+                    previewUrl: data.previewUrl
                 });
 
                 // 완료 또는 실패 시 폴링 중지
@@ -446,6 +447,17 @@ export default function ImagePage({ user, setUser }) {
                                 </span>
                             </div>
 
+                            {/* 샘플링 미리보기 (저해상도) */}
+                            {generationProgress.previewUrl && generationProgress.status === 'processing' && (
+                                <div className="flex justify-center">
+                                    <img
+                                        src={`${API_BASE}${generationProgress.previewUrl}`}
+                                        alt="생성 중 미리보기"
+                                        className="w-40 h-40 object-cover rounded-xl opacity-80 blur-[1px]"
+                                    />
+                                </div>
+                            )}
+
                             {/* 완료 상태 표시 */}
                             {generationProgress.status === 'completed' && (
                                 <div className="flex items-center justify-center gap-2 py-3 bg-green-50 dark:bg-green-500/10 text-green-600 rounded-xl">
@@ -536,8 +548,12 @@ export default function ImagePage({ user, setUser }) {
                                         >
                                             {/* 이미지 */}
                                             <img
-                                                src={`${API_BASE}${image.imageUrl}`}
+                                                src={`${API_BASE}${image.thumbnailUrl || image.imageUrl}`}
                                                 alt={image.promptPreview}
+                                                width={image.width || undefined}
+                                                height={image.height || undefined}
+                                                loading="lazy"
+                                                decoding="async"
                                                 className="w-full h-full object-cover transition-transform group-hover:scale-105"
                                             />
 